@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+/api/reports latency during an AI overload, with and without admission control.
+
+Starts the app under uvicorn with the offline model (--model-latency ms per
+call) and, for each setting of ADMISSION_CONTROL_ENABLED, measures:
+
+1. /api/reports latency from a probe issuing --probe-rate requests/s alone;
+2. the same probe while chat requests arrive at --chat-rate requests/s for
+   --duration seconds, far beyond what the model lane can serve, each given
+   --timeout seconds like an impatient client.
+
+It reports the probe's p50/p99 in both phases and what happened to the chat
+requests: answered, shed with 429/503 (and Retry-After), or timed out.
+
+Usage:
+    python -m benchmarks.admission [--chat-rate 40] [--duration 20] [--model-latency 1000]
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.common import percentiles
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def probe(client, rate: float, until: float, latencies: list):
+    while time.perf_counter() < until:
+        start = time.perf_counter()
+        response = await client.get("/api/reports")
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(max(0.0, 1 / rate - (time.perf_counter() - start)))
+
+
+async def chat(client, report_id: str, timeout: float, outcomes: Counter, latencies: list, retry_after: list):
+    import httpx
+    start = time.perf_counter()
+    try:
+        response = await client.post(f"/api/chat/{report_id}", data={"message": "What drives the outlook?"},
+                                     timeout=timeout)
+    except httpx.TimeoutException:
+        outcomes["timeout"] += 1
+        return
+    outcomes[response.status_code] += 1
+    if response.status_code == 200:
+        latencies.append(time.perf_counter() - start)
+    elif "retry-after" in response.headers:
+        retry_after.append(int(response.headers["retry-after"]))
+
+
+async def overload(base_url, args):
+    import httpx
+    async with httpx.AsyncClient(base_url=base_url, timeout=30) as prober, \
+            httpx.AsyncClient(base_url=base_url, limits=httpx.Limits(max_connections=None,
+                                                                      max_keepalive_connections=None)) as chatter:
+        report_ids = [report["id"] for report in (await prober.get("/api/reports")).json()["reports"]]
+
+        quiet = []
+        await probe(prober, args.probe_rate, time.perf_counter() + args.baseline, quiet)
+
+        loaded, chat_latencies, retry_after, outcomes, tasks = [], [], [], Counter(), []
+        until = time.perf_counter() + args.duration
+        probing = asyncio.ensure_future(probe(prober, args.probe_rate, until, loaded))
+        i = 0
+        while time.perf_counter() < until:
+            tasks.append(asyncio.ensure_future(chat(chatter, report_ids[i % len(report_ids)], args.timeout,
+                                                    outcomes, chat_latencies, retry_after)))
+            i += 1
+            await asyncio.sleep(1 / args.chat_rate)
+        await probing
+        await asyncio.gather(*tasks)
+    return quiet, loaded, outcomes, chat_latencies, retry_after
+
+
+def run_mode(enabled: bool, args):
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = dict(os.environ, AI_BACKEND="fake", DEBUG="False", NARRATIVE_WARMER_ENABLED="False",
+               ADMISSION_CONTROL_ENABLED=str(enabled), FAKE_MODEL_LATENCY_MS=str(args.model_latency),
+               MODEL_REQUESTS_PER_MINUTE="1000000", AI_HEDGING_ENABLED="False", RATE_LIMIT_ENABLED="False",
+               DATABASE_PATH=os.path.join(tempfile.mkdtemp(prefix="admission-bench-"), "bench.db"))
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+                               "--log-level", "error"], cwd=ROOT, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        import httpx
+        for _ in range(300):
+            try:
+                httpx.get(f"{base_url}/api/reports").raise_for_status()
+                break
+            except httpx.TransportError:
+                time.sleep(0.1)
+        return asyncio.run(overload(base_url, args))
+    finally:
+        # Without admission control, requests still queued for the model would hold up a graceful shutdown
+        server.kill()
+        server.wait()
+
+
+def run(args):
+    print(f"chat at {args.chat_rate:g}/s for {args.duration:g}s ({args.model_latency:g}ms model calls, "
+          f"{args.timeout:g}s client timeout); /api/reports probed at {args.probe_rate:g}/s")
+    header = (f"{'admission':<10}{'reports p50':>12}{'p99':>9}{'loaded p50':>12}{'p99':>9}"
+              f"{'chat ok':>9}{'429':>6}{'503':>6}{'timeout':>9}{'ok p50':>9}{'Retry-After':>13}")
+    print(header)
+    for enabled in (False, True):
+        quiet, loaded, outcomes, chat_latencies, retry_after = run_mode(enabled, args)
+        quiet, loaded, ok = percentiles(quiet), percentiles(loaded), percentiles(chat_latencies)
+        hint = f"{min(retry_after)}-{max(retry_after)}s" if retry_after else "-"
+        print(f"{'on' if enabled else 'off':<10}{quiet['p50'] * 1000:>10.1f}ms{quiet['p99'] * 1000:>7.1f}ms"
+              f"{loaded['p50'] * 1000:>10.1f}ms{loaded['p99'] * 1000:>7.1f}ms{outcomes[200]:>9}{outcomes[429]:>6}"
+              f"{outcomes[503]:>6}{outcomes['timeout']:>9}{ok['p50']:>8.1f}s{hint:>13}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chat-rate", type=float, default=40)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--baseline", type=float, default=5)
+    parser.add_argument("--probe-rate", type=float, default=20)
+    parser.add_argument("--model-latency", type=float, default=1000)
+    parser.add_argument("--timeout", type=float, default=30)
+    run(parser.parse_args())
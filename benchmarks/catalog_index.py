@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Dashboard start-up cost as the corpus grows: full catalog versus index plus one report.
+
+Runs the FastAPI app in-process and grows the seed corpus to each of --sizes
+reports by copying seed reports under new ids. For each size it compares
+what the dashboard loads before it can show the first report:
+
+- before: /api/reports, every report with its full text and charts;
+- after: the /api/catalog index, then /api/reports/{id} of the report shown.
+
+Reports the bytes transferred, the request time and the memory the parsed
+JSON takes (tracemalloc peak of json.loads, a stand-in for the browser's
+heap), averaged over --runs. The seed corpus has about 30 reports.
+
+Usage:
+    python -m benchmarks.catalog_index [--sizes 30,100,1000] [--runs 5]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.common import use_temporary_database
+
+
+async def load(client, paths):
+    """(bytes, seconds, parsed bytes) of fetching and parsing `paths` in turn."""
+    transferred, elapsed, parsed = 0, 0.0, 0
+    for path in paths:
+        start = time.perf_counter()
+        response = await client.get(path, headers={"Accept-Encoding": "identity"})
+        elapsed += time.perf_counter() - start
+        response.raise_for_status()
+        transferred += len(response.content)
+        tracemalloc.start()
+        json.loads(response.content)
+        parsed += tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return transferred, elapsed, parsed
+
+
+def grow_corpus(db_service, size: int) -> int:
+    """Copy reports until there are `size`; returns how many there are."""
+    seeds = db_service.get_reports()
+    for i in range(len(seeds), size):
+        report = seeds[i % len(seeds)].model_copy(update={"id": f"{seeds[i % len(seeds)].id}-copy-{i}"})
+        db_service.save_report(report)
+    return max(size, len(seeds))
+
+
+async def run(args):
+    import httpx
+    import main
+
+    main.db_service.initialize_database()
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print(f"{'reports':>8}  {'load':<22}{'bytes':>13}{'time':>10}{'parsed':>12}")
+        for size in (int(s) for s in args.sizes.split(",")):
+            size = grow_corpus(main.db_service, size)
+            first = (await client.get("/api/catalog")).json()["reports"][0]["id"]
+            for name, paths in (("full catalog (before)", ["/api/reports"]),
+                                ("index + 1 report", ["/api/catalog", f"/api/reports/{first}"])):
+                await load(client, paths)  # warm-up
+                results = [await load(client, paths) for _ in range(args.runs)]
+                transferred = results[0][0]
+                elapsed = sum(r[1] for r in results) / args.runs
+                parsed = sum(r[2] for r in results) / args.runs
+                print(f"{size:>8}  {name:<22}{transferred:>13,}{elapsed * 1000:>8.1f}ms{parsed / 1e6:>10.2f}MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="30,100,1000")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    use_temporary_database()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    asyncio.run(run(args))
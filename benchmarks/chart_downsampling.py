@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Report payload and chart preparation cost with and without server-side downsampling.
+
+Runs the FastAPI app in-process against a report with three --points-point
+charts: a two-series line chart, a bar chart and a pie chart. For
+/api/reports/{id} in full and with ?max_points=--max-points it reports:
+
+- the response size (uncompressed) and the points shipped to the browser;
+- the server time, cold (charts downsampled by the request) and cached;
+- the time to parse the JSON and build the Plotly traces from it, a stand-in
+  for the browser's work before drawing, which is linear in points too.
+
+Also times the NumPy LTTB against a pure-Python reference on one series.
+
+Usage:
+    python -m benchmarks.chart_downsampling [--points 10000] [--max-points 800] [--runs 20]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.common import use_temporary_database
+
+REPORT_ID = "large-charts"
+
+
+def large_report(points: int):
+    from models import ChartConfig, ReportData
+    rng = random.Random(7)
+    walk, level = [], 100.0
+    for _ in range(points):
+        level += rng.gauss(0, 1)
+        walk.append(round(level, 3))
+    line = ChartConfig(
+        type="line", title="Daily index", description="Two random walks", xAxisKey="day",
+        dataKeys=[{"key": "index", "name": "Index", "color": "#60a5fa"},
+                  {"key": "trend", "name": "Trend", "color": "#f59e0b"}],
+        data=[{"day": i, "index": value, "trend": round(100 + 10 * math.sin(i / 500), 3)} for i, value in enumerate(walk)],
+    )
+    categories = [{"item": f"Product {i}", "value": round(rng.paretovariate(1.2), 3)} for i in range(points)]
+    bar = ChartConfig(type="bar", title="Exports by product", description="", xAxisKey="item",
+                      dataKeys=[{"key": "value", "name": "Exports", "color": "#34d399"}], data=categories)
+    pie = bar.model_copy(update={"type": "pie", "title": "Export shares"})
+    return ReportData(id=REPORT_ID, title="Large charts", summary="Benchmark report with large charts.",
+                      keyFindings=[], charts=[line, bar, pie], fullText="")
+
+
+def traces(body: bytes) -> int:
+    """Parse a report and build its Plotly traces like renderPlotlyChart; returns the points shipped."""
+    report = json.loads(body)
+    shipped = 0
+    for chart in report["charts"]:
+        x = [row.get(chart["xAxisKey"]) for row in chart["data"]]
+        for data_key in chart["dataKeys"]:
+            y = [row.get(data_key["key"]) for row in chart["data"]]
+            shipped += len(y)
+            {"x": x, "y": y, "name": data_key.get("name"), "type": chart["type"]}
+    return shipped
+
+
+def lttb_python(x, y, n):
+    """Reference LTTB, point by point."""
+    size = len(y)
+    every = (size - 2) / (n - 2)
+    selected, a = [0], 0
+    for b in range(n - 2):
+        lo, hi = int(b * every) + 1, int((b + 1) * every) + 1
+        next_lo, next_hi = hi, min(int((b + 2) * every) + 1, size)
+        avg_x = sum(x[next_lo:next_hi]) / (next_hi - next_lo)
+        avg_y = sum(y[next_lo:next_hi]) / (next_hi - next_lo)
+        best, best_area = lo, -1.0
+        for i in range(lo, hi):
+            area = abs((x[a] - avg_x) * (y[i] - y[a]) - (x[a] - x[i]) * (avg_y - y[a]))
+            if area > best_area:
+                best, best_area = i, area
+        selected.append(best)
+        a = best
+    return selected + [size - 1]
+
+
+def mean_ms(fn, runs: int) -> float:
+    start = time.perf_counter()
+    for _ in range(runs):
+        fn()
+    return (time.perf_counter() - start) / runs * 1000
+
+
+async def run(args):
+    import httpx
+    import numpy as np
+    import main
+    from services.chart_downsampling import lttb_indices
+
+    main.db_service.initialize_database()
+    main.db_service.save_report(large_report(args.points))
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def fetch(query):
+            response = await client.get(f"/api/reports/{REPORT_ID}{query}", headers={"Accept-Encoding": "identity"})
+            response.raise_for_status()
+            return response.content
+
+        async def timed(query, runs):
+            start = time.perf_counter()
+            for _ in range(runs):
+                body = await fetch(query)
+            return body, (time.perf_counter() - start) / runs * 1000
+
+        await fetch("")  # warm-up: app start, report cache, lazy imports
+        await fetch("?max_points=3")
+        print(f"report with 3 charts of {args.points:,} points (line chart: 2 series)")
+        print(f"{'request':<22}{'bytes':>12}{'points':>9}{'server':>10}{'parse+traces':>15}")
+        for name, query in (("full", ""), (f"max_points={args.max_points}", f"?max_points={args.max_points}")):
+            if query:
+                main.chart_downsampler._reports.clear()
+                body, cold = await timed(query, 1)
+                print(f"{name + ' (cold)':<22}{len(body):>12,}{traces(body):>9,}{cold:>8.1f}ms")
+            body, elapsed = await timed(query, args.runs)
+            parse = mean_ms(lambda: traces(body), args.runs)
+            print(f"{name:<22}{len(body):>12,}{traces(body):>9,}{elapsed:>8.1f}ms{parse:>13.1f}ms")
+
+    x = np.arange(args.points, dtype=float)
+    y = np.cumsum(np.random.default_rng(7).normal(size=args.points))
+    x_list, y_list = x.tolist(), y.tolist()
+    assert lttb_indices(x, y, args.max_points).tolist() == lttb_python(x_list, y_list, args.max_points)
+    print(f"LTTB of {args.points:,} points to {args.max_points}: "
+          f"NumPy {mean_ms(lambda: lttb_indices(x, y, args.max_points), args.runs):.2f}ms, "
+          f"pure Python {mean_ms(lambda: lttb_python(x_list, y_list, args.max_points), args.runs):.2f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=10000)
+    parser.add_argument("--max-points", type=int, default=800)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+    use_temporary_database()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    asyncio.run(run(args))
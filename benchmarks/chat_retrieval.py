@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark chat prompt size and late-section coverage: retrieval vs. fixed truncation.
+
+All seed reports are concatenated into one long synthetic report. For each question
+about a report that sits in the second half of the document, we record the prompt
+sent to the model and check whether it contains text from the targeted section.
+
+Usage:
+    python -m benchmarks.chat_retrieval
+"""
+
+import asyncio
+import re
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from data.seed_data import get_seed_data
+from models import ReportData
+from services.gemini_service import GeminiService
+from services.retrieval_service import chunk_text, select_chunks
+
+BASELINE_CONTEXT_CHARS = 6000
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 characters per token for English prose)."""
+    return max(1, len(text) // 4)
+
+
+class _PromptRecorder:
+    """Stands in for the Gemini model and records every prompt it receives."""
+
+    def __init__(self):
+        self.prompts = []
+
+    def generate_content(self, prompt, generation_config=None):
+        self.prompts.append(prompt)
+        return type("Response", (), {"text": "ok"})()
+
+
+def build_long_report():
+    seed = get_seed_data()
+    sections = [report["fullText"] for report in seed]
+    report = ReportData(
+        id="benchmark-long-report",
+        title="Collected DIW Weekly Reports",
+        summary="All seed reports concatenated into a single long document.",
+        keyFindings=[],
+        charts=[],
+        fullText="\n\n".join(sections),
+    )
+    # Questions target the second half of the document
+    targets = seed[len(seed) // 2:]
+    return report, targets
+
+
+def _section_sentences(text: str):
+    return [s.strip() for s in re.split(r'(?<=[.!?])\s+', text) if len(s.strip()) > 40]
+
+
+def covers(prompt: str, section_text: str) -> bool:
+    return any(sentence in prompt for sentence in _section_sentences(section_text))
+
+
+async def main():
+    report, targets = build_long_report()
+    service = GeminiService()
+    recorder = _PromptRecorder()
+    service.model = recorder
+    service.enabled = True
+
+    chunks = chunk_text(report.fullText)
+    print(f"Document: {len(report.fullText)} characters, {len(chunks)} chunks")
+    print(f"Questions targeting late sections: {len(targets)}\n")
+
+    results = {"truncated": [], "retrieval": []}
+    for target in targets:
+        question = f"What does the report say about {target['title'].lower()}?"
+
+        # The previous behaviour: a fixed prefix of the full text as the only context
+        await service.chat_with_report(report, question, [(0, report.fullText[:BASELINE_CONTEXT_CHARS])])
+        prompt = recorder.prompts[-1]
+        results["truncated"].append((estimate_tokens(prompt), covers(prompt, target["fullText"])))
+
+        await service.chat_with_report(report, question, select_chunks(chunks, question))
+        prompt = recorder.prompts[-1]
+        results["retrieval"].append((estimate_tokens(prompt), covers(prompt, target["fullText"])))
+
+    print(f"{'strategy':<12} {'avg tokens/turn':>16} {'late-section coverage':>22}")
+    for name, rows in results.items():
+        avg_tokens = sum(tokens for tokens, _ in rows) / len(rows)
+        coverage = sum(1 for _, hit in rows if hit) / len(rows)
+        print(f"{name:<12} {avg_tokens:>16.0f} {coverage:>21.0%}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
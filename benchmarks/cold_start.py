@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Cold start: import-time profile of `main` and time to the first healthy response.
+
+First runs `python -X importtime -c "import main"` in a fresh interpreter and
+lists the slowest imports by cumulative time. Then starts uvicorn on the app
+--runs times, as a restarted container would, and measures the time from
+process start to the first 200 from the health check endpoint (the
+Dockerfile's HEALTHCHECK), on an already seeded database and on a fresh
+one. Exits non-zero if the median on the seeded database misses --target.
+
+Usage:
+    python -m benchmarks.cold_start [--runs 5] [--top 15] [--target 1.5]
+"""
+
+import argparse
+import http.client
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+HEALTH_PATH = "/api/stats"
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| *(\S+)")
+
+
+def import_profile(env: dict):
+    """(total seconds, [(cumulative seconds, self seconds, module)] slowest first) of `import main`."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            rows.append((int(match.group(2)) / 1e6, int(match.group(1)) / 1e6, match.group(3)))
+    total = next(cumulative for cumulative, _, module in rows if module == "main")
+    return total, sorted(((cumulative, own, module) for cumulative, own, module in rows if module != "main"),
+                         reverse=True)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_to_healthy(env: dict, timeout: float = 60) -> float:
+    # Plain http.client polling: the machine may have a single CPU, which the poller must not compete for
+    port = free_port()
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+                                "--log-level", "warning"], cwd=ROOT, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - start < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with {process.returncode}")
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            try:
+                connection.request("GET", HEALTH_PATH)
+                if connection.getresponse().status == 200:
+                    return time.perf_counter() - start
+            except OSError:
+                pass
+            finally:
+                connection.close()
+            time.sleep(0.01)
+        raise RuntimeError("no healthy response")
+    finally:
+        process.terminate()
+        process.wait(30)
+
+
+def run(args) -> int:
+    env = dict(os.environ, AI_BACKEND=args.backend, DEBUG="False", NARRATIVE_WARMER_ENABLED="False")
+    if args.backend == "gemini":
+        env.setdefault("GEMINI_API_KEY", "benchmark-key")
+
+    env["DATABASE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="cold-start-"), "bench.db")
+    total, modules = import_profile(env)
+    print(f"import main: {total * 1000:.0f}ms (AI_BACKEND={args.backend}); slowest imports:")
+    print(f"{'cumulative':>12}{'self':>10}  module")
+    for cumulative, own, module in modules[:args.top]:
+        print(f"{cumulative * 1000:>10.1f}ms{own * 1000:>8.1f}ms  {module}")
+
+    seeded = env["DATABASE_PATH"]
+    time_to_healthy(env)  # seeds it
+    print(f"\ntime to first healthy response ({HEALTH_PATH}), {args.runs} runs:")
+    medians = {}
+    for name in ("seeded database", "fresh database"):
+        samples = []
+        for _ in range(args.runs):
+            if name == "fresh database":
+                env["DATABASE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="cold-start-"), "bench.db")
+            else:
+                env["DATABASE_PATH"] = seeded
+            samples.append(time_to_healthy(env))
+        medians[name] = statistics.median(samples)
+        print(f"  {name:<16} median {medians[name] * 1000:.0f}ms, min {min(samples) * 1000:.0f}ms, "
+              f"max {max(samples) * 1000:.0f}ms")
+
+    met = medians["seeded database"] <= args.target
+    print(f"target {args.target * 1000:.0f}ms on a seeded database: {'met' if met else 'MISSED'}")
+    return 0 if met else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--target", type=float, default=1.5, help="seconds")
+    parser.add_argument("--backend", default="gemini", choices=["gemini", "fake"],
+                        help="gemini (with a placeholder key if none is set) exercises the SDK import")
+    sys.exit(run(parser.parse_args()))
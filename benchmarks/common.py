@@ -0,0 +1,63 @@
+"""Helpers shared by the benchmark scripts."""
+
+import os
+import tempfile
+import time
+
+
+def use_temporary_database() -> str:
+    """
+    Point the app at a throwaway SQLite file; call before importing main.
+
+    Also lifts the per-client rate limits, as every benchmark request comes from the same client.
+    """
+    path = os.path.join(tempfile.mkdtemp(prefix="dashboard-bench-"), "bench.db")
+    os.environ["DATABASE_PATH"] = path
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "False")
+    return path
+
+
+def make_text_pdf(text: str) -> bytes:
+    """Build a minimal single-page PDF whose content stream draws `text` line by line."""
+    lines = [text[i:i + 90] for i in range(0, len(text), 90)] or [""]
+    escaped = [line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") for line in lines]
+    stream = "BT /F1 10 Tf 40 800 Td 12 TL\n" + "\n".join(f"({line}) '" for line in escaped) + "\nET"
+
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+        "/Resources << /Font << /F1 5 0 R >> >> /Contents 4 0 R >>",
+        f"<< /Length {len(stream.encode('latin-1'))} >>\nstream\n{stream}\nendstream",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+
+    out = "%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out.encode("latin-1")))
+        out += f"{number} 0 obj\n{body}\nendobj\n"
+    xref_at = len(out.encode("latin-1"))
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n"
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_at}\n%%EOF\n"
+    return out.encode("latin-1")
+
+
+def percentiles(samples, points=(0.5, 0.95, 0.99)) -> dict:
+    """Nearest-rank percentiles of a list of numbers, keyed like 'p50'."""
+    values = sorted(samples)
+    if not values:
+        return {f"p{int(p * 100)}": 0.0 for p in points}
+    return {f"p{int(p * 100)}": values[min(len(values) - 1, int(p * len(values)))] for p in points}
+
+
+class Timer:
+    """Context manager measuring elapsed wall time in seconds."""
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
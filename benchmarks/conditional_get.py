@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Bytes and CPU of repeat navigation over the report endpoints, with and without revalidation.
+
+Runs the FastAPI app in-process on the seed corpus. Each navigation round
+fetches /api/reports and every /api/reports/{id}, as the dashboard does when
+it is reopened. The unconditional client refetches everything; the
+revalidating client sends If-None-Match with the ETags it stored, like a
+browser's HTTP cache. CPU is process time over all rounds (client and server
+share the process, and both modes send the same number of requests).
+
+Usage:
+    python -m benchmarks.conditional_get [--rounds 20]
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.common import use_temporary_database
+
+
+async def navigate(client, paths, etags):
+    transferred = not_modified = 0
+    for path in paths:
+        headers = {"If-None-Match": etags[path]} if etags is not None and path in etags else {}
+        response = await client.get(path, headers=headers)
+        transferred += len(response.content) + sum(len(k) + len(v) for k, v in response.headers.items())
+        if response.status_code == 304:
+            not_modified += 1
+        elif etags is not None:
+            etags[path] = response.headers["etag"]
+    return transferred, not_modified
+
+
+async def run(args):
+    import httpx
+    import main
+
+    main.db_service.initialize_database()
+    paths = ["/api/reports"] + [f"/api/reports/{report.id}" for report in main.db_service.get_reports()]
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print(f"{'client':<16}{'requests':>9}{'304s':>7}{'bytes':>12}{'CPU':>10}{'CPU/request':>13}")
+        for revalidate in (False, True):
+            etags = {} if revalidate else None
+            await navigate(client, paths, etags)  # first visit: both clients download everything
+            cpu, transferred, hits = time.process_time(), 0, 0
+            for _ in range(args.rounds):
+                sent, not_modified = await navigate(client, paths, etags)
+                transferred += sent
+                hits += not_modified
+            cpu = time.process_time() - cpu
+            requests = args.rounds * len(paths)
+            print(f"{'revalidating' if revalidate else 'unconditional':<16}{requests:>9}{hits:>7}{transferred:>12,}"
+                  f"{cpu * 1000:>8.0f}ms{cpu / requests * 1000:>11.2f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+    use_temporary_database()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    asyncio.run(run(args))
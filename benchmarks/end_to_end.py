@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+End-to-end latency and throughput of the AI endpoints, offline.
+
+Runs the FastAPI app in-process with the fake model backend (AI_BACKEND=fake),
+so no API key or network is needed, and drives each endpoint with a fixed
+number of requests from concurrent clients: PDF uploads (distinct documents),
+narratives and chat messages across the seed reports, and storyboards.
+Reports p50/p95/p99 latency, throughput and the model calls and tokens each
+scenario cost. The fake model's latency distribution and failure rate are
+configurable, e.g. --failure-rate 0.1 exercises the retry path.
+
+Usage:
+    python -m benchmarks.end_to_end [--requests 100] [--concurrency 20] [--latency-ms 400]
+                                    [--latency-sigma 0.5] [--ms-per-token 2] [--failure-rate 0]
+                                    [--scenarios upload,narrative,chat,storyboard]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.common import make_text_pdf, percentiles, use_temporary_database
+
+SCENARIOS = ("upload", "narrative", "chat", "storyboard")
+
+
+def configure(args):
+    """Settings are read at import time, so set them before importing the app."""
+    use_temporary_database()
+    os.environ.update({
+        "AI_BACKEND": "fake",
+        "FAKE_MODEL_LATENCY_MS": str(args.latency_ms),
+        "FAKE_MODEL_LATENCY_SIGMA": str(args.latency_sigma),
+        "FAKE_MODEL_MS_PER_TOKEN": str(args.ms_per_token),
+        "FAKE_MODEL_FAILURE_RATE": str(args.failure_rate),
+        "MODEL_REQUESTS_PER_MINUTE": str(args.requests_per_minute),
+        "MODEL_RETRY_BASE_DELAY": "0.2",
+    })
+
+
+def upload_pdf(i: int) -> bytes:
+    text = (f"Report {i}: German construction volume declined by {i % 7}.5 percent in 2024. "
+            f"Real wages rose by {i % 3}.1 percent while private consumption remained weak. "
+            f"Public investment would need to rise by 0.{i % 9} percent of GDP. ") * 12
+    return make_text_pdf(text)
+
+
+def make_requests(report_ids):
+    return {
+        "upload": lambda c, i: c.post("/api/reports/upload",
+                                      files={"files": (f"report-{i}.pdf", upload_pdf(i), "application/pdf")}),
+        "narrative": lambda c, i: c.post(f"/api/generate-narrative/{report_ids[i % len(report_ids)]}"),
+        "chat": lambda c, i: c.post(f"/api/chat/{report_ids[i % len(report_ids)]}",
+                                    data={"message": f"What drives the decline in question {i}?"}),
+        "storyboard": lambda c, i: c.post("/api/generate-storyboard"),
+    }
+
+
+async def drive(client, request, total: int, concurrency: int):
+    latencies, errors = [], 0
+    next_index = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in next_index:
+            start = time.perf_counter()
+            try:
+                response = await request(client, i)
+                if response.status_code >= 400:
+                    errors += 1
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+
+async def run(args):
+    import httpx
+    import main
+
+    main.db_service.initialize_database()
+    model = main.gemini_service.model
+    report_ids = [report.id for report in main.db_service.get_reports()]
+    requests = make_requests(report_ids)
+
+    print(f"Fake model: median {args.latency_ms:.0f} ms to first token (sigma {args.latency_sigma}), "
+          f"{args.ms_per_token} ms/token, {args.failure_rate:.0%} failures; "
+          f"{args.requests} requests per scenario from {args.concurrency} clients")
+    print(f"{'scenario':<12}{'errors':>7}{'req/s':>8}{'p50':>8}{'p95':>8}{'p99':>8}{'model calls':>13}{'tokens':>10}")
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as client:
+        for name in args.scenarios.split(","):
+            calls_before = model.calls
+            tokens_before = main.usage_recorder.rollup()[0]["total_tokens"]
+            latencies, errors, wall = await drive(client, requests[name], args.requests, args.concurrency)
+            tokens = main.usage_recorder.rollup()[0]["total_tokens"] - tokens_before
+            stats = percentiles(latencies)
+            print(f"{name:<12}{errors:>7}{len(latencies) / wall:>8.1f}{stats['p50']:>7.2f}s{stats['p95']:>7.2f}s"
+                  f"{stats['p99']:>7.2f}s{model.calls - calls_before:>13}{tokens:>10}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=400)
+    parser.add_argument("--latency-sigma", type=float, default=0.5)
+    parser.add_argument("--ms-per-token", type=float, default=2)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--requests-per-minute", type=int, default=100000)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    args = parser.parse_args()
+    configure(args)
+    asyncio.run(run(args))
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Chat latency while 50 PDF uploads are being processed.
+
+Runs the FastAPI app in-process against a fake model (1s per extraction call,
+0.2s per chat call) and measures /api/chat latency, first idle and then while
+50 uploads are in flight. The comparison mode puts every model call into one
+shared pool, as all calls did when they went through asyncio.to_thread.
+
+Usage:
+    python -m benchmarks.executor_isolation [--uploads 50] [--chats 20]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.common import make_text_pdf, percentiles, use_temporary_database
+
+use_temporary_database()
+os.environ.setdefault("MODEL_REQUESTS_PER_MINUTE", "100000")
+
+import httpx
+import main
+from services.model_client import ModelClient
+
+
+class _FakeModel:
+    def __init__(self, extraction_latency=1.0, chat_latency=0.2):
+        self.extraction_latency = extraction_latency
+        self.chat_latency = chat_latency
+        self.counter = 0
+
+    def generate_content(self, prompt, **kwargs):
+        if "structured JSON object" in prompt:
+            time.sleep(self.extraction_latency)
+            self.counter += 1
+            payload = {"id": f"upload-{self.counter}", "title": f"Upload {self.counter}",
+                       "summary": "Fake summary.", "keyFindings": ["Fake finding"], "charts": []}
+            return type("Response", (), {"text": json.dumps(payload)})()
+        time.sleep(self.chat_latency)
+        return type("Response", (), {"text": "Fake chat answer."})()
+
+
+async def measure_chat(client, count):
+    latencies = []
+    for i in range(count):
+        start = time.perf_counter()
+        response = await client.post("/api/chat/construction", data={"message": f"What about prices {i}?"})
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def upload(client, pdf, index):
+    files = {"files": (f"report-{index}.pdf", pdf, "application/pdf")}
+    response = await client.post("/api/reports/upload", files=files)
+    response.raise_for_status()
+
+
+async def scenario(label, uploads, chats):
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as client:
+        idle = await measure_chat(client, chats)
+
+        pdf = make_text_pdf("German construction volume declined by 3.5 percent in 2024. " * 20)
+        upload_tasks = [asyncio.create_task(upload(client, pdf, i)) for i in range(uploads)]
+        await asyncio.sleep(0.1)  # let the uploads occupy the model workers
+        loaded = await measure_chat(client, chats)
+        await asyncio.gather(*upload_tasks)
+
+    print(f"\n{label}")
+    for name, samples in (("idle", idle), (f"during {uploads} uploads", loaded)):
+        stats = percentiles(samples)
+        print(f"  chat {name:<22} p50 {stats['p50'] * 1000:7.0f} ms   p95 {stats['p95'] * 1000:7.0f} ms")
+
+
+async def run(args):
+    main.db_service.initialize_database()
+    main.gemini_service.model = _FakeModel()
+    main.gemini_service.enabled = True
+
+    await scenario("Dedicated lanes (interactive / batch) and PDF executor", args.uploads, args.chats)
+
+    shared = ModelClient(max_concurrency=main.settings.MODEL_MAX_CONCURRENCY)
+    shared.lanes[ModelClient.BATCH] = shared.lanes[ModelClient.INTERACTIVE]
+    main.gemini_service.client = shared
+    await scenario("Single shared pool for all model calls (previous behaviour)", args.uploads, args.chats)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uploads", type=int, default=50)
+    parser.add_argument("--chats", type=int, default=20)
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark chunked map-reduce report extraction against the old single truncated call.
+
+All seed reports are concatenated into one long document (~28k characters, the size
+of a long DIW report). A fake model with fixed latency "extracts" sentences that
+contain figures as key findings, so no API key or network is needed.
+
+Reports:
+- end-to-end latency with concurrency 1 (sequential) vs. EXTRACTION_CONCURRENCY
+- how many source sections contributed findings, and how deep into the document
+  the last finding comes from, map-reduce vs. truncated
+
+Usage:
+    python -m benchmarks.extraction_map_reduce [--latency 0.5]
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import settings
+from data.seed_data import get_seed_data
+from services.gemini_service import GeminiService
+
+TRUNCATED_CHARS = 8000
+
+
+class _FakeExtractionModel:
+    """Answers extraction prompts with sentences containing numbers, after a fixed delay."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+
+    def generate_content(self, prompt, generation_config=None):
+        self.calls += 1
+        time.sleep(self.latency)
+        if "Candidate key findings:" in prompt:
+            candidates = re.findall(r'^\s*- (.+)$', prompt.split("Candidate key findings:")[1], re.M)
+            # Pick findings spread evenly over all parts, as the merge prompt asks
+            k = min(settings.EXTRACTION_MAX_FINDINGS, len(candidates))
+            picks = sorted({round(i * (len(candidates) - 1) / max(k - 1, 1)) for i in range(k)})
+            payload = {"id": "merged", "title": "Merged", "summary": "Merged summary.",
+                       "keyFindings": [candidates[i] for i in picks]}
+        else:
+            text = prompt.rsplit("---", 2)[-2]
+            sentences = [s.strip() for s in re.split(r'(?<=[.!?])\s+', text) if re.search(r'\d', s)]
+            payload = {"id": "part", "title": sentences[0][:60] if sentences else "Part",
+                       "summary": " ".join(sentences[:2]), "keyFindings": sentences[:3], "charts": []}
+        return type("Response", (), {"text": json.dumps(payload)})()
+
+
+def sections_covered(findings, sections):
+    return sum(1 for section in sections if any(f in section for f in findings))
+
+
+def deepest_finding(findings, document):
+    """Position of the latest finding in the document, as a fraction of its length."""
+    positions = [document.find(f) for f in findings]
+    return max([p for p in positions if p >= 0], default=0) / len(document)
+
+
+async def run(service, text, concurrency):
+    settings.EXTRACTION_CONCURRENCY = concurrency
+    start = time.perf_counter()
+    report = await service.create_report_from_text(text)
+    return report, time.perf_counter() - start
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.5, help="fake model latency per call in seconds")
+    args = parser.parse_args()
+
+    sections = [report["fullText"] for report in get_seed_data()]
+    document = "\n\n".join(sections)
+    model = _FakeExtractionModel(args.latency)
+    service = GeminiService()
+    service.model = model
+    service.enabled = True
+    concurrency = settings.EXTRACTION_CONCURRENCY
+
+    print(f"Document: {len(document)} characters, {len(sections)} sections, "
+          f"chunk size {settings.EXTRACTION_CHUNK_SIZE}, fake latency {args.latency}s\n")
+
+    rows = []
+    for label, text, level in (
+        ("truncated (old)", document[:TRUNCATED_CHARS], 1),
+        ("map-reduce sequential", document, 1),
+        (f"map-reduce concurrency={concurrency}", document, concurrency),
+    ):
+        model.calls = 0
+        report, elapsed = await run(service, text, level)
+        rows.append((label, elapsed, model.calls, sections_covered(report.keyFindings, sections),
+                     deepest_finding(report.keyFindings, document)))
+
+    print(f"{'strategy':<36} {'latency':>9} {'calls':>6} {'sections':>9} {'deepest finding':>16}")
+    for label, elapsed, calls, covered, depth in rows:
+        print(f"{label:<36} {elapsed:>8.2f}s {calls:>6} {covered:>6}/{len(sections)} {depth:>16.0%}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
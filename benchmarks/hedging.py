@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Chat latency with and without hedged requests, against a heavy-tailed fake model.
+
+Sends the same sequence of chat questions through GeminiService with hedging
+off and on. The fake model's time to first token is log-normal, and a share
+of calls (stragglers) is many times slower. Reports latency percentiles and
+the extra model calls hedging cost.
+
+Usage:
+    python -m benchmarks.hedging [--requests 300] [--concurrency 8] [--straggler-rate 0.05]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.common import percentiles
+from data.seed_data import get_seed_data
+from models import ReportData
+from services.fake_model import FakeModel
+from services.gemini_service import GeminiService
+from services.hedging import Hedger
+from services.model_client import ModelClient
+
+QUESTIONS = ["What drives the forecast?", "How did wages develop?", "Which sectors are weakest?",
+             "What does the report recommend?", "How large is the investment gap?"]
+
+
+async def run_mode(args, hedging: bool):
+    model = FakeModel(latency_ms=args.latency_ms, latency_sigma=args.latency_sigma, ms_per_token=0,
+                      straggler_rate=args.straggler_rate, straggler_factor=args.straggler_factor,
+                      failure_rate=0, seed=args.seed)
+    client = ModelClient(requests_per_minute=10 ** 6, tokens_per_minute=10 ** 9,
+                         max_concurrency=args.concurrency * 2)
+    service = GeminiService(client, model=model)
+    service.router.hedger = Hedger(enabled=hedging, percentile=args.percentile, min_delay=0.05,
+                                   max_rate=args.max_rate)
+    reports = [ReportData(**report) for report in get_seed_data()]
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+
+    async def ask(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            await service.chat_with_report(reports[i % len(reports)], f"{QUESTIONS[i % len(QUESTIONS)]} ({i})")
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(ask(i) for i in range(args.requests)))
+    client.shutdown()
+    return percentiles(latencies), model.calls, service.router.hedger.hedged["chat"]
+
+
+async def run(args):
+    print(f"{'hedging':<10}{'requests':>9}{'model calls':>13}{'extra':>8}{'p50':>9}{'p95':>9}{'p99':>9}")
+    results = {}
+    for hedging in (False, True):
+        stats, calls, _ = results[hedging] = await run_mode(args, hedging)
+        print(f"{'on' if hedging else 'off':<10}{args.requests:>9}{calls:>13}{calls / args.requests - 1:>8.1%}"
+              f"{stats['p50'] * 1000:>7.0f}ms{stats['p95'] * 1000:>7.0f}ms{stats['p99'] * 1000:>7.0f}ms")
+    off, on = results[False][0], results[True][0]
+    print(f"p99 improvement: {1 - on['p99'] / off['p99']:.1%}, p95 improvement: {1 - on['p95'] / off['p95']:.1%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--latency-sigma", type=float, default=0.3)
+    parser.add_argument("--straggler-rate", type=float, default=0.05)
+    parser.add_argument("--straggler-factor", type=float, default=10)
+    parser.add_argument("--percentile", type=float, default=95)
+    parser.add_argument("--max-rate", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(run(parser.parse_args()))
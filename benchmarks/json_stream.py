@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Throughput of the incremental JSON parser on large storyboard responses.
+
+Builds storyboard JSON of increasing size (long narrative, many charts and key
+actors), feeds it to JSONStreamParser in fixed-size pieces as a streamed model
+response would arrive, and compares with parsing the complete text once:
+json.loads alone, and the brace-counting _extract_and_parse_json that the
+service used before streaming. Also reports how far into the response the
+first field (the title) becomes available, which for whole-response parsing
+is always 100%.
+
+Usage:
+    python -m benchmarks.json_stream [--piece-size 256] [--repeat 5]
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.common import Timer
+from services.gemini_service import GeminiService
+from services.json_stream import JSONStreamParser
+
+
+def make_storyboard(charts: int, actors: int, paragraphs: int) -> str:
+    paragraph = ("Germany's construction slump, weak private consumption and high energy prices "
+                 "reinforce each other: \"structural drag\" {compounds} across sectors.\n\n")
+    storyboard = {
+        "title": "The Crisis of Structural Adaptation",
+        "narrative": paragraph * paragraphs,
+        "charts": [
+            {"type": "bar", "title": f"Structural Drag Index {i}", "description": "Contribution per report",
+             "xAxisKey": "report", "dataKeys": [{"key": "drag", "color": "#8884d8"}, {"key": "trend", "color": "#82ca9d"}],
+             "rows": [{"label": f"Report {j}", "values": [j * 1.5, -j / 3]} for j in range(24)]}
+            for i in range(charts)
+        ],
+        "introspection": paragraph * (paragraphs // 4),
+        "retrospection": paragraph * (paragraphs // 4),
+        "relationshipGraph": {"nodes": [{"id": f"r{i}", "title": f"Report {i}"} for i in range(20)],
+                              "edges": [{"source": "r0", "target": f"r{i}", "label": "lowers tax revenue"}
+                                        for i in range(1, 20)]},
+        "keyActors": [{"name": f"Actor {i}", "description": "Faces higher costs", "icon": "fa-solid fa-users"}
+                      for i in range(actors)],
+    }
+    return json.dumps(storyboard, indent=2)
+
+
+def best_of(repeat: int, func) -> float:
+    times = []
+    for _ in range(repeat):
+        with Timer() as timer:
+            func()
+        times.append(timer.elapsed)
+    return min(times)
+
+
+def run(args):
+    legacy = GeminiService()
+    print(f"{'size':>9}{'events':>8}{'stream MB/s':>13}{'json.loads MB/s':>17}"
+          f"{'brace scan MB/s':>17}{'first field at':>16}")
+    for charts, actors, paragraphs in ((2, 6, 40), (20, 20, 400), (100, 60, 4000), (300, 100, 12000)):
+        text = make_storyboard(charts, actors, paragraphs)
+        pieces = [text[i:i + args.piece_size] for i in range(0, len(text), args.piece_size)]
+        megabytes = len(text.encode("utf-8")) / 1e6
+
+        def stream():
+            parser = JSONStreamParser()
+            for piece in pieces:
+                parser.feed(piece)
+
+        first_field_at, events, parser = None, 0, JSONStreamParser()
+        consumed = 0
+        for piece in pieces:
+            consumed += len(piece)
+            completed = parser.feed(piece)
+            events += len(completed)
+            if completed and first_field_at is None:
+                first_field_at = consumed / len(text)
+
+        stream_time = best_of(args.repeat, stream)
+        loads_time = best_of(args.repeat, lambda: json.loads(text))
+        scan_time = best_of(args.repeat, lambda: legacy._extract_and_parse_json(text))
+        print(f"{len(text) / 1024:>7.0f}KB{events:>8}{megabytes / stream_time:>13.1f}"
+              f"{megabytes / loads_time:>17.1f}{megabytes / scan_time:>17.1f}{first_field_at:>16.2%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--piece-size", type=int, default=256)
+    parser.add_argument("--repeat", type=int, default=5)
+    run(parser.parse_args())
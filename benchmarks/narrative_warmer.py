@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Narrative latency when opening reports, cold versus after background pre-generation.
+
+Runs the FastAPI app in-process with the fake model backend. Opens every
+seed report's analysis once on a fresh database (every open waits for a
+model call), then starts the narrative warmer on a second fresh database,
+waits until it has caught up and opens every report again.
+
+Usage:
+    python -m benchmarks.narrative_warmer [--latency-ms 400] [--per-minute 600]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.common import percentiles, use_temporary_database
+
+
+async def open_all(client, report_ids):
+    latencies, hits = [], 0
+    for report_id in report_ids:
+        start = time.perf_counter()
+        response = await client.post(f"/api/generate-narrative/{report_id}")
+        latencies.append(time.perf_counter() - start)
+        hits += response.json()["cached"]
+    return latencies, hits
+
+
+async def run(args):
+    import httpx
+    import main
+    from services.database_service import DatabaseService
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as client:
+        print(f"{'':<22}{'opens':>7}{'cache hits':>12}{'p50':>9}{'p95':>9}")
+        for warm in (False, True):
+            # A fresh database for each run, so the second one starts without stored narratives
+            main.narrative_service.db_service = main.db_service = DatabaseService(use_temporary_database())
+            main.db_service.initialize_database()
+            report_ids = [report.id for report in main.db_service.get_reports()]
+            if warm:
+                start = time.perf_counter()
+                main.narrative_warmer.bucket.rate = args.per_minute / 60
+                main.narrative_warmer.start()
+                while main.narrative_warmer.warmed < len(report_ids):
+                    await asyncio.sleep(0.05)
+                await main.narrative_warmer.stop()
+                print(f"(warmer pre-generated {len(report_ids)} narratives in {time.perf_counter() - start:.1f}s)")
+            latencies, hits = await open_all(client, report_ids)
+            stats = percentiles(latencies)
+            print(f"{'after warming' if warm else 'cold':<22}{len(latencies):>7}{hits:>12}"
+                  f"{stats['p50'] * 1000:>7.0f}ms{stats['p95'] * 1000:>7.0f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency-ms", type=float, default=400)
+    parser.add_argument("--per-minute", type=float, default=600)
+    args = parser.parse_args()
+    use_temporary_database()
+    os.environ.update({"AI_BACKEND": "fake", "FAKE_MODEL_LATENCY_MS": str(args.latency_ms),
+                       "MODEL_REQUESTS_PER_MINUTE": "100000"})
+    asyncio.run(run(args))
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Prompt tokens with the compact prompt encoding versus the previous serialization.
+
+Builds every prompt type for the seed corpus and counts tokens with the local
+counter (services.prompt_encoding.count_tokens), comparing against the data
+sections as they were serialized before:
+- narrative: findings as bullets, charts as json.dumps(indent=2), fullText[:4000]
+- storyboard: Python repr of every report dict (the intended source data; the
+  old template never interpolated it)
+- chat: key findings joined with ", " in the report context
+- report merge: candidate findings as bullets (unchanged format)
+
+Usage:
+    python -m benchmarks.prompt_encoding
+"""
+
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from data.seed_data import get_seed_data
+from models import ReportData
+from services.gemini_service import GeminiService
+from services.prompt_encoding import count_tokens, encode_report, encode_reports
+from config import settings
+
+
+def legacy_narrative_data(data: ReportData) -> str:
+    return f"""- **Report Title:** {data.title}
+            - **High-Level Summary:** {data.summary}
+            - **Key Findings:**
+            {chr(10).join(f"  - {f}" for f in data.keyFindings)}
+            - **Chart Data:** {json.dumps([chart.model_dump() for chart in data.charts], indent=2)}
+            - **Original Report Excerpt:**
+            ---
+            {data.fullText[:4000]}...
+            ---"""
+
+
+def row(name, old, new, count):
+    print(f"{name:<22}{count:>8}{old:>12.0f}{new:>12.0f}{1 - new / old:>10.1%}")
+
+
+def run():
+    service = GeminiService()
+    reports = [ReportData(**report) for report in get_seed_data()]
+    print(f"{'prompt':<22}{'prompts':>8}{'old tokens':>12}{'new tokens':>12}{'saved':>10}")
+
+    # Narrative: the instructions are shared, only the data section differs
+    old = new = 0
+    for report in reports:
+        prompt = service._narrative_prompt(report)
+        section = encode_report(report, text_budget=settings.PROMPT_NARRATIVE_EXCERPT_TOKENS)
+        new += count_tokens(prompt)
+        old += count_tokens(prompt) - count_tokens(section) + count_tokens(legacy_narrative_data(report))
+    row("narrative (mean)", old / len(reports), new / len(reports), len(reports))
+
+    # Storyboard over the whole corpus
+    prompt = service._storyboard_prompt(reports)
+    section = encode_reports(reports, settings.PROMPT_STORYBOARD_SOURCE_TOKENS)
+    legacy = str([report.model_dump() for report in reports])
+    row("storyboard", count_tokens(prompt) - count_tokens(section) + count_tokens(legacy), count_tokens(prompt), 1)
+
+    # Storyboard source data alone, without the budget (all reports whole)
+    row("storyboard data", count_tokens(legacy), count_tokens(encode_reports(reports, 10 ** 9)), 1)
+
+    # Chat report context
+    old = new = 0
+    for report in reports:
+        context = service._report_context(report)
+        new += count_tokens(context)
+        old += count_tokens(context.split("- **Key Findings:**")[0]) + count_tokens(
+            "- **Key Findings:** " + ", ".join(report.keyFindings))
+    row("chat context (mean)", old / len(reports), new / len(reports), len(reports))
+
+
+if __name__ == "__main__":
+    run()
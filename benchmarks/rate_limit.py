@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Cost and cross-worker accuracy of the per-client rate limiter.
+
+1. Microseconds per limiter check, for one client and for --clients clients.
+2. Microseconds the middleware adds to a request, against a bare ASGI app:
+   for a rate-limited API path and for an unlimited one (static files).
+3. Sharing: --workers processes, each with its own limiter syncing through
+   one SQLite database every --sync seconds, hammer the same client's AI
+   limit (--limit per minute) for --duration seconds. Reports how many
+   requests were admitted in total against the limit, and the sync time.
+
+Usage:
+    python -m benchmarks.rate_limit [--requests 200000] [--clients 10000] [--workers 4] [--sync 0.5]
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.rate_limit import RateLimit, RateLimitMiddleware, SlidingWindowLimiter
+
+LIMITS = {"read": RateLimit(requests=10 ** 9, window=60), "ai": RateLimit(requests=10 ** 9, window=60)}
+
+
+def time_checks(clients: int, requests: int) -> float:
+    limiter = SlidingWindowLimiter(LIMITS, enabled=True)
+    names = [f"10.{i // 65536}.{i // 256 % 256}.{i % 256}" for i in range(clients)]
+    start = time.perf_counter()
+    for i in range(requests):
+        limiter.hit("read", names[i % clients])
+    return (time.perf_counter() - start) / requests
+
+
+async def time_requests(app, path: str, requests: int) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    scope = {"type": "http", "method": "GET", "path": path, "client": ("192.0.2.1", 5000),
+             "headers": [(b"host", b"localhost"), (b"accept", b"application/json"), (b"user-agent", b"bench")]}
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(scope, receive, send)
+    return (time.perf_counter() - start) / requests
+
+
+async def bare_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+def worker(db_path, limit, sync, duration, rate):
+    from services.database_service import DatabaseService
+    limiter = SlidingWindowLimiter({"ai": RateLimit(requests=limit, window=60)}, DatabaseService(db_path),
+                                   sync_interval=sync, enabled=True)
+    limiter.start()
+    admitted = 0
+    until = time.perf_counter() + duration
+    while time.perf_counter() < until:
+        admitted += limiter.hit("ai", "203.0.113.7").allowed
+        time.sleep(1 / rate)
+    limiter.stop()
+    return admitted, limiter.syncs, limiter.last_sync_ms
+
+
+def run(args):
+    print("limiter check:")
+    for clients in (1, args.clients):
+        print(f"  {clients:>6} clients  {time_checks(clients, args.requests) * 1e6:6.2f}us")
+
+    print("middleware overhead per request:")
+    middleware = RateLimitMiddleware(bare_app, SlidingWindowLimiter(LIMITS, enabled=True))
+    bare = asyncio.run(time_requests(bare_app, "/api/reports", args.requests))
+    for name, path in (("limited /api/reports", "/api/reports"), ("unlimited /static/app.js", "/static/app.js")):
+        wrapped = asyncio.run(time_requests(middleware, path, args.requests))
+        print(f"  {name:<26} {wrapped * 1e6:6.2f}us vs {bare * 1e6:.2f}us bare: +{(wrapped - bare) * 1e6:.2f}us")
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix="rate-limit-bench-"), "bench.db")
+    from services.database_service import DatabaseService
+    DatabaseService(db_path).create_tables()
+    with multiprocessing.get_context("spawn").Pool(args.workers) as pool:
+        results = pool.starmap(worker, [(db_path, args.limit, args.sync, args.duration, args.rate)] * args.workers)
+    admitted = sum(result[0] for result in results)
+    attempted = int(args.workers * args.rate * args.duration)
+    print(f"shared limit of {args.limit}/min, {args.workers} workers x {args.rate:g} requests/s for "
+          f"{args.duration:g}s (~{attempted} attempts), synced every {args.sync:g}s:")
+    print(f"  admitted {admitted} ({admitted / args.limit:.2f}x the limit; one worker alone would admit "
+          f"{args.limit}, {args.workers} unsynced {args.workers * args.limit}); "
+          f"last sync {max(result[2] for result in results):.1f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200000)
+    parser.add_argument("--clients", type=int, default=10000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--rate", type=float, default=50, help="requests/s per worker")
+    parser.add_argument("--duration", type=float, default=5)
+    parser.add_argument("--sync", type=float, default=0.5)
+    run(parser.parse_args())
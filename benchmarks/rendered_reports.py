@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Per-request CPU and latency of GET /api/reports/{id} on reports with many charts.
+
+Runs the FastAPI app in-process on a database of synthetic reports with
+--charts charts of --points data points each. Compares the endpoint, which
+sends the JSON stored with the row, against the previous decode path
+(row -> json.loads -> ChartConfig/ReportData validation -> serialization),
+registered on a benchmark-only route. Both run through the full middleware
+stack without compression.
+
+Usage:
+    python -m benchmarks.rendered_reports [--reports 20] [--charts 40] [--points 24] [--rounds 10]
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.common import percentiles, use_temporary_database
+
+
+def chart_heavy_report(i, charts, points):
+    from models import ReportData
+    return ReportData(
+        id=f"charts-{i}",
+        title=f"Synthetic report {i}",
+        summary="A report with many charts. " * 10,
+        keyFindings=[f"Finding {n} of report {i}." for n in range(6)],
+        charts=[{
+            "type": "line",
+            "title": f"Series {c}",
+            "description": "Quarterly values by sector.",
+            "xAxisKey": "quarter",
+            "dataKeys": [{"key": key, "color": "#8884d8"} for key in ("industry", "services", "construction")],
+            "data": [{"quarter": f"Q{p % 4 + 1} {2000 + p // 4}", "industry": p * 1.5, "services": p * 0.7,
+                      "construction": -p * 0.2} for p in range(points)],
+        } for c in range(charts)],
+        fullText="Economic output stagnated. " * 400,
+    )
+
+
+async def run(args):
+    import httpx
+    import main
+    from services.responses import FastJSONResponse
+
+    @main.app.get("/bench/decoded/{report_id}")
+    async def decoded(report_id: str):
+        return FastJSONResponse(main.db_service.get_report_by_id(report_id))
+
+    main.db_service.initialize_database()
+    report_ids = [main.db_service.save_report(chart_heavy_report(i, args.charts, args.points)).id
+                  for i in range(args.reports)]
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        size = len((await client.get(f"/api/reports/{report_ids[0]}")).content)
+        print(f"{args.reports} reports, {args.charts} charts x {args.points} points, {size:,} bytes each")
+        print(f"{'path':<16}{'requests':>9}{'p50':>10}{'p95':>10}{'CPU/request':>13}")
+        for name, prefix in (("decode", "/bench/decoded"), ("stored JSON", "/api/reports")):
+            latencies, cpu = [], time.process_time()
+            for _ in range(args.rounds):
+                for report_id in report_ids:
+                    start = time.perf_counter()
+                    response = await client.get(f"{prefix}/{report_id}", headers={"Accept-Encoding": "identity"})
+                    latencies.append(time.perf_counter() - start)
+                    assert response.status_code == 200
+            cpu = (time.process_time() - cpu) / len(latencies)
+            stats = percentiles(latencies)
+            print(f"{name:<16}{len(latencies):>9}{stats['p50'] * 1000:>8.2f}ms{stats['p95'] * 1000:>8.2f}ms"
+                  f"{cpu * 1000:>11.2f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reports", type=int, default=20)
+    parser.add_argument("--charts", type=int, default=40)
+    parser.add_argument("--points", type=int, default=24)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+    use_temporary_database()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    asyncio.run(run(args))
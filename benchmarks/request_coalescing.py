@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Model calls and latency with 100 concurrent clients requesting the same AI output.
+
+Runs the FastAPI app in-process against a fake model (fixed latency per call)
+and fires N identical requests at once for a narrative, a storyboard, a
+streamed storyboard and a PDF upload, first with single-flight coalescing and
+then with it disabled.
+
+Usage:
+    python -m benchmarks.request_coalescing [--clients 100] [--latency 0.2]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.common import make_text_pdf, percentiles, use_temporary_database
+
+use_temporary_database()
+os.environ.setdefault("MODEL_REQUESTS_PER_MINUTE", "1000000")
+
+import httpx
+import main
+
+
+class _CountingModel:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt, stream=False, generation_config=None):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        if "narrative singularity" in prompt:
+            payload = {"title": "Thesis", "narrative": "Story", "charts": [], "introspection": "Why",
+                       "retrospection": "What if", "relationshipGraph": None, "keyActors": []}
+            text = json.dumps(payload)
+        elif "structured JSON object" in prompt:
+            text = json.dumps({"id": "upload", "title": "Upload", "summary": "Summary",
+                               "keyFindings": ["Finding"], "charts": []})
+        else:
+            text = "## Narrative\nConstruction is declining."
+        if stream:
+            return iter([type("Chunk", (), {"text": text[i:i + 20]})() for i in range(0, len(text), 20)])
+        return type("Response", (), {"text": text})()
+
+
+async def fire(client, clients, request):
+    async def one():
+        start = time.perf_counter()
+        response = await request(client)
+        response.raise_for_status()
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(one() for _ in range(clients)))
+    return latencies, time.perf_counter() - start
+
+
+async def run(args):
+    main.db_service.initialize_database()
+    model = _CountingModel(args.latency)
+    main.gemini_service.model = model
+    main.gemini_service.enabled = True
+    pdf = make_text_pdf("German construction volume declined by 3.5 percent in 2024. " * 20)
+
+    requests = {
+        "narrative": lambda c: c.post("/api/generate-narrative/construction"),
+        "storyboard": lambda c: c.post("/api/generate-storyboard"),
+        "storyboard (streamed)": lambda c: c.post("/api/generate-storyboard/stream"),
+        "report upload": lambda c: c.post("/api/reports/upload",
+                                          files={"files": ("same.pdf", pdf, "application/pdf")}),
+    }
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as client:
+        for enabled in (True, False):
+            main.gemini_service.single_flight.enabled = enabled
+            print(f"\nCoalescing {'enabled' if enabled else 'disabled'} ({args.clients} concurrent clients, "
+                  f"{args.latency * 1000:.0f} ms per model call)")
+            print(f"  {'request':<24}{'model calls':>12}{'wall':>9}{'p50':>9}{'p95':>9}")
+            for name, request in requests.items():
+                before = model.calls
+                latencies, wall = await fire(client, args.clients, request)
+                stats = percentiles(latencies)
+                print(f"  {name:<24}{model.calls - before:>12}{wall:>8.2f}s"
+                      f"{stats['p50']:>8.2f}s{stats['p95']:>8.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.2)
+    asyncio.run(run(parser.parse_args()))
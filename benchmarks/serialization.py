@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Serialization time and wire size of the largest JSON responses.
+
+Compares the previous path (pydantic .dict(), FastAPI's jsonable_encoder,
+stdlib json.dumps) with the current one (pydantic serializing straight to
+JSON bytes) for the full report catalog (/api/reports) and a storyboard
+(/api/generate-storyboard, generated by the fake model), and the size of
+each payload uncompressed, gzip-compressed and brotli-compressed (if the
+brotli package is installed) at the middleware's settings.
+
+Usage:
+    python -m benchmarks.serialization [--repeat 50]
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.encoders import jsonable_encoder
+
+from config import settings
+from data.seed_data import get_seed_data
+from models import ReportData
+from services.compression import brotli
+from services.fake_model import FakeModel
+from services.gemini_service import GeminiService
+from services.model_client import ModelClient
+from services.responses import ModelListJSON, dumps
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        body = fn()
+    return (time.perf_counter() - start) / repeat, body
+
+
+def report(name, legacy, current, repeat):
+    old_time, old_body = timed(legacy, repeat)
+    new_time, new_body = timed(current, repeat)
+    assert json.loads(old_body) == json.loads(new_body)
+    gzipped = len(gzip.compress(new_body, compresslevel=settings.COMPRESSION_GZIP_LEVEL))
+    brotli_size = f"{len(brotli.compress(new_body, quality=settings.COMPRESSION_BROTLI_QUALITY)):>10,}" if brotli else f"{'n/a':>10}"
+    print(f"{name:<12}{old_time * 1000:>10.2f}ms{new_time * 1000:>10.2f}ms{old_time / new_time:>8.1f}x"
+          f"{len(new_body):>12,}{gzipped:>10,}{brotli_size}")
+
+
+def run(args):
+    reports = [ReportData(**data) for data in get_seed_data()]
+    model = FakeModel(latency_ms=0, latency_sigma=0, ms_per_token=0, failure_rate=0)
+    service = GeminiService(ModelClient(requests_per_minute=6000), model=model)
+    storyboard = asyncio.run(service.generate_storyboard(reports))
+    service.client.shutdown()
+    reports_json = ModelListJSON(ReportData)
+
+    print(f"{'payload':<12}{'old encode':>12}{'new encode':>12}{'speedup':>9}{'bytes':>12}{'gzip':>10}{'brotli':>10}")
+    report("catalog",
+           lambda: json.dumps(jsonable_encoder({"reports": [r.dict() for r in reports]})).encode("utf-8"),
+           lambda: reports_json.wrapped("reports", reports), args.repeat)
+    report("storyboard",
+           lambda: json.dumps(jsonable_encoder(storyboard.dict())).encode("utf-8"),
+           lambda: dumps(storyboard), args.repeat)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=50)
+    run(parser.parse_args())
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Failed-generation rate and wasted tokens: prose JSON parsing vs schema + repair.
+
+A fake model answers extraction prompts and corrupts a share of its answers
+the ways model JSON breaks in practice: truncated output, a raw newline inside
+a string, a markdown fence with prose around it, and a field of the wrong type.
+The legacy pipeline is the chain create_report_from_text used before
+(json.loads, _extract_and_parse_json, then _create_fallback_report); the new
+one validates against the response schema and makes one repair call. The
+same fault sequence is replayed for both, so the numbers are directly
+comparable. A generation counts as failed when the report falls back to the
+heuristic structure or cannot be built at all; wasted tokens are the prompt
+and output tokens of calls whose output was discarded.
+
+Usage:
+    python -m benchmarks.structured_output [--reports 200] [--fault-rate 0.2]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from models import ReportData
+from services.gemini_service import GeminiService
+from services.model_client import ModelClient
+
+FAULTS = ("truncated", "raw_newline", "fenced", "wrong_type")
+
+
+def _report(i: int, schema: bool) -> dict:
+    chart = {"type": "bar", "title": "Volume", "description": "Construction volume", "xAxisKey": "year",
+             "dataKeys": [{"key": "volume", "color": "#8884d8"}]}
+    if schema:
+        chart["rows"] = [{"label": "2023", "values": [100]}, {"label": "2024", "values": [96.5]}]
+    else:
+        chart["data"] = [{"year": "2023", "volume": 100}, {"year": "2024", "volume": 96.5}]
+    return {"id": f"report-{i}", "title": f"Report {i}", "summary": "Construction volume falls.\nPrices rise.",
+            "keyFindings": ["Volume falls 3.5% in 2024", "Prices rise 2%"], "charts": [chart]}
+
+
+def _corrupt(payload: dict, fault: str) -> str:
+    text = json.dumps(payload)
+    if fault == "truncated":
+        return text[:len(text) * 2 // 3]
+    if fault == "raw_newline":
+        return text.replace("\\n", "\n")
+    if fault == "fenced":
+        return f"Here is the report:\n```json\n{text}\n```"
+    if fault == "wrong_type":
+        return json.dumps(dict(payload, keyFindings="; ".join(payload["keyFindings"])))
+    return text
+
+
+class _FaultyModel:
+    """Returns report JSON, corrupted according to a fixed fault plan; repair prompts are answered correctly."""
+
+    def __init__(self, plan, schema: bool):
+        self.plan = list(plan)
+        self.schema = schema
+        self.calls = 0
+        self.tokens = 0
+        self.first_prompt = None
+
+    def generate_content(self, prompt, generation_config=None):
+        self.calls += 1
+        self.first_prompt = self.first_prompt or prompt
+        if "does not match the required schema" in prompt:
+            text = json.dumps(_report(0, self.schema))
+        else:
+            i, fault = self.plan.pop(0)
+            text = _corrupt(_report(i, self.schema), fault)
+        self.tokens += ModelClient.estimate_tokens(prompt) + ModelClient.estimate_tokens(text)
+        return type("Response", (), {"text": text})()
+
+
+async def legacy_generation(service: GeminiService, text: str, prompt: str):
+    """The pre-schema chain: returns (report or None, fell_back, wasted_tokens)."""
+    response = await service.client.generate(service.model, prompt)
+    prompt_tokens = ModelClient.estimate_tokens(prompt)
+    wasted = 0
+    try:
+        parsed = json.loads(response.text)
+    except json.JSONDecodeError:
+        parsed = service._extract_and_parse_json(response.text)
+    fell_back = not parsed
+    if fell_back:
+        wasted = prompt_tokens + ModelClient.estimate_tokens(response.text)
+        parsed = service._create_fallback_report(text, "")
+    try:
+        report = ReportData(**dict(parsed, charts=service._build_charts(parsed.get("charts", [])), fullText=text))
+    except Exception:
+        return None, fell_back, prompt_tokens + ModelClient.estimate_tokens(response.text)
+    return report, fell_back, wasted
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+    plan = [(i, rng.choice(FAULTS) if rng.random() < args.fault_rate else None) for i in range(args.reports)]
+    source = "German construction volume declined by 3.5 percent in 2024. " * 40
+    client = ModelClient(requests_per_minute=1_000_000, tokens_per_minute=1_000_000_000)
+
+    schema = GeminiService(client)
+    schema.model, schema.enabled = _FaultyModel(plan, schema=True), True
+    for _ in plan:
+        await schema.create_report_from_text(source)
+    stats = schema.structured_stats.get_metrics()["report"]
+    schema_ok = args.reports - stats["failed"]
+
+    # Same prompt size for the legacy chain, so token counts compare like for like
+    legacy = GeminiService(client)
+    legacy.model, legacy.enabled = _FaultyModel(plan, schema=False), True
+    failed = wasted = 0
+    for _ in plan:
+        report, fell_back, waste = await legacy_generation(legacy, source, schema.model.first_prompt)
+        failed += report is None or fell_back
+        wasted += waste
+    legacy_ok = args.reports - failed
+
+    faults = sum(1 for _, fault in plan if fault)
+    print(f"{args.reports} generations, {faults} with injected faults ({', '.join(FAULTS)})\n")
+    print(f"{'pipeline':<32}{'model calls':>12}{'failed rate':>13}{'wasted tokens':>15}{'tokens/usable':>15}")
+    print(f"{'legacy (prose JSON + fallback)':<32}{legacy.model.calls:>12}"
+          f"{failed / args.reports:>13.1%}{wasted:>15}{legacy.model.tokens // max(legacy_ok, 1):>15}")
+    print(f"{'schema + one repair call':<32}{schema.model.calls:>12}"
+          f"{stats['failed_generation_rate']:>13.1%}{stats['wasted_tokens']:>15}"
+          f"{schema.model.tokens // max(schema_ok, 1):>15}")
+    print(f"\nschema pipeline: first pass valid {stats['first_pass_valid']}, salvaged {stats['salvaged']}, "
+          f"repaired {stats['repaired']}, failed {stats['failed']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reports", type=int, default=200)
+    parser.add_argument("--fault-rate", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=7)
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Timeline page latency as the catalog grows.
+
+Fills temporary databases with synthetic dated reports and times
+TimelineService pages: the first page uncached and cached, and a page deep
+in the timeline reached by its cursor. For reference it also times the
+previous endpoint body, which rebuilt the seed data list on every request
+(and only ever covered the seed reports).
+
+Usage:
+    python -m benchmarks.timeline [--sizes 100,1000,10000] [--repeat 200]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from data.seed_data import get_seed_data
+from models import ReportDB
+from services.database_service import DatabaseService
+from services.timeline_service import TimelineService, encode_cursor
+
+
+def filled_database(size: int) -> DatabaseService:
+    db_service = DatabaseService(os.path.join(tempfile.mkdtemp(prefix="timeline-bench-"), "bench.db"))
+    now = datetime.utcnow()
+    db = db_service.get_db()
+    try:
+        db.bulk_insert_mappings(ReportDB, [{
+            "id": f"report-{i:06d}", "title": f"Report {i}", "summary": "Summary of the report. " * 8,
+            "key_findings": "[]", "charts": "[]", "full_text": "Text.", "created_at": now, "updated_at": now,
+            "issue": str(i % 52 + 1), "published_on": date(2000, 1, 3) + timedelta(weeks=i),
+        } for i in range(size)])
+        db.commit()
+    finally:
+        db.close()
+    return db_service
+
+
+def timed(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def legacy_timeline():
+    return {"timeline": [{"id": r["id"], "title": r["title"], "summary": r["summary"]} for r in get_seed_data()]}
+
+
+def run(args):
+    print(f"seed-data rebuild (previous endpoint, 29 seed reports only): {timed(legacy_timeline, args.repeat):.3f}ms")
+    print(f"{'reports':>8}{'first page':>13}{'cached':>10}{'deep page':>12}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        db_service = filled_database(size)
+        service = TimelineService(db_service, page_size=20, cache_size=0)
+        uncached = timed(lambda: service.page(), args.repeat)
+        middle = db_service.get_timeline(size // 2, None)[-1]
+        cursor = encode_cursor(middle)
+        deep = timed(lambda: service.page(cursor), args.repeat)
+        cached_service = TimelineService(db_service, page_size=20)
+        cached = timed(lambda: cached_service.page(), args.repeat)
+        print(f"{size:>8}{uncached:>11.3f}ms{cached:>8.3f}ms{deep:>10.3f}ms")
+        db_service.engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100,1000,10000")
+    parser.add_argument("--repeat", type=int, default=200)
+    run(parser.parse_args())
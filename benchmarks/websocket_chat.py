@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Per-turn server overhead of chat over POST /api/chat/{report_id} versus the WebSocket channel.
+
+Starts the app under uvicorn with an instant offline model (no first-token
+latency, no per-token time), so what remains of a turn is the server's own
+work, and runs --turns sequential turns in one session each way:
+
+- POST: a form POST per turn, which loads the report and the session again;
+- WebSocket: one socket for the session, a question message per turn, the
+  answer streamed back.
+
+Reports the client-side latency per turn (p50/p99) and the server process's
+CPU time per turn. Also times, in-process, the per-turn report and session
+loads that the socket does only once.
+
+Usage:
+    python -m benchmarks.websocket_chat [--turns 200]
+"""
+
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.parse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.common import percentiles
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def cpu_seconds(pid: int) -> float:
+    with open(f"/proc/{pid}/stat") as stat:
+        fields = stat.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def post_turns(port: int, report_id: str, turns: int):
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    session_id, latencies = None, []
+    for i in range(turns):
+        form = {"message": f"Question {i}: what drives the outlook?"}
+        if session_id:
+            form["session_id"] = session_id
+        start = time.perf_counter()
+        connection.request("POST", f"/api/chat/{report_id}", urllib.parse.urlencode(form),
+                           {"Content-Type": "application/x-www-form-urlencoded"})
+        response = connection.getresponse()
+        body = json.loads(response.read())
+        latencies.append(time.perf_counter() - start)
+        assert response.status == 200, body
+        session_id = body["session_id"]
+    connection.close()
+    return latencies
+
+
+async def socket_turns(port: int, report_id: str, turns: int):
+    import websockets
+    latencies = []
+    async with websockets.connect(f"ws://127.0.0.1:{port}/api/chat/{report_id}/ws") as ws:
+        assert json.loads(await ws.recv())["type"] == "session"
+        for i in range(turns):
+            start = time.perf_counter()
+            await ws.send(json.dumps({"type": "question", "message": f"Question {i}: what drives the outlook?"}))
+            while True:
+                message = json.loads(await ws.recv())
+                if message["type"] in ("answer", "error"):
+                    break
+            latencies.append(time.perf_counter() - start)
+            assert message["type"] == "answer", message
+    return latencies
+
+
+def loads_per_turn(db_path: str, report_id: str, session_id: str, runs: int = 200) -> float:
+    """Seconds the POST flow spends loading the report and the session each turn."""
+    from services.database_service import DatabaseService
+    db_service = DatabaseService(db_path)
+    start = time.perf_counter()
+    for _ in range(runs):
+        db_service.get_report_by_id(report_id)
+        db_service.get_chat_session(session_id)
+    return (time.perf_counter() - start) / runs
+
+
+def run(args):
+    port = free_port()
+    db_path = os.path.join(tempfile.mkdtemp(prefix="websocket-chat-bench-"), "bench.db")
+    env = dict(os.environ, AI_BACKEND="fake", DEBUG="False", NARRATIVE_WARMER_ENABLED="False",
+               RATE_LIMIT_ENABLED="False", FAKE_MODEL_LATENCY_MS="0", FAKE_MODEL_MS_PER_TOKEN="0",
+               MODEL_REQUESTS_PER_MINUTE="1000000", DATABASE_PATH=db_path)
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+                               "--log-level", "error"], cwd=ROOT, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        for _ in range(300):
+            try:
+                connection = http.client.HTTPConnection("127.0.0.1", port)
+                connection.request("GET", "/api/reports")
+                reports = json.loads(connection.getresponse().read())["reports"]
+                break
+            except OSError:
+                time.sleep(0.1)
+        report_id = reports[0]["id"]
+        post_turns(port, report_id, 5)  # warm-up: retrieval index, prompt context, lazy imports
+        asyncio.run(socket_turns(port, report_id, 5))
+
+        print(f"{args.turns} sequential chat turns, instant offline model")
+        print(f"{'transport':<12}{'p50':>10}{'p99':>10}{'server CPU/turn':>18}")
+        results = {}
+        for name in ("POST", "WebSocket"):
+            before = cpu_seconds(server.pid)
+            if name == "POST":
+                latencies = post_turns(port, report_id, args.turns)
+            else:
+                latencies = asyncio.run(socket_turns(port, report_id, args.turns))
+            results[name] = (cpu_seconds(server.pid) - before) / args.turns
+            stats = percentiles(latencies)
+            print(f"{name:<12}{stats['p50'] * 1000:>8.2f}ms{stats['p99'] * 1000:>8.2f}ms"
+                  f"{results[name] * 1000:>16.2f}ms")
+        print(f"WebSocket saves {(results['POST'] - results['WebSocket']) * 1000:.2f}ms of server CPU per turn")
+    finally:
+        server.terminate()
+        server.wait(30)
+
+    from services.database_service import DatabaseService
+    session_id = DatabaseService(db_path).create_chat_session(report_id).id
+    print(f"report + session load per POST turn (in-process): "
+          f"{loads_per_turn(db_path, report_id, session_id) * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=200)
+    run(parser.parse_args())
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Read throughput of the production launcher (serve.py) from 1 to N workers.
+
+For each worker count, starts `serve.py` on a free port and a fresh seeded
+database with the offline model, then drives it from --clients client
+processes, each keeping --concurrency keep-alive requests in flight, cycling
+over the report catalog, single reports and the timeline. Throughput only
+scales while there are CPUs to spare for both the workers and the clients.
+
+Usage:
+    python -m benchmarks.workers [--workers 1,2,4] [--clients 2] [--concurrency 8] [--duration 10]
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.common import percentiles
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def drive(base_url, paths, concurrency, warmup, duration):
+    import httpx
+    latencies = []
+    async with httpx.AsyncClient(base_url=base_url, headers={"Accept-Encoding": "identity"},
+                                 limits=httpx.Limits(max_connections=concurrency)) as client:
+        async def loop(offset, until, record):
+            i = offset
+            while time.perf_counter() < until:
+                start = time.perf_counter()
+                response = await client.get(paths[i % len(paths)])
+                response.raise_for_status()
+                if record:
+                    latencies.append(time.perf_counter() - start)
+                i += 1
+
+        await asyncio.gather(*(loop(n, time.perf_counter() + warmup, False) for n in range(concurrency)))
+        await asyncio.gather(*(loop(n, time.perf_counter() + duration, True) for n in range(concurrency)))
+    return latencies
+
+
+def client_process(base_url, paths, concurrency, warmup, duration):
+    return asyncio.run(drive(base_url, paths, concurrency, warmup, duration))
+
+
+def wait_ready(base_url, process, timeout=60):
+    import httpx
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"serve.py exited with {process.returncode}")
+        try:
+            if httpx.get(f"{base_url}/api/reports").status_code == 200:
+                return httpx.get(f"{base_url}/api/reports").json()["reports"]
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("serve.py did not become ready")
+
+
+def run_workers(workers, args):
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = dict(os.environ, AI_BACKEND="fake", DEBUG="False", WORKER_MAX_REQUESTS="0", RATE_LIMIT_ENABLED="False",
+               DATABASE_PATH=os.path.join(tempfile.mkdtemp(prefix="workers-bench-"), "bench.db"))
+    process = subprocess.Popen([sys.executable, "serve.py", "--workers", str(workers), "--host", "127.0.0.1",
+                                "--port", str(port)], cwd=ROOT, env=env,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        reports = wait_ready(base_url, process)
+        paths = ["/api/reports", "/api/timeline"] + [f"/api/reports/{report['id']}" for report in reports[:8]]
+        with multiprocessing.get_context("spawn").Pool(args.clients) as pool:
+            results = pool.starmap(client_process, [(base_url, paths, args.concurrency, args.warmup, args.duration)]
+                                   * args.clients)
+    finally:
+        process.terminate()
+        process.wait(60)
+    latencies = [latency for result in results for latency in result]
+    return len(latencies) / args.duration, percentiles(latencies)
+
+
+def run(args):
+    print(f"{os.cpu_count()} CPUs, {args.clients} client processes x {args.concurrency} in flight, "
+          f"{args.duration:g}s per run")
+    print(f"{'workers':>8}{'requests/s':>12}{'p50':>10}{'p99':>10}{'scaling':>9}")
+    baseline = None
+    for workers in (int(w) for w in args.workers.split(",")):
+        throughput, stats = run_workers(workers, args)
+        baseline = baseline or throughput
+        print(f"{workers:>8}{throughput:>12.0f}{stats['p50'] * 1000:>8.2f}ms{stats['p99'] * 1000:>8.2f}ms"
+              f"{throughput / baseline:>8.2f}x")
+
+
+if __name__ == "__main__":
+    default_workers = sorted({1, 2, os.cpu_count() or 1})
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default=",".join(str(w) for w in default_workers))
+    parser.add_argument("--clients", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=float, default=2)
+    parser.add_argument("--duration", type=float, default=10)
+    run(parser.parse_args())
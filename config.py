@@ -11,28 +11,112 @@ class Settings:
     
     # Database Configuration
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./dashboard.db")
-    DATABASE_PATH: str = "./dashboard.db"
+    DATABASE_PATH: str = os.getenv("DATABASE_PATH", "./dashboard.db")
     
     # Application Configuration
     DEBUG: bool = os.getenv("DEBUG", "False").lower() == "true"
     HOST: str = os.getenv("HOST", "0.0.0.0")
     PORT: int = int(os.getenv("PORT", "8000"))
     
+    # Production Server Configuration (serve.py)
+    WORKERS: int = int(os.getenv("WORKERS", "0"))  # worker processes; 0 = one per CPU
+    WORKER_MAX_REQUESTS: int = int(os.getenv("WORKER_MAX_REQUESTS", "10000"))  # recycle a worker after this many requests; 0 = never
+    WORKER_MAX_REQUESTS_JITTER: int = int(os.getenv("WORKER_MAX_REQUESTS_JITTER", "1000"))  # so workers do not recycle together
+    WORKER_GRACEFUL_TIMEOUT: int = int(os.getenv("WORKER_GRACEFUL_TIMEOUT", "30"))  # seconds to finish in-flight requests on stop
+    
     # File Upload Configuration
     MAX_FILE_SIZE: int = 50 * 1024 * 1024  # 50MB
+    PDF_EXECUTOR_WORKERS: int = int(os.getenv("PDF_EXECUTOR_WORKERS", "2"))  # threads for PDF validation/extraction
     ALLOWED_EXTENSIONS: set = {".pdf"}
     UPLOAD_DIR: Path = Path("uploads")
     
     # AI Configuration
-    AI_MODEL: str = "gemini-2.5-flash"
+    AI_BACKEND: str = os.getenv("AI_BACKEND", "gemini").lower()  # "gemini", or "fake" for an offline deterministic model
+    AI_MODEL: str = os.getenv("AI_MODEL", "gemini-2.5-flash")  # primary model of every task route
+    AI_FALLBACK_MODEL: str = os.getenv("AI_FALLBACK_MODEL", "gemini-2.5-flash-lite")  # used when the primary errors or is slow; empty disables
+    AI_ROUTES: str = os.getenv("AI_ROUTES", "")  # JSON per-task route overrides, e.g. {"chat": {"latency_slo": 5}}
+    AI_ROUTE_COOLDOWN_SECONDS: float = float(os.getenv("AI_ROUTE_COOLDOWN_SECONDS", "60"))  # skip a failing primary this long
+    AI_HEDGING_ENABLED: bool = os.getenv("AI_HEDGING_ENABLED", "False").lower() == "true"  # duplicate slow chat/narrative calls
+    AI_HEDGE_PERCENTILE: float = float(os.getenv("AI_HEDGE_PERCENTILE", "95"))  # hedge calls slower than this latency percentile
+    AI_HEDGE_MIN_DELAY: float = float(os.getenv("AI_HEDGE_MIN_DELAY", "0.5"))  # never hedge sooner than this (seconds)
+    AI_HEDGE_MAX_RATE: float = float(os.getenv("AI_HEDGE_MAX_RATE", "0.1"))  # at most this fraction of calls is hedged
     MAX_TOKENS: int = 8192
+    PROMPT_NARRATIVE_EXCERPT_TOKENS: int = int(os.getenv("PROMPT_NARRATIVE_EXCERPT_TOKENS", "1000"))  # full-text excerpt in narrative prompts
+    PROMPT_STORYBOARD_SOURCE_TOKENS: int = int(os.getenv("PROMPT_STORYBOARD_SOURCE_TOKENS", "12000"))  # all reports in the storyboard prompt
+    ADMISSION_CONTROL_ENABLED: bool = os.getenv("ADMISSION_CONTROL_ENABLED", "True").lower() == "true"  # shed load on AI endpoints
+    ADMISSION_LIMITS: str = os.getenv("ADMISSION_LIMITS", "")  # JSON per-endpoint overrides, e.g. {"chat": {"concurrency": 4}}
+    AI_REQUEST_COALESCING: bool = os.getenv("AI_REQUEST_COALESCING", "True").lower() == "true"  # share identical in-flight calls
+    
+    # Rate Limiting Configuration
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "True").lower() == "true"  # per-client limits on /api routes
+    RATE_LIMITS: str = os.getenv("RATE_LIMITS", "")  # JSON per-class overrides of read/upload/ai, e.g. {"ai": {"requests": 10, "window": 60}}
+    RATE_LIMIT_KEY_HEADER: str = os.getenv("RATE_LIMIT_KEY_HEADER", "")  # identify clients by this header (e.g. X-API-Key) instead of IP
+    RATE_LIMIT_SYNC_SECONDS: float = float(os.getenv("RATE_LIMIT_SYNC_SECONDS", "0.5"))  # how often workers share their counts
+    
+    # Response Compression Configuration
+    COMPRESSION_MIN_SIZE: int = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))  # smaller responses are sent uncompressed
+    COMPRESSION_GZIP_LEVEL: int = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+    COMPRESSION_BROTLI_QUALITY: int = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))  # used if the brotli package is installed
+    
+    # Narrative Pre-generation Configuration
+    NARRATIVE_WARMER_ENABLED: bool = os.getenv("NARRATIVE_WARMER_ENABLED", "False").lower() == "true"
+    NARRATIVE_WARMER_PER_MINUTE: float = float(os.getenv("NARRATIVE_WARMER_PER_MINUTE", "4"))  # background generations per minute
+    NARRATIVE_WARMER_STARTUP_DELAY: float = float(os.getenv("NARRATIVE_WARMER_STARTUP_DELAY", "10"))  # seconds after startup
+    NARRATIVE_WARMER_POLL_SECONDS: float = float(os.getenv("NARRATIVE_WARMER_POLL_SECONDS", "10"))  # new-report and warmer-lock checks
+    
+    # Timeline Configuration
+    TIMELINE_PAGE_SIZE: int = int(os.getenv("TIMELINE_PAGE_SIZE", "20"))  # timeline entries per page
+    
+    # Chart Downsampling Configuration
+    CHART_DOWNSAMPLE_CACHE_SIZE: int = int(os.getenv("CHART_DOWNSAMPLE_CACHE_SIZE", "256"))  # report resolutions remembered in memory
+    
+    # Chat Retrieval Configuration
+    CHAT_CHUNK_SIZE: int = int(os.getenv("CHAT_CHUNK_SIZE", "1200"))  # characters per indexed chunk
+    CHAT_CHUNK_OVERLAP: int = int(os.getenv("CHAT_CHUNK_OVERLAP", "200"))
+    CHAT_TOP_K: int = int(os.getenv("CHAT_TOP_K", "4"))  # chunks included in each chat prompt
+    CHAT_HISTORY_MESSAGES: int = int(os.getenv("CHAT_HISTORY_MESSAGES", "6"))  # recent messages sent verbatim
+    CHAT_SUMMARY_TRIGGER: int = int(os.getenv("CHAT_SUMMARY_TRIGGER", "10"))  # fold history beyond this many messages
+    CHAT_SUMMARY_MAX_TOKENS: int = 256
+    
+    # Report Extraction Configuration
+    EXTRACTION_CHUNK_SIZE: int = int(os.getenv("EXTRACTION_CHUNK_SIZE", "8000"))  # characters per extraction call
+    EXTRACTION_CHUNK_OVERLAP: int = int(os.getenv("EXTRACTION_CHUNK_OVERLAP", "300"))
+    EXTRACTION_CONCURRENCY: int = int(os.getenv("EXTRACTION_CONCURRENCY", "4"))  # parallel chunk extractions per report
+    EXTRACTION_MAX_FINDINGS: int = int(os.getenv("EXTRACTION_MAX_FINDINGS", "8"))
+    
+    # Model Client Configuration (shared by all Gemini calls)
+    MODEL_REQUESTS_PER_MINUTE: int = int(os.getenv("MODEL_REQUESTS_PER_MINUTE", "60"))
+    MODEL_TOKENS_PER_MINUTE: int = int(os.getenv("MODEL_TOKENS_PER_MINUTE", "1000000"))
+    MODEL_RATE_LIMIT_WORKERS: int = max(int(os.getenv("MODEL_RATE_LIMIT_WORKERS", "1")), 1)  # processes splitting the limits above; set by serve.py
+    MODEL_MAX_CONCURRENCY: int = int(os.getenv("MODEL_MAX_CONCURRENCY", "8"))  # interactive calls (chat, narratives)
+    MODEL_BATCH_CONCURRENCY: int = int(os.getenv("MODEL_BATCH_CONCURRENCY", "4"))  # extraction and storyboard calls
+    MODEL_MAX_RETRIES: int = int(os.getenv("MODEL_MAX_RETRIES", "3"))
+    MODEL_RETRY_BASE_DELAY: float = float(os.getenv("MODEL_RETRY_BASE_DELAY", "1.0"))  # seconds
+    MODEL_RETRY_MAX_DELAY: float = float(os.getenv("MODEL_RETRY_MAX_DELAY", "30.0"))
+    MODEL_BREAKER_FAILURE_THRESHOLD: int = int(os.getenv("MODEL_BREAKER_FAILURE_THRESHOLD", "5"))
+    MODEL_BREAKER_RESET_SECONDS: float = float(os.getenv("MODEL_BREAKER_RESET_SECONDS", "30"))
+    
+    # Fake Model Configuration (AI_BACKEND=fake)
+    FAKE_MODEL_LATENCY_MS: float = float(os.getenv("FAKE_MODEL_LATENCY_MS", "400"))  # median time to first token
+    FAKE_MODEL_LATENCY_SIGMA: float = float(os.getenv("FAKE_MODEL_LATENCY_SIGMA", "0.5"))  # log-normal spread
+    FAKE_MODEL_MS_PER_TOKEN: float = float(os.getenv("FAKE_MODEL_MS_PER_TOKEN", "2"))  # generation time per output token
+    FAKE_MODEL_FAILURE_RATE: float = float(os.getenv("FAKE_MODEL_FAILURE_RATE", "0"))  # share of calls failing with a retryable error
+    FAKE_MODEL_STRAGGLER_RATE: float = float(os.getenv("FAKE_MODEL_STRAGGLER_RATE", "0"))  # share of calls with a much slower first token
+    FAKE_MODEL_STRAGGLER_FACTOR: float = float(os.getenv("FAKE_MODEL_STRAGGLER_FACTOR", "10"))  # how much slower stragglers are
+    FAKE_MODEL_SEED: int = int(os.getenv("FAKE_MODEL_SEED", "0"))
+    
+    # Usage Accounting Configuration
+    MODEL_INPUT_COST_PER_MILLION: float = float(os.getenv("MODEL_INPUT_COST_PER_MILLION", "0.30"))  # USD per 1M prompt tokens
+    MODEL_OUTPUT_COST_PER_MILLION: float = float(os.getenv("MODEL_OUTPUT_COST_PER_MILLION", "2.50"))  # USD per 1M output tokens
+    USAGE_FLUSH_SIZE: int = int(os.getenv("USAGE_FLUSH_SIZE", "50"))  # buffered usage records written per batch
+    USAGE_FLUSH_SECONDS: float = float(os.getenv("USAGE_FLUSH_SECONDS", "10"))  # write buffered records at least this often
     
     def __init__(self):
         # Create necessary directories
         self.UPLOAD_DIR.mkdir(exist_ok=True)
         
         # Validate required settings
-        if not self.GEMINI_API_KEY:
+        if not self.GEMINI_API_KEY and self.AI_BACKEND != "fake":
             print("Warning: GEMINI_API_KEY not set. AI features will be disabled.")
 
 settings = Settings()
\ No newline at end of file
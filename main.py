@@ -1,20 +1,36 @@
-from fastapi import FastAPI, Request, UploadFile, File, HTTPException, Form, Depends
+from fastapi import FastAPI, Request, UploadFile, File, HTTPException, Form, Depends, WebSocket, WebSocketDisconnect
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-from typing import List, Optional
-import uvicorn
+from typing import List, Optional, Tuple
+import asyncio
 import logging
+import orjson
 from pathlib import Path
 
 from models import ReportData, StoryboardData, UploadResponse
 from services.database_service import DatabaseService
-from services.gemini_service import GeminiService
+from services.gemini_service import ChatUnavailable, GeminiService
 from services.pdf_service import PDFService
+from services.retrieval_service import RetrievalService
+from services.chat_service import ChatService, ChatSessionError
+from services.chat_channel import ChatChannel
+from services.narrative_service import NarrativeService, NarrativeWarmer
+from services.timeline_service import TimelineService
+from services.catalog_index import CatalogIndex
+from services.chart_downsampling import ChartDownsampler
+from services.admission import AdmissionController, Overloaded
+from services.rate_limit import RateLimitMiddleware, SlidingWindowLimiter
+from services.executors import InstrumentedExecutor
+from services.file_lock import FileLock, lock_path
+from services.http_cache import cached_json, not_modified, strong_etag
+from services.responses import FastJSONResponse, dumps
+from services.compression import CompressionMiddleware
+from services.model_client import ModelClient
+from services.usage_service import USAGE_GROUPS, UsageContextMiddleware, UsageRecorder
 from config import settings
-from data.seed_data import get_seed_data
 
 # Setup logging
 logging.basicConfig(
@@ -27,9 +43,42 @@ logger = logging.getLogger(__name__)
 # DatabaseService: Handles all database operations
 # GeminiService: Handles AI interactions
 # PDFService: Handles PDF extraction/validation
+# RetrievalService: Selects relevant report sections for chat
+# ChatService: Manages multi-turn chat sessions
+# NarrativeService: Serves stored narratives; NarrativeWarmer pre-generates them
+# UsageRecorder: Records token use and latency of every model call
+# TimelineService: Serves cached, paginated highlights timeline pages
+# CatalogIndex: Serves the cached index of all reports the dashboard starts from
+# ChartDownsampler: Caches large chart series downsampled to the resolution clients ask for
+# AdmissionController: Limits concurrent chat, narrative and storyboard requests, shedding the excess
+# SlidingWindowLimiter: Counts each client's API requests per route class, shared across workers
 db_service = DatabaseService()
-gemini_service = GeminiService()
+usage_recorder = UsageRecorder(db_service)
+gemini_service = GeminiService(ModelClient(usage=usage_recorder))
 pdf_service = PDFService()
+retrieval_service = RetrievalService(db_service)
+chat_service = ChatService(db_service, gemini_service, retrieval_service)
+admission = AdmissionController()
+narrative_service = NarrativeService(db_service, gemini_service, gate=admission.gate("narrative"))
+narrative_warmer = NarrativeWarmer(narrative_service)
+timeline_service = TimelineService(db_service)
+catalog_index = CatalogIndex(db_service)
+chart_downsampler = ChartDownsampler()
+rate_limiter = SlidingWindowLimiter(db_service=db_service)
+
+# PDF parsing is CPU-bound; it gets its own threads so it neither blocks the
+# event loop nor competes with model calls for workers
+pdf_executor = InstrumentedExecutor("pdf", settings.PDF_EXECUTOR_WORKERS)
+
+# With several worker processes (serve.py) only the one holding this lock runs the narrative warmer
+warmer_lock = FileLock(lock_path(settings.DATABASE_PATH, "narrative-warmer"))
+
+async def claim_narrative_warmer():
+    """Run the narrative warmer once this worker holds the warmer lock."""
+    # The holder may be a worker being replaced (recycling, SIGHUP), so keep trying until it is gone
+    while not warmer_lock.acquire(blocking=False):
+        await asyncio.sleep(settings.NARRATIVE_WARMER_POLL_SECONDS)
+    narrative_warmer.start(delay=settings.NARRATIVE_WARMER_STARTUP_DELAY)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -38,14 +87,31 @@ async def lifespan(app: FastAPI):
     logger.info("Starting German Economic Insights Dashboard...")
     db_service.initialize_database()
     
-    # Log database stats
-    stats = db_service.get_database_stats()
-    logger.info(f"Database initialized: {stats}")
+    # Log database stats (only queried when they would be logged)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(f"Database initialized: {db_service.get_database_stats()}")
+    
+    warmer_claim = None
+    if settings.NARRATIVE_WARMER_ENABLED and gemini_service.enabled:
+        warmer_claim = asyncio.ensure_future(claim_narrative_warmer())
+    
+    rate_limiter.start()
+    usage_recorder.start()
+    # In the background, so startup does not wait for the SDK import
+    sdk_preload = asyncio.ensure_future(gemini_service.preload())
     
     yield
     
     # Shutdown
     logger.info("Shutting down German Economic Insights Dashboard...")
+    sdk_preload.cancel()
+    if warmer_claim is not None:
+        warmer_claim.cancel()
+    await narrative_warmer.stop()
+    await chat_service.stop()
+    warmer_lock.release()
+    rate_limiter.stop()
+    usage_recorder.stop()
 
 # Initialize FastAPI app with lifespan
 app = FastAPI(
@@ -53,7 +119,8 @@ app = FastAPI(
     description="AI-powered economic analysis dashboard",
     version="1.0.0",
     debug=settings.DEBUG,
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
 # Add CORS middleware
@@ -65,32 +132,107 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Attribute model calls to the endpoint and report they were made for
+app.add_middleware(UsageContextMiddleware)
+
+# Compress large complete responses (report catalog, storyboards, static assets)
+app.add_middleware(CompressionMiddleware)
+
+# Per-client request limits; outermost, so requests over the limit cost nothing else
+app.add_middleware(RateLimitMiddleware, limiter=rate_limiter)
+
 # Setup templates and static files
 templates = Jinja2Templates(directory="templates")
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded):
+    """Answer requests shed by admission control with 429/503 and when to retry."""
+    return FastJSONResponse({"detail": str(exc)}, status_code=exc.status_code,
+                            headers={"Retry-After": str(exc.retry_after)})
+
+def admitted(endpoint: str):
+    """Dependency holding one of the endpoint's admission slots until its response, streamed or not, is sent."""
+    gate = admission.gate(endpoint)
+    
+    async def hold_slot():
+        async with gate.admit():
+            yield
+    
+    return hold_slot
+
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request):
     """Render the main dashboard page."""
     return templates.TemplateResponse("index.html", {"request": request})
 
 @app.get("/api/reports")
-async def get_reports():
-    """Get all reports from the database."""
+async def get_reports(request: Request):
+    """
+    Get all reports from the database.
+    
+    The ETag covers every report's id and last change; a matching
+    If-None-Match is answered with 304 before any report is loaded.
+    """
     try:
-        reports = db_service.get_reports()
-        return {"reports": [report.dict() for report in reports]}
+        etag = strong_etag("catalog", *db_service.get_catalog_versions())
+        unchanged = not_modified(request, etag)
+        if unchanged:
+            return unchanged
+        # Reports are sent as the JSON stored with their rows, without decoding them
+        reports = db_service.get_reports_json()
+        # Tagged with what was actually loaded, in case a report changed since the check
+        etag = strong_etag("catalog", *((report_id, updated_at) for report_id, updated_at, _ in reports))
+        body = ",".join(rendered for _, _, rendered in reports)
+        return cached_json(f'{{"reports":[{body}]}}'.encode("utf-8"), etag)
     except Exception as e:
         logger.error(f"Error fetching reports: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch reports")
 
+@app.get("/api/catalog")
+async def get_catalog(request: Request):
+    """
+    List every report's id, title and last change, without their content.
+    
+    The dashboard loads this index on start and fetches report bodies from
+    /api/reports/{report_id} when they are shown; `updated_at` tells whether a
+    stored copy is still current. Conditional on If-None-Match, like /api/reports.
+    """
+    etag, body = catalog_index.get()
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+    return cached_json(body, etag)
+
 @app.get("/api/reports/{report_id}")
-async def get_report(report_id: str):
-    """Get a specific report by ID."""
-    report = db_service.get_report_by_id(report_id)
-    if not report:
+async def get_report(report_id: str, request: Request, max_points: Optional[int] = None):
+    """
+    Get a specific report by ID (conditional on If-None-Match, like /api/reports).
+
+    With max_points, charts with more data points than that are downsampled to
+    at most max_points: line charts to the points that keep each series' shape,
+    bar and pie charts to their largest categories plus "Other". Such charts
+    carry their original point count as sourcePoints.
+    """
+    if max_points is not None and max_points < 3:
+        raise HTTPException(status_code=400, detail="max_points must be at least 3")
+    resolution = () if max_points is None else (max_points,)
+    version = db_service.get_report_version(report_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Report not found")
+    etag = strong_etag("report", report_id, version, *resolution)
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+    stored = db_service.get_report_json(report_id)
+    if not stored:
         raise HTTPException(status_code=404, detail="Report not found")
-    return report.dict()
+    updated_at, rendered = stored
+    if max_points is None:
+        body = rendered.encode("utf-8")
+    else:
+        body = chart_downsampler.report_json(report_id, updated_at, rendered, max_points)
+    return cached_json(body, strong_etag("report", report_id, updated_at, *resolution))
 
 @app.delete("/api/reports/{report_id}")
 async def delete_report(report_id: str):
@@ -98,8 +240,74 @@ async def delete_report(report_id: str):
     success = db_service.delete_report(report_id)
     if not success:
         raise HTTPException(status_code=404, detail="Report not found")
+    retrieval_service.invalidate(report_id)
     return {"message": "Report deleted successfully"}
 
+async def _read_upload(file: UploadFile, file_index: int) -> Tuple[Optional[bytes], Optional[str]]:
+    """Check an uploaded file's name and size and read it; returns (content, None) or (None, error)."""
+    if not file.filename:
+        return None, f"File {file_index + 1}: No filename provided"
+    
+    if not file.filename.lower().endswith('.pdf'):
+        return None, f"File '{file.filename}': Not a PDF file (only PDF files are supported)"
+    
+    # Check file size
+    if hasattr(file, 'size') and file.size is not None:
+        if file.size == 0:
+            return None, f"File '{file.filename}': Empty file"
+        
+        if file.size > settings.MAX_FILE_SIZE:
+            size_mb = file.size / (1024 * 1024)
+            max_mb = settings.MAX_FILE_SIZE / (1024 * 1024)
+            return None, f"File '{file.filename}': Too large ({size_mb:.1f}MB, max: {max_mb}MB)"
+        
+        logger.info(f"File size: {file.size / (1024 * 1024):.2f}MB")
+    
+    # Read file content
+    try:
+        content = await file.read()
+        logger.info(f"Successfully read {len(content)} bytes from {file.filename}")
+        return content, None
+    except Exception as e:
+        return None, f"File '{file.filename}': Could not read file content - {str(e)}"
+
+async def _extract_upload_text(filename: str, content: bytes) -> Tuple[Optional[str], Optional[str]]:
+    """Validate a PDF and extract its text; returns (text, None) or (None, error)."""
+    # Validate PDF format
+    is_valid, validation_msg = await pdf_executor.run(pdf_service.validate_pdf, content)
+    if not is_valid:
+        return None, f"File '{filename}': {validation_msg}"
+    
+    logger.info(f"PDF validation passed: {validation_msg}")
+    
+    # Extract text from PDF
+    try:
+        text = await pdf_executor.run(pdf_service.extract_text_from_pdf, content)
+        logger.info(f"Text extraction completed. Length: {len(text)} characters")
+    except Exception as e:
+        return None, f"File '{filename}': PDF text extraction failed - {str(e)}"
+    
+    if not text or not text.strip():
+        return None, f"File '{filename}': No text could be extracted. This might be an image-based PDF or scanned document."
+    
+    # Check if extracted text is meaningful
+    if len(text.strip()) < 100:
+        return None, f"File '{filename}': Extracted text too short ({len(text)} characters). Minimum 100 characters required."
+    
+    logger.info(f"Text extraction successful for {filename}")
+    return text, None
+
+def _save_new_report(report_data: ReportData) -> ReportData:
+    """Save a generated report under a unique ID."""
+    original_id = report_data.id
+    counter = 1
+    while db_service.get_report_by_id(report_data.id):
+        report_data.id = f"{original_id}_{counter}"
+        counter += 1
+    saved = db_service.save_report(report_data)
+    narrative_warmer.enqueue(saved.id)
+    return saved
+
 @app.post("/api/reports/upload")
 async def upload_reports(files: List[UploadFile] = File(...)):
     """Upload and process PDF files to create new reports with enhanced error handling."""
@@ -115,64 +323,16 @@ async def upload_reports(files: List[UploadFile] = File(...)):
         try:
             logger.info(f"Processing file {file_index + 1}/{len(files)}: {file.filename}")
             
-            # Validate file properties
-            if not file.filename:
-                errors.append(f"File {file_index + 1}: No filename provided")
-                continue
-            
-            if not file.filename.lower().endswith('.pdf'):
-                errors.append(f"File '{file.filename}': Not a PDF file (only PDF files are supported)")
-                continue
-            
-            # Check file size
-            if hasattr(file, 'size') and file.size is not None:
-                if file.size == 0:
-                    errors.append(f"File '{file.filename}': Empty file")
-                    continue
-                
-                if file.size > settings.MAX_FILE_SIZE:
-                    size_mb = file.size / (1024 * 1024)
-                    max_mb = settings.MAX_FILE_SIZE / (1024 * 1024)
-                    errors.append(f"File '{file.filename}': Too large ({size_mb:.1f}MB, max: {max_mb}MB)")
-                    continue
-                
-                logger.info(f"File size: {file.size / (1024 * 1024):.2f}MB")
-            
-            # Read file content
-            try:
-                content = await file.read()
-                logger.info(f"Successfully read {len(content)} bytes from {file.filename}")
-            except Exception as e:
-                errors.append(f"File '{file.filename}': Could not read file content - {str(e)}")
-                continue
-            
-            # Validate PDF format
-            is_valid, validation_msg = pdf_service.validate_pdf(content)
-            if not is_valid:
-                errors.append(f"File '{file.filename}': {validation_msg}")
-                continue
-            
-            logger.info(f"PDF validation passed: {validation_msg}")
-            
-            # Extract text from PDF
-            try:
-                text = pdf_service.extract_text_from_pdf(content)
-                logger.info(f"Text extraction completed. Length: {len(text)} characters")
-            except Exception as e:
-                errors.append(f"File '{file.filename}': PDF text extraction failed - {str(e)}")
-                continue
-            
-            if not text or not text.strip():
-                errors.append(f"File '{file.filename}': No text could be extracted. This might be an image-based PDF or scanned document.")
+            content, error = await _read_upload(file, file_index)
+            if error:
+                errors.append(error)
                 continue
             
-            # Check if extracted text is meaningful
-            if len(text.strip()) < 100:
-                errors.append(f"File '{file.filename}': Extracted text too short ({len(text)} characters). Minimum 100 characters required.")
+            text, error = await _extract_upload_text(file.filename, content)
+            if error:
+                errors.append(error)
                 continue
             
-            logger.info(f"Text extraction successful for {file.filename}")
-            
             # Generate report using AI
             try:
                 logger.info(f"Starting AI processing for {file.filename}")
@@ -196,16 +356,9 @@ async def upload_reports(files: List[UploadFile] = File(...)):
                 errors.append(f"File '{file.filename}': AI could not generate a structured report from the text")
                 continue
             
-            # Ensure unique ID
-            original_id = report_data.id
-            counter = 1
-            while db_service.get_report_by_id(report_data.id):
-                report_data.id = f"{original_id}_{counter}"
-                counter += 1
-            
             # Save to database
             try:
-                saved_report = db_service.save_report(report_data)
+                saved_report = _save_new_report(report_data)
                 new_reports.append(saved_report.dict())
                 logger.info(f"Successfully processed and saved report: {saved_report.id} from {file.filename}")
             except Exception as e:
@@ -220,11 +373,65 @@ async def upload_reports(files: List[UploadFile] = File(...)):
     # Log summary
     logger.info(f"Upload processing complete. Success: {len(new_reports)}, Errors: {len(errors)}")
     
-    return UploadResponse(
+    return FastJSONResponse(UploadResponse(
         reports=[ReportData(**report) for report in new_reports],
         errors=errors,
         success_count=len(new_reports)
-    ).dict()
+    ))
+
+def _ndjson(event: dict) -> bytes:
+    return dumps(event) + b"\n"
+
+@app.post("/api/reports/upload/stream")
+async def upload_reports_stream(files: List[UploadFile] = File(...)):
+    """
+    Upload PDF files like /api/reports/upload, streaming progress as NDJSON.
+    
+    Per file: {"type": "file"}, then the report's fields as the model writes them
+    ("field", "item" or "part" events), then "report" or "error". The stream
+    ends with {"type": "done", "success_count", "errors"}.
+    """
+    if not files:
+        raise HTTPException(status_code=400, detail="No files provided")
+    
+    # Read everything before responding; the uploads are closed once the handler returns
+    uploads = []
+    for file_index, file in enumerate(files):
+        content, error = await _read_upload(file, file_index)
+        uploads.append((file.filename or f"file_{file_index + 1}", content, error))
+    
+    async def events():
+        errors = []
+        success_count = 0
+        for file_index, (filename, content, error) in enumerate(uploads):
+            yield _ndjson({"type": "file", "file_index": file_index, "filename": filename})
+            try:
+                text = None
+                if not error:
+                    text, error = await _extract_upload_text(filename, content)
+                report_data = None
+                if not error:
+                    async for event in gemini_service.stream_report_from_text(text):
+                        if event["type"] == "report":
+                            report_data = event["report"]
+                        else:
+                            yield _ndjson(dict(event, file_index=file_index))
+                    if not report_data:
+                        error = f"File '{filename}': AI could not generate a structured report from the text"
+                if not error:
+                    saved_report = _save_new_report(report_data)
+                    success_count += 1
+                    yield _ndjson({"type": "report", "file_index": file_index, "report": saved_report})
+            except Exception as e:
+                logger.error(f"Unexpected error processing file: {e}", exc_info=True)
+                error = f"File '{filename}': Unexpected error - {str(e)}"
+            if error:
+                errors.append(error)
+                yield _ndjson({"type": "error", "file_index": file_index, "message": error})
+        logger.info(f"Upload processing complete. Success: {success_count}, Errors: {len(errors)}")
+        yield _ndjson({"type": "done", "success_count": success_count, "errors": errors})
+    
+    return StreamingResponse(events(), media_type="application/x-ndjson")
 
 @app.post("/api/generate-narrative/{report_id}")
 async def generate_narrative(report_id: str):
@@ -234,14 +441,16 @@ async def generate_narrative(report_id: str):
         raise HTTPException(status_code=404, detail="Report not found")
     
     try:
-        narrative = await gemini_service.generate_narrative(report)
-        return {"narrative": narrative}
+        narrative, cached = await narrative_service.get(report)
+        return {"narrative": narrative, "cached": cached}
+    except Overloaded:
+        raise
     except Exception as e:
         logger.error(f"Error generating narrative for {report_id}: {e}")
         raise HTTPException(status_code=500, detail="Failed to generate narrative")
 
 # main.py - Enhanced error handling
-@app.post("/api/generate-storyboard")
+@app.post("/api/generate-storyboard", dependencies=[Depends(admitted("storyboard"))])
 async def generate_storyboard():
     """Generate AI storyboard from all reports."""
     try:
@@ -264,7 +473,7 @@ async def generate_storyboard():
             raise HTTPException(status_code=500, detail="Failed to generate storyboard")
         
         logger.info("Storyboard generated successfully")
-        return storyboard.dict()
+        return FastJSONResponse(storyboard)
         
     except HTTPException:
         raise
@@ -273,20 +482,95 @@ async def generate_storyboard():
         raise HTTPException(status_code=500, detail=f"Failed to generate storyboard: {str(e)}")
     
     
-@app.post("/api/chat/{report_id}")
-async def chat_with_report(report_id: str, message: str = Form(...)):
-    """Chat with AI about a specific report."""
+@app.post("/api/generate-storyboard/stream", dependencies=[Depends(admitted("storyboard"))])
+async def generate_storyboard_stream():
+    """
+    Generate the AI storyboard, streaming its fields as NDJSON while the model writes them.
+    
+    Emits "field" and "item" events, then {"type": "storyboard", "storyboard"} or
+    {"type": "error", "message"}.
+    """
+    reports = db_service.get_reports()
+    if not reports:
+        raise HTTPException(status_code=400, detail="No reports available for storyboard generation")
+    
+    async def events():
+        async for event in gemini_service.stream_storyboard(reports):
+            if event["type"] == "storyboard" and not event["storyboard"]:
+                yield _ndjson({"type": "error", "message": "Failed to generate storyboard"})
+            else:
+                yield _ndjson(event)
+    
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+@app.post("/api/chat/{report_id}", dependencies=[Depends(admitted("chat"))])
+async def chat_with_report(report_id: str, message: str = Form(...), session_id: Optional[str] = Form(None)):
+    """Chat with AI about a specific report, continuing the given session or starting a new one."""
     report = db_service.get_report_by_id(report_id)
     if not report:
         raise HTTPException(status_code=404, detail="Report not found")
     
     try:
-        response = await gemini_service.chat_with_report(report, message)
-        return {"response": response}
+        session_id, response = await chat_service.chat(report, message, session_id)
+        return {"response": response, "session_id": session_id}
+    except ChatSessionError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ChatUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error(f"Error in chat for report {report_id}: {e}")
         raise HTTPException(status_code=500, detail="Chat service unavailable")
 
+@app.websocket("/api/chat/{report_id}/ws")
+async def chat_socket(websocket: WebSocket, report_id: str, session_id: Optional[str] = None):
+    """
+    Chat about a report over a WebSocket, continuing `session_id` or starting a new session.
+    
+    The report and session stay loaded for the life of the socket; questions may
+    be pipelined and answers are streamed (see ChatChannel for the messages).
+    The first message sent is {"type": "session", "session_id"}. Every question
+    counts against the client's ai rate limit and is answered in a chat
+    admission slot, like a POST to /api/chat/{report_id}.
+    """
+    report = db_service.get_report_by_id(report_id)
+    if not report:
+        await websocket.close(code=4404, reason="Report not found")
+        return
+    try:
+        session = chat_service.get_or_create_session(report.id, session_id)
+    except ChatSessionError as e:
+        await websocket.close(code=4404, reason=str(e))
+        return
+    
+    await websocket.accept()
+    client = rate_limiter.client_of(websocket.scope)
+    channel = ChatChannel(
+        lambda message: websocket.send_text(dumps(message).decode("utf-8")),
+        chat_service, report, session, gate=admission.gate("chat"),
+        rate_limit=(lambda: rate_limiter.hit("ai", client)) if rate_limiter.enabled else None,
+    )
+    try:
+        await channel.send({"type": "session", "session_id": session.id})
+        while True:
+            text = await websocket.receive_text()
+            try:
+                message = orjson.loads(text)
+            except orjson.JSONDecodeError:
+                message = None
+            await channel.receive(message)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await channel.close()
+
+@app.get("/api/chat/sessions/{session_id}")
+async def get_chat_session(session_id: str):
+    """Get the full message history of a chat session."""
+    session = db_service.get_chat_session(session_id, full_history=True)
+    if not session:
+        raise HTTPException(status_code=404, detail="Chat session not found")
+    return FastJSONResponse(session)
+
 @app.get("/api/stats")
 async def get_database_stats():
     """Get database statistics."""
@@ -297,6 +581,44 @@ async def get_database_stats():
         logger.error(f"Error getting database stats: {e}")
         raise HTTPException(status_code=500, detail="Failed to get statistics")
 
+@app.get("/api/metrics")
+async def get_metrics():
+    """Get AI call metrics: call counts, retries, circuit breaker state, queueing delay, model routing and fallbacks, executor load, structured output validity, coalesced calls, narrative cache hits, timeline page and catalog index cache hits, admission control (active, waiting and rejected requests per endpoint) and per-client rate limiting."""
+    return {
+        "model_client": gemini_service.client.get_metrics(),
+        "routing": gemini_service.router.get_metrics(),
+        "pdf_executor": pdf_executor.get_metrics(),
+        "structured_output": gemini_service.structured_stats.get_metrics(),
+        "coalescing": gemini_service.single_flight.get_metrics(),
+        "narratives": dict(narrative_service.get_metrics(), warmer=narrative_warmer.get_metrics()),
+        "timeline": timeline_service.get_metrics(),
+        "catalog_index": catalog_index.get_metrics(),
+        "chart_downsampling": chart_downsampler.get_metrics(),
+        "admission": admission.get_metrics(),
+        "rate_limit": rate_limiter.get_metrics(),
+    }
+
+@app.get("/api/usage")
+async def get_usage(hours: float = 24, group_by: str = "hour,endpoint,report"):
+    """Get model token use, latency and estimated cost over the last `hours`, in total and per group (hour, endpoint, report, task, model)."""
+    groups = [group.strip() for group in group_by.split(",") if group.strip()]
+    unknown = [group for group in groups if group not in USAGE_GROUPS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown group_by {', '.join(unknown)}; use {', '.join(USAGE_GROUPS)}")
+    def usage():
+        return {
+            "hours": hours,
+            "totals": usage_recorder.rollup(hours)[0],
+            "rollups": {group: usage_recorder.rollup(hours, group) for group in groups},
+        }
+    
+    try:
+        # The rollups flush this worker's buffer and query SQLite; keep both off the event loop
+        return await asyncio.get_running_loop().run_in_executor(None, usage)
+    except Exception as e:
+        logger.error(f"Error fetching model usage: {e}")
+        raise HTTPException(status_code=500, detail="Failed to fetch model usage")
+
 @app.post("/api/backup")
 async def backup_database():
     """Create a backup of the database."""
@@ -333,20 +655,16 @@ async def health_check():
         return {"status": "unhealthy", "error": str(e)}
 
 @app.get("/api/timeline")
-async def get_highlights_timeline():
-    """Get highlights timeline from seed data."""
+async def get_highlights_timeline(cursor: Optional[str] = None, limit: Optional[int] = None):
+    """
+    Get a page of the highlights timeline: every report, newest publication first.
+    
+    Pass the returned next_cursor to get the following page; it is null on the last one.
+    """
     try:
-        seed_data = get_seed_data()
-        # Optionally, add a date field if available in the future
-        timeline = [
-            {
-                "id": report["id"],
-                "title": report["title"],
-                "summary": report["summary"],
-            }
-            for report in seed_data
-        ]
-        return {"timeline": timeline}
+        return FastJSONResponse(timeline_service.page(cursor, limit))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error fetching highlights timeline: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch highlights timeline")
@@ -362,14 +680,14 @@ async def debug_pdf_processing(file: UploadFile = File(...)):
         logger.info(f"File size: {len(content)} bytes")
         
         # Validate PDF
-        is_valid, validation_msg = pdf_service.validate_pdf(content)
+        is_valid, validation_msg = await pdf_executor.run(pdf_service.validate_pdf, content)
         logger.info(f"PDF validation: {is_valid} - {validation_msg}")
         
         if not is_valid:
             return {"error": f"PDF validation failed: {validation_msg}"}
         
         # Extract text
-        text = pdf_service.extract_text_from_pdf(content)
+        text = await pdf_executor.run(pdf_service.extract_text_from_pdf, content)
         logger.info(f"Text extraction: {len(text)} characters")
         
         if not text or not text.strip():
@@ -400,6 +718,7 @@ async def debug_pdf_processing(file: UploadFile = File(...)):
         return {"error": f"Processing error: {str(e)}"}
 
 if __name__ == "__main__":
+    import uvicorn
     logger.info(f"Starting server on {settings.HOST}:{settings.PORT}")
     uvicorn.run(
         "main:app",
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from typing import List, Dict, Any, Optional, Union
-from sqlalchemy import Column, Integer, String, Text, DateTime, create_engine
+from sqlalchemy import Column, Integer, String, Text, Date, DateTime, Boolean, Index, create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
@@ -20,6 +20,76 @@ class ReportDB(Base):
     full_text = Column(Text, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    rendered_json = Column(Text, nullable=True)  # ReportData JSON as served by the API, written with the row
+    issue = Column(String, nullable=True)  # Weekly Report issue, e.g. "16*17*18"
+    published_on = Column(Date, nullable=True)  # From the report text on every save; null if it names none
+    
+    # Timeline order and cursor pagination
+    __table_args__ = (Index("ix_reports_timeline", "published_on", "id"),)
+
+class CatalogStateDB(Base):
+    __tablename__ = "catalog_state"
+    
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)  # Bumped in the transaction of every report write and delete
+
+class ReportChunkDB(Base):
+    __tablename__ = "report_chunks"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    report_id = Column(String, nullable=False, index=True)
+    chunk_index = Column(Integer, nullable=False)
+    content = Column(Text, nullable=False)
+
+class ChatSessionDB(Base):
+    __tablename__ = "chat_sessions"
+    
+    id = Column(String, primary_key=True, index=True)
+    report_id = Column(String, nullable=False, index=True)
+    summary = Column(Text, nullable=False, default="")  # Rolling summary of folded-away turns
+    summarized_count = Column(Integer, nullable=False, default=0)  # Messages covered by the summary
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class ChatMessageDB(Base):
+    __tablename__ = "chat_messages"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    session_id = Column(String, nullable=False, index=True)
+    role = Column(String, nullable=False)
+    content = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class NarrativeDB(Base):
+    __tablename__ = "narratives"
+    
+    report_id = Column(String, primary_key=True, index=True)
+    prompt_key = Column(String, nullable=False)  # Hash of the prompt it answers; a changed report or prompt makes it stale
+    report_updated_at = Column(DateTime)  # Last change of the report it was generated from
+    content = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class ModelUsageDB(Base):
+    __tablename__ = "model_usage"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    endpoint = Column(String, nullable=False)  # Route template of the request that made the call, e.g. "POST /api/chat/{report_id}"
+    report_id = Column(String, nullable=True, index=True)
+    task = Column(String, nullable=False)  # narrative, storyboard, report, report_merge, chat, ...
+    model = Column(String, nullable=False)
+    prompt_tokens = Column(Integer, nullable=False, default=0)
+    output_tokens = Column(Integer, nullable=False, default=0)
+    latency_ms = Column(Integer, nullable=False, default=0)
+    estimated = Column(Boolean, nullable=False, default=False)  # Token counts estimated; the response had no usage metadata
+    success = Column(Boolean, nullable=False, default=True)
+
+class RateLimitCounterDB(Base):
+    __tablename__ = "rate_limit_counters"
+    
+    key = Column(String, primary_key=True)  # Route class and client, e.g. "ai:203.0.113.7"
+    window_start = Column(Integer, primary_key=True, index=True)  # Unix time the fixed window began
+    count = Column(Integer, nullable=False, default=0)  # Requests counted by all workers in the window
 
 # Pydantic Models
 class ChartDataPoint(BaseModel):
@@ -49,15 +119,51 @@ class ReportData(BaseModel):
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
 
+class ReportIndexEntry(BaseModel):
+    """A report as listed in the catalog index: enough to list it and to tell whether a stored copy is current."""
+    id: str
+    title: str
+    updated_at: Optional[datetime] = None
+
+class GraphNode(BaseModel):
+    id: str
+    title: str
+
+class GraphEdge(BaseModel):
+    source: str
+    target: str
+    label: str
+
+class RelationshipGraphData(BaseModel):
+    nodes: List[GraphNode] = Field(default_factory=list)
+    edges: List[GraphEdge] = Field(default_factory=list)
+
+class KeyActor(BaseModel):
+    name: str
+    description: str
+    icon: str = Field(..., description='Font Awesome 6 class string, e.g. "fa-solid fa-users"')
+
 class StoryboardData(BaseModel):
+    title: str = ""
     narrative: str
     charts: List[ChartConfig]
+    introspection: str = ""
+    retrospection: str = ""
+    relationshipGraph: Optional[RelationshipGraphData] = None
+    keyActors: List[KeyActor] = Field(default_factory=list)
 
 class ChatMessage(BaseModel):
     role: str = Field(..., description="Either 'user' or 'model'")
     content: str
     timestamp: Optional[datetime] = Field(default_factory=datetime.utcnow)
 
+class ChatSession(BaseModel):
+    id: str
+    report_id: str
+    summary: str = ""
+    summarized_count: int = 0
+    messages: List[ChatMessage] = Field(default_factory=list)  # Messages not yet folded into the summary
+
 class UploadResponse(BaseModel):
     reports: List[ReportData]
     errors: List[str]
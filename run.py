@@ -92,15 +92,19 @@ def start_server():
             browser_thread.daemon = True
             browser_thread.start()
         
-        # Start the server
-        import uvicorn
-        uvicorn.run(
-            "main:app",
-            host=settings.HOST,
-            port=settings.PORT,
-            reload=settings.DEBUG,
-            log_level="info" if settings.DEBUG else "warning"
-        )
+        # Start the server: auto-reloading in debug mode, otherwise the multi-worker launcher
+        if settings.DEBUG:
+            import uvicorn
+            uvicorn.run(
+                "main:app",
+                host=settings.HOST,
+                port=settings.PORT,
+                reload=True,
+                log_level="info"
+            )
+        else:
+            from serve import serve
+            sys.exit(serve())
         
     except KeyboardInterrupt:
         print("\n👋 Server stopped by user")
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Production launcher for the German Economic Insights Dashboard.
+
+Runs several uvicorn worker processes sharing one listening socket:
+
+- the database schema and seed data are prepared once, in this process,
+  before any worker starts (workers take the same file lock, so a worker
+  started any other way cannot race them either);
+- the model rate limits (MODEL_REQUESTS_PER_MINUTE, MODEL_TOKENS_PER_MINUTE)
+  are split evenly between the workers;
+- a worker is recycled after WORKER_MAX_REQUESTS requests (plus up to
+  WORKER_MAX_REQUESTS_JITTER, so they do not all restart together) and
+  replaced whenever it exits or crashes;
+- SIGHUP replaces the workers one at a time; SIGINT/SIGTERM stop them,
+  letting in-flight requests finish within WORKER_GRACEFUL_TIMEOUT.
+
+Usage:
+    python serve.py [--workers N] [--host HOST] [--port PORT]
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import random
+import signal
+import sys
+import threading
+import time
+from multiprocessing.context import SpawnProcess
+from typing import Dict, List
+
+import uvicorn
+
+from config import settings
+
+logger = logging.getLogger("serve")
+
+# A worker exiting with an error this soon after starting failed to boot; replacing it would only loop
+MIN_WORKER_LIFETIME = 5.0
+
+def worker_count(requested: int = 0) -> int:
+    """Worker processes to run: `requested`, or one per CPU this process may run on."""
+    if requested > 0:
+        return requested
+    if hasattr(os, "sched_getaffinity"):
+        # Unlike os.cpu_count(), limited to the CPUs a container or taskset allows
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+def run_worker(config: uvicorn.Config, sockets):
+    """Worker process entry point: serve `config.app` on the sockets inherited from the launcher."""
+    config.configure_logging()
+    uvicorn.Server(config).run(sockets=sockets)
+
+def prepare_database():
+    """Create the schema and seed the database before any worker starts."""
+    from services.database_service import DatabaseService
+    db_service = DatabaseService()
+    try:
+        db_service.initialize_database()
+    finally:
+        db_service.engine.dispose()
+
+class WorkerPool:
+    """Supervises uvicorn worker processes serving `config.app` on one shared socket."""
+
+    def __init__(self, config: uvicorn.Config, workers: int, max_requests: int = 0, max_requests_jitter: int = 0,
+                 graceful_timeout: float = 30):
+        self.config = config
+        self.workers = workers
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.graceful_timeout = graceful_timeout
+        self.processes: Dict[SpawnProcess, float] = {}
+        self.should_exit = threading.Event()
+        self.should_restart = threading.Event()
+        self.sockets = []
+        self.recycled = 0
+
+    def spawn(self):
+        # The config is pickled into the child on start, so each worker gets its own request limit
+        if self.max_requests > 0:
+            self.config.limit_max_requests = self.max_requests + random.randint(0, self.max_requests_jitter)
+        process = multiprocessing.get_context("spawn").Process(
+            target=run_worker, kwargs={"config": self.config, "sockets": self.sockets}
+        )
+        process.start()
+        self.processes[process] = time.monotonic()
+        logger.info(f"Started worker {process.pid}")
+
+    def stop(self, processes: List[SpawnProcess]):
+        """Stop workers gracefully (SIGTERM: finish in-flight requests), killing any still busy after the timeout."""
+        for process in processes:
+            process.terminate()
+        deadline = time.monotonic() + self.graceful_timeout + 5
+        for process in processes:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                logger.warning(f"Worker {process.pid} did not stop within {self.graceful_timeout}s; killing it")
+                process.kill()
+                process.join()
+            self.processes.pop(process, None)
+
+    def restart(self):
+        """Replace every worker, one at a time, so the others keep serving."""
+        for process in list(self.processes):
+            self.spawn()
+            self.stop([process])
+
+    def run(self) -> int:
+        """Serve until SIGINT/SIGTERM; returns the exit status."""
+        self.sockets = [self.config.bind_socket()]
+        signal.signal(signal.SIGINT, lambda *_: self.should_exit.set())
+        signal.signal(signal.SIGTERM, lambda *_: self.should_exit.set())
+        if hasattr(signal, "SIGHUP"):
+            signal.signal(signal.SIGHUP, lambda *_: self.should_restart.set())
+
+        for _ in range(self.workers):
+            self.spawn()
+        status = 0
+        while not self.should_exit.wait(0.5):
+            if self.should_restart.is_set():
+                self.should_restart.clear()
+                logger.info("Restarting workers")
+                self.restart()
+            for process, started in list(self.processes.items()):
+                if process.is_alive():
+                    continue
+                del self.processes[process]
+                lived = time.monotonic() - started
+                if process.exitcode != 0 and lived < MIN_WORKER_LIFETIME:
+                    logger.error(f"Worker {process.pid} failed to boot (exit code {process.exitcode}); shutting down")
+                    status = 1
+                    self.should_exit.set()
+                    break
+                self.recycled += 1
+                logger.info(f"Worker {process.pid} exited (exit code {process.exitcode}) after {lived:.0f}s; replacing it")
+                self.spawn()
+
+        logger.info("Stopping workers")
+        self.stop(list(self.processes))
+        for sock in self.sockets:
+            sock.close()
+        return status
+
+def serve(workers: int = None, host: str = None, port: int = None) -> int:
+    """Prepare the database and run the worker pool; returns the exit status."""
+    workers = worker_count(settings.WORKERS if workers is None else workers)
+    prepare_database()
+    # Inherited by the workers, whose model clients each take their share of the model rate limits
+    os.environ["MODEL_RATE_LIMIT_WORKERS"] = str(workers)
+    config = uvicorn.Config(
+        "main:app",
+        host=host or settings.HOST,
+        port=port or settings.PORT,
+        log_level="info" if settings.DEBUG else "warning",
+        timeout_graceful_shutdown=settings.WORKER_GRACEFUL_TIMEOUT,
+    )
+    logger.info(f"Serving on {config.host}:{config.port} with {workers} workers")
+    pool = WorkerPool(config, workers, max_requests=settings.WORKER_MAX_REQUESTS,
+                      max_requests_jitter=settings.WORKER_MAX_REQUESTS_JITTER,
+                      graceful_timeout=settings.WORKER_GRACEFUL_TIMEOUT)
+    return pool.run()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: WORKERS, or one per available CPU)")
+    parser.add_argument("--host", default=None)
+    parser.add_argument("--port", type=int, default=None)
+    args = parser.parse_args()
+    logging.basicConfig(
+        level=logging.INFO if settings.DEBUG else logging.WARNING,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    sys.exit(serve(args.workers, args.host, args.port))
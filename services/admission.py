@@ -0,0 +1,177 @@
+import asyncio
+import json
+import logging
+import math
+import time
+from collections import Counter, deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Optional
+from pydantic import BaseModel, Field
+from config import settings
+from services.executors import latency_summary
+
+logger = logging.getLogger(__name__)
+
+class Overloaded(Exception):
+    """
+    A request turned away by admission control.
+
+    `status_code` is 429 when the endpoint's wait queue is full and 503 when
+    the request could not be started within the endpoint's wait deadline;
+    `retry_after` is the whole seconds a client should wait before retrying.
+    """
+
+    def __init__(self, endpoint: str, status_code: int, retry_after: int, reason: str):
+        super().__init__(f"{endpoint} is overloaded ({reason}); retry in {retry_after}s")
+        self.endpoint = endpoint
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.reason = reason
+
+class AdmissionLimit(BaseModel):
+    """Concurrency limit and wait queue of one AI-backed endpoint."""
+    concurrency: int = Field(..., ge=1, description="Requests served at the same time")
+    queue: int = Field(..., ge=0, description="Requests waiting for a slot; more are rejected with 429")
+    max_wait: float = Field(..., gt=0, description="Seconds a request may wait for a slot, estimated on arrival "
+                                                   "and enforced while waiting; longer is rejected with 503")
+
+def default_limits() -> Dict[str, AdmissionLimit]:
+    """Limits per endpoint: built-in defaults, overridden per endpoint by the ADMISSION_LIMITS JSON setting."""
+    limits = {
+        "chat": AdmissionLimit(concurrency=8, queue=32, max_wait=10),
+        "narrative": AdmissionLimit(concurrency=8, queue=32, max_wait=30),
+        "storyboard": AdmissionLimit(concurrency=2, queue=4, max_wait=60),
+    }
+    overrides = json.loads(settings.ADMISSION_LIMITS) if settings.ADMISSION_LIMITS else {}
+    for endpoint, override in overrides.items():
+        base = limits.get(endpoint, limits["chat"])
+        limits[endpoint] = AdmissionLimit(**{**base.model_dump(), **override})
+    return limits
+
+class AdmissionSlot:
+    """A granted slot; release() is idempotent, so a streamed response may release it from several places."""
+
+    def __init__(self, gate: "AdmissionGate"):
+        self._gate = gate
+        self._started = time.monotonic()
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._gate._release(time.monotonic() - self._started)
+
+class AdmissionGate:
+    """
+    Admits at most `concurrency` requests of one endpoint at a time, first come first served.
+
+    Up to `queue` more wait for a slot. A request arriving to a full queue is
+    rejected at once with 429, and one whose estimated wait (queue position
+    times recent service time, over the concurrency) exceeds `max_wait` with
+    503, as is one still waiting when `max_wait` runs out. Rejections cost no
+    model call and no database work, so a burst cannot pile up requests that
+    all time out together, and other endpoints stay fast.
+    """
+
+    def __init__(self, name: str, limit: AdmissionLimit, enabled: bool = True):
+        self.name = name
+        self.limit = limit
+        self.enabled = enabled
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._service_times = deque(maxlen=100)
+        self.wait_times = deque(maxlen=1000)
+        self.admitted = 0
+        self.rejected = Counter()  # reason -> requests
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def estimated_wait(self) -> float:
+        """Seconds a request arriving now would wait for a slot, from recent service times."""
+        if self.active < self.limit.concurrency or not self._service_times:
+            return 0.0
+        mean = sum(self._service_times) / len(self._service_times)
+        return (self.waiting + 1) * mean / self.limit.concurrency
+
+    def _reject(self, status_code: int, reason: str, estimate: float) -> Overloaded:
+        self.rejected[reason] += 1
+        logger.info(f"Rejected {self.name} request: {reason} ({self.active} active, {self.waiting} waiting)")
+        return Overloaded(self.name, status_code, max(1, math.ceil(estimate)), reason)
+
+    async def acquire(self) -> AdmissionSlot:
+        """Wait for a slot, or raise Overloaded."""
+        if not self.enabled:
+            self.active += 1
+            self.admitted += 1
+            return AdmissionSlot(self)
+        if self.active < self.limit.concurrency and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            self.wait_times.append(0.0)
+            return AdmissionSlot(self)
+
+        estimate = self.estimated_wait()
+        if self.waiting >= self.limit.queue:
+            raise self._reject(429, "queue_full", estimate)
+        if estimate > self.limit.max_wait:
+            raise self._reject(503, "wait_estimate", estimate)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        arrived = time.monotonic()
+        try:
+            # A released slot is handed to the first waiter without freeing it in between
+            await asyncio.wait_for(waiter, self.limit.max_wait)
+        except asyncio.TimeoutError:
+            raise self._reject(503, "wait_timeout", self.estimated_wait()) from None
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+        self.admitted += 1
+        self.wait_times.append(time.monotonic() - arrived)
+        return AdmissionSlot(self)
+
+    def _release(self, service_time: float):
+        self._service_times.append(service_time)
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    @asynccontextmanager
+    async def admit(self):
+        """Hold a slot for the duration of the block; raises Overloaded if none is granted."""
+        slot = await self.acquire()
+        try:
+            yield slot
+        finally:
+            slot.release()
+
+    def get_metrics(self) -> dict:
+        return {
+            **self.limit.model_dump(),
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+            "estimated_wait_seconds": self.estimated_wait(),
+            "wait_seconds": latency_summary(self.wait_times),
+        }
+
+class AdmissionController:
+    """Admission gates of the AI-backed endpoints (chat, narrative, storyboard)."""
+
+    def __init__(self, limits: Optional[Dict[str, AdmissionLimit]] = None, enabled: bool = None):
+        self.enabled = settings.ADMISSION_CONTROL_ENABLED if enabled is None else enabled
+        self.gates = {name: AdmissionGate(name, limit, self.enabled)
+                      for name, limit in (limits or default_limits()).items()}
+
+    def gate(self, endpoint: str) -> AdmissionGate:
+        return self.gates[endpoint]
+
+    def get_metrics(self) -> dict:
+        return {"enabled": self.enabled, "endpoints": {name: gate.get_metrics() for name, gate in self.gates.items()}}
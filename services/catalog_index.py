@@ -0,0 +1,41 @@
+import threading
+from typing import Optional, Tuple
+from models import ReportIndexEntry
+from services.http_cache import strong_etag
+from services.responses import ModelListJSON
+
+class CatalogIndex:
+    """
+    The catalog index served by /api/catalog: id, title and last change of every report.
+
+    The JSON and its ETag are rendered once per catalog version, like timeline
+    pages, so serving the index costs one single-row query at any catalog size.
+    """
+
+    def __init__(self, db_service):
+        self.db_service = db_service
+        self._json = ModelListJSON(ReportIndexEntry)
+        self._cached: Optional[Tuple[int, str, bytes]] = None  # (catalog version, ETag, JSON)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self) -> Tuple[str, bytes]:
+        """(ETag, JSON) of the index: {"reports": [{"id", "title", "updated_at"}, ...]}."""
+        version = self.db_service.get_catalog_version()
+        with self._lock:
+            if self._cached is not None and self._cached[0] == version:
+                self.hits += 1
+                return self._cached[1:]
+        self.misses += 1
+
+        # Read after the version, so the entries are at least as new as the version they are cached under
+        entries = self.db_service.get_catalog_index()
+        etag = strong_etag("catalog-index", *((entry.id, entry.updated_at) for entry in entries))
+        body = self._json.wrapped("reports", entries)
+        with self._lock:
+            self._cached = (version, etag, body)
+        return etag, body
+
+    def get_metrics(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
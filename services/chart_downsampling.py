@@ -0,0 +1,176 @@
+import threading
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple
+import orjson
+from config import settings
+
+OTHER_LABEL = "Other"
+
+def _numpy():
+    # Imported on first use: most reports have no chart large enough to need it
+    import numpy
+    return numpy
+
+def _numbers(values: List[Any]):
+    """Float array of chart values; anything not a number becomes NaN."""
+    np = _numpy()
+    try:
+        # Converts in C when every value is a number (or None, which becomes NaN)
+        return np.array(values, dtype=float)
+    except (TypeError, ValueError):
+        pass
+    return np.fromiter(
+        (value if isinstance(value, (int, float)) and not isinstance(value, bool) else np.nan for value in values),
+        dtype=float, count=len(values),
+    )
+
+# lttb_indices tabulates choices for buckets up to this wide (past it, a NumPy call per bucket is cheaper)
+# and tables of up to this many (buckets x points per bucket x points per bucket) areas, about 32 MB
+LTTB_TABLE_MAX_WIDTH = 20
+LTTB_TABLE_LIMIT = 4_000_000
+
+def lttb_indices(x, y, n: int):
+    """
+    Indices of the `n` points Largest-Triangle-Three-Buckets keeps of the series (x, y), in order.
+
+    The first and last points are kept; the others are split into n - 2
+    buckets, each contributing the point forming the largest triangle with
+    the point kept before it and the average of the next bucket. Which point
+    that is depends only on which point of the previous bucket was kept, so
+    the choice for every bucket and every possible previous point is computed
+    at once, leaving only an index walk; with wide buckets, where that table
+    grows large, each bucket's choice is one vectorized argmax instead.
+    """
+    np = _numpy()
+    size = len(y)
+    if n >= size or n < 3:
+        return np.arange(size)
+
+    # Bucket b covers [edges[b], edges[b + 1]); each holds at least one point as n < size
+    edges = np.linspace(1, size - 1, n - 1).astype(np.int64)
+    widths = np.diff(edges)
+    next_x = np.append(np.add.reduceat(x[:size - 1], edges[:-1])[1:] / widths[1:], x[-1])
+    next_y = np.append(np.add.reduceat(y[:size - 1], edges[:-1])[1:] / widths[1:], y[-1])
+    buckets, width = n - 2, int(widths.max())
+
+    selected = np.empty(n, dtype=np.int64)
+    selected[0], selected[-1] = 0, size - 1
+    if width <= LTTB_TABLE_MAX_WIDTH and buckets * width * width <= LTTB_TABLE_LIMIT:
+        # current[b, j]: j-th point of bucket b (padding repeats its last point); previous[b, k]: of bucket b - 1
+        offsets = np.arange(width)
+        current = edges[:-1, None] + np.minimum(offsets, widths[:, None] - 1)
+        previous = np.vstack([np.zeros((1, width), dtype=np.int64), current[:-1]])
+        ax, ay = x[previous][:, :, None], y[previous][:, :, None]
+        # Twice the triangle areas, which rank the same; padding is never chosen as argmax picks the first maximum
+        areas = np.abs((ax - next_x[:, None, None]) * (y[current][:, None, :] - ay)
+                       - (ax - x[current][:, None, :]) * (next_y[:, None, None] - ay))
+        choice = areas.argmax(axis=2).tolist()  # choice[b][k]: position kept in bucket b after previous[b, k]
+        column, kept = 0, []
+        for b in range(buckets):
+            column = choice[b][column]
+            kept.append(column)
+        selected[1:-1] = edges[:-1] + kept
+        return selected
+
+    a = 0
+    for b in range(buckets):
+        lo, hi = edges[b], edges[b + 1]
+        areas = np.abs((x[a] - next_x[b]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (next_y[b] - y[a]))
+        a = lo + int(np.argmax(areas))
+        selected[b + 1] = a
+    return selected
+
+def _lttb_rows(rows: List[dict], x_key: str, keys: List[str], max_points: int) -> List[dict]:
+    np = _numpy()
+    x = _numbers([row.get(x_key) for row in rows])
+    if np.isnan(x).any():
+        x = np.arange(len(rows), dtype=float)  # categorical x axis: evenly spaced, as plotted
+    series = [np.nan_to_num(_numbers([row.get(key) for row in rows])) for key in keys]
+    # Every series keeps its own shape; their points are shown together, so each gets a share of the budget,
+    # shrunk while the rows they pick (which overlap less than they might) are more than max_points
+    per_series = max(3, max_points // len(keys))
+    while True:
+        indices = np.unique(np.concatenate([lttb_indices(x, y, per_series) for y in series]))
+        if len(indices) <= max_points or per_series == 3:
+            break
+        per_series = max(3, per_series * max_points // len(indices))
+    if len(indices) > max_points:
+        # More series than the budget lets each keep its shape: an even spread of the rows they picked
+        indices = indices[np.linspace(0, len(indices) - 1, max_points).astype(np.int64)]
+    return [rows[i] for i in indices]
+
+def _top_rows(rows: List[dict], x_key: str, keys: List[str], max_points: int) -> List[dict]:
+    np = _numpy()
+    values = np.nan_to_num(np.stack([_numbers([row.get(key) for row in rows]) for key in keys]))
+    # The largest categories by total across series, in their original order; the rest are summed into one
+    keep = np.sort(np.argpartition(-np.abs(values.sum(axis=0)), max_points - 2)[:max_points - 1])
+    rest = np.ones(len(rows), dtype=bool)
+    rest[keep] = False
+    other = {x_key: OTHER_LABEL}
+    other.update({key: float(total) for key, total in zip(keys, values[:, rest].sum(axis=1))})
+    return [rows[i] for i in keep] + [other]
+
+def downsample_chart(chart: dict, max_points: int) -> dict:
+    """
+    A chart (ChartConfig as JSON) with at most `max_points` data rows.
+
+    Line charts keep the rows LTTB selects for each series; bar and pie
+    charts keep their largest categories and sum the others into "Other".
+    Downsampled charts carry the original row count as `sourcePoints`.
+    """
+    rows = chart.get("data") or []
+    keys = [data_key["key"] for data_key in chart.get("dataKeys") or [] if data_key.get("key")]
+    if len(rows) <= max_points or not keys:
+        return chart
+    if chart.get("type") == "line":
+        sampled = _lttb_rows(rows, chart.get("xAxisKey"), keys, max_points)
+    else:
+        sampled = _top_rows(rows, chart.get("xAxisKey"), keys, max(max_points, 2))
+    return {**chart, "data": sampled, "sourcePoints": len(rows)}
+
+class ChartDownsampler:
+    """
+    Serves stored report JSON with its large charts downsampled to a requested number of points.
+
+    The result is kept per (report, version, points), so each chart of a
+    report is downsampled once per resolution clients ask for and repeat
+    requests cost a dictionary lookup rather than parsing the full report.
+    Reports with no chart over the limit are remembered as such and passed
+    through as stored.
+    """
+
+    def __init__(self, cache_size: int = None):
+        self.cache_size = cache_size or settings.CHART_DOWNSAMPLE_CACHE_SIZE
+        self._reports: "OrderedDict[Tuple[str, Any, int], Optional[bytes]]" = OrderedDict()  # None: unchanged
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def report_json(self, report_id: str, version: Any, rendered: str, max_points: int) -> bytes:
+        """The report JSON `rendered` (stored for `version`) with every chart of more than `max_points` rows downsampled."""
+        key = (report_id, version, max_points)
+        with self._lock:
+            if key in self._reports:
+                self._reports.move_to_end(key)
+                self.hits += 1
+                cached = self._reports[key]
+                return rendered.encode("utf-8") if cached is None else cached
+            self.misses += 1
+
+        report = orjson.loads(rendered)
+        charts: List[dict] = report.get("charts") or []
+        large = [i for i, chart in enumerate(charts) if len(chart.get("data") or []) > max_points]
+        body = None
+        if large:
+            for i in large:
+                charts[i] = downsample_chart(charts[i], max_points)
+            body = orjson.dumps(report)
+        with self._lock:
+            self._reports[key] = body
+            while len(self._reports) > self.cache_size:
+                self._reports.popitem(last=False)
+        return rendered.encode("utf-8") if body is None else body
+
+    def get_metrics(self) -> dict:
+        with self._lock:
+            return {"cached_reports": len(self._reports), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,136 @@
+import asyncio
+import contextlib
+import logging
+from collections import deque
+from typing import Awaitable, Callable, Deque, Optional, Tuple
+from models import ReportData, ChatSession
+from services.admission import AdmissionGate, Overloaded
+from services.chat_service import ChatService
+from services.gemini_service import ChatUnavailable
+from services.rate_limit import RateLimitDecision
+
+logger = logging.getLogger(__name__)
+
+class ChatChannel:
+    """
+    One chat session held open over a WebSocket.
+
+    The report and session are loaded once, when the socket opens, and stay
+    resident, so a turn costs no report fetch, session load or form parsing.
+    Questions are answered one at a time, in order, with the answer streamed
+    back as the model writes it; a question may arrive while an earlier one
+    is still being answered. Unless sent with "queue": true, a new question
+    cancels the answer in progress and any still queued, as does an explicit
+    {"type": "cancel"}. Cancelled turns are not saved to the session.
+
+    Client messages: {"type": "question", "message", "id"?, "queue"?} and
+    {"type": "cancel"}. Server messages, each with the question's "id":
+    "start", "delta" ("text"), "answer" ("response"), "cancelled" and
+    "error" ("message", and "retry_after" when rate limited or overloaded).
+    A question that gets no complete answer ends in "error" and is not saved.
+    """
+
+    def __init__(self, send: Callable[[dict], Awaitable[None]], chat_service: ChatService,
+                 report: ReportData, session: ChatSession, gate: Optional[AdmissionGate] = None,
+                 rate_limit: Optional[Callable[[], RateLimitDecision]] = None):
+        self._send = send
+        self.chat_service = chat_service
+        self.report = report
+        self.session = session
+        self.gate = gate
+        self.rate_limit = rate_limit
+        self._send_lock = asyncio.Lock()
+        self._pending: Deque[Tuple[object, str]] = deque()
+        self._answering: Optional[Tuple[object, asyncio.Task]] = None
+        self._runner: Optional[asyncio.Task] = None
+        self._next_id = 0
+        self.answered = 0
+        self.cancelled = 0
+
+    async def send(self, message: dict):
+        # Answers and rejections are sent from different tasks
+        async with self._send_lock:
+            await self._send(message)
+
+    async def receive(self, message: dict):
+        """Handle one message from the client."""
+        kind = message.get("type") if isinstance(message, dict) else None
+        if kind == "cancel":
+            await self.cancel()
+            return
+        if kind != "question" or not isinstance(message.get("message"), str) or not message["message"].strip():
+            await self.send({"type": "error", "id": None, "message": "Expected {\"type\": \"question\", \"message\": ...}"})
+            return
+
+        turn_id = message.get("id")
+        if turn_id is None:
+            self._next_id += 1
+            turn_id = self._next_id
+        if self.rate_limit is not None:
+            decision = self.rate_limit()
+            if not decision.allowed:
+                await self.send({"type": "error", "id": turn_id, "retry_after": decision.retry_after,
+                                 "message": f"Too many questions; retry in {decision.retry_after}s"})
+                return
+        if not message.get("queue"):
+            await self.cancel()
+        self._pending.append((turn_id, message["message"]))
+        if self._runner is None:
+            self._runner = asyncio.ensure_future(self._run())
+
+    async def cancel(self):
+        """Cancel the answer in progress and drop the questions queued behind it."""
+        while self._pending:
+            turn_id, _ = self._pending.popleft()
+            self.cancelled += 1
+            await self.send({"type": "cancelled", "id": turn_id})
+        if self._answering is not None:
+            _, task = self._answering
+            task.cancel()
+            # Its "cancelled" message goes out before anything about the next question
+            await asyncio.wait([task])
+
+    async def close(self):
+        """Stop answering; the socket is gone."""
+        self._pending.clear()
+        if self._runner is not None:
+            self._runner.cancel()
+            await asyncio.wait([self._runner])
+        if self._answering is not None:
+            self._answering[1].cancel()
+            await asyncio.wait([self._answering[1]])
+
+    async def _run(self):
+        try:
+            while self._pending:
+                turn_id, question = self._pending.popleft()
+                task = asyncio.ensure_future(self._answer(turn_id, question))
+                self._answering = (turn_id, task)
+                # Unlike awaiting the task, wait() returns normally when it is cancelled
+                await asyncio.wait([task])
+                self._answering = None
+        finally:
+            self._runner = None
+
+    async def _answer(self, turn_id, question: str):
+        try:
+            async with self.gate.admit() if self.gate is not None else contextlib.nullcontext():
+                await self.send({"type": "start", "id": turn_id})
+                pieces = []
+                async for piece in self.chat_service.stream(self.report, self.session, question):
+                    pieces.append(piece)
+                    await self.send({"type": "delta", "id": turn_id, "text": piece})
+            self.answered += 1
+            await self.send({"type": "answer", "id": turn_id, "response": "".join(pieces)})
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            with contextlib.suppress(Exception):
+                await self.send({"type": "cancelled", "id": turn_id})
+            raise
+        except Overloaded as e:
+            await self.send({"type": "error", "id": turn_id, "retry_after": e.retry_after, "message": str(e)})
+        except ChatUnavailable as e:
+            await self.send({"type": "error", "id": turn_id, "message": str(e)})
+        except Exception as e:
+            logger.error(f"Error in chat session {self.session.id}: {e}")
+            await self.send({"type": "error", "id": turn_id, "message": "Chat service unavailable"})
@@ -0,0 +1,122 @@
+import asyncio
+import logging
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from models import ReportData, ChatMessage, ChatSession
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+class ChatSessionError(Exception):
+    """Raised when a chat session does not exist or belongs to another report."""
+
+class ChatService:
+    """
+    Multi-turn chat sessions with bounded prompt size.
+
+    Each turn sends the model the static report context, the retrieved report
+    sections, the rolling summary and only the most recent messages. Once more
+    than CHAT_SUMMARY_TRIGGER messages are outside the summary, the oldest are
+    folded into it so the per-turn prompt stays flat as the session grows.
+    Folding is a model call of its own, made in the background after the
+    answer is returned, one at a time per session.
+    """
+
+    def __init__(self, db_service, gemini_service, retrieval_service):
+        self.db_service = db_service
+        self.gemini_service = gemini_service
+        self.retrieval_service = retrieval_service
+        self._summaries: Dict[str, asyncio.Task] = {}  # session id -> summarization in progress
+
+    def get_or_create_session(self, report_id: str, session_id: Optional[str] = None) -> ChatSession:
+        """Load an existing session for the report or start a new one."""
+        if not session_id:
+            return self.db_service.create_chat_session(report_id)
+
+        session = self.db_service.get_chat_session(session_id)
+        if not session or session.report_id != report_id:
+            raise ChatSessionError(f"Chat session {session_id} not found for report {report_id}")
+        return session
+
+    async def chat(self, report: ReportData, message: str, session_id: Optional[str] = None) -> Tuple[str, str]:
+        """
+        Answer a message within a session; returns (session_id, response).
+
+        When the model gives no answer, ChatUnavailable propagates and the session is left as it was.
+        """
+        session = self.get_or_create_session(report.id, session_id)
+        recent, context_chunks = self._turn_context(report, session, message)
+        response = await self.gemini_service.chat_with_report(
+            report, message, context_chunks, history=recent, summary=session.summary
+        )
+        self._save_turn(report, session, message, response)
+        return session.id, response
+
+    async def stream(self, report: ReportData, session: ChatSession, message: str) -> AsyncIterator[str]:
+        """
+        Answer a message within an already loaded session, yielding the answer as the model writes it.
+
+        The turn is saved once the answer is complete; an answer abandoned part
+        way (cancelled, or no longer iterated) is not, nor one cut short by
+        ChatUnavailable, which propagates.
+        """
+        recent, context_chunks = self._turn_context(report, session, message)
+        pieces = []
+        async for piece in self.gemini_service.stream_chat_with_report(
+            report, message, context_chunks, history=recent, summary=session.summary
+        ):
+            pieces.append(piece)
+            yield piece
+        self._save_turn(report, session, message, "".join(pieces))
+
+    def _turn_context(self, report: ReportData, session: ChatSession,
+                      message: str) -> Tuple[List[ChatMessage], List[Tuple[int, str]]]:
+        """Recent messages and the report sections retrieved for a new message."""
+        recent = session.messages[-settings.CHAT_HISTORY_MESSAGES:] if settings.CHAT_HISTORY_MESSAGES > 0 else []
+
+        # Follow-up questions ("and in 2025?") retrieve better with the previous question attached
+        previous_questions = [m.content for m in recent if m.role == "user"][-1:]
+        query = " ".join(previous_questions + [message])
+        return recent, self.retrieval_service.get_relevant_chunks(report, query)
+
+    def _save_turn(self, report: ReportData, session: ChatSession, message: str, response: str):
+        new_messages = [ChatMessage(role="user", content=message), ChatMessage(role="model", content=response)]
+        self.db_service.append_chat_messages(session.id, new_messages)
+        session.messages.extend(new_messages)
+
+        if len(session.messages) > settings.CHAT_SUMMARY_TRIGGER and session.id not in self._summaries:
+            task = asyncio.ensure_future(self._summarize(report, session))
+            self._summaries[session.id] = task
+            task.add_done_callback(lambda _: self._summaries.pop(session.id, None))
+
+    async def wait_for_summaries(self):
+        """Wait for the summarizations in progress."""
+        await asyncio.gather(*self._summaries.values(), return_exceptions=True)
+
+    async def stop(self):
+        """Cancel the summarizations in progress; their sessions are summarized on a later turn."""
+        for task in list(self._summaries.values()):
+            task.cancel()
+        await self.wait_for_summaries()
+
+    async def _summarize(self, report: ReportData, session: ChatSession):
+        """Fold everything but the recent window into the rolling summary."""
+        keep = max(settings.CHAT_HISTORY_MESSAGES, 0)
+        to_fold = session.messages[:len(session.messages) - keep]
+        try:
+            summary = await self.gemini_service.summarize_conversation(report, session.summary, to_fold)
+            if summary:
+                self.db_service.update_chat_summary(session.id, summary, session.summarized_count + len(to_fold))
+        except Exception as e:
+            logger.error(f"Error summarizing chat session {session.id}: {e}")
+            summary = None
+        if not summary:
+            # Keep the full backlog; summarization is retried on the next turn
+            logger.warning(f"Could not summarize chat session {session.id}")
+            return
+
+        # Kept in step with the database for sessions that stay loaded across turns (WebSocket chat);
+        # messages added since are after the folded ones
+        session.summary = summary
+        session.summarized_count += len(to_fold)
+        session.messages = session.messages[len(to_fold):]
+        logger.info(f"Folded {len(to_fold)} messages into summary of chat session {session.id}")
@@ -0,0 +1,80 @@
+import gzip
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from config import settings
+from services.http_cache import encoded_etag
+
+try:
+    import brotli
+except ImportError:  # optional: without it responses are only gzip-compressed
+    brotli = None
+
+def _compressible(content_type: str) -> bool:
+    return content_type.startswith("text/") or "json" in content_type or "javascript" in content_type
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing complete responses of at least `minimum_size` bytes.
+
+    Uses brotli when the client accepts it and the brotli package is
+    installed, otherwise gzip. Only responses sent in one piece are
+    compressed; streamed responses (NDJSON progress) pass through unchanged
+    so their events are not held back by the compressor.
+    """
+
+    def __init__(self, app, minimum_size: int = None, gzip_level: int = None, brotli_quality: int = None):
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MIN_SIZE if minimum_size is None else minimum_size
+        self.gzip_level = settings.COMPRESSION_GZIP_LEVEL if gzip_level is None else gzip_level
+        self.brotli_quality = settings.COMPRESSION_BROTLI_QUALITY if brotli_quality is None else brotli_quality
+
+    def _coding(self, scope) -> Optional[str]:
+        accepted = {part.split(";")[0].strip().lower()
+                    for part in Headers(scope=scope).get("accept-encoding", "").split(",")}
+        if brotli is not None and "br" in accepted:
+            return "br"
+        return "gzip" if "gzip" in accepted else None
+
+    def _compress(self, coding: str, body: bytes) -> bytes:
+        if coding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    async def __call__(self, scope, receive, send):
+        coding = self._coding(scope) if scope["type"] == "http" else None
+        if coding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+
+        async def send_compressed(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message  # held until the first body piece shows whether the response is complete
+                return
+            if start is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            held, start = start, None
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=held["headers"])
+            if (message.get("more_body", False) or len(body) < self.minimum_size or "content-encoding" in headers
+                    or not _compressible(headers.get("content-type", ""))):
+                await send(held)
+                await send(message)
+                return
+
+            compressed = self._compress(coding, body)
+            headers["Content-Encoding"] = coding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            if "etag" in headers:
+                headers["ETag"] = encoded_etag(headers["etag"], coding)
+            await send(held)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
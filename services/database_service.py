@@ -1,13 +1,19 @@
 import sqlite3
 import json
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
+from datetime import date, datetime
 from pathlib import Path
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, func, case, inspect, text, and_, or_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import sessionmaker, Session
-from models import ReportData, ChartConfig, ReportDB, Base
-from data.seed_data import get_seed_data
+from models import (ReportData, ReportIndexEntry, ChartConfig, ChatMessage, ChatSession, ReportDB, ReportChunkDB,
+                    ChatSessionDB, ChatMessageDB, NarrativeDB, ModelUsageDB, CatalogStateDB, RateLimitCounterDB, Base)
+from services.file_lock import FileLock, lock_path
+from services.report_metadata import publication_info
+from services.retrieval_service import chunk_text
 from config import settings
 import logging
+import uuid
 
 logger = logging.getLogger(__name__)
 
@@ -16,15 +22,46 @@ class DatabaseService:
         self.db_path = db_path or settings.DATABASE_PATH
         self.engine = create_engine(f"sqlite:///{self.db_path}", echo=settings.DEBUG)
         self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
-        self.create_tables()
+        # Tables are created by the first session rather than here, so constructing the service is free
+        self._tables_ready = False
     
     def create_tables(self):
         """Create database tables."""
-        Base.metadata.create_all(bind=self.engine)
+        # Every worker process creates a DatabaseService; the lock keeps their schema changes from racing
+        with FileLock(lock_path(self.db_path, "init")):
+            Base.metadata.create_all(bind=self.engine)
+            self._add_missing_schema()
+            self._tables_ready = True
+            db = self.get_db()
+            try:
+                if db.get(CatalogStateDB, 1) is None:
+                    db.add(CatalogStateDB(id=1, version=0))
+                    db.commit()
+            finally:
+                db.close()
         logger.info("Database tables created successfully")
     
+    def _add_missing_schema(self):
+        """Add columns and indexes introduced after a database was created (create_all only creates missing tables)."""
+        inspector = inspect(self.engine)
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(self.engine.dialect)
+                    with self.engine.begin() as connection:
+                        connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+                    logger.info(f"Added column {table.name}.{column.name}")
+            indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in indexes:
+                    index.create(bind=self.engine)
+                    logger.info(f"Added index {index.name}")
+    
     def get_db(self) -> Session:
-        """Get database session."""
+        """Get database session (creating the tables on first use)."""
+        if not self._tables_ready:
+            self.create_tables()
         db = self.SessionLocal()
         try:
             return db
@@ -33,7 +70,14 @@ class DatabaseService:
             raise e
     
     def initialize_database(self):
-        """Initialize database with seed data if empty."""
+        """Initialize database with seed data if empty (once, however many processes call it at the same time)."""
+        if not self._tables_ready:
+            self.create_tables()
+        with FileLock(lock_path(self.db_path, "init")):
+            self._initialize_database()
+    
+    def _initialize_database(self):
+        self._backfill_publication_info()
         db = self.get_db()
         try:
             # Check if database has any reports
@@ -42,8 +86,9 @@ class DatabaseService:
                 logger.info(f"Database already has {existing_reports} reports")
                 return
             
-            # Seed with data
+            # Seed with data (the seed module is only loaded when seeding)
             logger.info("Seeding database with initial data...")
+            from data.seed_data import get_seed_data
             seed_data = get_seed_data()
             
             for report_dict in seed_data:
@@ -73,6 +118,7 @@ class DatabaseService:
         try:
             # Check if report exists
             existing = db.query(ReportDB).filter(ReportDB.id == report.id).first()
+            now = datetime.utcnow()
             
             if existing:
                 # Update existing report
@@ -82,17 +128,29 @@ class DatabaseService:
                 existing.charts = json.dumps([chart.dict() for chart in report.charts])
                 existing.full_text = report.fullText
                 db_report = existing
+                if db.is_modified(db_report) or db_report.rendered_json is None:
+                    db_report.updated_at = now
+                    db_report.rendered_json = self._render(db_report)
+                    self._set_publication_info(db_report)
+                    self._bump_catalog_version(db)
             else:
-                # Create new report
+                # Create new report; timestamps are set here so the rendered JSON carries them
                 db_report = ReportDB(
                     id=report.id,
                     title=report.title,
                     summary=report.summary,
                     key_findings=json.dumps(report.keyFindings),
                     charts=json.dumps([chart.dict() for chart in report.charts]),
-                    full_text=report.fullText
+                    full_text=report.fullText,
+                    created_at=now,
+                    updated_at=now
                 )
+                db_report.rendered_json = self._render(db_report)
+                self._set_publication_info(db_report)
                 db.add(db_report)
+                self._bump_catalog_version(db)
+            
+            self._replace_chunks(db, report.id, report.fullText)
             
             db.commit()
             db.refresh(db_report)
@@ -105,6 +163,116 @@ class DatabaseService:
             logger.error(f"Error saving report {report.id}: {e}")
             raise
     
+    @staticmethod
+    def _set_publication_info(db_report: ReportDB):
+        db_report.issue, db_report.published_on = publication_info(db_report.full_text)
+    
+    def _bump_catalog_version(self, db: Session):
+        """Mark the set of reports as changed (caller commits)."""
+        db.query(CatalogStateDB).filter(CatalogStateDB.id == 1).update(
+            {CatalogStateDB.version: CatalogStateDB.version + 1}, synchronize_session=False
+        )
+    
+    def get_catalog_version(self) -> int:
+        """Counter that changes whenever a report is added, changed or deleted."""
+        db = self.get_db()
+        try:
+            return db.query(CatalogStateDB.version).filter(CatalogStateDB.id == 1).scalar() or 0
+        finally:
+            db.close()
+    
+    def _backfill_publication_info(self):
+        """Set issue and publication date on reports stored before they were extracted."""
+        db = self.get_db()
+        try:
+            # Undated reports are checked again on every start; there are few and the check is cheap
+            dated = 0
+            for db_report in db.query(ReportDB).filter(ReportDB.published_on.is_(None)).all():
+                issue, published_on = publication_info(db_report.full_text)
+                if published_on is None:
+                    continue
+                # Setting updated_at to itself keeps its onupdate from moving the timestamp the JSON carries
+                db.query(ReportDB).filter(ReportDB.id == db_report.id).update({
+                    ReportDB.issue: issue,
+                    ReportDB.published_on: published_on,
+                    ReportDB.updated_at: ReportDB.updated_at,
+                }, synchronize_session=False)
+                dated += 1
+            if dated:
+                self._bump_catalog_version(db)
+                db.commit()
+                logger.info(f"Extracted publication dates of {dated} reports")
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error extracting publication dates: {e}")
+            raise
+        finally:
+            db.close()
+    
+    def get_timeline(self, limit: int, after: Optional[Tuple[Optional[date], str]] = None) -> List[dict]:
+        """
+        Up to `limit` reports, newest publication first and undated ones last, as timeline entries.
+        
+        `after` is the (published_on, id) of the last entry of the previous
+        page; the timeline index makes each page cost the same at any depth.
+        """
+        db = self.get_db()
+        try:
+            entries = db.query(ReportDB.id, ReportDB.title, ReportDB.summary, ReportDB.issue, ReportDB.published_on)
+            published_on, report_id = after or (None, None)
+            rows = []
+            # Dated and undated reports are separate index ranges, each read in order
+            if after is None or published_on is not None:
+                dated = entries.filter(ReportDB.published_on.is_not(None))
+                if after is not None:
+                    # The plain bound lets SQLite start the index range at the cursor; the OR alone is not used
+                    dated = dated.filter(ReportDB.published_on <= published_on, or_(
+                        ReportDB.published_on < published_on,
+                        and_(ReportDB.published_on == published_on, ReportDB.id < report_id),
+                    ))
+                rows = dated.order_by(ReportDB.published_on.desc(), ReportDB.id.desc()).limit(limit).all()
+            if len(rows) < limit:
+                undated = entries.filter(ReportDB.published_on.is_(None))
+                if published_on is None and report_id is not None:
+                    undated = undated.filter(ReportDB.id < report_id)
+                rows += undated.order_by(ReportDB.id.desc()).limit(limit - len(rows)).all()
+            return [dict(row._mapping) for row in rows]
+        finally:
+            db.close()
+    
+    def _replace_chunks(self, db: Session, report_id: str, full_text: str):
+        """Re-chunk a report's full text for retrieval (caller commits)."""
+        db.query(ReportChunkDB).filter(ReportChunkDB.report_id == report_id).delete()
+        db.add_all([
+            ReportChunkDB(report_id=report_id, chunk_index=i, content=chunk)
+            for i, chunk in enumerate(chunk_text(full_text))
+        ])
+    
+    def get_report_chunks(self, report_id: str) -> List[str]:
+        """Get the indexed text chunks of a report, chunking it on first access if needed."""
+        db = self.get_db()
+        try:
+            rows = (db.query(ReportChunkDB.content)
+                    .filter(ReportChunkDB.report_id == report_id)
+                    .order_by(ReportChunkDB.chunk_index)
+                    .all())
+            if rows:
+                return [row.content for row in rows]
+            
+            # Reports stored before chunking was introduced are chunked lazily
+            db_report = db.query(ReportDB).filter(ReportDB.id == report_id).first()
+            if not db_report:
+                return []
+            self._replace_chunks(db, report_id, db_report.full_text)
+            db.commit()
+            return chunk_text(db_report.full_text)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error loading chunks for report {report_id}: {e}")
+            raise
+        finally:
+            db.close()
+    
     def get_reports(self) -> List[ReportData]:
         """Get all reports from the database."""
         db = self.get_db()
@@ -125,6 +293,84 @@ class DatabaseService:
         finally:
             db.close()
     
+    def get_report_json(self, report_id: str) -> Optional[Tuple[datetime, str]]:
+        """(last change, JSON as served by the API) of a report, without decoding it; None if it does not exist."""
+        db = self.get_db()
+        try:
+            row = db.query(ReportDB.updated_at, ReportDB.rendered_json).filter(ReportDB.id == report_id).first()
+            if row is None:
+                return None
+            if row.rendered_json is None:
+                return self._backfill_rendered(db, [report_id])[0]
+            return row.updated_at, row.rendered_json
+        finally:
+            db.close()
+    
+    def get_reports_json(self) -> List[Tuple[str, datetime, str]]:
+        """(id, last change, JSON as served by the API) of every report, in get_reports() order."""
+        db = self.get_db()
+        try:
+            rows = (db.query(ReportDB.id, ReportDB.updated_at, ReportDB.rendered_json)
+                    .order_by(ReportDB.created_at.desc()).all())
+            missing = [row.id for row in rows if row.rendered_json is None]
+            if not missing:
+                return [tuple(row) for row in rows]
+            rendered = dict(zip(missing, self._backfill_rendered(db, missing)))
+            return [(row.id, *rendered[row.id]) if row.id in rendered else tuple(row) for row in rows]
+        finally:
+            db.close()
+    
+    def _render(self, db_report: ReportDB) -> str:
+        return self._db_to_pydantic(db_report).model_dump_json()
+    
+    def _backfill_rendered(self, db: Session, report_ids: List[str]) -> List[Tuple[datetime, str]]:
+        """Render and store the JSON of reports saved before it was kept with the row."""
+        results = []
+        try:
+            for report_id in report_ids:
+                db_report = db.query(ReportDB).filter(ReportDB.id == report_id).one()
+                rendered = self._render(db_report)
+                # Setting updated_at to itself keeps its onupdate from moving the timestamp the JSON carries
+                db.query(ReportDB).filter(ReportDB.id == report_id).update(
+                    {ReportDB.rendered_json: rendered, ReportDB.updated_at: ReportDB.updated_at},
+                    synchronize_session=False
+                )
+                results.append((db_report.updated_at, rendered))
+            db.commit()
+            return results
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error rendering stored reports: {e}")
+            raise
+    
+    def get_report_version(self, report_id: str) -> Optional[datetime]:
+        """Last change of a report (None if it does not exist), without loading its content."""
+        db = self.get_db()
+        try:
+            row = db.query(ReportDB.updated_at).filter(ReportDB.id == report_id).first()
+            return row.updated_at if row else None
+        finally:
+            db.close()
+    
+    def get_catalog_versions(self) -> List[Tuple[str, datetime]]:
+        """(id, last change) of every report, in get_reports() order, without loading their content."""
+        db = self.get_db()
+        try:
+            return [tuple(row) for row in db.query(ReportDB.id, ReportDB.updated_at)
+                    .order_by(ReportDB.created_at.desc()).all()]
+        finally:
+            db.close()
+    
+    def get_catalog_index(self) -> List[ReportIndexEntry]:
+        """Id, title and last change of every report, in get_reports() order, without loading their content."""
+        db = self.get_db()
+        try:
+            rows = (db.query(ReportDB.id, ReportDB.title, ReportDB.updated_at)
+                    .order_by(ReportDB.created_at.desc()).all())
+            return [ReportIndexEntry(id=row.id, title=row.title, updated_at=row.updated_at) for row in rows]
+        finally:
+            db.close()
+    
     def delete_report(self, report_id: str) -> bool:
         """Delete a report by ID."""
         db = self.get_db()
@@ -132,6 +378,12 @@ class DatabaseService:
             db_report = db.query(ReportDB).filter(ReportDB.id == report_id).first()
             if db_report:
                 db.delete(db_report)
+                db.query(ReportChunkDB).filter(ReportChunkDB.report_id == report_id).delete()
+                session_ids = db.query(ChatSessionDB.id).filter(ChatSessionDB.report_id == report_id)
+                db.query(ChatMessageDB).filter(ChatMessageDB.session_id.in_(session_ids.scalar_subquery())).delete(synchronize_session=False)
+                db.query(ChatSessionDB).filter(ChatSessionDB.report_id == report_id).delete()
+                db.query(NarrativeDB).filter(NarrativeDB.report_id == report_id).delete()
+                self._bump_catalog_version(db)
                 db.commit()
                 logger.info(f"Deleted report {report_id}")
                 return True
@@ -143,6 +395,224 @@ class DatabaseService:
         finally:
             db.close()
     
+    def create_chat_session(self, report_id: str) -> ChatSession:
+        """Start a new chat session for a report."""
+        db = self.get_db()
+        try:
+            db_session = ChatSessionDB(id=uuid.uuid4().hex, report_id=report_id, summary="", summarized_count=0)
+            db.add(db_session)
+            db.commit()
+            return ChatSession(id=db_session.id, report_id=report_id)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error creating chat session for report {report_id}: {e}")
+            raise
+        finally:
+            db.close()
+    
+    def get_chat_session(self, session_id: str, full_history: bool = False) -> Optional[ChatSession]:
+        """
+        Get a chat session with its messages.
+        
+        By default only the messages not yet folded into the rolling summary are
+        loaded; pass full_history=True to load the whole conversation.
+        """
+        db = self.get_db()
+        try:
+            db_session = db.query(ChatSessionDB).filter(ChatSessionDB.id == session_id).first()
+            if not db_session:
+                return None
+            
+            query = (db.query(ChatMessageDB)
+                     .filter(ChatMessageDB.session_id == session_id)
+                     .order_by(ChatMessageDB.id))
+            if not full_history:
+                query = query.offset(db_session.summarized_count)
+            
+            return ChatSession(
+                id=db_session.id,
+                report_id=db_session.report_id,
+                summary=db_session.summary,
+                summarized_count=db_session.summarized_count,
+                messages=[
+                    ChatMessage(role=m.role, content=m.content, timestamp=m.created_at)
+                    for m in query.all()
+                ]
+            )
+        finally:
+            db.close()
+    
+    def append_chat_messages(self, session_id: str, messages: List[ChatMessage]):
+        """Append messages to a chat session."""
+        db = self.get_db()
+        try:
+            db.add_all([
+                ChatMessageDB(session_id=session_id, role=m.role, content=m.content,
+                              created_at=m.timestamp or datetime.utcnow())
+                for m in messages
+            ])
+            db.query(ChatSessionDB).filter(ChatSessionDB.id == session_id).update(
+                {ChatSessionDB.updated_at: datetime.utcnow()}
+            )
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error saving chat messages for session {session_id}: {e}")
+            raise
+        finally:
+            db.close()
+    
+    def update_chat_summary(self, session_id: str, summary: str, summarized_count: int):
+        """Store a new rolling summary covering the first summarized_count messages."""
+        db = self.get_db()
+        try:
+            db.query(ChatSessionDB).filter(ChatSessionDB.id == session_id).update({
+                ChatSessionDB.summary: summary,
+                ChatSessionDB.summarized_count: summarized_count,
+            })
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error updating summary for chat session {session_id}: {e}")
+            raise
+        finally:
+            db.close()
+    
+    def get_narrative(self, report_id: str) -> Optional[Tuple[str, str]]:
+        """Get the stored narrative of a report as (prompt_key, content)."""
+        db = self.get_db()
+        try:
+            row = db.query(NarrativeDB).filter(NarrativeDB.report_id == report_id).first()
+            return (row.prompt_key, row.content) if row else None
+        finally:
+            db.close()
+    
+    def get_narrative_keys(self) -> Dict[str, Tuple[str, Optional[datetime]]]:
+        """Map every report with a stored narrative to the (prompt_key, report updated_at) it was generated for."""
+        db = self.get_db()
+        try:
+            rows = db.query(NarrativeDB.report_id, NarrativeDB.prompt_key, NarrativeDB.report_updated_at).all()
+            return {row.report_id: (row.prompt_key, row.report_updated_at) for row in rows}
+        finally:
+            db.close()
+    
+    def set_narrative_report_version(self, report_id: str, report_updated_at: datetime):
+        """Record that a report's stored narrative still answers its version of `report_updated_at`."""
+        db = self.get_db()
+        try:
+            db.query(NarrativeDB).filter(NarrativeDB.report_id == report_id).update(
+                {NarrativeDB.report_updated_at: report_updated_at}, synchronize_session=False
+            )
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error updating narrative of report {report_id}: {e}")
+            raise
+        finally:
+            db.close()
+    
+    def save_narrative(self, report_id: str, prompt_key: str, content: str, report_updated_at: datetime = None):
+        """Store (or replace) the narrative of a report, generated from its version of `report_updated_at`."""
+        db = self.get_db()
+        try:
+            db.merge(NarrativeDB(report_id=report_id, prompt_key=prompt_key, content=content,
+                                 report_updated_at=report_updated_at, created_at=datetime.utcnow()))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error saving narrative for report {report_id}: {e}")
+            raise
+        finally:
+            db.close()
+    
+    def save_model_usage(self, records: List[dict]):
+        """Insert a batch of model usage records (ModelUsageDB column values)."""
+        db = self.get_db()
+        try:
+            db.bulk_insert_mappings(ModelUsageDB, records)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error saving {len(records)} model usage records: {e}")
+            raise
+        finally:
+            db.close()
+    
+    def sync_rate_limit_counts(self, deltas: Dict[Tuple[str, int], int], since: int) -> Dict[Tuple[str, int], int]:
+        """
+        Add one worker's new request counts, keyed (key, window_start), to the shared rate limit counters.
+        
+        Returns every worker's counts for the windows starting at or after `since`;
+        older windows are deleted in the same transaction as the new counts are
+        added. Without new counts nothing is written, so idle workers take no
+        write lock.
+        """
+        db = self.get_db()
+        try:
+            if deltas:
+                rows = [{"key": key, "window_start": window_start, "count": count}
+                        for (key, window_start), count in deltas.items()]
+                # 3 bound parameters per row, well below SQLite's limit per statement
+                for start in range(0, len(rows), 500):
+                    insert = sqlite_insert(RateLimitCounterDB).values(rows[start:start + 500])
+                    db.execute(insert.on_conflict_do_update(
+                        index_elements=["key", "window_start"],
+                        set_={"count": RateLimitCounterDB.count + insert.excluded.count},
+                    ))
+                db.query(RateLimitCounterDB).filter(RateLimitCounterDB.window_start < since).delete(
+                    synchronize_session=False
+                )
+                db.commit()
+            counts = db.query(RateLimitCounterDB.key, RateLimitCounterDB.window_start, RateLimitCounterDB.count).filter(
+                RateLimitCounterDB.window_start >= since
+            ).all()
+            return {(key, window_start): count for key, window_start, count in counts}
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error syncing {len(deltas)} rate limit counters: {e}")
+            raise
+        finally:
+            db.close()
+    
+    def get_model_usage(self, since: datetime, group_by: Optional[str] = None) -> List[dict]:
+        """
+        Sum model usage since `since`, optionally grouped by hour, endpoint, report, task or model.
+        
+        Returns one dict per group (a single totals dict without group_by), largest token use first.
+        """
+        group_columns = {
+            "hour": func.strftime("%Y-%m-%dT%H:00:00", ModelUsageDB.created_at),
+            "endpoint": ModelUsageDB.endpoint,
+            "report": ModelUsageDB.report_id,
+            "task": ModelUsageDB.task,
+            "model": ModelUsageDB.model,
+        }
+        if group_by is not None and group_by not in group_columns:
+            raise ValueError(f"Cannot group model usage by {group_by!r}")
+        
+        prompt_tokens = func.coalesce(func.sum(ModelUsageDB.prompt_tokens), 0)
+        output_tokens = func.coalesce(func.sum(ModelUsageDB.output_tokens), 0)
+        columns = [
+            func.count(ModelUsageDB.id).label("calls"),
+            func.coalesce(func.sum(case((ModelUsageDB.success == False, 1), else_=0)), 0).label("failed_calls"),
+            func.coalesce(func.sum(case((ModelUsageDB.estimated == True, 1), else_=0)), 0).label("estimated_calls"),
+            prompt_tokens.label("prompt_tokens"),
+            output_tokens.label("output_tokens"),
+            func.coalesce(func.avg(ModelUsageDB.latency_ms), 0).label("avg_latency_ms"),
+            func.coalesce(func.max(ModelUsageDB.latency_ms), 0).label("max_latency_ms"),
+        ]
+        db = self.get_db()
+        try:
+            if group_by is None:
+                query = db.query(*columns)
+            else:
+                key = group_columns[group_by]
+                query = db.query(key.label(group_by), *columns).group_by(key)
+                query = query.order_by(key) if group_by == "hour" else query.order_by((prompt_tokens + output_tokens).desc())
+            return [dict(row._mapping) for row in query.filter(ModelUsageDB.created_at >= since).all()]
+        finally:
+            db.close()
+    
     def _db_to_pydantic(self, db_report: ReportDB) -> ReportData:
         """Convert SQLAlchemy model to Pydantic model."""
         return ReportData(
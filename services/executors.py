@@ -0,0 +1,83 @@
+import asyncio
+import functools
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+def latency_summary(samples) -> dict:
+    """Mean/p50/p95/max of a collection of durations in seconds."""
+    values = sorted(samples)
+
+    def percentile(p: float) -> float:
+        return values[min(len(values) - 1, int(p * len(values)))] if values else 0.0
+
+    return {
+        "samples": len(values),
+        "mean": sum(values) / len(values) if values else 0.0,
+        "p50": percentile(0.50),
+        "p95": percentile(0.95),
+        "max": values[-1] if values else 0.0,
+    }
+
+class InstrumentedExecutor:
+    """
+    A named, bounded thread pool for one kind of blocking work.
+
+    Keeps model calls, PDF parsing and everything else that uses the default
+    loop executor from starving each other, and records how many tasks are
+    queued or running and how long each waited for a worker thread.
+    """
+
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.queued = 0
+        self.active = 0
+        self.wait_times = deque(maxlen=1000)
+
+    def _instrumented(self, func: Callable, submitted_at: float):
+        with self._lock:
+            self.queued -= 1
+            self.active += 1
+            self.wait_times.append(time.monotonic() - submitted_at)
+        try:
+            return func()
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.completed += 1
+
+    async def run(self, func: Callable, *args, **kwargs):
+        """Run func(*args, **kwargs) on this pool and await its result."""
+        call = functools.partial(func, *args, **kwargs)
+        with self._lock:
+            self.submitted += 1
+            self.queued += 1
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(self._instrumented, call, time.monotonic())
+        )
+
+    def get_metrics(self) -> dict:
+        """Queue depth, busy workers and worker wait time statistics."""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "queued": self.queued,
+                "active": self.active,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "wait_seconds": latency_summary(self.wait_times),
+            }
+
+    def shutdown(self, wait: bool = False):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,181 @@
+import hashlib
+import json
+import logging
+import math
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Iterator, List, Optional
+
+from google.api_core import exceptions as google_exceptions
+
+from config import settings
+from services.prompt_encoding import count_tokens
+
+logger = logging.getLogger(__name__)
+
+_SENTENCE = re.compile(r"[A-Z](?:[^.!?\n]|\.(?=\d)){24,300}[.!?]")  # decimal points do not end a sentence
+_PALETTE = ["#8884d8", "#82ca9d", "#ffc658", "#ff7300", "#0088fe", "#00c49f"]
+_ICONS = ["fa-solid fa-users", "fa-solid fa-industry", "fa-solid fa-building-columns",
+          "fa-solid fa-house", "fa-solid fa-briefcase", "fa-solid fa-globe"]
+# (min, max) items generated for arrays, by field name
+_ARRAY_SIZES = {"keyFindings": (4, 6), "charts": (1, 2), "rows": (4, 7), "dataKeys": (1, 2),
+                "nodes": (3, 5), "edges": (2, 4), "keyActors": (3, 4)}
+_FILLER = ("German economic output stagnated as higher energy prices and weak demand weighed on industry. "
+           "Real wages rose by 2.1 percent while private consumption remained subdued. "
+           "Construction volume declined by 3.5 percent amid higher financing costs. "
+           "Public investment would need to increase by 0.5 percent of GDP to close the gap.")
+# Retryable errors the real API returns under load
+_TRANSIENT_ERRORS = [google_exceptions.ServiceUnavailable, google_exceptions.TooManyRequests,
+                     google_exceptions.InternalServerError]
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")[:60] or "report"
+
+class FakeModel:
+    """
+    Offline stand-in for genai.GenerativeModel, selected with AI_BACKEND=fake.
+
+    generate_content() returns realistic output built from the sentences of
+    the prompt: an object matching the response_schema of structured calls
+    (reports, merges, storyboards, repairs), and markdown for narratives,
+    chat answers and conversation summaries. Output is deterministic per
+    prompt and seed. Each call sleeps a log-normally distributed time to the
+    first token (`straggler_factor` times longer at `straggler_rate`) plus a
+    per-token generation time, and fails with a retryable API error at
+    `failure_rate`. Responses carry usage_metadata like real ones.
+    """
+
+    model_name = "models/fake-gemini"
+
+    def __init__(self, latency_ms: float = None, latency_sigma: float = None, ms_per_token: float = None,
+                 failure_rate: float = None, straggler_rate: float = None, straggler_factor: float = None,
+                 seed: int = None):
+        self.latency_ms = settings.FAKE_MODEL_LATENCY_MS if latency_ms is None else latency_ms
+        self.latency_sigma = settings.FAKE_MODEL_LATENCY_SIGMA if latency_sigma is None else latency_sigma
+        self.ms_per_token = settings.FAKE_MODEL_MS_PER_TOKEN if ms_per_token is None else ms_per_token
+        self.failure_rate = settings.FAKE_MODEL_FAILURE_RATE if failure_rate is None else failure_rate
+        self.straggler_rate = settings.FAKE_MODEL_STRAGGLER_RATE if straggler_rate is None else straggler_rate
+        self.straggler_factor = settings.FAKE_MODEL_STRAGGLER_FACTOR if straggler_factor is None else straggler_factor
+        self.seed = settings.FAKE_MODEL_SEED if seed is None else seed
+        # Timing and failures draw from one sequence; content is seeded per prompt
+        self._random = random.Random(self.seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def generate_content(self, prompt, stream: bool = False, generation_config=None, **kwargs):
+        prompt = str(prompt)
+        with self._lock:
+            self.calls += 1
+            first_token = self.latency_ms / 1000 * math.exp(self._random.gauss(0, self.latency_sigma))
+            if self._random.random() < self.straggler_rate:
+                first_token *= self.straggler_factor
+            fails = self._random.random() < self.failure_rate
+            error = self._random.choice(_TRANSIENT_ERRORS)
+
+        if fails:
+            time.sleep(first_token)
+            raise error("Fake model transient failure")
+
+        text = self.render(prompt, generation_config)
+        usage = SimpleNamespace(prompt_token_count=count_tokens(prompt), candidates_token_count=count_tokens(text))
+        usage.total_token_count = usage.prompt_token_count + usage.candidates_token_count
+        if stream:
+            return self._stream(text, first_token, usage)
+        time.sleep(first_token + usage.candidates_token_count * self.ms_per_token / 1000)
+        return SimpleNamespace(text=text, usage_metadata=usage)
+
+    def _stream(self, text: str, first_token: float, usage) -> Iterator[SimpleNamespace]:
+        time.sleep(first_token)
+        pieces = [text[i:i + 64] for i in range(0, len(text), 64)]
+        for i, piece in enumerate(pieces):
+            time.sleep(len(piece) / 4 * self.ms_per_token / 1000)
+            # Like the real API, the last chunk reports usage for the whole response
+            yield SimpleNamespace(text=piece, usage_metadata=usage if i == len(pieces) - 1 else None)
+
+    def render(self, prompt: str, generation_config=None) -> str:
+        """The response text for a prompt, without any delay."""
+        rng = random.Random(hashlib.sha256(f"{self.seed}\0{prompt}".encode("utf-8")).digest())
+        sentences = self._sentences(prompt)
+        schema = self._schema_of(generation_config)
+        if schema:
+            return json.dumps(self._fill(schema, "", rng, sentences))
+        if "running summary" in prompt:
+            return " ".join(rng.sample(sentences, min(3, len(sentences))))
+        if "User question:" in prompt:
+            return " ".join(rng.sample(sentences, min(4, len(sentences))))
+        sections = ["Summary", "Key Trends", "Interconnections", "Outlook"]
+        return "\n\n".join(f"## {section}\n\n" + " ".join(rng.sample(sentences, min(4, len(sentences))))
+                           for section in sections)
+
+    @staticmethod
+    def _schema_of(generation_config) -> Optional[dict]:
+        if isinstance(generation_config, dict):
+            return generation_config.get("response_schema")
+        return getattr(generation_config, "response_schema", None)
+
+    @staticmethod
+    def _sentences(prompt: str) -> List[str]:
+        # Prefer the quoted source text (between --- fences) over the instructions
+        parts = prompt.split("---")
+        source = " ".join(parts[1::2]) if len(parts) >= 3 else prompt
+        sentences = [s.strip() for s in _SENTENCE.findall(source)]
+        return sentences or [s.strip() for s in _SENTENCE.findall(_FILLER)]
+
+    def _fill(self, schema: dict, name: str, rng: random.Random, sentences: List[str]) -> Any:
+        """A value matching a Gemini response schema, with field contents chosen by field name."""
+        if schema.get("enum"):
+            return rng.choice(schema["enum"])
+        kind = schema.get("type")
+        if kind == "object":
+            return self._fill_object(schema, rng, sentences)
+        if kind == "array":
+            low, high = _ARRAY_SIZES.get(name, (2, 4))
+            return [self._fill(schema["items"], name, rng, sentences) for _ in range(rng.randint(low, high))]
+        if kind == "integer":
+            return rng.randint(0, 100)
+        if kind == "number":
+            return round(rng.uniform(-5, 120), 1)
+        if kind == "boolean":
+            return rng.random() < 0.5
+        if schema.get("nullable"):
+            return None
+        return self._string(name, rng, sentences)
+
+    def _fill_object(self, schema: dict, rng: random.Random, sentences: List[str]) -> dict:
+        value = {key: self._fill(child, key, rng, sentences) for key, child in schema["properties"].items()}
+        # Keep generated objects internally consistent, as a real model's would be
+        if isinstance(value.get("title"), str) and "id" in value:
+            value["id"] = _slug(value["title"])
+        if isinstance(value.get("dataKeys"), list) and isinstance(value.get("rows"), list):
+            value["xAxisKey"] = "year"
+            for i, data_key in enumerate(value["dataKeys"]):
+                data_key["key"] = f"series{i + 1}"
+            for i, row in enumerate(value["rows"]):
+                row["label"] = str(2018 + i)
+                row["values"] = [round(rng.uniform(-5, 120), 1) for _ in value["dataKeys"]]
+        if isinstance(value.get("nodes"), list) and isinstance(value.get("edges"), list) and value["nodes"]:
+            ids = [node["id"] for node in value["nodes"]]
+            for edge in value["edges"]:
+                edge["source"], edge["target"] = rng.choice(ids), rng.choice(ids)
+        return value
+
+    def _string(self, name: str, rng: random.Random, sentences: List[str]) -> str:
+        sentence = rng.choice(sentences)
+        if name == "title":
+            return " ".join(sentence.split()[:7]).rstrip(",.;:")
+        if name in ("id", "key", "source", "target"):
+            return _slug(" ".join(sentence.split()[:4]))
+        if name == "color":
+            return rng.choice(_PALETTE)
+        if name == "icon":
+            return rng.choice(_ICONS)
+        if name == "name":
+            return " ".join(sentence.split()[:3]).rstrip(",.;:")
+        if name == "narrative":
+            return "\n\n".join(" ".join(rng.sample(sentences, min(4, len(sentences)))) for _ in range(3))
+        if name in ("summary", "introspection", "retrospection", "description"):
+            return " ".join(rng.sample(sentences, min(2, len(sentences))))
+        return sentence
@@ -0,0 +1,67 @@
+import os
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+class FileLock:
+    """
+    Exclusive lock on a file, shared by every process using the same path.
+
+    Used to run one-time work (schema creation, seeding) once when several
+    worker processes start together, and to pick one worker for singleton
+    background jobs. The lock is released when the holder releases it or exits.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._handle = None
+
+    @property
+    def held(self) -> bool:
+        return self._handle is not None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        """Take the lock; without `blocking`, return False at once if another holder has it."""
+        if self._handle is not None:
+            raise RuntimeError(f"Lock {self.path} is already held")
+        handle = open(self.path, "a+b")
+        try:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+        except OSError:
+            handle.close()
+            if blocking:
+                raise
+            return False
+        self._handle = handle
+        return True
+
+    def release(self):
+        handle, self._handle = self._handle, None
+        if handle is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            handle.close()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+def lock_path(db_path: str, name: str) -> str:
+    """Lock file next to the database, so every process using that database shares it."""
+    return f"{os.path.abspath(db_path)}.{name}.lock"
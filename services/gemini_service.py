@@ -1,37 +1,189 @@
-import google.generativeai as genai
 import os
 import json
-from typing import List, Optional
-from models import ReportData, StoryboardData, ChartConfig
+from typing import AsyncIterator, Callable, List, Optional, Tuple, Type
+from collections import OrderedDict
+from pydantic import BaseModel
+from models import ReportData, StoryboardData, ChartConfig, ChatMessage
 from config import settings
+from services.retrieval_service import chunk_text, select_chunks, tokenize
+from services.fake_model import FakeModel
+from services.model_client import ModelClient
+from services.model_router import ModelRouter
+from services.prompt_encoding import encode_findings, encode_report, encode_reports
+from services.structured_output import (
+    ChartSpec, ReportExtraction, ReportMerge, StoryboardGeneration, StructuredOutputStats,
+    response_schema, to_domain, validate_output,
+)
+from services.json_stream import JSONStreamError, JSONStreamParser
+from services.single_flight import SingleFlight, prompt_key
 import logging
 import asyncio
+import threading
 
 logger = logging.getLogger(__name__)
 
+class ChatUnavailable(Exception):
+    """Raised when a chat message gets no answer: AI features are disabled or the model call failed."""
+
+def _dedupe_findings(findings: List[str], threshold: float = 0.7) -> List[str]:
+    """Drop findings whose word overlap (Jaccard) with an earlier finding exceeds threshold."""
+    kept, kept_terms = [], []
+    for finding in findings:
+        terms = set(tokenize(finding))
+        if not terms:
+            continue
+        if any(len(terms & seen) / len(terms | seen) >= threshold for seen in kept_terms):
+            continue
+        kept.append(finding.strip())
+        kept_terms.append(terms)
+    return kept
+
+def _dedupe_charts(charts: List[dict]) -> List[dict]:
+    """Drop charts whose normalized title was already seen."""
+    seen, kept = set(), []
+    for chart in charts:
+        key = " ".join(tokenize(str(chart.get("title", ""))))
+        if key and key in seen:
+            continue
+        seen.add(key)
+        kept.append(chart)
+    return kept
+
+def _progress_event(path: tuple, value) -> Optional[dict]:
+    """
+    Turn a completed streamed value into an event for progressive rendering.
+    
+    Top-level scalars and objects become {"type": "field", "field", "value"};
+    items of top-level lists become {"type": "item", "field", "index", "value"},
+    with charts converted to ChartConfig form. Whole lists and deeper values are
+    skipped because their items have already been sent.
+    """
+    if len(path) == 1 and not isinstance(value, list):
+        return {"type": "field", "field": path[0], "value": value}
+    if len(path) == 2 and isinstance(path[1], int):
+        if path[0] == "charts":
+            try:
+                value = ChartSpec(**value).to_chart_config().model_dump()
+            except Exception:
+                return None
+        return {"type": "item", "field": path[0], "index": path[1], "value": value}
+    return None
+
+class _GeminiModel:
+    """
+    A Gemini model whose SDK is loaded by its first call.
+
+    generate_content() runs on the model client's worker threads, so the
+    slow SDK import and configuration never hold up the event loop.
+    """
+
+    def __init__(self, service: "GeminiService", name: str):
+        self.model_name = name
+        self._service = service
+
+    def generate_content(self, *args, **kwargs):
+        return self._service._load_model(self.model_name).generate_content(*args, **kwargs)
+
+NARRATIVE_ERROR_MESSAGE = "An error occurred while generating the analysis. Please check the console for details."
+
 class GeminiService:
-    def __init__(self):
+    def __init__(self, client: Optional[ModelClient] = None, model=None):
+        """
+        `model` is any object with genai.GenerativeModel's generate_content();
+        by default it is chosen by settings.AI_BACKEND.
+        """
+        self._report_contexts = OrderedDict()
+        self.client = client or ModelClient()
+        self.structured_stats = StructuredOutputStats()
+        self.single_flight = SingleFlight(settings.AI_REQUEST_COALESCING)
+        self.router = ModelRouter(self.client)
+        self._injected_model = None
+        self._models = {}
+        self._sdk_models = {}
+        self._sdk_lock = threading.Lock()
         self.api_key = settings.GEMINI_API_KEY
+        if model is None and settings.AI_BACKEND == "fake":
+            model = FakeModel()
+        if model is not None:
+            self.model = model
+            self.enabled = True
+            logger.info(f"Gemini AI service initialized with model backend: {type(model).__name__}")
+            return
         if not self.api_key:
             logger.warning("Gemini API key not found. AI features will be disabled.")
             self.enabled = False
             return
         
+        # The SDK takes most of a second to import, so it is loaded off the event loop after startup
+        # (preload()) or by the first model call, on a worker thread
+        self.enabled = True
+        logger.info(f"Gemini AI service initialized with model: {settings.AI_MODEL}")
+    
+    @property
+    def model(self):
+        """The primary model; an assigned (injected or fake) model serves every route."""
+        return self._model_for(settings.AI_MODEL)
+    
+    @model.setter
+    def model(self, model):
+        self._injected_model = model
+    
+    def _model_for(self, name: str):
+        """Model object for a model name in the routing table; Gemini models load the SDK on first call."""
+        if self._injected_model is not None:
+            return self._injected_model
+        if name not in self._models:
+            self._models[name] = _GeminiModel(self, name)
+        return self._models[name]
+
+    def _load_model(self, name: str):
+        """The SDK's GenerativeModel for a model name, importing and configuring the SDK on first use (blocking)."""
+        if name not in self._sdk_models:
+            with self._sdk_lock:
+                if name not in self._sdk_models:
+                    import google.generativeai as genai
+                    genai.configure(api_key=self.api_key)
+                    self._sdk_models[name] = genai.GenerativeModel(name)
+        return self._sdk_models[name]
+
+    async def preload(self):
+        """Load the SDK and the primary model in the default executor, so no user request waits for it."""
+        if not self.enabled or self._injected_model is not None:
+            return
         try:
-            genai.configure(api_key=self.api_key)
-            self.model = genai.GenerativeModel(settings.AI_MODEL)
-            self.enabled = True
-            logger.info(f"Gemini AI service initialized with model: {settings.AI_MODEL}")
+            await asyncio.get_running_loop().run_in_executor(None, self._load_model, settings.AI_MODEL)
         except Exception as e:
-            logger.error(f"Failed to initialize Gemini service: {e}")
-            self.enabled = False
-    
+            logger.error(f"Could not load the Gemini SDK: {e}")
+
+    def _generation_config(self, task: str, **extra) -> dict:
+        """Generation settings of a task's route, in the dict form generate_content() accepts."""
+        route = self.router.route(task)
+        return dict(max_output_tokens=route.max_output_tokens, temperature=route.temperature, **extra)
+
     async def generate_narrative(self, data: ReportData) -> str:
         """Generate a narrative analysis for a report."""
         if not self.enabled:
             return "AI features are disabled. Please configure the Gemini API key."
         
-        prompt = f"""
+        narrative = await self.create_narrative(data)
+        return NARRATIVE_ERROR_MESSAGE if narrative is None else narrative
+    
+    async def create_narrative(self, data: ReportData, lane: str = ModelClient.INTERACTIVE) -> Optional[str]:
+        """Generate a narrative on the given model client lane; None if AI is disabled or the call failed."""
+        if not self.enabled:
+            return None
+        prompt = self._narrative_prompt(data)
+        # Users opening the same report at once share one call; the lane is part of the key, so a user
+        # never waits in the batch lane behind a pre-generation of the same narrative
+        return await self.single_flight.run("narrative", prompt_key(prompt, lane),
+                                            lambda: self._complete_narrative(prompt, lane))
+    
+    def narrative_key(self, data: ReportData) -> str:
+        """Key of the narrative prompt for a report; it changes when the report or the prompt does."""
+        return prompt_key(self._narrative_prompt(data))
+    
+    def _narrative_prompt(self, data: ReportData) -> str:
+        return f"""
             You are a world-class economic data analyst from the German Institute for Economic Research (DIW Berlin).
             Based on the following data from a DIW Weekly Report on "{data.title}", write a compelling narrative summary.
 
@@ -42,59 +194,80 @@ class GeminiService:
             4. Conclude with a forward-looking statement or a key takeaway.
             5. Format your entire response in GitHub-flavored Markdown for web display.
 
-            Here is the data for your analysis:
-            - **Report Title:** {data.title}
-            - **High-Level Summary:** {data.summary}
-            - **Key Findings:**
-            {chr(10).join(f"  - {f}" for f in data.keyFindings)}
-            - **Chart Data:** {json.dumps([chart.dict() for chart in data.charts], indent=2)}
-            - **Original Report Excerpt:** 
+            Here is the data for your analysis (chart data as pipe-separated tables):
             ---
-            {data.fullText[:4000]}...
+            {encode_report(data, text_budget=settings.PROMPT_NARRATIVE_EXCERPT_TOKENS)}
             ---
             """
-        
+    
+    async def _complete_narrative(self, prompt: str, lane: str) -> Optional[str]:
         try:
-            response = await asyncio.to_thread(
-                self.model.generate_content,
+            response = await self.router.generate(
+                self._model_for,
                 prompt,
-                generation_config=genai.types.GenerationConfig(
-                    max_output_tokens=settings.MAX_TOKENS,
-                    temperature=0.7
-                )
+                lane=lane,
+                task="narrative",
+                generation_config=self._generation_config("narrative")
             )
             return response.text
         except Exception as e:
             logger.error(f"Error generating narrative: {e}")
-            return "An error occurred while generating the analysis. Please check the console for details."
+            return None
     
     async def generate_storyboard(self, reports: List[ReportData]) -> Optional[StoryboardData]:
         """Generate a storyboard from all reports using a detailed, structured prompt."""
         if not self.enabled:
             return None
-
-        # Prepare the source data for the prompt
-        source_data = [report.dict() for report in reports]
         
-        prompt = '''
+        prompt = self._storyboard_prompt(reports)
+        return await self.single_flight.run("storyboard", prompt_key(prompt), lambda: self._complete_storyboard(prompt))
+    
+    async def _complete_storyboard(self, prompt: str) -> Optional[StoryboardData]:
+        try:
+            parsed = await self._generate_structured("storyboard", prompt, StoryboardGeneration)
+        except Exception as e:
+            logger.error(f"Error generating storyboard: {e}")
+            return None
+        return self._build_storyboard(parsed)
+    
+    async def stream_storyboard(self, reports: List[ReportData]) -> AsyncIterator[dict]:
+        """
+        Generate a storyboard, yielding its fields as the model streams them.
+        
+        Yields progress events (see _progress_event) and finally
+        {"type": "storyboard", "storyboard": StoryboardData or None}.
+        """
+        if not self.enabled:
+            yield {"type": "storyboard", "storyboard": None}
+            return
+        
+        prompt = self._storyboard_prompt(reports)
+        async for event in self.single_flight.stream(
+            "storyboard_stream", prompt_key(prompt), lambda: self._stream_storyboard_events(prompt)
+        ):
+            yield event
+    
+    async def _stream_storyboard_events(self, prompt: str) -> AsyncIterator[dict]:
+        parsed = None
+        try:
+            async for event in self._stream_structured("storyboard", prompt, StoryboardGeneration):
+                if event["type"] == "result":
+                    parsed = event["value"]
+                else:
+                    yield event
+        except Exception as e:
+            logger.error(f"Error generating storyboard: {e}")
+        yield {"type": "storyboard", "storyboard": self._build_storyboard(parsed)}
+    
+    def _storyboard_prompt(self, reports: List[ReportData]) -> str:
+        # Reports without their full text, in the shared compact encoding
+        source_data = encode_reports(reports, settings.PROMPT_STORYBOARD_SOURCE_TOKENS)
+        
+        prompt = f'''
 You are a world-class macroeconomic strategist. Your mission is to analyze a collection of disparate economic reports and uncover the **"narrative singularity"**—the single, powerful, underlying story that connects them all. You must distill complexity into a clear, compelling, and unified thesis, visualize it, and reflect on your own analytical process.
 
-Your response MUST be a single JSON object that conforms to this TypeScript interface:
-interface ChartDataPoint { name: string; [key: string]: string | number; }
-interface ChartConfig { type: 'bar' | 'line' | 'pie'; data: ChartDataPoint[]; dataKeys: { key: string; color: string; stackId?: string; name?: string }[]; title: string; description: string; xAxisKey: string; }
-interface GraphNode { id: string; title: string; }
-interface GraphEdge { source: string; target: string; label: string; }
-interface RelationshipGraphData { nodes: GraphNode[]; edges: GraphEdge[]; }
-interface KeyActor { name: string; description: string; icon: string; /* A full Font Awesome 6 class string, e.g., "fa-solid fa-users" or "fa-solid fa-industry" */ }
-interface StoryboardData {
-  title: string; // A compelling, overarching title for the entire storyboard analysis.
-  narrative: string;
-  charts: ChartConfig[];
-  introspection: string;
-  retrospection: string;
-  relationshipGraph: RelationshipGraphData;
-  keyActors: KeyActor[];
-}
+Your response is a single JSON object with the fields `title`, `narrative`, `charts`, `introspection`, `retrospection`, `relationshipGraph` and `keyActors`; the response schema defines their types.
+Each chart lists its series in `dataKeys` and one `rows` entry per x-axis category, whose `values` follow the order of `dataKeys`.
 
 ---
 **DETAILED INSTRUCTIONS**
@@ -139,28 +312,14 @@ interface StoryboardData {
 ---
 {source_data}
 '''
-        
-        try:
-            response = await asyncio.to_thread(
-                self.model.generate_content,
-                prompt,
-                generation_config=genai.types.GenerationConfig(
-                    max_output_tokens=settings.MAX_TOKENS,
-                    temperature=0.8
-                )
-            )
-            if not response or not response.text:
-                return None
-            response_text = response.text
-        except Exception as e:
-            logger.error(f"Error generating storyboard: {e}")
+        return prompt
+    
+    def _build_storyboard(self, parsed: Optional[dict]) -> Optional[StoryboardData]:
+        """Fill in defaults for missing storyboard fields and build the model."""
+        if not parsed:
             return None
         
-        # Try to parse the response as JSON
         try:
-            parsed = self._extract_and_parse_json(response_text)
-            if not parsed:
-                return None
             # Fallbacks for missing fields
             if not parsed.get('introspection'):
                 parsed['introspection'] = 'No introspection provided by AI.'
@@ -202,9 +361,119 @@ interface StoryboardData {
                 ]
             return StoryboardData(**parsed)
         except Exception as e:
-            logger.error(f"Failed to parse storyboard JSON: {e}\nResponse: {response_text}")
+            logger.error(f"Failed to build storyboard: {e}")
             return None
 
+    def _structured_config(self, task: str, schema: Type[BaseModel]) -> dict:
+        return self._generation_config(
+            task, response_mime_type="application/json", response_schema=response_schema(schema)
+        )
+    
+    async def _generate_structured(self, task: str, prompt: str, schema: Type[BaseModel]) -> Optional[dict]:
+        """
+        Generate a JSON object constrained to `schema` and validate it in one pass.
+        
+        Returns the validated object as a dict with charts in ChartConfig form, or
+        None (see _validate_structured). Failed or empty model calls raise.
+        """
+        generation_config = self._structured_config(task, schema)
+        response = await self.router.generate(
+            self._model_for, prompt, lane=ModelClient.BATCH, task=task, generation_config=generation_config
+        )
+        if not response or not response.text:
+            raise ValueError("Empty response from AI model")
+        return await self._validate_structured(task, prompt, schema, response.text, generation_config)
+    
+    async def _stream_structured(self, task: str, prompt: str, schema: Type[BaseModel]) -> AsyncIterator[dict]:
+        """
+        Streaming variant of _generate_structured.
+        
+        Yields a progress event for every top-level field and list item as soon as
+        the model has finished writing it, then {"type": "result", "value": ...}
+        with the validated object once the whole response has arrived.
+        """
+        generation_config = self._structured_config(task, schema)
+        parser = JSONStreamParser()
+        pieces = []
+        async for piece in self.router.stream(
+            self._model_for, prompt, lane=ModelClient.BATCH, task=task, generation_config=generation_config
+        ):
+            pieces.append(piece)
+            try:
+                completed = parser.feed(piece)
+            except JSONStreamError as e:
+                # Progress stops here; the full response still goes through validation and repair
+                logger.warning(f"Streamed {task} output is not valid JSON: {e}")
+                parser.done = True
+                continue
+            for path, value in completed:
+                event = _progress_event(path, value)
+                if event:
+                    yield event
+        
+        text = "".join(pieces)
+        if not text:
+            raise ValueError("Empty response from AI model")
+        yield {"type": "result", "value": await self._validate_structured(task, prompt, schema, text, generation_config)}
+    
+    async def _validate_structured(self, task: str, prompt: str, schema: Type[BaseModel], text: str,
+                                   generation_config) -> Optional[dict]:
+        """
+        Validate model output against `schema`.
+        
+        Output that fails validation is first salvaged locally (fences, prose around
+        the object); if that fails too, exactly one repair call is made that sends
+        the invalid output and the validation errors back to the model. Returns None
+        if the repaired output is still invalid.
+        """
+        self.structured_stats.record(task, "generation")
+        
+        instance, error = validate_output(schema, text)
+        if instance:
+            self.structured_stats.record(task, "first_pass_valid")
+            return to_domain(instance)
+        
+        salvaged = self._extract_and_parse_json(text)
+        if salvaged is not None:
+            instance, _ = validate_output(schema, json.dumps(salvaged))
+            if instance:
+                self.structured_stats.record(task, "salvaged")
+                return to_domain(instance)
+        
+        # The first call's output is discarded from here on
+        wasted = ModelClient.estimate_tokens(prompt) + ModelClient.estimate_tokens(text)
+        logger.warning(f"{task} output failed validation, requesting a repair: {error}")
+        repair_prompt = f"""
+            The JSON below was generated for a {task} task but does not match the required schema.
+            Return the corrected JSON object only. Keep all content that is valid; fix only what the errors describe.
+
+            Validation errors:
+            {error}
+
+            Invalid JSON:
+            {text}
+            """
+        self.structured_stats.record(task, "repair_calls")
+        try:
+            repair = await self.router.generate(
+                self._model_for, repair_prompt, lane=ModelClient.BATCH, task=f"{task}_repair",
+                generation_config=generation_config
+            )
+            repair_text = repair.text if repair else ""
+        except Exception as e:
+            logger.error(f"Repair call for {task} failed: {e}")
+            repair_text = ""
+        
+        instance, error = validate_output(schema, repair_text) if repair_text else (None, "empty repair response")
+        if instance:
+            self.structured_stats.record(task, "repaired", wasted_tokens=wasted)
+            return to_domain(instance)
+        
+        wasted += ModelClient.estimate_tokens(repair_prompt) + ModelClient.estimate_tokens(repair_text)
+        logger.error(f"{task} output still invalid after repair: {error}")
+        self.structured_stats.record(task, "failed", wasted_tokens=wasted)
+        return None
+
     def _extract_and_parse_json(self, text: str) -> dict:
         """Robust JSON extraction and parsing."""
         try:
@@ -233,42 +502,12 @@ interface StoryboardData {
             
             json_str = clean_text[start:end]
             
-            # Try parsing - if it fails, attempt to fix common issues
-            try:
-                return json.loads(json_str)
-            except json.JSONDecodeError as e:
-                logger.warning(f"Initial JSON parse failed: {e}")
-                # Fix common issues: unescaped newlines and quotes in narrative
-                fixed_json = self._fix_json_narrative(json_str)
-                return json.loads(fixed_json)
+            return json.loads(json_str)
                 
         except Exception as e:
             logger.error(f"JSON extraction failed: {e}")
             return None
 
-    def _fix_json_narrative(self, json_str: str) -> str:
-        """Fix unescaped characters in the narrative field."""
-        import re
-        
-        # Find the narrative value (between "narrative": " and ", "charts")
-        pattern = r'"narrative":\s*"(.*?)"(?=\s*,\s*"charts")'
-        match = re.search(pattern, json_str, re.DOTALL)
-        
-        if match:
-            narrative_content = match.group(1)
-            # Fix unescaped characters
-            fixed_narrative = (narrative_content
-                            .replace('\\', '\\\\')  # Escape backslashes first
-                            .replace('\n', '\\n')   # Escape newlines
-                            .replace('\r', '\\r')   # Escape carriage returns
-                            .replace('\t', '\\t')   # Escape tabs
-                            .replace('"', '\\"'))   # Escape quotes
-            
-            # Replace in original string
-            json_str = json_str.replace(match.group(0), f'"narrative": "{fixed_narrative}"')
-        
-        return json_str
-
     def _create_fallback_report(self, full_text: str, ai_response: str) -> dict:
         """Create a basic report structure when AI JSON parsing fails."""
         import re
@@ -329,7 +568,13 @@ interface StoryboardData {
             "charts": []  # No charts in fallback
         }
     async def create_report_from_text(self, full_text: str) -> Optional[ReportData]:
-        """Create a structured report from raw text."""
+        """
+        Create a structured report from raw text.
+        
+        Texts longer than EXTRACTION_CHUNK_SIZE are split into chunks that are
+        extracted concurrently (at most EXTRACTION_CONCURRENCY at a time) and
+        then merged into a single report.
+        """
         if not self.enabled:
             logger.warning("AI service is disabled")
             return None
@@ -341,128 +586,270 @@ interface StoryboardData {
         
         logger.info(f"Processing text of length: {len(full_text)} characters")
         
+        # Concurrent uploads of the same document share one extraction; each caller
+        # gets its own copy because the upload path renames duplicate IDs in place
+        report = await self.single_flight.run("report", prompt_key(full_text), lambda: self._create_report(full_text))
+        return report.model_copy(deep=True) if report else None
+    
+    async def _create_report(self, full_text: str) -> Optional[ReportData]:
+        try:
+            chunks = chunk_text(full_text, settings.EXTRACTION_CHUNK_SIZE, settings.EXTRACTION_CHUNK_OVERLAP)
+            if len(chunks) <= 1:
+                parsed_data = await self._extract_report_fields(full_text)
+            else:
+                parsed_data = await self._map_reduce_report_fields(chunks)
+            
+            return self._finish_report(full_text, parsed_data)
+        except Exception as e:
+            logger.error(f"Error creating report from text: {e}")
+            logger.error(f"Full text preview: {full_text[:200]}...")
+            return None
+    
+    def _finish_report(self, full_text: str, parsed_data: Optional[dict]) -> Optional[ReportData]:
+        """Build the report from extracted fields, falling back to a heuristic structure."""
+        if not parsed_data:
+            # Fallback: try to create a basic report from the text
+            logger.warning("Attempting fallback report creation")
+            parsed_data = self._create_fallback_report(full_text, "")
+            if not parsed_data:
+                logger.error("Fallback report creation also failed")
+                return None
+        
+        # Validate required fields
+        required_fields = ["id", "title", "summary", "keyFindings"]
+        missing_fields = []
+        for field in required_fields:
+            if field not in parsed_data:
+                missing_fields.append(field)
+        
+        if missing_fields:
+            logger.error(f"Missing required fields: {missing_fields}")
+            logger.error(f"Available fields: {list(parsed_data.keys())}")
+            return None
+        
+        logger.info("All required fields present in parsed data")
+        
+        charts = self._build_charts(parsed_data.get("charts", []))
+        
+        logger.info(f"Successfully created report with {len(charts)} charts")
+        return ReportData(
+            id=parsed_data["id"],
+            title=parsed_data["title"],
+            summary=parsed_data["summary"],
+            keyFindings=parsed_data["keyFindings"],
+            charts=charts,
+            fullText=full_text
+        )
+    
+    async def stream_report_from_text(self, full_text: str) -> AsyncIterator[dict]:
+        """
+        Streaming variant of create_report_from_text, for progressive rendering.
+        
+        Single-chunk texts yield field and item events (see _progress_event) while
+        the model writes them; longer texts yield {"type": "part", "index", "total",
+        "title", "keyFindings"} as each chunk is extracted. The last event is
+        {"type": "report", "report": ReportData or None}.
+        """
+        if not self.enabled or not full_text or not full_text.strip():
+            yield {"type": "report", "report": None}
+            return
+        
+        async for event in self.single_flight.stream(
+            "report_stream", prompt_key(full_text), lambda: self._stream_report_events(full_text)
+        ):
+            if event["type"] == "report" and event["report"]:
+                event = dict(event, report=event["report"].model_copy(deep=True))
+            yield event
+    
+    async def _stream_report_events(self, full_text: str) -> AsyncIterator[dict]:
+        try:
+            chunks = chunk_text(full_text, settings.EXTRACTION_CHUNK_SIZE, settings.EXTRACTION_CHUNK_OVERLAP)
+            parsed_data = None
+            if len(chunks) <= 1:
+                async for event in self._stream_structured(
+                    "report", self._extraction_prompt(full_text), ReportExtraction
+                ):
+                    if event["type"] == "result":
+                        parsed_data = event["value"]
+                    else:
+                        yield event
+            else:
+                events: asyncio.Queue = asyncio.Queue()
+                finished = object()
+                
+                def on_partial(i: int, partial: dict):
+                    events.put_nowait({"type": "part", "index": i, "total": len(chunks),
+                                       "title": partial.get("title"), "keyFindings": partial.get("keyFindings", [])})
+                
+                task = asyncio.ensure_future(self._map_reduce_report_fields(chunks, on_partial))
+                task.add_done_callback(lambda _: events.put_nowait(finished))
+                try:
+                    while (event := await events.get()) is not finished:
+                        yield event
+                finally:
+                    task.cancel()
+                parsed_data = task.result()
+            report = self._finish_report(full_text, parsed_data)
+        except Exception as e:
+            logger.error(f"Error creating report from text: {e}")
+            report = None
+        yield {"type": "report", "report": report}
+    
+    def _build_charts(self, chart_data: list) -> List[ChartConfig]:
+        """Convert raw chart dicts to ChartConfig objects, skipping invalid ones."""
+        charts = []
+        logger.info(f"Processing {len(chart_data)} charts")
+        
+        for i, chart_data_item in enumerate(chart_data):
+            try:
+                chart = ChartConfig(**chart_data_item)
+                charts.append(chart)
+                logger.info(f"Successfully processed chart {i+1}")
+            except Exception as e:
+                logger.warning(f"Invalid chart data in uploaded report (chart {i+1}): {e}")
+                logger.warning(f"Chart data: {chart_data_item}")
+        return charts
+    
+    async def _extract_report_fields(self, text: str, part: Optional[Tuple[int, int]] = None) -> Optional[dict]:
+        """
+        Run the extraction prompt over one piece of text.
+        
+        `part` is (index, total) when the text is one chunk of a longer report.
+        Returns the validated fields, or None if the response could not be
+        validated even after a repair call. Failed or empty model calls raise.
+        """
+        logger.info("Sending request to AI model" + (f" (part {part[0] + 1}/{part[1]})" if part else ""))
+        return await self._generate_structured("report", self._extraction_prompt(text, part), ReportExtraction)
+    
+    def _extraction_prompt(self, text: str, part: Optional[Tuple[int, int]] = None) -> str:
+        if part:
+            scope = (f"The text below is part {part[0] + 1} of {part[1]} of a longer report. "
+                     f"Extract only what this part contains; the parts are merged afterwards.")
+        else:
+            scope = "Read the entire provided text carefully."
+        
         prompt = f"""
-            You are an expert data analyst AI. Your task is to read the following text from an economic report and convert it into a structured JSON object.
-
-            Your output MUST be a JSON object that follows this structure:
-            {{
-            "id": "url-friendly-slug",
-            "title": "Report Title",
-            "summary": "2-3 sentence summary",
-            "keyFindings": ["Finding 1", "Finding 2", "Finding 3"],
-            "charts": [
-                {{
-                "type": "bar|line|pie",
-                "data": [{{ "name": "Category", "value": 123 }}],
-                "dataKeys": [{{ "key": "value", "color": "#8884d8" }}],
-                "title": "Chart Title",
-                "description": "Chart description",
-                "xAxisKey": "name"
-                }}
-            ]
-            }}
+            You are an expert data analyst AI. Your task is to read the following text from an economic report and convert it into a structured JSON object
+            with the fields id, title, summary, keyFindings and charts, as defined by the response schema.
 
             **Instructions:**
-            1. Read the entire provided text carefully.
+            1. {scope}
             2. Generate a title that accurately reflects the report's main subject.
             3. From the title, create a URL-friendly id (e.g., "Women in Leadership" becomes "women-in-leadership").
             4. Write a concise summary.
             5. Extract the most important points as key findings.
-            6. For charts, scan for quantifiable data that can be visualized. If no suitable data exists, return an empty array [].
-            7. Your entire response MUST be ONLY the JSON object.
+            6. For charts, scan for quantifiable data that can be visualized. List each series in dataKeys and give one row per x-axis category, with one value per series in dataKeys order. If no suitable data exists, return an empty array [].
 
             Here is the report text:
             ---
-            {full_text[:8000]}...
+            {text}
             ---
             """
-                    
+        
+        return prompt
+    
+    async def _map_reduce_report_fields(self, chunks: List[str],
+                                        on_partial: Optional[Callable[[int, dict], None]] = None) -> Optional[dict]:
+        """
+        Extract each chunk concurrently, then merge the partial results into one report.
+        
+        `on_partial(index, fields)` is called as each chunk's extraction completes.
+        """
+        semaphore = asyncio.Semaphore(max(1, settings.EXTRACTION_CONCURRENCY))
+        
+        async def extract(i: int, chunk: str) -> Optional[dict]:
+            async with semaphore:
+                partial = await self._extract_report_fields(chunk, part=(i, len(chunks)))
+            if partial and on_partial:
+                on_partial(i, partial)
+            return partial
+        
+        logger.info(f"Extracting {len(chunks)} chunks with concurrency {settings.EXTRACTION_CONCURRENCY}")
+        results = await asyncio.gather(*(extract(i, chunk) for i, chunk in enumerate(chunks)), return_exceptions=True)
+        failures = [result for result in results if isinstance(result, BaseException)]
+        partials = [result for result in results if isinstance(result, dict)]
+        logger.info(f"{len(partials)}/{len(chunks)} chunks extracted successfully")
+        
+        if len(failures) == len(results):
+            # Every model call failed; surface it rather than building a fallback report
+            raise failures[0]
+        if not partials:
+            return None
+        return await self._reduce_report_fields(partials)
+    
+    async def _reduce_report_fields(self, partials: List[dict]) -> dict:
+        """
+        Merge partial extractions in document order.
+        
+        Findings and charts are deduplicated locally; a short model call then picks
+        the overall title, summary and most important findings. If that call fails,
+        the first part's title and summary are used.
+        """
+        findings = _dedupe_findings(
+            [f for p in partials for f in p.get("keyFindings", []) if isinstance(f, str)]
+        )
+        charts = _dedupe_charts([c for p in partials for c in p.get("charts", []) if isinstance(c, dict)])
+        
+        merged = {
+            "id": next((p["id"] for p in partials if p.get("id")), None),
+            "title": next((p["title"] for p in partials if p.get("title")), None),
+            "summary": next((p["summary"] for p in partials if p.get("summary")), None),
+            "keyFindings": findings[:settings.EXTRACTION_MAX_FINDINGS],
+            "charts": charts,
+        }
+        
+        section_summaries = "\n".join(
+            f"- Part {i + 1}: {p.get('title', '')}: {p.get('summary', '')}" for i, p in enumerate(partials)
+        )
+        candidate_findings = encode_findings(findings)
+        prompt = f"""
+            You are an expert data analyst AI. The parts of one economic report were analysed separately.
+            Combine them into the report's overall metadata.
+
+            Your output is a JSON object with the fields id (url-friendly slug), title, summary (2-3 sentences) and keyFindings.
+
+            **Instructions:**
+            1. The title should describe the report as a whole (the first part usually contains the real title).
+            2. The summary must cover all parts, not only the first.
+            3. Choose the {settings.EXTRACTION_MAX_FINDINGS} most important key findings from the candidates, copying them verbatim.
+
+            Part summaries:
+            {section_summaries}
+
+            Candidate key findings:
+            {candidate_findings}
+            """
+        
         try:
-            logger.info("Sending request to AI model")
-            response = await asyncio.to_thread(
-                self.model.generate_content,
-                prompt,
-                generation_config=genai.types.GenerationConfig(
-                    max_output_tokens=settings.MAX_TOKENS,
-                    temperature=0.5
-                )
-            )
-            
-            if not response or not response.text:
-                logger.error("Empty response from AI model")
-                return None
-            
-            json_str = response.text.strip()
-            logger.info(f"AI response length: {len(json_str)} characters")
-            
-            # Try to parse JSON with better error handling
-            try:
-                parsed_data = json.loads(json_str)
-                logger.info("JSON parsing successful with direct json.loads")
-            except json.JSONDecodeError as e:
-                logger.error(f"JSON parsing failed: {e}")
-                logger.error(f"Response text: {json_str[:500]}...")
-                # Try to extract JSON from the response
-                logger.info("Attempting to extract JSON from response using _extract_and_parse_json")
-                parsed_data = self._extract_and_parse_json(json_str)
-                if not parsed_data:
-                    # Fallback: try to create a basic report from the text
-                    logger.warning("Attempting fallback report creation")
-                    parsed_data = self._create_fallback_report(full_text, json_str)
-                    if not parsed_data:
-                        logger.error("Fallback report creation also failed")
-                        return None
-                else:
-                    logger.info("JSON extraction successful using _extract_and_parse_json")
-            
-            # Validate required fields
-            required_fields = ["id", "title", "summary", "keyFindings"]
-            missing_fields = []
-            for field in required_fields:
-                if field not in parsed_data:
-                    missing_fields.append(field)
-            
-            if missing_fields:
-                logger.error(f"Missing required fields: {missing_fields}")
-                logger.error(f"Available fields: {list(parsed_data.keys())}")
-                return None
-            
-            logger.info("All required fields present in parsed data")
-            
-            # Convert charts to ChartConfig objects
-            charts = []
-            chart_data = parsed_data.get("charts", [])
-            logger.info(f"Processing {len(chart_data)} charts")
-            
-            for i, chart_data_item in enumerate(chart_data):
-                try:
-                    chart = ChartConfig(**chart_data_item)
-                    charts.append(chart)
-                    logger.info(f"Successfully processed chart {i+1}")
-                except Exception as e:
-                    logger.warning(f"Invalid chart data in uploaded report (chart {i+1}): {e}")
-                    logger.warning(f"Chart data: {chart_data_item}")
-            
-            logger.info(f"Successfully created report with {len(charts)} charts")
-            return ReportData(
-                id=parsed_data["id"],
-                title=parsed_data["title"],
-                summary=parsed_data["summary"],
-                keyFindings=parsed_data["keyFindings"],
-                charts=charts,
-                fullText=full_text
-            )
+            reduced = await self._generate_structured("report_merge", prompt, ReportMerge)
         except Exception as e:
-            logger.error(f"Error creating report from text: {e}")
-            logger.error(f"Full text preview: {full_text[:200]}...")
-            return None
+            logger.error(f"Error merging partial extractions: {e}")
+            reduced = None
+        
+        if reduced:
+            for field in ("id", "title", "summary"):
+                if isinstance(reduced.get(field), str) and reduced[field].strip():
+                    merged[field] = reduced[field]
+            if isinstance(reduced.get("keyFindings"), list) and reduced["keyFindings"]:
+                merged["keyFindings"] = [f for f in reduced["keyFindings"] if isinstance(f, str)]
+        else:
+            logger.warning("Using locally merged report fields")
+        
+        return {k: v for k, v in merged.items() if v is not None}
     
-    async def chat_with_report(self, report: ReportData, message: str) -> str:
-        """Chat with AI about a specific report."""
-        if not self.enabled:
-            return "AI features are disabled. Please configure the Gemini API key."
+    def _report_context(self, report: ReportData) -> str:
+        """
+        Static chat context for a report, built once per report version.
+        
+        It leads every chat prompt byte-for-byte unchanged across turns, so the
+        model's implicit prefix caching can reuse it.
+        """
+        key = (report.id, report.updated_at)
+        context = self._report_contexts.get(key)
+        if context is not None:
+            return context
         
-        system_instruction = f"""You are an expert AI assistant from DIW Berlin, specializing in German economic data. Your knowledge base for this conversation is the DIW Weekly Report on "{report.title}". 
+        context = f"""You are an expert AI assistant from DIW Berlin, specializing in German economic data. Your knowledge base for this conversation is the DIW Weekly Report on "{report.title}". 
 
                 Your tasks are:
                 1. Answer the user's questions concisely about the provided report.
@@ -473,28 +860,126 @@ interface StoryboardData {
                 Report context:
                 - **Title:** {report.title}
                 - **Summary:** {report.summary}
-                - **Key Findings:** {', '.join(report.keyFindings)}
-                - **Full Text:** {report.fullText[:6000]}...
+                - **Key Findings:**
+{encode_findings(report.keyFindings)}"""
+        
+        self._report_contexts[key] = context
+        while len(self._report_contexts) > 256:
+            self._report_contexts.popitem(last=False)
+        return context
+    
+    def _chat_prompt(self, report: ReportData, message: str,
+                     context_chunks: Optional[List[Tuple[int, str]]],
+                     history: Optional[List[ChatMessage]], summary: str) -> str:
+        if context_chunks is None:
+            context_chunks = select_chunks(chunk_text(report.fullText), message)
+        excerpts = "\n\n".join(f"[Section {i + 1}] {chunk}" for i, chunk in context_chunks)
+        
+        system_instruction = f"""{self._report_context(report)}
+                - **Relevant Report Sections:**
+                {excerpts}
                 """
+        
+        conversation = ""
+        if summary:
+            conversation += f"\nSummary of the earlier conversation: {summary}\n"
+        if history:
+            conversation += "\nRecent conversation:\n" + "\n".join(
+                f"{'User' if m.role == 'user' else 'Assistant'}: {m.content}" for m in history
+            ) + "\n"
                         
-        chat_prompt = f"""
+        return f"""
                 {system_instruction}
-
+                {conversation}
                 User question: {message}
 
                 Please provide a helpful and concise response based on the report data provided above.
                 """
+    
+    async def chat_with_report(self, report: ReportData, message: str,
+                               context_chunks: Optional[List[Tuple[int, str]]] = None,
+                               history: Optional[List[ChatMessage]] = None,
+                               summary: str = "") -> str:
+        """
+        Chat with AI about a specific report.
         
+        Only the report sections relevant to the message are sent to the model.
+        `context_chunks` are (chunk_index, text) pairs, normally served from the
+        retrieval index; when omitted they are selected from the full text here.
+        `history` holds the recent turns of a chat session and `summary` the
+        rolling summary of everything before them. Raises ChatUnavailable when
+        there is no answer, so no error text is mistaken for one.
+        """
+        if not self.enabled:
+            raise ChatUnavailable("AI features are disabled. Please configure the Gemini API key.")
+        
+        chat_prompt = self._chat_prompt(report, message, context_chunks, history, summary)
         try:
-            response = await asyncio.to_thread(
-                self.model.generate_content,
+            response = await self.router.generate(
+                self._model_for,
                 chat_prompt,
-                generation_config=genai.types.GenerationConfig(
-                    max_output_tokens=1024,
-                    temperature=0.7
-                )
+                task="chat",
+                generation_config=self._generation_config("chat")
             )
             return response.text
         except Exception as e:
             logger.error(f"Error in chat: {e}")
-            return "Sorry, I encountered an error. Please try again."
\ No newline at end of file
+            raise ChatUnavailable("The model could not answer. Please try again.") from e
+    
+    async def stream_chat_with_report(self, report: ReportData, message: str,
+                                      context_chunks: Optional[List[Tuple[int, str]]] = None,
+                                      history: Optional[List[ChatMessage]] = None,
+                                      summary: str = "") -> AsyncIterator[str]:
+        """
+        Streaming variant of chat_with_report, yielding the answer as the model writes it.
+
+        Raises ChatUnavailable, possibly after some pieces, when there is no complete answer.
+        """
+        if not self.enabled:
+            raise ChatUnavailable("AI features are disabled. Please configure the Gemini API key.")
+        
+        chat_prompt = self._chat_prompt(report, message, context_chunks, history, summary)
+        try:
+            async for piece in self.router.stream(
+                self._model_for,
+                chat_prompt,
+                task="chat",
+                generation_config=self._generation_config("chat")
+            ):
+                yield piece
+        except Exception as e:
+            logger.error(f"Error in chat: {e}")
+            raise ChatUnavailable("The model could not answer. Please try again.") from e
+    
+    async def summarize_conversation(self, report: ReportData, previous_summary: str,
+                                     messages: List[ChatMessage]) -> Optional[str]:
+        """Fold chat messages into a short rolling summary of the conversation."""
+        if not self.enabled:
+            return None
+        
+        transcript = "\n".join(
+            f"{'User' if m.role == 'user' else 'Assistant'}: {m.content}" for m in messages
+        )
+        prompt = f"""
+                You maintain a running summary of a conversation about the DIW Weekly Report "{report.title}".
+                Update the summary so it also covers the new messages. Keep the facts, figures and open
+                questions the user cares about; drop pleasantries. Answer with the summary only, in at most
+                120 words.
+
+                Current summary: {previous_summary or "(none)"}
+
+                New messages:
+                {transcript}
+                """
+        
+        try:
+            response = await self.router.generate(
+                self._model_for,
+                prompt,
+                task="chat_summary",
+                generation_config=self._generation_config("chat_summary")
+            )
+            return response.text.strip()
+        except Exception as e:
+            logger.error(f"Error summarizing conversation: {e}")
+            return None
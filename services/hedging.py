@@ -0,0 +1,98 @@
+import asyncio
+import logging
+import time
+from collections import Counter, deque
+from typing import Any, Awaitable, Callable, Dict
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+class Hedger:
+    """
+    Hedged requests against tail latency.
+
+    A call that has not answered after the `percentile` latency of recent
+    calls of its kind gets a duplicate; the first successful result wins and
+    the other call is cancelled. Kinds hedge only once `min_samples`
+    latencies are known, never sooner than `min_delay`, and at most
+    `max_rate` of the recent calls of a kind are hedged.
+    """
+
+    WINDOW = 200
+
+    def __init__(self, enabled: bool = None, percentile: float = None, min_delay: float = None,
+                 max_rate: float = None, min_samples: int = 20):
+        self.enabled = settings.AI_HEDGING_ENABLED if enabled is None else enabled
+        self.percentile = (settings.AI_HEDGE_PERCENTILE if percentile is None else percentile) / 100
+        self.min_delay = settings.AI_HEDGE_MIN_DELAY if min_delay is None else min_delay
+        self.max_rate = settings.AI_HEDGE_MAX_RATE if max_rate is None else max_rate
+        self.min_samples = min_samples
+        self._latencies: Dict[str, deque] = {}
+        self._recent: Dict[str, deque] = {}  # per kind: whether each recent call was hedged
+        self.calls = Counter()
+        self.hedged = Counter()
+        self.hedge_wins = Counter()
+
+    def delay(self, kind: str):
+        """Seconds a call of `kind` may run before it is hedged; None while too few latencies are known."""
+        samples = sorted(self._latencies.get(kind, ()))
+        if len(samples) < self.min_samples:
+            return None
+        return max(self.min_delay, samples[min(len(samples) - 1, int(self.percentile * len(samples)))])
+
+    def _may_hedge(self, kind: str) -> bool:
+        recent = self._recent[kind]
+        return sum(recent) + 1 <= self.max_rate * (len(recent) + 1)
+
+    async def run(self, kind: str, factory: Callable[[], Awaitable], allow: bool = True) -> Any:
+        """Await factory(), hedging it with a second factory() call if it is slow and `allow` is true."""
+        self.calls[kind] += 1
+        if not self.enabled:
+            return await factory()
+        latencies = self._latencies.setdefault(kind, deque(maxlen=self.WINDOW))
+        recent = self._recent.setdefault(kind, deque(maxlen=self.WINDOW))
+        delay = self.delay(kind) if allow else None
+        started = time.monotonic()
+        calls = [asyncio.ensure_future(factory())]
+        try:
+            if delay is not None:
+                await asyncio.wait(calls, timeout=delay)
+            if calls[0].done() or delay is None or not self._may_hedge(kind):
+                recent.append(False)
+                result = await calls[0]
+                latencies.append(time.monotonic() - started)
+                return result
+
+            recent.append(True)
+            self.hedged[kind] += 1
+            calls.append(asyncio.ensure_future(factory()))
+            pending, error = set(calls), None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for call in done:
+                    if call.exception() is None:
+                        if call is calls[1]:
+                            self.hedge_wins[kind] += 1
+                        latencies.append(time.monotonic() - started)
+                        return call.result()
+                    error = call.exception()
+            raise error
+        finally:
+            for call in calls:
+                if not call.done():
+                    call.cancel()
+
+    def get_metrics(self) -> dict:
+        """Per kind: calls, calls hedged, hedges that answered first, and the current hedge delay."""
+        return {
+            "enabled": self.enabled,
+            "kinds": {
+                kind: {
+                    "calls": self.calls[kind],
+                    "hedged": self.hedged[kind],
+                    "hedge_wins": self.hedge_wins[kind],
+                    "hedge_delay_seconds": self.delay(kind),
+                }
+                for kind in sorted(self.calls)
+            },
+        }
@@ -0,0 +1,47 @@
+import hashlib
+import re
+from typing import Any, Optional
+from fastapi import Request
+from fastapi.responses import Response
+from services.responses import FastJSONResponse
+
+# Clients may store responses but must revalidate them; reports change whenever one is uploaded or deleted
+CACHE_CONTROL = "no-cache"
+
+# Bump when the JSON representation of reports changes, so stored copies stop matching
+REPRESENTATION_VERSION = "1"
+
+# Compressed representations carry their content coding in the ETag ("<tag>-gzip")
+_CODING_SUFFIX = re.compile(r'-(?:gzip|br)"$')
+
+def strong_etag(*parts: Any) -> str:
+    """Strong ETag for a representation identified by `parts` (ids and change timestamps)."""
+    digest = hashlib.sha256(REPRESENTATION_VERSION.encode("utf-8"))
+    for part in parts:
+        digest.update(b"\0")
+        digest.update(str(part).encode("utf-8"))
+    return f'"{digest.hexdigest()[:32]}"'
+
+def encoded_etag(etag: str, coding: str) -> str:
+    """ETag of the `coding`-compressed representation of a response tagged `etag`."""
+    if etag.startswith('"') and etag.endswith('"'):
+        return f'{etag[:-1]}-{coding}"'
+    return etag
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """A 304 response if the request's If-None-Match matches `etag`, otherwise None."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return None
+    # If-None-Match uses the weak comparison: W/ prefixes are ignored, as are content codings
+    tags = {_CODING_SUFFIX.sub('"', tag.strip().removeprefix("W/")) for tag in header.split(",")}
+    if "*" in tags or etag in tags:
+        return Response(status_code=304, headers=cache_headers(etag))
+    return None
+
+def cache_headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+def cached_json(content: Any, etag: str) -> FastJSONResponse:
+    """JSON response (content as for FastJSONResponse) carrying its ETag and caching policy."""
+    return FastJSONResponse(content, headers=cache_headers(etag))
@@ -0,0 +1,214 @@
+import json
+import re
+from typing import Any, List, Optional, Tuple, Union
+
+# Characters that change parser state outside strings, and inside them
+_STRUCTURAL = re.compile(r'[{}\[\]",:]')
+_BRACKETS = re.compile(r'[{}\[\]"]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+Path = Tuple[Union[str, int], ...]
+
+class JSONStreamError(ValueError):
+    """Raised when streamed output is not valid JSON."""
+
+class _Frame:
+    __slots__ = ("kind", "start", "key", "expect_key", "value_start", "child_done", "collected")
+
+    def __init__(self, kind: str, start: int, value_start: Optional[int], collect: bool):
+        self.kind = kind
+        self.start = start
+        self.key: Union[str, int, None] = 0 if kind == "[" else None
+        self.expect_key = kind == "{"
+        self.value_start = value_start
+        self.child_done = False
+        self.collected = ([] if kind == "[" else {}) if collect else None
+
+class JSONStreamParser:
+    """
+    Incremental, string-aware parser for one JSON object arriving in chunks.
+
+    feed() returns (path, value) pairs for every value at most `emit_depth`
+    levels below the root as soon as it is complete, e.g. ("title",) when the
+    title string closes and ("keyFindings", 2) when the third finding does.
+    Text before the root object (a markdown fence, prose) and after it is
+    ignored.
+
+    Containers above `emit_depth` are assembled from their already parsed
+    children, so the buffer never holds more than the value being parsed at
+    `emit_depth` (or one long string), whatever the size of the response.
+    """
+
+    def __init__(self, emit_depth: int = 2):
+        self.emit_depth = emit_depth
+        self.done = False
+        self._text = ""
+        self._string_parts: List[str] = []  # earlier pieces of a long open string
+        self._pos = 0
+        self._frames: List[_Frame] = []
+        self._string_start: Optional[int] = None
+        self._key_string = False
+        self._nested = 0  # open containers inside the value at emit_depth; only counted
+
+    def feed(self, chunk: str) -> List[Tuple[Path, Any]]:
+        """Consume the next chunk and return the values completed by it."""
+        if self.done:
+            return []
+        self._text += chunk
+
+        events: List[Tuple[Path, Any]] = []
+        text = self._text
+        pos = self._pos
+        frames = self._frames
+
+        while pos < len(text) and not self.done:
+            if self._string_start is not None:
+                match = _STRING_SPECIAL.search(text, pos)
+                if not match:
+                    pos = len(text)
+                    break
+                if match.group() == "\\":
+                    if match.end() >= len(text):
+                        pos = match.start()  # the escaped character has not arrived yet
+                        break
+                    pos = match.end() + 1
+                    continue
+                pos = match.end()
+                start, self._string_start = self._string_start, None
+                if len(frames) > self.emit_depth:
+                    continue
+                prefix, self._string_parts = "".join(self._string_parts), []
+                top = frames[-1]
+                if self._key_string:
+                    top.key = self._loads(prefix + text[start:pos])
+                    top.expect_key = False
+                else:
+                    self._complete_child(events, text, start, pos, prefix=prefix)
+                continue
+
+            if len(frames) > self.emit_depth:
+                # Inside a value that is emitted whole: only find where it ends
+                match = _BRACKETS.search(text, pos)
+                if not match:
+                    pos = len(text)
+                    break
+                char = match.group()
+                pos = match.end()
+                if char == '"':
+                    self._string_start = match.start()
+                    self._key_string = False
+                elif char in "{[":
+                    self._nested += 1
+                elif self._nested:
+                    self._nested -= 1
+                else:
+                    frame = frames.pop()
+                    self._complete_child(events, text, frame.start, pos)
+                continue
+
+            match = _STRUCTURAL.search(text, pos)
+            if not match:
+                pos = len(text)
+                break
+            char = match.group()
+            pos = match.end()
+
+            if not frames:
+                if char == "{":
+                    frames.append(_Frame("{", match.start(), None, collect=False))
+                continue
+
+            top = frames[-1]
+            if char == '"':
+                self._string_start = match.start()
+                self._key_string = top.kind == "{" and top.expect_key
+            elif char in "{[":
+                collect = 1 <= len(frames) < self.emit_depth
+                frames.append(_Frame(char, match.start(), pos if char == "[" else None, collect))
+            elif char in "}]":
+                self._complete_scalar(events, text, match.start())
+                frame = frames.pop()
+                if not frames:
+                    self.done = True
+                else:
+                    self._complete_child(events, text, value=frame.collected)
+            elif char == ":":
+                top.value_start = pos
+                top.child_done = False
+            elif char == ",":
+                self._complete_scalar(events, text, match.start())
+                if top.kind == "[":
+                    top.key += 1
+                    top.value_start = pos
+                    top.child_done = False
+                else:
+                    top.expect_key = True
+                    top.value_start = None
+
+        self._pos = pos
+        self._trim()
+        return events
+
+    def _loads(self, value: str) -> Any:
+        try:
+            # strict=False accepts raw newlines and tabs inside strings
+            return json.loads(value, strict=False)
+        except json.JSONDecodeError as e:
+            raise JSONStreamError(f"Invalid JSON value {value[:80]!r}: {e}") from e
+
+    _MISSING = object()
+
+    def _complete_child(self, events: list, text: str, start: int = 0, end: int = 0,
+                        value: Any = _MISSING, prefix: str = ""):
+        """The current child of the innermost open container is complete (prefix + text[start:end] unless given)."""
+        top = self._frames[-1]
+        top.child_done = True
+        if len(self._frames) > self.emit_depth:
+            return
+        if value is self._MISSING:
+            value = self._loads(prefix + text[start:end])
+        events.append((tuple(frame.key for frame in self._frames), value))
+        if top.collected is not None:
+            if top.kind == "[":
+                top.collected.append(value)
+            else:
+                top.collected[top.key] = value
+
+    def _complete_scalar(self, events: list, text: str, end: int):
+        """Finish a number, true, false or null child, which only ends at the next delimiter."""
+        top = self._frames[-1]
+        if top.value_start is None or top.child_done:
+            return
+        if text[top.value_start:end].strip():
+            self._complete_child(events, text, top.value_start, end)
+
+    def _trim(self):
+        """Drop input that no pending value can refer to any more."""
+        keep = self._pos
+        if len(self._frames) > self.emit_depth:
+            keep = min(keep, self._frames[self.emit_depth].start)
+        if self._string_start is not None:
+            if keep >= self._string_start:
+                # Nothing before the open string is needed: set its text so far aside
+                # rather than copying it again with every chunk
+                self._string_parts.append(self._text[self._string_start:self._pos])
+                self._string_start = self._pos
+            keep = min(keep, self._string_start)
+        elif self._frames and self._frames[-1].value_start is not None and not self._frames[-1].child_done:
+            keep = min(keep, self._frames[-1].value_start)  # a number or literal still arriving
+        if keep <= 0:
+            return
+        self._text = self._text[keep:]
+        self._pos -= keep
+        if self._string_start is not None:
+            self._string_start -= keep
+        for frame in self._frames:
+            frame.start -= keep
+            if frame.value_start is not None:
+                frame.value_start -= keep
+
+def iter_completed(chunks, emit_depth: int = 2):
+    """Parse an iterable of text chunks, yielding (path, value) pairs as values complete."""
+    parser = JSONStreamParser(emit_depth)
+    for chunk in chunks:
+        yield from parser.feed(chunk)
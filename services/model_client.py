@@ -0,0 +1,375 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Optional, Tuple
+from config import settings
+from services.executors import InstrumentedExecutor, latency_summary
+from services.prompt_encoding import count_tokens
+
+logger = logging.getLogger(__name__)
+
+# HTTP statuses worth retrying: throttling and transient server errors
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+class CircuitOpenError(Exception):
+    """Raised without calling the model while the circuit breaker is open."""
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether a model call error is transient (throttling, 5xx, timeouts, connection drops)."""
+    if isinstance(error, (TimeoutError, ConnectionError, asyncio.TimeoutError)):
+        return True
+    code = getattr(error, "code", None)
+    try:
+        return int(code) in RETRYABLE_STATUS_CODES
+    except (TypeError, ValueError):
+        return False
+
+def usage_counts(response) -> Tuple[Optional[int], Optional[int]]:
+    """(prompt, output) token counts from a response's usage metadata, or None where missing."""
+    metadata = getattr(response, "usage_metadata", None)
+    counts = (getattr(metadata, "prompt_token_count", None), getattr(metadata, "candidates_token_count", None))
+    return tuple(count if isinstance(count, int) else None for count in counts)
+
+def _text_of(response) -> str:
+    try:
+        return response.text or "" if response is not None else ""
+    except Exception:
+        return ""  # e.g. a blocked response, whose .text raises
+
+def model_name(model) -> str:
+    """Short name of a model object for usage records, e.g. "gemini-2.5-flash"."""
+    name = getattr(model, "model_name", None)
+    return name.rsplit("/", 1)[-1] if isinstance(name, str) else type(model).__name__
+
+class TokenBucket:
+    """Async token bucket refilled continuously at rate_per_minute, holding at most one minute's worth."""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1):
+        """Wait until `amount` tokens are available and take them (callers are served in order)."""
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+class CircuitBreaker:
+    """
+    Fails fast after `failure_threshold` consecutive failures.
+
+    After `reset_timeout` seconds a single trial call is let through (half-open);
+    its success closes the circuit, its failure opens it again. A trial that
+    ends with neither (e.g. it was cancelled) must be released with
+    release_trial(), or no further call would be let through.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+
+    def before_call(self) -> bool:
+        """Raise CircuitOpenError, or let a call through; True if it is the half-open trial."""
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                raise CircuitOpenError("Model API circuit is open; failing fast")
+            self.state = self.HALF_OPEN
+            self._trial_in_flight = False
+        if self.state == self.HALF_OPEN:
+            if self._trial_in_flight:
+                raise CircuitOpenError("Model API circuit is half-open; trial call in progress")
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def release_trial(self):
+        """The trial call ended without an outcome; let the next call be the trial."""
+        if self.state == self.HALF_OPEN:
+            self._trial_in_flight = False
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(f"Opening model API circuit after {self.failures} consecutive failures")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+class _Lane:
+    """Concurrency slot pool and dedicated worker threads for one class of model calls."""
+
+    def __init__(self, name: str, concurrency: int):
+        self.name = name
+        self.semaphore = asyncio.Semaphore(concurrency)
+        # Threads abandoned by cancelled callers keep running, so allow some slack over the cap
+        self.executor = InstrumentedExecutor(f"model-{name}", concurrency * 2)
+        self.waiting = 0
+        self.queue_delays = deque(maxlen=1000)
+
+    def get_metrics(self) -> dict:
+        return {
+            "waiting": self.waiting,
+            "queue_delay_seconds": latency_summary(self.queue_delays),
+            "executor": self.executor.get_metrics(),
+        }
+
+class ModelClient:
+    """
+    Shared wrapper around blocking `model.generate_content` calls.
+
+    Every call passes through the circuit breaker, its lane's concurrency cap
+    and the request/token rate limits before it is sent; transient errors are
+    retried with jittered exponential backoff. Time spent waiting before the
+    call is recorded as queueing delay.
+
+    Calls run on dedicated thread pools rather than the default loop executor.
+    Interactive calls (chat, narratives) and batch calls (report extraction,
+    storyboards) use separate lanes so a burst of uploads cannot hold up chat.
+
+    With a `usage` recorder, every call's token counts (from the response's
+    usage metadata, estimated when it has none), latency and outcome are
+    recorded under the caller's `task` label.
+    """
+
+    INTERACTIVE = "interactive"
+    BATCH = "batch"
+
+    def __init__(self, requests_per_minute: float = None, tokens_per_minute: float = None,
+                 max_concurrency: int = None, batch_concurrency: int = None, max_retries: int = None,
+                 base_delay: float = None, max_delay: float = None,
+                 breaker: Optional[CircuitBreaker] = None, usage=None):
+        # The configured limits are for the whole deployment; each worker process takes an equal share
+        workers = settings.MODEL_RATE_LIMIT_WORKERS
+        self.request_bucket = TokenBucket(requests_per_minute or settings.MODEL_REQUESTS_PER_MINUTE / workers)
+        self.token_bucket = TokenBucket(tokens_per_minute or settings.MODEL_TOKENS_PER_MINUTE / workers)
+        self.lanes = {
+            self.INTERACTIVE: _Lane(self.INTERACTIVE, max_concurrency or settings.MODEL_MAX_CONCURRENCY),
+            self.BATCH: _Lane(self.BATCH, batch_concurrency or settings.MODEL_BATCH_CONCURRENCY),
+        }
+        self.max_retries = settings.MODEL_MAX_RETRIES if max_retries is None else max_retries
+        self.base_delay = settings.MODEL_RETRY_BASE_DELAY if base_delay is None else base_delay
+        self.max_delay = settings.MODEL_RETRY_MAX_DELAY if max_delay is None else max_delay
+        self.breaker = breaker or CircuitBreaker(settings.MODEL_BREAKER_FAILURE_THRESHOLD,
+                                                 settings.MODEL_BREAKER_RESET_SECONDS)
+        self.usage = usage
+
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.rejected = 0
+
+    @staticmethod
+    def estimate_tokens(prompt: Any) -> int:
+        """Local token estimate used for the tokens-per-minute limit and responses without usage metadata."""
+        return max(1, count_tokens(str(prompt)))
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff delay for the given retry attempt (0-based)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    @asynccontextmanager
+    async def _admit(self, call_lane: _Lane, prompt):
+        """Hold a concurrency slot of `call_lane` once the rate limits allow another call."""
+        enqueued = time.monotonic()
+        call_lane.waiting += 1
+        dequeued = False
+        try:
+            async with call_lane.semaphore:
+                await self.request_bucket.acquire(1)
+                await self.token_bucket.acquire(self.estimate_tokens(prompt))
+                call_lane.waiting -= 1
+                dequeued = True
+                call_lane.queue_delays.append(time.monotonic() - enqueued)
+                self.calls += 1
+                yield
+        finally:
+            if not dequeued:
+                call_lane.waiting -= 1
+
+    def _retry_delay(self, error: Exception, attempt: int) -> float:
+        """Record a failed attempt; return the backoff before the next one, or re-raise if it is final."""
+        if not is_retryable(error):
+            # Client errors say nothing about API health
+            self.breaker.record_success()
+            self.failures += 1
+            raise error
+        self.breaker.record_failure()
+        if attempt >= self.max_retries or self.breaker.state == CircuitBreaker.OPEN:
+            self.failures += 1
+            raise error
+        delay = self._backoff(attempt)
+        self.retries += 1
+        logger.warning(f"Retryable model error ({error}); retry {attempt + 1}/{self.max_retries} in {delay:.2f}s")
+        return delay
+
+    def _record_usage(self, task: str, model, prompt, started: float, usage: Tuple[Optional[int], Optional[int]],
+                      output_text: str, success: bool):
+        if self.usage is None:
+            return
+        prompt_tokens, output_tokens = usage
+        estimated = prompt_tokens is None or (success and output_tokens is None)
+        if prompt_tokens is None:
+            prompt_tokens = self.estimate_tokens(prompt)
+        if output_tokens is None:
+            output_tokens = self.estimate_tokens(output_text) if output_text else 0
+        try:
+            self.usage.record(task, model_name(model), prompt_tokens, output_tokens,
+                              time.monotonic() - started, success=success, estimated=estimated)
+        except Exception as e:
+            logger.error(f"Failed to record model usage: {e}")
+
+    def _check_circuit(self) -> bool:
+        try:
+            return self.breaker.before_call()
+        except CircuitOpenError:
+            self.rejected += 1
+            raise
+
+    async def generate(self, model, prompt, lane: str = INTERACTIVE, task: str = "unlabelled", **kwargs):
+        """Call model.generate_content(prompt, **kwargs) with rate limiting, retries and the circuit breaker."""
+        call_lane = self.lanes[lane]
+        started = time.monotonic()
+        response = None
+        attempt = 0
+        trial = False
+        try:
+            while True:
+                trial = self._check_circuit()
+                try:
+                    async with self._admit(call_lane, prompt):
+                        response = await call_lane.executor.run(model.generate_content, prompt, **kwargs)
+                except Exception as e:
+                    delay = self._retry_delay(e, attempt)
+                    attempt += 1
+                    await asyncio.sleep(delay)
+                    continue
+
+                self.breaker.record_success()
+                return response
+        finally:
+            if trial:
+                # Cancelled mid-trial: the outcome is unknown, but the next call must not be refused for it
+                self.breaker.release_trial()
+            self._record_usage(task, model, prompt, started, usage_counts(response), _text_of(response),
+                               response is not None)
+
+    async def stream(self, model, prompt, lane: str = INTERACTIVE, task: str = "unlabelled",
+                     **kwargs) -> AsyncIterator[str]:
+        """
+        Like generate(), but yield the response text piece by piece as the model produces it.
+
+        Uses generate_content(stream=True) on the lane's worker thread. Errors are
+        retried only until the first piece has been yielded; after that they propagate.
+        """
+        call_lane = self.lanes[lane]
+        loop = asyncio.get_running_loop()
+        started = time.monotonic()
+        usage = (None, None)
+        output = []
+        success = False
+        attempt = 0
+        trial = False
+        try:
+            while True:
+                trial = self._check_circuit()
+                queue: asyncio.Queue = asyncio.Queue()
+                done = object()
+                abandoned = threading.Event()
+
+                def produce():
+                    try:
+                        for piece in model.generate_content(prompt, stream=True, **kwargs):
+                            if abandoned.is_set():
+                                return
+                            loop.call_soon_threadsafe(queue.put_nowait, piece)
+                        loop.call_soon_threadsafe(queue.put_nowait, done)
+                    except Exception as e:
+                        loop.call_soon_threadsafe(queue.put_nowait, e)
+
+                yielded = False
+                try:
+                    async with self._admit(call_lane, prompt):
+                        worker = asyncio.ensure_future(call_lane.executor.run(produce))
+                        try:
+                            while True:
+                                item = await queue.get()
+                                if item is done:
+                                    break
+                                if isinstance(item, Exception):
+                                    raise item
+                                # The final piece carries the usage metadata for the whole response
+                                usage = tuple(new if new is not None else old
+                                              for new, old in zip(usage_counts(item), usage))
+                                if item.text:
+                                    yielded = True
+                                    output.append(item.text)
+                                    yield item.text
+                        finally:
+                            # An abandoned (e.g. cancelled) stream stops reading the response at its next piece
+                            abandoned.set()
+                            worker.cancel()
+                except Exception as e:
+                    if yielded:
+                        if is_retryable(e):
+                            self.breaker.record_failure()
+                        self.failures += 1
+                        raise
+                    delay = self._retry_delay(e, attempt)
+                    attempt += 1
+                    await asyncio.sleep(delay)
+                    continue
+
+                self.breaker.record_success()
+                success = True
+                return
+        finally:
+            if trial:
+                self.breaker.release_trial()
+            self._record_usage(task, model, prompt, started, usage, "".join(output), success)
+
+    def get_metrics(self) -> dict:
+        """Call counters, circuit state and per-lane queueing and executor statistics."""
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "failures": self.failures,
+            "rejected_by_circuit": self.rejected,
+            "circuit_state": self.breaker.state,
+            "lanes": {name: lane.get_metrics() for name, lane in self.lanes.items()},
+        }
+
+    def shutdown(self):
+        """Stop the dedicated worker threads."""
+        for lane in self.lanes.values():
+            lane.executor.shutdown()
@@ -0,0 +1,192 @@
+import asyncio
+import json
+import logging
+import time
+from collections import Counter, deque
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+from pydantic import BaseModel, Field
+from config import settings
+from services.executors import latency_summary
+from services.hedging import Hedger
+from services.model_client import CircuitOpenError, ModelClient, is_retryable
+
+logger = logging.getLogger(__name__)
+
+class ModelRoute(BaseModel):
+    """Models and generation settings for one GeminiService task."""
+    primary: str
+    fallback: Optional[str] = None
+    latency_slo: float = Field(..., description="Seconds the primary may take (to its first piece when streaming) "
+                                                "before the fallback is used instead")
+    temperature: float
+    max_output_tokens: int
+    hedge: bool = Field(False, description="Duplicate slow primary calls when hedging is enabled")
+
+def default_routes() -> Dict[str, ModelRoute]:
+    """The routing table: built-in defaults per task, overridden per task by the AI_ROUTES JSON setting."""
+    primary = settings.AI_MODEL
+    fallback = settings.AI_FALLBACK_MODEL or None
+    light = fallback or primary
+    routes = {
+        "default": ModelRoute(primary=primary, fallback=fallback, latency_slo=60, temperature=0.7,
+                              max_output_tokens=settings.MAX_TOKENS),
+        "chat": ModelRoute(primary=primary, fallback=fallback, latency_slo=10, temperature=0.7, max_output_tokens=1024,
+                           hedge=True),
+        # Folding chat history into a summary is simple; the lighter model is enough
+        "chat_summary": ModelRoute(primary=light, fallback=primary if light != primary else None, latency_slo=10,
+                                   temperature=0.2, max_output_tokens=settings.CHAT_SUMMARY_MAX_TOKENS),
+        "narrative": ModelRoute(primary=primary, fallback=fallback, latency_slo=30, temperature=0.7,
+                                max_output_tokens=settings.MAX_TOKENS, hedge=True),
+        "report": ModelRoute(primary=primary, fallback=fallback, latency_slo=60, temperature=0.5,
+                             max_output_tokens=settings.MAX_TOKENS),
+        "report_merge": ModelRoute(primary=primary, fallback=fallback, latency_slo=30, temperature=0.3,
+                                   max_output_tokens=2048),
+        "storyboard": ModelRoute(primary=primary, fallback=fallback, latency_slo=90, temperature=0.8,
+                                 max_output_tokens=settings.MAX_TOKENS),
+    }
+    overrides = json.loads(settings.AI_ROUTES) if settings.AI_ROUTES else {}
+    for task, override in overrides.items():
+        base = routes.get(task, routes["default"])
+        routes[task] = ModelRoute(**{**base.model_dump(), **override})
+    return routes
+
+class _RouteStats:
+    def __init__(self):
+        self.calls = 0
+        self.primary_ok = 0
+        self.fallbacks = Counter()  # reason -> calls sent to the fallback model
+        self.fallback_failed = 0
+        self.latencies = {"primary": deque(maxlen=1000), "fallback": deque(maxlen=1000)}
+
+class ModelRouter:
+    """
+    Sends each task's model calls to its route's primary model, or its fallback.
+
+    The fallback is used when the primary errors or misses the route's latency
+    SLO. A primary that timed out or kept failing is skipped for `cooldown`
+    seconds afterwards, so calls meanwhile do not wait out the SLO first.
+    Primary calls of hedged routes go through the hedger, unless their lane
+    is already queueing.
+    """
+
+    def __init__(self, client: ModelClient, routes: Optional[Dict[str, ModelRoute]] = None, cooldown: float = None,
+                 hedger: Optional[Hedger] = None):
+        self.client = client
+        self.hedger = hedger or Hedger()
+        self.routes = routes or default_routes()
+        self.cooldown = settings.AI_ROUTE_COOLDOWN_SECONDS if cooldown is None else cooldown
+        self._primary_down_until: Dict[str, float] = {}
+        self.stats: Dict[str, _RouteStats] = {}
+
+    def route(self, task: str) -> ModelRoute:
+        """Route of a task; repair calls follow the task they repair."""
+        base = task[:-len("_repair")] if task.endswith("_repair") else task
+        return self.routes.get(base) or self.routes["default"]
+
+    def _begin(self, task: str):
+        route = self.route(task)
+        stats = self.stats.setdefault(task, _RouteStats())
+        stats.calls += 1
+        skip = route.fallback and time.monotonic() < self._primary_down_until.get(task, 0)
+        return route, stats, "cooldown" if skip else None
+
+    def _primary_failed(self, task: str, route: ModelRoute, error: Exception) -> str:
+        """Decide whether a primary failure falls back (re-raising if not); returns the reason."""
+        if not route.fallback or isinstance(error, CircuitOpenError):
+            raise error
+        timed_out = isinstance(error, (asyncio.TimeoutError, TimeoutError))
+        if timed_out or is_retryable(error):
+            self._primary_down_until[task] = time.monotonic() + self.cooldown
+        return "timeout" if timed_out else "error"
+
+    def _fall_back(self, task: str, route: ModelRoute, stats: _RouteStats, reason: str):
+        stats.fallbacks[reason] += 1
+        if reason != "cooldown":
+            logger.warning(f"{task}: primary model {route.primary} {reason}; using {route.fallback}")
+
+    async def generate(self, models: Callable[[str], Any], prompt, task: str,
+                       lane: str = ModelClient.INTERACTIVE, **kwargs):
+        """ModelClient.generate() on the task's route; `models` maps a model name to a model object."""
+        route, stats, reason = self._begin(task)
+        if reason is None:
+            started = time.monotonic()
+
+            def factory():
+                return self.client.generate(models(route.primary), prompt, lane=lane, task=task, **kwargs)
+            if route.hedge:
+                call = self.hedger.run(task, factory, allow=not self.client.lanes[lane].waiting)
+            else:
+                call = factory()
+            try:
+                response = await asyncio.wait_for(call, route.latency_slo if route.fallback else None)
+                stats.primary_ok += 1
+                stats.latencies["primary"].append(time.monotonic() - started)
+                return response
+            except Exception as e:
+                reason = self._primary_failed(task, route, e)
+
+        self._fall_back(task, route, stats, reason)
+        started = time.monotonic()
+        try:
+            response = await self.client.generate(models(route.fallback), prompt, lane=lane, task=task, **kwargs)
+        except Exception:
+            stats.fallback_failed += 1
+            raise
+        stats.latencies["fallback"].append(time.monotonic() - started)
+        return response
+
+    async def stream(self, models: Callable[[str], Any], prompt, task: str,
+                     lane: str = ModelClient.INTERACTIVE, **kwargs) -> AsyncIterator[str]:
+        """
+        ModelClient.stream() on the task's route.
+
+        The SLO applies to the first piece; once the primary has produced one,
+        the stream stays with it.
+        """
+        route, stats, reason = self._begin(task)
+        if reason is None:
+            started = time.monotonic()
+            pieces = self.client.stream(models(route.primary), prompt, lane=lane, task=task, **kwargs)
+            try:
+                first = await asyncio.wait_for(pieces.__anext__(), route.latency_slo if route.fallback else None)
+            except StopAsyncIteration:
+                return
+            except Exception as e:
+                await pieces.aclose()
+                reason = self._primary_failed(task, route, e)
+            else:
+                yield first
+                async for piece in pieces:
+                    yield piece
+                stats.primary_ok += 1
+                stats.latencies["primary"].append(time.monotonic() - started)
+                return
+
+        self._fall_back(task, route, stats, reason)
+        started = time.monotonic()
+        try:
+            async for piece in self.client.stream(models(route.fallback), prompt, lane=lane, task=task, **kwargs):
+                yield piece
+        except Exception:
+            stats.fallback_failed += 1
+            raise
+        stats.latencies["fallback"].append(time.monotonic() - started)
+
+    def get_metrics(self) -> dict:
+        """The routing table and, per task, calls served by the primary and by the fallback (by reason)."""
+        now = time.monotonic()
+        return {
+            "routes": {task: route.model_dump() for task, route in self.routes.items()},
+            "hedging": self.hedger.get_metrics(),
+            "tasks": {
+                task: {
+                    "calls": stats.calls,
+                    "primary_ok": stats.primary_ok,
+                    "fallbacks": dict(stats.fallbacks),
+                    "fallback_failed": stats.fallback_failed,
+                    "primary_cooling_down": now < self._primary_down_until.get(task, 0),
+                    "latency_seconds": {model: latency_summary(samples) for model, samples in stats.latencies.items()},
+                }
+                for task, stats in sorted(self.stats.items())
+            },
+        }
@@ -0,0 +1,201 @@
+import asyncio
+import contextlib
+import logging
+from typing import List, Optional, Tuple
+from models import ReportData
+from config import settings
+from services.gemini_service import NARRATIVE_ERROR_MESSAGE
+from services.model_client import ModelClient, TokenBucket
+
+logger = logging.getLogger(__name__)
+
+class NarrativeService:
+    """
+    Report narratives served from the database.
+
+    A stored narrative is fresh while it answers the report's current
+    narrative prompt (same prompt key); otherwise it is generated and stored.
+    Generations on a miss wait for a slot at `gate` (an AdmissionGate), if
+    given; stored narratives are served without one.
+    """
+
+    def __init__(self, db_service, gemini_service, gate=None):
+        self.db_service = db_service
+        self.gemini_service = gemini_service
+        self.gate = gate
+        self.hits = 0
+        self.misses = 0
+
+    def cached(self, report: ReportData) -> Optional[str]:
+        """The stored narrative of a report if it is fresh."""
+        stored = self.db_service.get_narrative(report.id)
+        if stored and stored[0] == self.gemini_service.narrative_key(report):
+            return stored[1]
+        return None
+
+    async def get(self, report: ReportData) -> Tuple[str, bool]:
+        """Return (narrative, served_from_cache), generating and storing it on a miss."""
+        narrative = self.cached(report)
+        if narrative is not None:
+            self.hits += 1
+            return narrative, True
+
+        self.misses += 1
+        if not self.gemini_service.enabled:
+            return await self.gemini_service.generate_narrative(report), False
+        async with (self.gate.admit() if self.gate else contextlib.nullcontext()):
+            narrative = await self.refresh(report)
+        return (NARRATIVE_ERROR_MESSAGE if narrative is None else narrative), False
+
+    async def refresh(self, report: ReportData, lane: str = ModelClient.INTERACTIVE) -> Optional[str]:
+        """Generate and store a report's narrative; None if generation failed."""
+        key = self.gemini_service.narrative_key(report)
+        narrative = await self.gemini_service.create_narrative(report, lane=lane)
+        if narrative:
+            self.db_service.save_narrative(report.id, key, narrative, report_updated_at=report.updated_at)
+        return narrative
+
+    def get_metrics(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+class NarrativeWarmer:
+    """
+    Background worker that pre-generates narratives for reports without a fresh one.
+
+    It queues every stale report on start and again whenever the catalog
+    version changes, which it checks every `catalog_poll` seconds, so reports
+    uploaded through any worker process are warmed; uploads through this one
+    are queued at once. The scans run in the default executor, and only the
+    first decodes every report to compare prompt keys (the prompt may have
+    changed since the narratives were stored); later ones only decode reports
+    changed since their narrative was generated. Generations run on the model client's batch lane at no more than
+    `per_minute`, and wait while interactive or batch calls are queueing, so
+    the warmer only uses capacity that users are not.
+    """
+
+    def __init__(self, narrative_service: NarrativeService, per_minute: float = None, idle_poll: float = 1.0,
+                 catalog_poll: float = None):
+        self.narrative_service = narrative_service
+        self.bucket = TokenBucket(per_minute or settings.NARRATIVE_WARMER_PER_MINUTE, capacity=1)
+        self.idle_poll = idle_poll
+        self.catalog_poll = catalog_poll or settings.NARRATIVE_WARMER_POLL_SECONDS
+        self._queue: Optional[asyncio.Queue] = None
+        self._queued = set()
+        self._task: Optional[asyncio.Task] = None
+        self.warmed = 0
+        self.skipped = 0
+        self.failed = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, delay: float = 0):
+        """Start the worker on the running event loop, queueing stale reports after `delay` seconds."""
+        self._queue = asyncio.Queue()
+        self._task = asyncio.ensure_future(self._run(delay))
+        logger.info(f"Narrative warmer started ({self.bucket.rate * 60:g} per minute)")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    def enqueue(self, report_id: str):
+        """Queue a report for pre-generation (no-op while the warmer is not running)."""
+        if not self.running or report_id in self._queued:
+            return
+        self._queued.add(report_id)
+        self._queue.put_nowait(report_id)
+
+    async def enqueue_stale(self, check_all: bool = True):
+        """Queue every report whose stored narrative is missing or stale."""
+        loop = asyncio.get_running_loop()
+        for report_id in await loop.run_in_executor(None, self._stale_report_ids, check_all):
+            self.enqueue(report_id)
+
+    def _stale_report_ids(self, check_all: bool) -> List[str]:
+        """
+        Reports whose stored narrative is missing or answers another prompt.
+
+        Unless `check_all`, a narrative generated from the report's current
+        version is taken as fresh without decoding the report.
+        """
+        service = self.narrative_service
+        stored = service.db_service.get_narrative_keys()
+        stale = []
+        for report_id, updated_at in service.db_service.get_catalog_versions():
+            key, generated_from = stored.get(report_id, (None, None))
+            if key is None:
+                stale.append(report_id)
+                continue
+            if not check_all and generated_from == updated_at:
+                continue
+            report = service.db_service.get_report_by_id(report_id)
+            if report is None:
+                continue
+            if key != service.gemini_service.narrative_key(report):
+                stale.append(report_id)
+            elif generated_from != updated_at:
+                # Still answers the report's prompt: recorded so later scans need not decode it again
+                service.db_service.set_narrative_report_version(report_id, updated_at)
+        return stale
+
+    async def _run(self, delay: float):
+        await asyncio.sleep(delay)
+        watcher = asyncio.ensure_future(self._watch_catalog())
+        try:
+            while True:
+                report_id = await self._queue.get()
+                self._queued.discard(report_id)
+                try:
+                    await self._warm(report_id)
+                except Exception as e:
+                    self.failed += 1
+                    logger.error(f"Pre-generating narrative for {report_id} failed: {e}")
+        finally:
+            watcher.cancel()
+
+    async def _watch_catalog(self):
+        """Queue stale reports now and after every catalog change, wherever it was made."""
+        db_service = self.narrative_service.db_service
+        seen = None
+        while True:
+            try:
+                version = db_service.get_catalog_version()
+                if version != seen:
+                    await self.enqueue_stale(check_all=seen is None)
+                    seen = version
+            except Exception as e:
+                logger.error(f"Checking for reports to pre-generate narratives for failed: {e}")
+            await asyncio.sleep(self.catalog_poll)
+
+    async def _warm(self, report_id: str):
+        await self.bucket.acquire()
+        await self._wait_until_idle()
+        # Checked only now: the report may have been deleted, changed or opened meanwhile
+        report = self.narrative_service.db_service.get_report_by_id(report_id)
+        if report is None or self.narrative_service.cached(report) is not None:
+            self.skipped += 1
+            return
+        if await self.narrative_service.refresh(report, lane=ModelClient.BATCH):
+            self.warmed += 1
+            logger.info(f"Pre-generated narrative for {report_id}")
+        else:
+            self.failed += 1
+
+    async def _wait_until_idle(self):
+        lanes = self.narrative_service.gemini_service.client.lanes
+        while any(lane.waiting for lane in lanes.values()):
+            await asyncio.sleep(self.idle_poll)
+
+    def get_metrics(self) -> dict:
+        return {
+            "running": self.running,
+            "queued": len(self._queued),
+            "warmed": self.warmed,
+            "skipped": self.skipped,
+            "failed": self.failed,
+        }
@@ -1,4 +1,3 @@
-import PyPDF2
 import io
 import logging
 import re
@@ -33,6 +32,9 @@ class PDFService:
             logger.error("Empty PDF content provided. Cannot extract text.")
             return ""
 
+        # Imported on first use, to keep it out of application startup
+        import PyPDF2
+
         try:
             logger.info(f"Attempting to process PDF of size: {len(pdf_content)} bytes")
             
@@ -174,6 +176,8 @@ class PDFService:
         if not pdf_content.startswith(b'%PDF-'):
             return False, "File does not have a valid PDF header (%PDF- not found at beginning)."
 
+        import PyPDF2
+
         try:
             pdf_file = io.BytesIO(pdf_content)
             pdf_reader = PyPDF2.PdfReader(pdf_file)
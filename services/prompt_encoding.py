@@ -0,0 +1,114 @@
+import math
+import re
+from typing import Iterable, List, Optional, Sequence
+
+from models import ChartConfig, ReportData
+
+# Pieces the way SentencePiece-style tokenizers (Gemini's) tend to split text:
+# words, single digits, single punctuation marks and runs of whitespace.
+# A lone space is absorbed into the following word.
+_TOKEN_PIECES = re.compile(r"[^\W\d_]+|\d|\s{2,}|[^\w\s]|_")
+_CHARS_PER_WORD_TOKEN = 6  # long words split into pieces of about this size
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n+")
+
+def count_tokens(text: str) -> int:
+    """
+    Local estimate of the model's token count for `text`.
+
+    Digits, punctuation and whitespace runs (indentation) count one token
+    each, words about one per six letters. On English prose this is close to
+    the familiar four characters per token, while JSON, indentation and
+    numbers are charged what they really cost.
+    """
+    count = 0
+    for piece in _TOKEN_PIECES.findall(str(text)):
+        count += math.ceil(len(piece) / _CHARS_PER_WORD_TOKEN) if piece[0].isalpha() else 1
+    return count
+
+def truncate_to_tokens(text: str, budget: int, marker: str = " […]") -> str:
+    """
+    Cut `text` to at most `budget` tokens at a sentence (or line) boundary.
+
+    A first sentence longer than the whole budget is cut at a word boundary
+    instead. `marker` is appended when anything was dropped.
+    """
+    if count_tokens(text) <= budget:
+        return text
+    budget = max(1, budget - count_tokens(marker))
+    kept, used, position = [], 0, 0
+    for match in list(_SENTENCE_END.finditer(text)) + [None]:
+        end = match.start() if match else len(text)
+        sentence = text[position:end]
+        cost = count_tokens(sentence)
+        if used + cost > budget:
+            break
+        kept.append(text[position:match.end() if match else end])
+        used += cost
+        position = match.end() if match else end
+    if not kept:
+        words = []
+        for word in text.split():
+            used += count_tokens(word)
+            if used > budget:
+                break
+            words.append(word)
+        return " ".join(words) + marker
+    return "".join(kept).rstrip() + marker
+
+def _format_value(value) -> str:
+    if isinstance(value, float):
+        return f"{value:g}"
+    return str(value).replace("|", "/").replace("\n", " ")
+
+def encode_table(columns: Sequence[str], rows: Iterable[Sequence]) -> str:
+    """Pipe-separated table: a header line, then one line per row."""
+    lines = ["|".join(columns)]
+    lines.extend("|".join(_format_value(value) for value in row) for row in rows)
+    return "\n".join(lines)
+
+def encode_chart(chart: ChartConfig) -> str:
+    """A chart as its title line plus a table with the x-axis column followed by one column per series."""
+    keys = [data_key["key"] for data_key in chart.dataKeys if "key" in data_key]
+    columns = [chart.xAxisKey] + keys
+    header = f"Chart ({chart.type}): {chart.title}"
+    if chart.description:
+        header += f" - {chart.description}"
+    return header + "\n" + encode_table(columns, ([point.get(column, "") for column in columns] for point in chart.data))
+
+def encode_findings(findings: Sequence[str]) -> str:
+    return "\n".join(f"- {finding}" for finding in findings)
+
+def encode_report(report: ReportData, text_budget: Optional[int] = None, charts: bool = True) -> str:
+    """
+    A report as compact plain text: id and title, summary, findings, chart tables
+    and, when `text_budget` is given, an excerpt of the full text cut to that many tokens.
+    """
+    parts = [f"## {report.title} (id: {report.id})", f"Summary: {report.summary}"]
+    if report.keyFindings:
+        parts.append("Key findings:\n" + encode_findings(report.keyFindings))
+    if charts and report.charts:
+        parts.append("\n\n".join(encode_chart(chart) for chart in report.charts))
+    if text_budget:
+        parts.append("Excerpt:\n" + truncate_to_tokens(report.fullText, text_budget))
+    return "\n".join(parts)
+
+def encode_reports(reports: Sequence[ReportData], budget: int) -> str:
+    """
+    Several reports (without full text) within a total token budget.
+
+    When they do not all fit, the budget is shared out evenly: reports smaller
+    than their share are sent whole and leave the rest to the others, larger
+    ones are cut at a line or sentence boundary.
+    """
+    blocks: List[str] = [encode_report(report) for report in reports]
+    sizes = [count_tokens(block) for block in blocks]
+    if sum(sizes) <= budget:
+        return "\n\n".join(blocks)
+    remaining = budget
+    order = sorted(range(len(blocks)), key=sizes.__getitem__)
+    for position, index in enumerate(order):
+        share = max(1, remaining // (len(blocks) - position))
+        if sizes[index] > share:
+            blocks[index] = truncate_to_tokens(blocks[index], share)
+        remaining -= min(sizes[index], share)
+    return "\n\n".join(blocks)
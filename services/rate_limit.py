@@ -0,0 +1,251 @@
+import hashlib
+import json
+import logging
+import math
+import threading
+import time
+from collections import Counter
+from typing import Dict, NamedTuple, Optional, Tuple
+from pydantic import BaseModel, Field
+from config import settings
+from services.responses import dumps
+
+logger = logging.getLogger(__name__)
+
+class RateLimit(BaseModel):
+    """Requests one client may make to one route class per sliding window."""
+    requests: int = Field(..., ge=1, description="Requests allowed per window")
+    window: int = Field(..., ge=1, description="Window length in seconds")
+
+def default_limits() -> Dict[str, RateLimit]:
+    """Limits per route class: built-in defaults, overridden per class by the RATE_LIMITS JSON setting."""
+    limits = {
+        "read": RateLimit(requests=600, window=60),
+        "upload": RateLimit(requests=20, window=60),
+        "ai": RateLimit(requests=20, window=60),
+    }
+    overrides = json.loads(settings.RATE_LIMITS) if settings.RATE_LIMITS else {}
+    for route_class, override in overrides.items():
+        if route_class not in limits:
+            raise ValueError(f"Unknown rate limit class {route_class!r}; use {', '.join(limits)}")
+        limits[route_class] = RateLimit(**{**limits[route_class].model_dump(), **override})
+    return limits
+
+def route_class(method: str, path: str) -> Optional[str]:
+    """
+    Rate limit class of a request: "ai" for model-backed endpoints, "read" for
+    other API reads and "upload" for other API writes (uploads, deletes,
+    backups). Pages, static files and CORS preflights are not limited (None).
+    """
+    if not path.startswith("/api/") or method == "OPTIONS":
+        return None
+    if method == "POST" and path.startswith(("/api/generate-", "/api/chat/")):
+        return "ai"
+    if method == "GET" or method == "HEAD":
+        return "read"
+    return "upload"
+
+class RateLimitDecision(NamedTuple):
+    allowed: bool
+    limit: int
+    remaining: int  # requests left in the current window
+    reset: int  # seconds until the current window ends
+    retry_after: int  # seconds until a rejected request would be allowed; 0 if allowed
+
+class SlidingWindowLimiter:
+    """
+    Per-client sliding-window request counters.
+
+    Counts are kept per (route class:client, fixed window start). A request
+    is allowed while the previous window's count, weighted by the share of it
+    still inside the sliding window, plus the current window's count stays
+    within the limit — two integers per client instead of a log of request
+    times, and a check is a few dict lookups under a lock.
+
+    With several worker processes each counts its own requests in memory and
+    a background thread adds them to the rate_limit_counters table every
+    `sync_interval` seconds, reading back every worker's totals. A client
+    spread over all workers can therefore exceed its limit by what the other
+    workers admitted since their last sync.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, RateLimit]] = None, db_service=None,
+                 sync_interval: float = None, enabled: bool = None, key_header: str = None):
+        self.limits = limits or default_limits()
+        self.db_service = db_service
+        self.sync_interval = settings.RATE_LIMIT_SYNC_SECONDS if sync_interval is None else sync_interval
+        self.enabled = settings.RATE_LIMIT_ENABLED if enabled is None else enabled
+        key_header = settings.RATE_LIMIT_KEY_HEADER if key_header is None else key_header
+        self.key_header = key_header.lower().encode("latin-1") if key_header else None
+        self._retention = 2 * max(limit.window for limit in self.limits.values())
+        self._local: Dict[Tuple[str, int], int] = {}  # this worker's requests since the last sync
+        self._shared: Dict[Tuple[str, int], int] = {}  # every worker's requests as of the last sync
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.allowed = Counter()  # route class -> requests
+        self.limited = Counter()
+        self.syncs = 0
+        self.sync_errors = 0
+        self.last_sync_ms = 0.0
+
+    def client_of(self, scope) -> str:
+        """
+        Who an HTTP or WebSocket request counts against: the `key_header`
+        request header if set and present (hashed, so keys are never stored),
+        otherwise the client's IP address.
+        """
+        if self.key_header is not None:
+            for name, value in scope["headers"]:
+                if name == self.key_header:
+                    return "key-" + hashlib.sha256(value).hexdigest()[:16]
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    def _count(self, key: Tuple[str, int]) -> int:
+        return self._shared.get(key, 0) + self._local.get(key, 0)
+
+    def hit(self, route_class: str, client: str, now: float = None) -> RateLimitDecision:
+        """Count one request of `client` to `route_class` if it is within the limit."""
+        limit = self.limits[route_class]
+        window = limit.window
+        now = time.time() if now is None else now
+        window_start = int(now) // window * window
+        elapsed = (now - window_start) / window
+        key = route_class + ":" + client
+        current_key = (key, window_start)
+        with self._lock:
+            previous = self._count((key, window_start - window))
+            current = self._count(current_key)
+            estimate = previous * (1 - elapsed) + current
+            allowed = estimate + 1 <= limit.requests
+            if allowed:
+                self._local[current_key] = self._local.get(current_key, 0) + 1
+        reset = math.ceil(window_start + window - now)
+        if allowed:
+            self.allowed[route_class] += 1
+            return RateLimitDecision(True, limit.requests, int(limit.requests - estimate - 1), reset, 0)
+
+        self.limited[route_class] += 1
+        if current + 1 <= limit.requests and previous:
+            # The previous window's weight falls until the estimate leaves room for one more
+            wait = (1 - (limit.requests - 1 - current) / previous - elapsed) * window
+        else:
+            # Only in the next window, once this window's share has fallen far enough
+            wait = (1 - elapsed) * window + max(0.0, 1 - (limit.requests - 1) / current) * window
+        # Rounded up to whole seconds, less float noise that would add a second to exact waits
+        return RateLimitDecision(False, limit.requests, 0, reset, max(1, math.ceil(wait - 1e-9)))
+
+    def sync(self):
+        """
+        Add this worker's counts to the shared counters and read back every worker's, dropping old windows.
+
+        A worker with nothing new to add only reads, so idle workers cause no write-lock churn.
+        """
+        with self._sync_lock:
+            since = int(time.time()) - self._retention
+            with self._lock:
+                deltas, self._local = self._local, {}
+                # Counted as shared until the database answers, so no request goes uncounted meanwhile
+                for key, count in deltas.items():
+                    self._shared[key] = self._shared.get(key, 0) + count
+            if self.db_service is None:
+                with self._lock:
+                    self._shared = {key: count for key, count in self._shared.items() if key[1] >= since}
+                return
+
+            started = time.perf_counter()
+            try:
+                shared = self.db_service.sync_rate_limit_counts(deltas, since)
+            except Exception as e:
+                self.sync_errors += 1
+                logger.warning(f"Rate limit counters not synced, retrying with the next sync: {e}")
+                with self._lock:
+                    for key, count in deltas.items():
+                        self._shared[key] -= count
+                        self._local[key] = self._local.get(key, 0) + count
+                return
+            with self._lock:
+                self._shared = shared
+            self.syncs += 1
+            self.last_sync_ms = (time.perf_counter() - started) * 1000
+
+    def _run(self):
+        while not self._stop.wait(self.sync_interval):
+            self.sync()
+
+    def start(self):
+        """Sync counters in a background thread until stop()."""
+        if self.enabled and self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="rate-limit-sync", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the background thread and sync what this worker counted since its last run."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+            self.sync()
+
+    def get_metrics(self) -> dict:
+        with self._lock:
+            tracked = len({key for key, _ in self._shared} | {key for key, _ in self._local})
+        return {
+            "enabled": self.enabled,
+            "limits": {name: limit.model_dump() for name, limit in self.limits.items()},
+            "allowed": dict(self.allowed),
+            "limited": dict(self.limited),
+            "tracked_clients": tracked,
+            "syncs": self.syncs,
+            "sync_errors": self.sync_errors,
+            "last_sync_ms": self.last_sync_ms,
+        }
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware applying per-client rate limits to API requests.
+
+    Limited responses carry RateLimit-Limit, RateLimit-Remaining and
+    RateLimit-Reset headers; requests over the limit are answered with 429
+    and Retry-After without reaching the app.
+    """
+
+    def __init__(self, app, limiter: SlidingWindowLimiter):
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope, receive, send):
+        limited = route_class(scope["method"], scope["path"]) if scope["type"] == "http" else None
+        if limited is None or not self.limiter.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        decision = self.limiter.hit(limited, self.limiter.client_of(scope))
+        headers = [
+            (b"ratelimit-limit", str(decision.limit).encode()),
+            (b"ratelimit-remaining", str(decision.remaining).encode()),
+            (b"ratelimit-reset", str(decision.reset).encode()),
+        ]
+        if not decision.allowed:
+            body = dumps({"detail": f"Too many {limited} requests; retry in {decision.retry_after}s"})
+            await send({
+                "type": "http.response.start",
+                "status": 429,
+                "headers": headers + [
+                    (b"retry-after", str(decision.retry_after).encode()),
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        async def send_with_limits(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": list(message.get("headers", [])) + headers}
+            await send(message)
+
+        await self.app(scope, receive, send_with_limits)
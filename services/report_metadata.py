@@ -0,0 +1,44 @@
+import re
+from datetime import date
+from typing import Optional, Tuple
+
+# "DIW Weekly Report 16*17*18 2024", "DIW Weekly Report 50-52 2024": issue number(s), then the year
+_ISSUE_HEADER = re.compile(r"Weekly Report\s+(\d{1,2}(?:\s*[-+*/]\s*\d{1,2})*)\s+((?:19|20)\d{2})\b")
+_MONTHS = ["january", "february", "march", "april", "may", "june", "july", "august", "september", "october",
+           "november", "december"]
+_MONTH = "|".join(_MONTHS)
+# "January 31, 2024" or "31 January 2024"
+_WRITTEN_DATE = re.compile(rf"\b(?:({_MONTH})\s+(\d{{1,2}}),\s*((?:19|20)\d{{2}})|(\d{{1,2}})\s+({_MONTH})\s+((?:19|20)\d{{2}}))\b",
+                           re.IGNORECASE)
+# Only the front matter of a report names its own issue and date
+_HEADER_CHARS = 2000
+
+def publication_info(full_text: str) -> Tuple[Optional[str], Optional[date]]:
+    """
+    (issue, publication date) of a report, read from the front of its text.
+
+    A Weekly Report header gives the issue ("16*17*18") and, as the reports
+    appear weekly, the Monday of the first issue's week of that year; without
+    one, the first written-out date is used. Either may be None.
+    """
+    head = full_text[:_HEADER_CHARS]
+    match = _ISSUE_HEADER.search(head)
+    if match:
+        issue = re.sub(r"\s+", "", match.group(1))
+        first_issue = int(re.match(r"\d+", issue).group(0))
+        try:
+            return issue, date.fromisocalendar(int(match.group(2)), first_issue, 1)
+        except ValueError:
+            return issue, None
+
+    match = _WRITTEN_DATE.search(head)
+    if match:
+        if match.group(1):
+            month, day, year = match.group(1), match.group(2), match.group(3)
+        else:
+            day, month, year = match.group(4), match.group(5), match.group(6)
+        try:
+            return None, date(int(year), _MONTHS.index(month.lower()) + 1, int(day))
+        except ValueError:
+            pass
+    return None, None
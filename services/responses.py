@@ -0,0 +1,42 @@
+from typing import Any, List, Type
+import orjson
+from fastapi.responses import Response
+from pydantic import BaseModel, TypeAdapter
+
+def _default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(content: Any) -> bytes:
+    """Serialize to JSON bytes: pydantic models with their own serializer, anything else with orjson."""
+    if isinstance(content, BaseModel):
+        return content.model_dump_json().encode("utf-8")
+    return orjson.dumps(content, default=_default)
+
+class FastJSONResponse(Response):
+    """
+    JSON response rendered with pydantic's serializer or orjson instead of json.dumps.
+
+    Content may also be already serialized JSON bytes, which are sent as they are.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
+class ModelListJSON:
+    """Serializes lists of one pydantic model straight to JSON bytes, without intermediate dicts."""
+
+    def __init__(self, model: Type[BaseModel]):
+        self._adapter = TypeAdapter(List[model])
+
+    def dumps(self, items: List[BaseModel]) -> bytes:
+        return self._adapter.dump_json(items)
+
+    def wrapped(self, key: str, items: List[BaseModel]) -> bytes:
+        """`{"<key>": [...items]}` as JSON bytes."""
+        return b'{' + orjson.dumps(key) + b':' + self.dumps(items) + b'}'
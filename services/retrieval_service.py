@@ -0,0 +1,174 @@
+import math
+import re
+import logging
+from collections import Counter, OrderedDict
+from typing import List, Tuple, Optional
+from models import ReportData
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+_SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+|\n{2,}')
+_TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+# Common English function words that carry no retrieval signal
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being below
+between both but by can could did do does doing down during each few for from further had has have
+having he her here hers herself him himself his how i if in into is it its itself just me more most my
+myself no nor not now of off on once only or other our ours ourselves out over own same she should so
+some such than that the their theirs them themselves then there these they this those through to too
+under until up very was we were what when where which while who whom why will with would you your
+yours yourself yourselves per report diw weekly
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case word tokens without stopwords or single letters (single digits are kept)."""
+    return [
+        token for token in _TOKEN_PATTERN.findall(text.lower())
+        if (len(token) > 1 or token.isdigit()) and token not in STOPWORDS
+    ]
+
+
+def chunk_text(text: str, chunk_size: int = None, overlap: int = None) -> List[str]:
+    """
+    Split text into chunks of roughly chunk_size characters on sentence boundaries.
+
+    Consecutive chunks share up to `overlap` characters of trailing sentences so that
+    facts spanning a boundary remain retrievable from either side.
+    """
+    chunk_size = chunk_size or settings.CHAT_CHUNK_SIZE
+    overlap = settings.CHAT_CHUNK_OVERLAP if overlap is None else overlap
+
+    if not text or not text.strip():
+        return []
+
+    sentences = [s.strip() for s in _SENTENCE_SPLIT.split(text) if s and s.strip()]
+    chunks = []
+    current: List[str] = []
+    current_len = 0
+
+    for sentence in sentences:
+        # Hard-split sentences that alone exceed the chunk size
+        while len(sentence) > chunk_size:
+            if current:
+                chunks.append(' '.join(current))
+                current, current_len = [], 0
+            chunks.append(sentence[:chunk_size])
+            sentence = sentence[chunk_size:]
+
+        if current and current_len + len(sentence) + 1 > chunk_size:
+            chunks.append(' '.join(current))
+            # Carry trailing sentences forward as overlap
+            carried: List[str] = []
+            carried_len = 0
+            for previous in reversed(current):
+                if carried_len + len(previous) + 1 > overlap:
+                    break
+                carried.insert(0, previous)
+                carried_len += len(previous) + 1
+            current, current_len = carried, carried_len
+
+        current.append(sentence)
+        current_len += len(sentence) + 1
+
+    if current:
+        chunks.append(' '.join(current))
+
+    return chunks
+
+
+class BM25Index:
+    """Okapi BM25 index over a fixed list of text chunks."""
+
+    def __init__(self, chunks: List[str], k1: float = 1.5, b: float = 0.75):
+        self.chunks = chunks
+        self.k1 = k1
+        self.b = b
+        self.term_freqs = [Counter(tokenize(chunk)) for chunk in chunks]
+        self.lengths = [sum(tf.values()) for tf in self.term_freqs]
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+
+        doc_freqs = Counter()
+        for tf in self.term_freqs:
+            doc_freqs.update(tf.keys())
+        n = len(chunks)
+        self.idf = {
+            term: math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for term, df in doc_freqs.items()
+        }
+
+    def search(self, query: str, top_k: int) -> List[Tuple[int, float]]:
+        """Return (chunk_index, score) pairs for the best matching chunks, best first."""
+        terms = [t for t in set(tokenize(query)) if t in self.idf]
+        if not terms or not self.chunks:
+            return []
+
+        scores = []
+        for i, tf in enumerate(self.term_freqs):
+            length_norm = self.k1 * (1 - self.b + self.b * self.lengths[i] / (self.avg_length or 1))
+            score = 0.0
+            for term in terms:
+                freq = tf.get(term)
+                if freq:
+                    score += self.idf[term] * freq * (self.k1 + 1) / (freq + length_norm)
+            if score > 0:
+                scores.append((i, score))
+
+        scores.sort(key=lambda item: item[1], reverse=True)
+        return scores[:top_k]
+
+
+def select_chunks(chunks: List[str], query: str, top_k: int = None, index: BM25Index = None) -> List[Tuple[int, str]]:
+    """
+    Pick the top_k chunks most relevant to the query, returned in document order.
+
+    Falls back to the opening chunks when the query shares no terms with the text
+    (e.g. "summarize this report").
+    """
+    top_k = top_k or settings.CHAT_TOP_K
+    if not chunks:
+        return []
+
+    index = index or BM25Index(chunks)
+    hits = index.search(query, top_k)
+    selected = sorted(i for i, _ in hits) if hits else list(range(min(top_k, len(chunks))))
+    return [(i, chunks[i]) for i in selected]
+
+
+class RetrievalService:
+    """Serves relevant report chunks for chat, keeping BM25 indexes of recent reports in memory."""
+
+    def __init__(self, db_service, max_cached_reports: int = 128):
+        self.db_service = db_service
+        self.max_cached_reports = max_cached_reports
+        self._indexes: "OrderedDict[str, Tuple[Optional[object], BM25Index]]" = OrderedDict()
+
+    def _get_index(self, report: ReportData) -> BM25Index:
+        cached = self._indexes.get(report.id)
+        if cached and cached[0] == report.updated_at:
+            self._indexes.move_to_end(report.id)
+            return cached[1]
+
+        chunks = self.db_service.get_report_chunks(report.id)
+        if not chunks:
+            chunks = chunk_text(report.fullText)
+        index = BM25Index(chunks)
+
+        self._indexes[report.id] = (report.updated_at, index)
+        self._indexes.move_to_end(report.id)
+        while len(self._indexes) > self.max_cached_reports:
+            self._indexes.popitem(last=False)
+
+        logger.info(f"Built BM25 index for report {report.id} with {len(chunks)} chunks")
+        return index
+
+    def get_relevant_chunks(self, report: ReportData, query: str, top_k: int = None) -> List[Tuple[int, str]]:
+        """Return (chunk_index, text) pairs relevant to the query, in document order."""
+        index = self._get_index(report)
+        return select_chunks(index.chunks, query, top_k, index=index)
+
+    def invalidate(self, report_id: str):
+        """Drop the cached index for a report."""
+        self._indexes.pop(report_id, None)
@@ -0,0 +1,125 @@
+import asyncio
+import hashlib
+import logging
+from collections import Counter
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+def prompt_key(*parts: Any) -> str:
+    """Stable key for an effective prompt (prompt text plus anything else that changes the output)."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+class _Flight:
+    __slots__ = ("task", "waiters", "events", "changed")
+
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.waiters = 0
+        self.events: List[Any] = []
+        self.changed = asyncio.Event()
+
+    def notify(self):
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls.
+
+    The first caller for a (kind, key) pair starts the work; callers arriving
+    while it is in flight wait for the same result instead of repeating it.
+    The work is cancelled only when every waiting caller has gone. Nothing is
+    kept once the call completes, so later callers start a fresh call.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._flights: Dict[Tuple[str, Hashable], _Flight] = {}
+        self.started = Counter()
+        self.coalesced = Counter()
+
+    def _join(self, kind: str, key: Hashable, start: Callable[[_Flight], Awaitable]) -> _Flight:
+        flight_key = (kind, key)
+        flight = self._flights.get(flight_key)
+        if flight is None:
+            flight = _Flight()
+            flight.task = asyncio.ensure_future(start(flight))
+            self._flights[flight_key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(flight_key, flight))
+            self.started[kind] += 1
+        else:
+            self.coalesced[kind] += 1
+        flight.waiters += 1
+        return flight
+
+    def _forget(self, flight_key: Tuple[str, Hashable], flight: _Flight):
+        if self._flights.get(flight_key) is flight:
+            del self._flights[flight_key]
+
+    def _leave(self, kind: str, key: Hashable, flight: _Flight):
+        flight.waiters -= 1
+        if flight.waiters == 0 and not flight.task.done():
+            logger.info(f"All callers left in-flight {kind} call; cancelling it")
+            self._forget((kind, key), flight)
+            flight.task.cancel()
+
+    async def run(self, kind: str, key: Hashable, factory: Callable[[], Awaitable]) -> Any:
+        """Await factory(), sharing the call with concurrent callers of the same kind and key."""
+        if not self.enabled:
+            self.started[kind] += 1
+            return await factory()
+        flight = self._join(kind, key, lambda _: factory())
+        try:
+            # shield: one caller being cancelled must not cancel the call for the others
+            return await asyncio.shield(flight.task)
+        finally:
+            self._leave(kind, key, flight)
+
+    async def stream(self, kind: str, key: Hashable, factory: Callable[[], AsyncIterator]) -> AsyncIterator:
+        """
+        Iterate factory(), sharing one underlying iteration with concurrent callers.
+
+        Callers that join late first receive every item produced so far.
+        """
+        if not self.enabled:
+            self.started[kind] += 1
+            async for item in factory():
+                yield item
+            return
+
+        async def pump(flight: _Flight):
+            try:
+                async for item in factory():
+                    flight.events.append(item)
+                    flight.notify()
+            finally:
+                flight.notify()
+
+        flight = self._join(kind, key, pump)
+        try:
+            index = 0
+            while True:
+                if index < len(flight.events):
+                    index += 1
+                    yield flight.events[index - 1]
+                elif flight.task.done():
+                    flight.task.result()  # re-raise the producer's error, if any
+                    return
+                else:
+                    await flight.changed.wait()
+        finally:
+            self._leave(kind, key, flight)
+
+    def get_metrics(self) -> dict:
+        """Calls started and calls served by an in-flight call, per kind."""
+        kinds = set(self.started) | set(self.coalesced)
+        return {
+            "enabled": self.enabled,
+            "in_flight": len(self._flights),
+            "kinds": {kind: {"started": self.started[kind], "coalesced": self.coalesced[kind]} for kind in sorted(kinds)},
+        }
@@ -0,0 +1,134 @@
+from typing import Dict, List, Optional, Set, Tuple, Type
+from pydantic import BaseModel, Field, ValidationError, create_model
+from models import ChartConfig, ReportData, StoryboardData
+
+# Gemini's response_schema accepts an OpenAPI subset: no $ref, anyOf or free-form objects
+_GEMINI_KEYS = {"type", "format", "description", "nullable", "enum", "items", "properties", "required"}
+
+def to_gemini_schema(schema: dict, defs: Optional[dict] = None) -> dict:
+    """
+    Convert a pydantic JSON schema into the subset Gemini's response_schema accepts.
+
+    References are inlined, Optional[X] becomes X with nullable set, and every
+    non-nullable property is required so the model always fills it.
+    """
+    defs = schema.get("$defs", {}) if defs is None else defs
+
+    if "$ref" in schema:
+        return to_gemini_schema(defs[schema["$ref"].split("/")[-1]], defs)
+
+    if "anyOf" in schema:
+        options = [option for option in schema["anyOf"] if option.get("type") != "null"]
+        if len(options) != 1:
+            raise ValueError(f"Union types are not supported by Gemini schemas: {schema}")
+        converted = to_gemini_schema(options[0], defs)
+        converted["nullable"] = True
+        return converted
+
+    converted = {key: value for key, value in schema.items() if key in _GEMINI_KEYS}
+    if schema.get("type") == "array":
+        converted["items"] = to_gemini_schema(schema["items"], defs)
+    elif schema.get("type") == "object":
+        if not schema.get("properties"):
+            raise ValueError("Free-form objects are not supported by Gemini schemas")
+        converted["properties"] = {
+            name: to_gemini_schema(value, defs) for name, value in schema["properties"].items()
+        }
+        converted["required"] = [
+            name for name, value in converted["properties"].items() if not value.get("nullable")
+        ]
+    return converted
+
+class ChartDataKey(BaseModel):
+    key: str
+    color: str = Field(..., description="Hex colour, e.g. #8884d8")
+    name: Optional[str] = None
+    stackId: Optional[str] = None
+
+class ChartRow(BaseModel):
+    label: str = Field(..., description="Category on the x axis")
+    values: List[float] = Field(..., description="One value per entry of dataKeys, in the same order")
+
+class ChartSpec(BaseModel):
+    """
+    Wire form of ChartConfig for schema-constrained generation.
+
+    ChartConfig.data rows are free-form dicts, which a response schema cannot
+    express; the model instead returns one label plus a value per series.
+    """
+    type: str = Field(..., json_schema_extra={"enum": ["bar", "line", "pie"]})
+    title: str
+    description: str
+    xAxisKey: str
+    dataKeys: List[ChartDataKey]
+    rows: List[ChartRow]
+
+    def to_chart_config(self) -> ChartConfig:
+        data = []
+        for row in self.rows:
+            point = {self.xAxisKey: row.label}
+            point.update({dk.key: value for dk, value in zip(self.dataKeys, row.values)})
+            data.append(point)
+        data_keys = [{k: v for k, v in dk.model_dump().items() if v is not None} for dk in self.dataKeys]
+        return ChartConfig(type=self.type, data=data, dataKeys=data_keys, title=self.title,
+                           description=self.description, xAxisKey=self.xAxisKey)
+
+def _wire_model(name: str, source: Type[BaseModel], exclude: Set[str] = frozenset()) -> Type[BaseModel]:
+    """Derive a generation model from a domain model, with charts in their wire form."""
+    fields = {}
+    for field_name, info in source.model_fields.items():
+        if field_name in exclude:
+            continue
+        annotation = List[ChartSpec] if field_name == "charts" else info.annotation
+        fields[field_name] = (annotation, info)
+    return create_model(name, **fields)
+
+ReportExtraction = _wire_model("ReportExtraction", ReportData, exclude={"fullText", "created_at", "updated_at"})
+ReportMerge = _wire_model("ReportMerge", ReportData, exclude={"fullText", "created_at", "updated_at", "charts"})
+StoryboardGeneration = _wire_model("StoryboardGeneration", StoryboardData)
+
+def response_schema(model: Type[BaseModel]) -> dict:
+    return to_gemini_schema(model.model_json_schema())
+
+def validate_output(model: Type[BaseModel], text: str) -> Tuple[Optional[BaseModel], Optional[str]]:
+    """Validate model output in one pass; returns (instance, None) or (None, error description)."""
+    try:
+        return model.model_validate_json(text), None
+    except ValidationError as e:
+        return None, "; ".join(
+            f"{'.'.join(str(part) for part in error['loc']) or '<root>'}: {error['msg']}"
+            for error in e.errors()[:10]
+        )
+
+def to_domain(instance: BaseModel) -> dict:
+    """Dump a generation model to a dict with charts converted back to ChartConfig dicts."""
+    data = instance.model_dump()
+    if "charts" in data:
+        data["charts"] = [chart.to_chart_config().model_dump() for chart in instance.charts]
+    return data
+
+class StructuredOutputStats:
+    """Per-task counters for schema-constrained generation and the tokens spent on discarded output."""
+
+    def __init__(self):
+        self.tasks: Dict[str, Dict[str, int]] = {}
+
+    def record(self, task: str, outcome: str, wasted_tokens: int = 0):
+        counters = self.tasks.setdefault(task, {
+            "generations": 0, "first_pass_valid": 0, "salvaged": 0, "repaired": 0,
+            "failed": 0, "repair_calls": 0, "wasted_tokens": 0,
+        })
+        if outcome == "generation":
+            counters["generations"] += 1
+        else:
+            counters[outcome] += 1
+        counters["wasted_tokens"] += wasted_tokens
+
+    def get_metrics(self) -> dict:
+        result = {}
+        for task, counters in self.tasks.items():
+            generations = counters["generations"] or 1
+            result[task] = dict(counters,
+                                parse_failure_rate=1 - counters["first_pass_valid"] / generations,
+                                failed_generation_rate=counters["failed"] / generations)
+        return result
@@ -0,0 +1,79 @@
+import asyncio
+import unittest
+
+from services.admission import AdmissionGate, AdmissionLimit, Overloaded
+
+
+class AdmissionGateTest(unittest.TestCase):
+    def _gate(self, concurrency=1, queue=1, max_wait=5.0, enabled=True):
+        return AdmissionGate("chat", AdmissionLimit(concurrency=concurrency, queue=queue, max_wait=max_wait), enabled)
+
+    def test_waiters_are_admitted_in_order_as_slots_free(self):
+        gate = self._gate(concurrency=1, queue=2)
+        order = []
+
+        async def request(name, hold):
+            async with gate.admit():
+                order.append(name)
+                await asyncio.sleep(hold)
+
+        async def main():
+            await asyncio.gather(request("a", 0.02), request("b", 0), request("c", 0))
+
+        asyncio.run(main())
+        self.assertEqual(order, ["a", "b", "c"])
+        self.assertEqual((gate.active, gate.waiting, gate.admitted), (0, 0, 3))
+
+    def test_full_queue_is_rejected_with_429_and_retry_after(self):
+        gate = self._gate(concurrency=1, queue=1)
+
+        async def main():
+            gate._service_times.append(2.5)
+            slot = await gate.acquire()
+            waiter = asyncio.ensure_future(gate.acquire())
+            await asyncio.sleep(0)
+            with self.assertRaises(Overloaded) as rejected:
+                await gate.acquire()
+            slot.release()
+            (await waiter).release()
+            return rejected.exception
+
+        error = asyncio.run(main())
+        self.assertEqual((error.status_code, error.reason), (429, "queue_full"))
+        self.assertEqual(error.retry_after, 5)  # two requests ahead of it, 2.5s each, one at a time
+        self.assertEqual(gate.active, 0)
+
+    def test_long_estimated_or_actual_wait_is_rejected_with_503(self):
+        gate = self._gate(concurrency=1, queue=10, max_wait=0.05)
+
+        async def main():
+            slot = await gate.acquire()
+            with self.assertRaises(Overloaded) as timed_out:
+                await gate.acquire()
+            gate._service_times.append(1.0)
+            with self.assertRaises(Overloaded) as estimated:
+                await gate.acquire()
+            slot.release()
+            return timed_out.exception, estimated.exception
+
+        timed_out, estimated = asyncio.run(main())
+        self.assertEqual((timed_out.status_code, timed_out.reason), (503, "wait_timeout"))
+        self.assertEqual((estimated.status_code, estimated.reason), (503, "wait_estimate"))
+        self.assertEqual(dict(gate.rejected), {"wait_timeout": 1, "wait_estimate": 1})
+        self.assertEqual((gate.active, gate.waiting), (0, 0))
+
+    def test_disabled_gate_admits_everything_and_release_is_idempotent(self):
+        gate = self._gate(concurrency=1, queue=0, enabled=False)
+
+        async def main():
+            slots = [await gate.acquire() for _ in range(5)]
+            for slot in slots:
+                slot.release()
+                slot.release()
+
+        asyncio.run(main())
+        self.assertEqual((gate.active, gate.admitted, sum(gate.rejected.values())), (0, 5, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
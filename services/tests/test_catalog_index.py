@@ -0,0 +1,48 @@
+import json
+import os
+import tempfile
+import unittest
+
+from models import ReportData
+from services.catalog_index import CatalogIndex
+from services.database_service import DatabaseService
+
+
+class CatalogIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_service = DatabaseService(os.path.join(self.tmpdir.name, "test.db"))
+        self.db_service.initialize_database()
+        self.index = CatalogIndex(self.db_service)
+
+    def tearDown(self):
+        self.db_service.engine.dispose()
+        self.tmpdir.cleanup()
+
+    def _report(self, report_id, title):
+        return ReportData(id=report_id, title=title, summary="Summary.", keyFindings=["Finding"], charts=[],
+                          fullText="Full text of the report. " * 50)
+
+    def test_index_lists_reports_without_content_with_their_versions(self):
+        etag, body = self.index.get()
+        entries = json.loads(body)["reports"]
+        self.assertEqual(len(entries), len(self.db_service.get_reports()))
+        self.assertEqual(set(entries[0]), {"id", "title", "updated_at"})
+        # Versions compare equal to those in the report bodies the dashboard stores
+        stored = json.loads(self.db_service.get_report_json(entries[0]["id"])[1])
+        self.assertEqual(entries[0]["updated_at"], stored["updated_at"])
+        self.assertEqual(self.index.get(), (etag, body))
+        self.assertEqual((self.index.hits, self.index.misses), (1, 1))
+
+    def test_changes_are_served_at_once_with_a_new_etag(self):
+        etag, _ = self.index.get()
+        self.db_service.save_report(self._report("new-report", "New report"))
+        new_etag, body = self.index.get()
+        self.assertNotEqual(new_etag, etag)
+        self.assertIn("new-report", [entry["id"] for entry in json.loads(body)["reports"]])
+        self.db_service.delete_report("new-report")
+        self.assertNotIn("new-report", [entry["id"] for entry in json.loads(self.index.get()[1])["reports"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
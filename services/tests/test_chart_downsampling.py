@@ -0,0 +1,97 @@
+import math
+import unittest
+from unittest import mock
+
+import orjson
+
+from services import chart_downsampling
+from services.chart_downsampling import ChartDownsampler, downsample_chart, lttb_indices
+
+
+def _line_chart(points):
+    return {
+        "type": "line", "title": "Index", "description": "", "xAxisKey": "year",
+        "dataKeys": [{"key": "index", "name": "Index", "color": "#fff"}],
+        "data": [{"year": 1900 + i, "index": math.sin(i / 50)} for i in range(points)],
+    }
+
+
+class ChartDownsamplingTest(unittest.TestCase):
+    def test_lttb_keeps_the_ends_and_the_spikes(self):
+        import numpy as np
+        y = np.zeros(1000)
+        y[317], y[642] = 50.0, -40.0
+        indices = lttb_indices(np.arange(1000, dtype=float), y, 50)
+        self.assertEqual(len(indices), 50)
+        self.assertEqual((indices[0], indices[-1]), (0, 999))
+        self.assertTrue(np.all(np.diff(indices) > 0))
+        self.assertIn(317, indices)
+        self.assertIn(642, indices)
+
+    def test_lttb_choices_tabulated_or_per_bucket_agree(self):
+        import numpy as np
+        rng = np.random.default_rng(3)
+        x, y = np.sort(rng.random(5000)), rng.normal(size=5000).cumsum()
+        for n in (4, 100, 1000):
+            with mock.patch.object(chart_downsampling, "LTTB_TABLE_MAX_WIDTH", 10_000):
+                tabulated = lttb_indices(x, y, n)
+            with mock.patch.object(chart_downsampling, "LTTB_TABLE_MAX_WIDTH", 0):
+                per_bucket = lttb_indices(x, y, n)
+            self.assertEqual(tabulated.tolist(), per_bucket.tolist())
+
+    def test_line_chart_is_downsampled_to_its_own_rows(self):
+        chart = _line_chart(5000)
+        sampled = downsample_chart(chart, 200)
+        self.assertEqual(len(sampled["data"]), 200)
+        self.assertEqual(sampled["sourcePoints"], 5000)
+        self.assertEqual(sampled["data"][0], chart["data"][0])
+        self.assertEqual(sampled["data"][-1], chart["data"][-1])
+        self.assertTrue(all(row in chart["data"] for row in sampled["data"][::20]))
+        self.assertEqual(len(chart["data"]), 5000)  # the original is left alone
+
+    def test_many_series_stay_within_the_point_budget(self):
+        chart = _line_chart(3000)
+        chart["dataKeys"] = [{"key": f"s{k}", "name": f"S{k}"} for k in range(40)]
+        for i, row in enumerate(chart["data"]):
+            row.update({f"s{k}": math.sin(i / (10 + k)) * (k + 1) for k in range(40)})
+        for max_points in (100, 400):
+            sampled = downsample_chart(chart, max_points)["data"]
+            self.assertLessEqual(len(sampled), max_points)
+            self.assertEqual((sampled[0], sampled[-1]), (chart["data"][0], chart["data"][-1]))
+
+    def test_bar_chart_keeps_the_largest_categories_and_sums_the_rest(self):
+        chart = {
+            "type": "bar", "title": "Exports", "xAxisKey": "country",
+            "dataKeys": [{"key": "2022", "name": "2022"}, {"key": "2023", "name": "2023"}],
+            "data": [{"country": f"C{i}", "2022": i % 7, "2023": 1} for i in range(100)]
+                    + [{"country": "Big", "2022": 500, "2023": "n/a"}],
+        }
+        sampled = downsample_chart(chart, 10)
+        self.assertEqual(len(sampled["data"]), 10)
+        kept = sampled["data"][:-1]
+        self.assertIn({"country": "Big", "2022": 500, "2023": "n/a"}, kept)
+        self.assertEqual(sampled["data"][-1]["country"], "Other")
+        for key in ("2022", "2023"):
+            total = sum(row[key] for row in chart["data"] if isinstance(row[key], int))
+            shown = sum(row[key] for row in sampled["data"] if isinstance(row[key], (int, float)))
+            self.assertAlmostEqual(shown, total)
+
+    def test_report_json_downsamples_large_charts_once_and_passes_small_ones(self):
+        small = _line_chart(20)
+        rendered = orjson.dumps({"id": "r", "charts": [small, _line_chart(3000)]}).decode()
+        downsampler = ChartDownsampler(cache_size=8)
+
+        first = orjson.loads(downsampler.report_json("r", "v1", rendered, 100))
+        self.assertEqual(first["charts"][0], small)
+        self.assertEqual(len(first["charts"][1]["data"]), 100)
+        self.assertEqual(downsampler.report_json("r", "v1", rendered, 100), orjson.dumps(first))
+        self.assertEqual(downsampler.get_metrics(), {"cached_reports": 1, "hits": 1, "misses": 1})
+
+        self.assertEqual(downsampler.report_json("r", "v1", rendered, 5000), rendered.encode())
+        self.assertEqual(downsampler.report_json("r", "v1", rendered, 5000), rendered.encode())
+        downsampler.report_json("r", "v2", rendered, 100)  # a new version is downsampled afresh
+        self.assertEqual((downsampler.hits, downsampler.misses), (2, 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
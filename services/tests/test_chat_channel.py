@@ -0,0 +1,135 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+
+from models import ReportData
+from services.chat_channel import ChatChannel
+from services.chat_service import ChatService
+from services.database_service import DatabaseService
+from services.gemini_service import GeminiService
+from services.rate_limit import RateLimitDecision
+from services.retrieval_service import RetrievalService
+
+
+class _StreamingModel:
+    """Fake Gemini model streaming a fixed answer in pieces, with a pause before each."""
+
+    def __init__(self, pieces=5, delay=0.02):
+        self.pieces = pieces
+        self.delay = delay
+        self.prompts = []
+        self.pieces_read = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt, stream=False, generation_config=None):
+        self.prompts.append(prompt)
+        return self._stream()
+
+    def _stream(self):
+        for i in range(self.pieces):
+            time.sleep(self.delay)
+            with self._lock:
+                self.pieces_read += 1
+            yield SimpleNamespace(text=f"part {i}. ", usage_metadata=None)
+
+
+class ChatChannelTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_service = DatabaseService(os.path.join(self.tmpdir.name, "test.db"))
+        self.report = self.db_service.save_report(ReportData(
+            id="construction", title="Construction", summary="Construction volume declines.",
+            keyFindings=["Volume falls 3.5%"], charts=[],
+            fullText="Construction prices fell. Residential construction declined sharply. " * 40,
+        ))
+        self.model = _StreamingModel()
+        gemini_service = GeminiService()
+        gemini_service.model = self.model
+        gemini_service.enabled = True
+        self.chat_service = ChatService(self.db_service, gemini_service, RetrievalService(self.db_service))
+        self.session = self.chat_service.get_or_create_session(self.report.id)
+        self.sent = []
+
+    def tearDown(self):
+        self.db_service.engine.dispose()
+        self.tmpdir.cleanup()
+
+    async def _send(self, message):
+        self.sent.append(message)
+
+    def _channel(self, **kwargs):
+        return ChatChannel(self._send, self.chat_service, self.report, self.session, **kwargs)
+
+    def _events(self):
+        return [(m["type"], m["id"]) for m in self.sent if m["type"] != "delta"]
+
+    def _saved_messages(self):
+        return [m.content for m in self.db_service.get_chat_session(self.session.id, full_history=True).messages]
+
+    def test_queued_questions_are_answered_in_order_with_streamed_answers(self):
+        async def main():
+            channel = self._channel()
+            await channel.receive({"type": "question", "message": "What happened?", "id": "a"})
+            await channel.receive({"type": "question", "message": "Why?", "id": "b", "queue": True})
+            await channel._runner
+
+        asyncio.run(main())
+        self.assertEqual(self._events(), [("start", "a"), ("answer", "a"), ("start", "b"), ("answer", "b")])
+        deltas = [m["text"] for m in self.sent if m["type"] == "delta" and m["id"] == "a"]
+        self.assertEqual(len(deltas), 5)
+        self.assertEqual(self._saved_messages(), ["What happened?", "".join(deltas), "Why?", "".join(deltas)])
+        self.assertIn("What happened?", self.model.prompts[-1])  # the second turn saw the first
+
+    def test_new_question_cancels_the_answer_in_progress(self):
+        async def main():
+            channel = self._channel()
+            await channel.receive({"type": "question", "message": "What happened?", "id": "a"})
+            while not any(m["type"] == "delta" for m in self.sent):
+                await asyncio.sleep(0.005)
+            await channel.receive({"type": "question", "message": "Never mind, why?", "id": "b"})
+            await channel._runner
+
+        asyncio.run(main())
+        self.assertEqual(self._events(), [("start", "a"), ("cancelled", "a"), ("start", "b"), ("answer", "b")])
+        self.assertEqual(self._saved_messages()[0::2], ["Never mind, why?"])
+        time.sleep(0.1)
+        self.assertLess(self.model.pieces_read, 10)  # the abandoned response stopped being read
+
+    def test_failed_answers_end_in_an_error_and_are_not_saved(self):
+        def fail_midway():
+            yield SimpleNamespace(text="part 0. ", usage_metadata=None)
+            raise ValueError("model broke")
+
+        self.model._stream = fail_midway
+
+        async def main():
+            channel = self._channel()
+            await channel.receive({"type": "question", "message": "What happened?", "id": "a"})
+            await channel._runner
+            self.chat_service.gemini_service.enabled = False
+            await channel.receive({"type": "question", "message": "Why?", "id": "b"})
+            await channel._runner
+
+        asyncio.run(main())
+        self.assertEqual(self._events(), [("start", "a"), ("error", "a"), ("start", "b"), ("error", "b")])
+        self.assertEqual(self._saved_messages(), [])
+        self.assertEqual(self.session.messages, [])
+
+    def test_rate_limited_questions_are_rejected_without_closing(self):
+        async def main():
+            channel = self._channel(rate_limit=lambda: RateLimitDecision(False, 20, 0, 30, 12))
+            await channel.receive({"type": "question", "message": "What happened?", "id": "a"})
+            await channel.receive({"type": "bogus"})
+
+        asyncio.run(main())
+        self.assertEqual([(m["type"], m["id"], m.get("retry_after")) for m in self.sent],
+                         [("error", "a", 12), ("error", None, None)])
+        self.assertEqual(self._saved_messages(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
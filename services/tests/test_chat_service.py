@@ -0,0 +1,130 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from models import ReportData
+from services.chat_service import ChatService, ChatSessionError
+from services.database_service import DatabaseService
+from services.gemini_service import ChatUnavailable, GeminiService
+from services.retrieval_service import RetrievalService
+
+
+class _RecordingModel:
+    """Fake Gemini model that answers every prompt with a fixed-size reply."""
+
+    def __init__(self):
+        self.prompts = []
+
+    def generate_content(self, prompt, generation_config=None):
+        self.prompts.append(prompt)
+        return type("Response", (), {"text": "A fixed-size answer about the report. " * 5})()
+
+
+class ChatServiceTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_service = DatabaseService(os.path.join(self.tmpdir.name, "test.db"))
+        self.report = self.db_service.save_report(ReportData(
+            id="construction", title="Construction", summary="Construction volume declines.",
+            keyFindings=["Volume falls 3.5%"], charts=[],
+            fullText="Construction prices fell. Residential construction declined sharply. " * 40,
+        ))
+        self.model = _RecordingModel()
+        self.gemini_service = GeminiService()
+        self.gemini_service.model = self.model
+        self.gemini_service.enabled = True
+        self.chat_service = ChatService(self.db_service, self.gemini_service, RetrievalService(self.db_service))
+
+    def tearDown(self):
+        self.db_service.engine.dispose()
+        self.tmpdir.cleanup()
+
+    def _chat(self, message, session_id=None):
+        async def turn():
+            answer = await self.chat_service.chat(self.report, message, session_id)
+            await self.chat_service.wait_for_summaries()
+            return answer
+
+        return asyncio.run(turn())
+
+    def test_session_is_created_and_reused(self):
+        session_id, _ = self._chat("What happened to construction?")
+        same_id, _ = self._chat("And residential?", session_id)
+        self.assertEqual(session_id, same_id)
+        session = self.db_service.get_chat_session(session_id, full_history=True)
+        self.assertEqual([m.role for m in session.messages], ["user", "model", "user", "model"])
+
+    def test_follow_up_sees_previous_turn(self):
+        session_id, _ = self._chat("What happened to construction prices?")
+        self._chat("Why?", session_id)
+        self.assertIn("What happened to construction prices?", self.model.prompts[-1])
+
+    def test_prompt_size_stays_flat(self):
+        session_id = None
+        chat_prompt_sizes = []
+        for turn in range(30):
+            session_id, _ = self._chat(f"Question number {turn} about construction?", session_id)
+            chat_prompt_sizes.append(len(next(p for p in reversed(self.model.prompts) if "User question" in p)))
+
+        session = self.db_service.get_chat_session(session_id)
+        self.assertGreater(session.summarized_count, 0)
+        self.assertTrue(session.summary)
+        # Once the history window is full, later turns cost no more than earlier ones
+        self.assertLessEqual(max(chat_prompt_sizes[10:]), max(chat_prompt_sizes[:10]) * 1.2)
+
+    def test_answer_is_returned_before_the_summary_is_written(self):
+        released = threading.Event()
+        answer = self.model.generate_content
+
+        def generate_content(prompt, generation_config=None):
+            if "running summary" in prompt:
+                released.wait(5)
+            return answer(prompt, generation_config)
+
+        self.model.generate_content = generate_content
+
+        async def run():
+            session_id = None
+            for turn in range(8):  # past CHAT_SUMMARY_TRIGGER from the sixth turn on
+                start = time.monotonic()
+                session_id, _ = await self.chat_service.chat(self.report, f"Question {turn}?", session_id)
+                self.assertLess(time.monotonic() - start, 1)
+            self.assertEqual(len(self.chat_service._summaries), 1)  # one at a time per session
+            self.assertEqual(self.db_service.get_chat_session(session_id).summary, "")
+            released.set()
+            await self.chat_service.wait_for_summaries()
+            return session_id
+
+        session_id = asyncio.run(run())
+        self.assertTrue(self.db_service.get_chat_session(session_id).summary)
+        self.assertEqual(sum("running summary" in prompt for prompt in self.model.prompts), 1)
+
+    def test_unanswered_messages_leave_the_session_unchanged(self):
+        session_id, _ = self._chat("What happened to construction?")
+        self.model.generate_content = lambda prompt, generation_config=None: 1 / 0
+        with self.assertRaises(ChatUnavailable):
+            self._chat("And residential?", session_id)
+        self.gemini_service.enabled = False
+        with self.assertRaises(ChatUnavailable):
+            self._chat("And prices?", session_id)
+
+        session = self.db_service.get_chat_session(session_id, full_history=True)
+        self.assertEqual([m.content for m in session.messages][0::2], ["What happened to construction?"])
+        self.assertEqual(session.summary, "")
+
+    def test_session_of_other_report_is_rejected(self):
+        session_id, _ = self._chat("Hello")
+        with self.assertRaises(ChatSessionError):
+            self.chat_service.get_or_create_session("other-report", session_id)
+
+    def test_sessions_deleted_with_report(self):
+        session_id, _ = self._chat("Hello")
+        self.db_service.delete_report(self.report.id)
+        self.assertIsNone(self.db_service.get_chat_session(session_id))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import asyncio
+import gzip
+import json
+import unittest
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+from data.seed_data import get_seed_data
+from models import ReportData
+from services.compression import CompressionMiddleware
+from services.http_cache import cached_json, not_modified
+from services.responses import FastJSONResponse, ModelListJSON, dumps
+
+
+class CompressionTest(unittest.TestCase):
+    def setUp(self):
+        self.app = FastAPI(default_response_class=FastJSONResponse)
+        self.app.add_middleware(CompressionMiddleware, minimum_size=500)
+
+        @self.app.get("/large")
+        async def large(request: Request):
+            etag = '"abc"'
+            return not_modified(request, etag) or cached_json({"rows": list(range(500))}, etag)
+
+        @self.app.get("/small")
+        async def small():
+            return {"ok": True}
+
+        @self.app.get("/stream")
+        async def stream():
+            async def lines():
+                for i in range(200):
+                    yield b'{"type": "item"}\n'
+            return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    def _get(self, path, headers=None):
+        async def run():
+            transport = httpx.ASGITransport(app=self.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                request = http.build_request("GET", path, headers=headers or {})
+                response = await http.send(request, stream=True)
+                body = b"".join([chunk async for chunk in response.aiter_raw()])
+                return response, body
+        return asyncio.run(run())
+
+    def test_large_responses_are_gzipped_with_a_coding_specific_etag(self):
+        response, body = self._get("/large", {"Accept-Encoding": "gzip"})
+        self.assertEqual(response.headers["content-encoding"], "gzip")
+        self.assertEqual(response.headers["vary"], "Accept-Encoding")
+        self.assertEqual(response.headers["etag"], '"abc-gzip"')
+        self.assertEqual(gzip.decompress(body), dumps({"rows": list(range(500))}))
+        self.assertEqual(int(response.headers["content-length"]), len(body))
+
+        revalidated, _ = self._get("/large", {"Accept-Encoding": "gzip", "If-None-Match": '"abc-gzip"'})
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_small_streamed_and_unaccepted_responses_pass_through(self):
+        for path, headers in (("/small", {"Accept-Encoding": "gzip"}), ("/stream", {"Accept-Encoding": "gzip"}),
+                              ("/large", {"Accept-Encoding": "identity"})):
+            response, body = self._get(path, headers)
+            self.assertNotIn("content-encoding", response.headers, path)
+        self.assertEqual(body, dumps({"rows": list(range(500))}))
+
+
+class SerializationTest(unittest.TestCase):
+    def test_model_lists_serialize_like_their_dicts(self):
+        reports = [ReportData(**report) for report in get_seed_data()[:3]]
+        encoded = json.loads(ModelListJSON(ReportData).wrapped("reports", reports))
+        self.assertEqual(encoded, {"reports": [json.loads(report.model_dump_json()) for report in reports]})
+        self.assertEqual(json.loads(dumps({"report": reports[0]})), {"report": json.loads(reports[0].model_dump_json())})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from sqlalchemy import update
+
+from models import ReportDB
+from services.database_service import DatabaseService
+
+
+class RenderedReportTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "test.db")
+
+    def tearDown(self):
+        self.db_service.engine.dispose()
+        self.tmpdir.cleanup()
+
+    def _open(self):
+        self.db_service = DatabaseService(self.path)
+        self.db_service.initialize_database()
+        return self.db_service
+
+    def _decoded(self, report):
+        return json.loads(report.model_dump_json())
+
+    def test_stored_json_matches_the_decoded_report(self):
+        db_service = self._open()
+        for report in db_service.get_reports():
+            updated_at, rendered = db_service.get_report_json(report.id)
+            self.assertEqual(json.loads(rendered), self._decoded(report))
+            self.assertEqual(updated_at, report.updated_at)
+        self.assertEqual([row[0] for row in db_service.get_reports_json()],
+                         [report.id for report in db_service.get_reports()])
+
+    def test_json_is_rewritten_only_when_the_report_changes(self):
+        db_service = self._open()
+        report = db_service.get_reports()[0]
+        before = db_service.get_report_json(report.id)
+        db_service.save_report(report)
+        self.assertEqual(db_service.get_report_json(report.id), before)
+
+        db_service.save_report(report.model_copy(update={"title": "Changed"}))
+        updated_at, rendered = db_service.get_report_json(report.id)
+        self.assertGreater(updated_at, before[0])
+        self.assertEqual(json.loads(rendered), self._decoded(db_service.get_report_by_id(report.id)))
+        self.assertEqual(json.loads(rendered)["title"], "Changed")
+
+    def test_reports_saved_without_json_are_backfilled_on_read(self):
+        db_service = self._open()
+        report = db_service.get_reports()[0]
+        with db_service.engine.begin() as connection:
+            connection.execute(update(ReportDB).values(rendered_json=None, updated_at=ReportDB.updated_at))
+
+        reports = {report_id: (updated_at, rendered) for report_id, updated_at, rendered in db_service.get_reports_json()}
+        self.assertEqual(json.loads(reports[report.id][1]), self._decoded(report))
+        # The backfill keeps the timestamp the JSON (and the ETag) carries
+        self.assertEqual(db_service.get_report_version(report.id), report.updated_at)
+
+    def test_missing_columns_are_added_to_existing_databases(self):
+        connection = sqlite3.connect(self.path)
+        connection.execute("CREATE TABLE reports (id VARCHAR PRIMARY KEY, title VARCHAR NOT NULL, summary TEXT NOT NULL, "
+                           "key_findings TEXT NOT NULL, charts TEXT NOT NULL, full_text TEXT NOT NULL, "
+                           "created_at DATETIME, updated_at DATETIME)")
+        connection.execute("INSERT INTO reports VALUES ('old', 'Old', 'Summary', '[]', '[]', 'Text', "
+                           "'2024-01-01 00:00:00', '2024-01-01 00:00:00')")
+        connection.commit()
+        connection.close()
+
+        db_service = self._open()
+        updated_at, rendered = db_service.get_report_json("old")
+        self.assertEqual(json.loads(rendered)["title"], "Old")
+        self.assertEqual(updated_at.year, 2024)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from config import settings
+from data.seed_data import get_seed_data
+from models import ReportData
+from services.fake_model import FakeModel
+from services.gemini_service import GeminiService
+from services.model_client import ModelClient, is_retryable
+
+
+def _fast_model(**overrides):
+    options = dict(latency_ms=0, latency_sigma=0, ms_per_token=0, failure_rate=0, seed=0)
+    options.update(overrides)
+    return FakeModel(**options)
+
+
+class FakeModelTest(unittest.TestCase):
+    def setUp(self):
+        self.reports = [ReportData(**report) for report in get_seed_data()[:5]]
+        self.service = GeminiService(ModelClient(requests_per_minute=6000), model=_fast_model())
+
+    def tearDown(self):
+        self.service.client.shutdown()
+
+    def test_output_is_deterministic_per_prompt_and_seed(self):
+        prompt = f"Summarize:\n---\n{self.reports[0].fullText}\n---"
+        self.assertEqual(_fast_model().render(prompt), _fast_model().render(prompt))
+        self.assertNotEqual(_fast_model().render(prompt), _fast_model(seed=1).render(prompt))
+        self.assertIn("## Summary", _fast_model().render(prompt))
+
+    def test_structured_outputs_validate_on_the_first_pass(self):
+        async def run():
+            report = await self.service.create_report_from_text(self.reports[0].fullText)
+            storyboard = await self.service.generate_storyboard(self.reports)
+            return report, storyboard
+
+        report, storyboard = asyncio.run(run())
+        self.assertTrue(report.keyFindings)
+        self.assertTrue(all(chart.data for chart in report.charts))
+        self.assertTrue(storyboard.narrative and storyboard.keyActors)
+        for task, counters in self.service.structured_stats.get_metrics().items():
+            self.assertEqual(counters["first_pass_valid"], counters["generations"], task)
+
+    def test_stream_matches_render_and_reports_usage_last(self):
+        model = _fast_model()
+        pieces = list(model.generate_content("Question:\n---\nOne long enough sentence about wages.\n---", stream=True))
+        self.assertEqual("".join(p.text for p in pieces), model.render("Question:\n---\nOne long enough sentence about wages.\n---"))
+        self.assertTrue(all(piece.usage_metadata is None for piece in pieces[:-1]))
+        self.assertGreater(pieces[-1].usage_metadata.candidates_token_count, 0)
+
+    def test_failures_are_retryable_api_errors(self):
+        with self.assertRaises(Exception) as raised:
+            _fast_model(failure_rate=1).generate_content("prompt")
+        self.assertTrue(is_retryable(raised.exception))
+
+    def test_backend_setting_selects_the_fake_model(self):
+        with mock.patch.object(settings, "AI_BACKEND", "fake"):
+            service = GeminiService()
+        self.assertIsInstance(service.model, FakeModel)
+        self.assertTrue(service.enabled)
+        service.client.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import multiprocessing
+import os
+import tempfile
+import unittest
+
+from data.seed_data import get_seed_data
+from services.database_service import DatabaseService
+from services.file_lock import FileLock
+
+
+def initialize(db_path):
+    db_service = DatabaseService(db_path)
+    db_service.initialize_database()
+    db_service.engine.dispose()
+
+
+class FileLockTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "test.lock")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_lock_excludes_other_holders_until_released(self):
+        first, second = FileLock(self.path), FileLock(self.path)
+        self.assertTrue(first.acquire(blocking=False))
+        self.assertFalse(second.acquire(blocking=False))
+        self.assertFalse(second.held)
+        first.release()
+        with second:
+            self.assertTrue(second.held)
+            self.assertFalse(first.acquire(blocking=False))
+        self.assertFalse(second.held)
+
+    def test_concurrent_workers_initialize_the_database_once(self):
+        db_path = os.path.join(self.tmpdir.name, "test.db")
+        context = multiprocessing.get_context("spawn")
+        processes = [context.Process(target=initialize, args=(db_path,)) for _ in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(60)
+        self.assertEqual([process.exitcode for process in processes], [0] * 4)
+
+        db_service = DatabaseService(db_path)
+        self.assertEqual(len(db_service.get_reports()), len({report["id"] for report in get_seed_data()}))
+        self.assertEqual(db_service.get_catalog_version(), len(get_seed_data()))
+        db_service.engine.dispose()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,294 @@
+import asyncio
+import json
+import threading
+import time
+import unittest
+
+from config import settings
+from services.gemini_service import GeminiService, _dedupe_findings
+from services.structured_output import ReportExtraction, response_schema
+
+
+class _ExtractionModel:
+    """Fake Gemini model for extraction prompts that tracks call concurrency."""
+
+    def __init__(self, latency=0.05, fail_merge=False):
+        self.latency = latency
+        self.fail_merge = fail_merge
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def generate_content(self, prompt, generation_config=None):
+        with self.lock:
+            self.calls += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(self.latency)
+            if "Candidate key findings:" in prompt:
+                if self.fail_merge:
+                    raise RuntimeError("merge failed")
+                payload = {"id": "merged-report", "title": "Merged Report", "summary": "Covers every part.",
+                           "keyFindings": ["GDP will shrink by 0.2 percent in 2024"]}
+            else:
+                part = prompt.split("part ")[1].split(" ")[0] if "part " in prompt else "1"
+                payload = {
+                    "id": f"part-{part}", "title": f"Part {part}", "summary": f"Summary of part {part}.",
+                    "keyFindings": [f"Unique finding from part {part}", "GDP will shrink by 0.2 percent in 2024"],
+                    "charts": [{"type": "bar", "rows": [{"label": "a", "values": [1]}], "dataKeys": [{"key": "v", "color": "#fff"}],
+                                "title": "GDP growth", "description": "d", "xAxisKey": "name"}],
+                }
+            return type("Response", (), {"text": json.dumps(payload)})()
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+class CreateReportFromTextTest(unittest.TestCase):
+    def setUp(self):
+        self._saved = (settings.EXTRACTION_CHUNK_SIZE, settings.EXTRACTION_CONCURRENCY)
+        settings.EXTRACTION_CHUNK_SIZE = 500
+        settings.EXTRACTION_CONCURRENCY = 2
+        self.text = "The economy grew slowly this year. " * 100  # ~3500 characters -> several chunks
+
+    def tearDown(self):
+        settings.EXTRACTION_CHUNK_SIZE, settings.EXTRACTION_CONCURRENCY = self._saved
+
+    def _service(self, model):
+        service = GeminiService()
+        service.model = model
+        service.enabled = True
+        return service
+
+    def test_long_text_is_mapped_and_reduced(self):
+        model = _ExtractionModel()
+        report = asyncio.run(self._service(model).create_report_from_text(self.text))
+
+        self.assertEqual(report.title, "Merged Report")
+        self.assertEqual(report.fullText, self.text)
+        # One call per chunk plus the merge call
+        self.assertGreater(model.calls, 2)
+        # Shared findings and charts are deduplicated across chunks
+        self.assertEqual(sum(1 for f in report.keyFindings if "GDP" in f), 1)
+        self.assertEqual(len(report.charts), 1)
+
+    def test_concurrency_is_bounded(self):
+        model = _ExtractionModel()
+        asyncio.run(self._service(model).create_report_from_text(self.text))
+        self.assertLessEqual(model.max_active, 2)
+        self.assertEqual(model.max_active, 2)
+
+    def test_merge_failure_falls_back_to_local_merge(self):
+        model = _ExtractionModel(fail_merge=True)
+        report = asyncio.run(self._service(model).create_report_from_text(self.text))
+        self.assertEqual(report.title, "Part 1")
+        self.assertIn("Unique finding from part 2", report.keyFindings)
+
+    def test_short_text_uses_single_call(self):
+        model = _ExtractionModel()
+        report = asyncio.run(self._service(model).create_report_from_text("Short report text. " * 10))
+        self.assertEqual(model.calls, 1)
+        self.assertEqual(report.id, "part-1")
+
+
+class _ScriptedModel:
+    """Fake model returning the queued response texts in order and recording prompts and configs."""
+
+    def __init__(self, texts):
+        self.texts = list(texts)
+        self.prompts = []
+        self.configs = []
+
+    def generate_content(self, prompt, generation_config=None):
+        self.prompts.append(prompt)
+        self.configs.append(generation_config)
+        return type("Response", (), {"text": self.texts.pop(0)})()
+
+
+VALID_REPORT = {
+    "id": "construction", "title": "Construction", "summary": "Volume falls.", "keyFindings": ["Down 3.5%"],
+    "charts": [{"type": "line", "title": "Volume", "description": "d", "xAxisKey": "year",
+                "dataKeys": [{"key": "volume", "color": "#8884d8"}, {"key": "prices", "color": "#82ca9d"}],
+                "rows": [{"label": "2023", "values": [100, 4.1]}, {"label": "2024", "values": [96.5, 2.0]}]}],
+}
+
+
+class StructuredOutputTest(unittest.TestCase):
+    def _service(self, model):
+        service = GeminiService()
+        service.model = model
+        service.enabled = True
+        return service
+
+    def test_valid_output_is_accepted_in_one_pass(self):
+        model = _ScriptedModel([json.dumps(VALID_REPORT)])
+        service = self._service(model)
+        report = asyncio.run(service.create_report_from_text("Short report text."))
+
+        self.assertEqual(len(model.prompts), 1)
+        self.assertEqual(model.configs[0]["response_mime_type"], "application/json")
+        self.assertEqual(report.charts[0].data, [{"year": "2023", "volume": 100, "prices": 4.1},
+                                                 {"year": "2024", "volume": 96.5, "prices": 2.0}])
+        stats = service.structured_stats.get_metrics()["report"]
+        self.assertEqual(stats["first_pass_valid"], 1)
+        self.assertEqual(stats["wasted_tokens"], 0)
+
+    def test_fenced_output_is_salvaged_without_a_repair_call(self):
+        model = _ScriptedModel(["```json\n" + json.dumps(VALID_REPORT) + "\n```"])
+        service = self._service(model)
+        report = asyncio.run(service.create_report_from_text("Short report text."))
+
+        self.assertEqual(report.id, "construction")
+        self.assertEqual(len(model.prompts), 1)
+        self.assertEqual(service.structured_stats.get_metrics()["report"]["salvaged"], 1)
+
+    def test_invalid_output_gets_one_targeted_repair(self):
+        broken = dict(VALID_REPORT, keyFindings="Down 3.5%")
+        model = _ScriptedModel([json.dumps(broken), json.dumps(VALID_REPORT)])
+        service = self._service(model)
+        report = asyncio.run(service.create_report_from_text("Short report text."))
+
+        self.assertEqual(report.keyFindings, ["Down 3.5%"])
+        self.assertEqual(len(model.prompts), 2)
+        self.assertIn("keyFindings", model.prompts[1])
+        self.assertNotIn("Short report text.", model.prompts[1])
+        stats = service.structured_stats.get_metrics()["report"]
+        self.assertEqual((stats["repaired"], stats["repair_calls"]), (1, 1))
+        self.assertGreater(stats["wasted_tokens"], 0)
+
+    def test_failed_repair_falls_back_without_further_calls(self):
+        model = _ScriptedModel(["not json", "still not json"])
+        service = self._service(model)
+        report = asyncio.run(service.create_report_from_text("Short report text. " * 5))
+
+        self.assertEqual(len(model.prompts), 2)
+        self.assertEqual(report.charts, [])
+        self.assertEqual(service.structured_stats.get_metrics()["report"]["failed_generation_rate"], 1.0)
+
+    def test_concurrent_identical_extractions_share_one_call(self):
+        model = _ExtractionModel(latency=0.05)
+        service = self._service(model)
+
+        async def run():
+            return await asyncio.gather(*(service.create_report_from_text("Short report text.") for _ in range(10)))
+
+        reports = asyncio.run(run())
+        self.assertEqual(model.calls, 1)
+        self.assertEqual({r.id for r in reports}, {"part-1"})
+        # Callers get their own copies, so renaming one does not rename the others
+        reports[0].id = "renamed"
+        self.assertEqual(reports[1].id, "part-1")
+
+    def test_response_schema_is_gemini_compatible(self):
+        schema = json.dumps(response_schema(ReportExtraction))
+        for unsupported in ("$ref", "anyOf", "additionalProperties", "default"):
+            self.assertNotIn(unsupported, schema)
+
+
+class _StreamingModel:
+    """Fake model that streams `text` in small pieces and answers repair prompts with `repair`."""
+
+    def __init__(self, text, repair=None):
+        self.text = text
+        self.repair = repair
+        self.calls = 0
+
+    def generate_content(self, prompt, stream=False, generation_config=None):
+        self.calls += 1
+        text = self.repair if "does not match the required schema" in prompt else self.text
+        pieces = [type("Chunk", (), {"text": text[i:i + 7]})() for i in range(0, len(text), 7)]
+        return iter(pieces) if stream else type("Response", (), {"text": text})()
+
+
+class StreamingTest(unittest.TestCase):
+    def _collect(self, model, agen_factory):
+        service = GeminiService()
+        service.model = model
+        service.enabled = True
+
+        async def run():
+            return [event async for event in agen_factory(service)]
+
+        return asyncio.run(run())
+
+    def test_report_fields_stream_before_the_final_report(self):
+        events = self._collect(_StreamingModel(json.dumps(VALID_REPORT)),
+                               lambda service: service.stream_report_from_text("Short report text."))
+        kinds = [(e["type"], e.get("field")) for e in events]
+        self.assertEqual(kinds[:4], [("field", "id"), ("field", "title"), ("field", "summary"),
+                                     ("item", "keyFindings")])
+        chart = next(e for e in events if e.get("field") == "charts")
+        self.assertEqual(chart["value"]["data"][0], {"year": "2023", "volume": 100, "prices": 4.1})
+        self.assertEqual(events[-1]["type"], "report")
+        self.assertEqual(events[-1]["report"].id, "construction")
+
+    def test_invalid_stream_is_repaired_after_streaming(self):
+        broken = json.dumps(dict(VALID_REPORT, keyFindings="Down 3.5%"))
+        model = _StreamingModel(broken, repair=json.dumps(VALID_REPORT))
+        events = self._collect(model, lambda service: service.stream_report_from_text("Short report text."))
+        self.assertEqual(events[-1]["report"].keyFindings, ["Down 3.5%"])
+        self.assertEqual(model.calls, 2)
+
+    def test_long_text_streams_one_event_per_part(self):
+        saved = settings.EXTRACTION_CHUNK_SIZE
+        settings.EXTRACTION_CHUNK_SIZE = 500
+        try:
+            events = self._collect(_ExtractionModel(latency=0),
+                                   lambda service: service.stream_report_from_text("The economy grew. " * 150))
+        finally:
+            settings.EXTRACTION_CHUNK_SIZE = saved
+        parts = [e for e in events if e["type"] == "part"]
+        self.assertGreater(len(parts), 1)
+        self.assertEqual(sorted(e["index"] for e in parts), list(range(parts[0]["total"])))
+        self.assertEqual(events[-1]["report"].title, "Merged Report")
+
+    def test_storyboard_streams_fields(self):
+        storyboard = {"title": "Thesis", "narrative": "Story", "charts": [], "introspection": "Why",
+                      "retrospection": "What if", "relationshipGraph": None,
+                      "keyActors": [{"name": "Households", "description": "d", "icon": "fa-solid fa-users"}]}
+        events = self._collect(_StreamingModel(json.dumps(storyboard)),
+                               lambda service: service.stream_storyboard([]))
+        self.assertEqual(events[0], {"type": "field", "field": "title", "value": "Thesis"})
+        self.assertIn({"type": "item", "field": "keyActors", "index": 0, "value": storyboard["keyActors"][0]}, events)
+        self.assertEqual(events[-1]["storyboard"].keyActors[0].name, "Households")
+
+
+class SDKLoadingTest(unittest.TestCase):
+    def test_sdk_is_loaded_off_the_event_loop(self):
+        service = GeminiService()
+        service.enabled = True
+        loads = []
+        model = _ExtractionModel(latency=0)
+
+        def load_model(name):
+            loads.append((name, threading.current_thread()))
+            return model
+
+        service._load_model = load_model
+
+        async def run():
+            await service.preload()
+            await service.client.generate(service._model_for(settings.AI_MODEL), "prompt")
+            return threading.current_thread()
+
+        loop_thread = asyncio.run(run())
+        service.client.shutdown()
+        self.assertEqual([name for name, _ in loads], [settings.AI_MODEL] * 2)
+        self.assertTrue(all(thread is not loop_thread for _, thread in loads))
+        self.assertEqual(model.calls, 1)
+
+
+class DedupeFindingsTest(unittest.TestCase):
+    def test_near_duplicates_removed(self):
+        findings = [
+            "German GDP will decline by 0.2% in 2024.",
+            "German GDP will decline by 0.2 % in 2024",
+            "Private consumption remains weak.",
+        ]
+        self.assertEqual(len(_dedupe_findings(findings)), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import asyncio
+import unittest
+from collections import deque
+
+from services.hedging import Hedger
+
+
+class _Backend:
+    """Async call whose successive invocations take the given durations (seconds)."""
+
+    def __init__(self, durations, error_on=()):
+        self.durations = list(durations)
+        self.error_on = set(error_on)
+        self.started = 0
+        self.cancelled = 0
+
+    async def call(self):
+        index = self.started
+        self.started += 1
+        try:
+            await asyncio.sleep(self.durations[index])
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if index in self.error_on:
+            raise RuntimeError(f"call {index} failed")
+        return index
+
+
+class HedgerTest(unittest.TestCase):
+    def _hedger(self, **overrides):
+        options = dict(enabled=True, percentile=90, min_delay=0.01, max_rate=1.0, min_samples=5)
+        options.update(overrides)
+        hedger = Hedger(**options)
+        hedger._latencies["chat"] = deque([0.02] * 10)
+        hedger._recent["chat"] = deque([False] * 10)
+        return hedger
+
+    def test_slow_call_is_hedged_and_the_loser_cancelled(self):
+        hedger = self._hedger()
+        backend = _Backend([1.0, 0.01])
+        self.assertEqual(asyncio.run(hedger.run("chat", backend.call)), 1)
+        self.assertEqual((backend.started, backend.cancelled), (2, 1))
+        self.assertEqual((hedger.hedged["chat"], hedger.hedge_wins["chat"]), (1, 1))
+
+    def test_fast_call_is_not_hedged(self):
+        hedger = self._hedger()
+        backend = _Backend([0.0])
+        self.assertEqual(asyncio.run(hedger.run("chat", backend.call)), 0)
+        self.assertEqual(backend.started, 1)
+
+    def test_failed_hedge_waits_for_the_original(self):
+        hedger = self._hedger()
+        backend = _Backend([0.1, 0.0], error_on={1})
+        self.assertEqual(asyncio.run(hedger.run("chat", backend.call)), 0)
+        self.assertEqual(hedger.hedge_wins["chat"], 0)
+
+    def test_hedge_rate_is_capped(self):
+        hedger = self._hedger(max_rate=0.1)
+        backend = _Backend([0.05] * 10)
+
+        async def run():
+            for _ in range(5):
+                await hedger.run("chat", backend.call)
+
+        asyncio.run(run())
+        # 10 unhedged calls are on record, so one of the next five may be hedged
+        self.assertEqual(hedger.hedged["chat"], 1)
+
+    def test_no_hedging_without_enough_latencies_or_when_disallowed(self):
+        hedger = self._hedger()
+        self.assertIsNone(hedger.delay("narrative"))
+        backend = _Backend([0.05])
+        asyncio.run(hedger.run("chat", backend.call, allow=False))
+        self.assertEqual(backend.started, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+import httpx
+from fastapi import FastAPI, Request
+
+from services.database_service import DatabaseService
+from services.http_cache import cached_json, not_modified, strong_etag
+
+
+class ConditionalGetTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_service = DatabaseService(os.path.join(self.tmpdir.name, "test.db"))
+        self.db_service.initialize_database()
+        self.report_id = self.db_service.get_reports()[0].id
+        self.app = FastAPI()
+
+        @self.app.get("/reports")
+        async def reports(request: Request):
+            etag = strong_etag("catalog", *self.db_service.get_catalog_versions())
+            return not_modified(request, etag) or cached_json({"count": len(self.db_service.get_reports())}, etag)
+
+    def tearDown(self):
+        self.db_service.engine.dispose()
+        self.tmpdir.cleanup()
+
+    def _get(self, headers=None):
+        async def run():
+            transport = httpx.ASGITransport(app=self.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                return await http.get("/reports", headers=headers or {})
+        return asyncio.run(run())
+
+    def test_matching_etag_is_answered_with_304(self):
+        first = self._get()
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.headers["cache-control"], "no-cache")
+        etag = first.headers["etag"]
+        self.assertTrue(etag.startswith('"'))
+
+        again = self._get({"If-None-Match": etag})
+        self.assertEqual((again.status_code, again.content, again.headers["etag"]), (304, b"", etag))
+        self.assertEqual(self._get({"If-None-Match": f'"other", W/{etag}'}).status_code, 304)
+        self.assertEqual(self._get({"If-None-Match": '"other"'}).status_code, 200)
+
+    def test_etag_changes_when_a_report_changes_or_is_deleted(self):
+        etag = self._get().headers["etag"]
+        report = self.db_service.get_report_by_id(self.report_id)
+        self.db_service.save_report(report.model_copy(update={"title": "Changed"}))
+        changed = self._get({"If-None-Match": etag})
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed.headers["etag"], etag)
+
+        etag = changed.headers["etag"]
+        self.db_service.delete_report(self.report_id)
+        self.assertEqual(self._get({"If-None-Match": etag}).status_code, 200)
+
+    def test_report_version_tracks_updates(self):
+        before = self.db_service.get_report_version(self.report_id)
+        report = self.db_service.get_report_by_id(self.report_id)
+        self.db_service.save_report(report.model_copy(update={"summary": "Changed"}))
+        self.assertGreater(self.db_service.get_report_version(self.report_id), before)
+        self.assertIsNone(self.db_service.get_report_version("missing"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import json
+import random
+import unittest
+
+from services.json_stream import JSONStreamError, JSONStreamParser, iter_completed
+
+DOC = {
+    "title": 'A "quoted" {brace} title',
+    "summary": "Backslash \\ and\nnewline",
+    "year": 2024,
+    "ratio": -1.5e3,
+    "final": True,
+    "missing": None,
+    "keyFindings": ["first, with comma", "second ] bracket"],
+    "charts": [{"type": "bar", "rows": [{"label": "a", "values": [1, 2]}]}],
+    "empty": [],
+    "graph": {"nodes": [{"id": "x"}], "edges": []},
+}
+
+
+def _feed_in_pieces(text, sizes):
+    parser = JSONStreamParser()
+    events, i = [], 0
+    for size in sizes:
+        events += parser.feed(text[i:i + size])
+        i += size
+    events += parser.feed(text[i:])
+    return parser, events
+
+
+class JSONStreamParserTest(unittest.TestCase):
+    def test_values_are_emitted_in_order_as_they_complete(self):
+        events = list(iter_completed([json.dumps(DOC)]))
+        paths = [path for path, _ in events]
+        self.assertEqual(paths[:7], [("title",), ("summary",), ("year",), ("ratio",), ("final",), ("missing",),
+                                     ("keyFindings", 0)])
+        self.assertIn(("charts", 0), paths)
+        self.assertIn(("graph", "nodes"), paths)
+        self.assertNotIn(("graph", "nodes", 0), paths)
+        self.assertEqual(dict(events)[("title",)], DOC["title"])
+        self.assertEqual(dict(events)[("charts", 0)], DOC["charts"][0])
+
+    def test_any_chunking_gives_the_same_events(self):
+        text = json.dumps(DOC, indent=2)
+        expected = list(iter_completed([text]))
+        rng = random.Random(3)
+        for _ in range(50):
+            parser, events = _feed_in_pieces(text, [rng.randint(1, 9) for _ in range(len(text) // 3)])
+            self.assertEqual(events, expected)
+            self.assertTrue(parser.done)
+
+    def test_string_completes_before_the_next_delimiter_arrives(self):
+        parser = JSONStreamParser()
+        self.assertEqual(parser.feed('{"title": "Constr'), [])
+        self.assertEqual(parser.feed('uction"'), [(("title",), "Construction")])
+        self.assertEqual(parser.feed(', "n": 12'), [])
+        self.assertEqual(parser.feed("}"), [(("n",), 12)])
+
+    def test_escape_split_across_chunks(self):
+        parser = JSONStreamParser()
+        self.assertEqual(parser.feed('{"t": "a\\'), [])
+        self.assertEqual(parser.feed('"b"}'), [(("t",), 'a"b')])
+
+    def test_fences_and_prose_around_the_object_are_ignored(self):
+        events = list(iter_completed(['Here you go:\n```json\n{"a": 1}\n``` trailing {"b": 2}']))
+        self.assertEqual(events, [(("a",), 1)])
+
+    def test_raw_newlines_inside_strings_are_tolerated(self):
+        self.assertEqual(list(iter_completed(['{"n": "line\nbreak"}'])), [(("n",), "line\nbreak")])
+
+    def test_invalid_scalar_raises(self):
+        with self.assertRaises(JSONStreamError):
+            list(iter_completed(['{"a": tru, "b": 1}']))
+
+    def test_completed_fields_are_dropped_from_the_buffer(self):
+        parser = JSONStreamParser()
+        parser.feed(json.dumps({"narrative": "x" * 100_000})[:-1] + ', "keyActors": [{"name": "Hou')
+        self.assertLess(len(parser._text), 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,218 @@
+import asyncio
+import time
+import unittest
+from unittest import mock
+
+from google.api_core import exceptions as google_exceptions
+
+from config import settings
+from services.model_client import CircuitBreaker, CircuitOpenError, ModelClient, TokenBucket, is_retryable
+
+
+class _FlakyModel:
+    """Fake model that sleeps `latency` seconds and raises the queued errors before succeeding."""
+
+    def __init__(self, errors=(), latency=0.0):
+        self.errors = list(errors)
+        self.latency = latency
+        self.calls = 0
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        self.calls += 1
+        time.sleep(self.latency)
+        if self.errors:
+            raise self.errors.pop(0)
+        text = f"answer to {prompt}"
+        if stream:
+            return (type("Chunk", (), {"text": word})() for word in text.split(" "))
+        return type("Response", (), {"text": text})()
+
+
+def _client(**overrides):
+    options = dict(requests_per_minute=6000, tokens_per_minute=10_000_000, max_concurrency=4,
+                   max_retries=3, base_delay=0.001, max_delay=0.01,
+                   breaker=CircuitBreaker(failure_threshold=3, reset_timeout=0.2))
+    options.update(overrides)
+    return ModelClient(**options)
+
+
+class RetryTest(unittest.TestCase):
+    def test_transient_errors_are_retried(self):
+        model = _FlakyModel([google_exceptions.TooManyRequests("slow down"),
+                             google_exceptions.ServiceUnavailable("unavailable")])
+        client = _client()
+        response = asyncio.run(client.generate(model, "q"))
+        self.assertEqual(response.text, "answer to q")
+        self.assertEqual(model.calls, 3)
+        self.assertEqual(client.retries, 2)
+
+    def test_client_errors_are_not_retried(self):
+        model = _FlakyModel([google_exceptions.InvalidArgument("bad prompt")])
+        client = _client()
+        with self.assertRaises(google_exceptions.InvalidArgument):
+            asyncio.run(client.generate(model, "q"))
+        self.assertEqual(model.calls, 1)
+        self.assertEqual(client.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_gives_up_after_max_retries(self):
+        model = _FlakyModel([google_exceptions.InternalServerError("boom")] * 5)
+        client = _client(max_retries=1, breaker=CircuitBreaker(failure_threshold=10, reset_timeout=1))
+        with self.assertRaises(google_exceptions.InternalServerError):
+            asyncio.run(client.generate(model, "q"))
+        self.assertEqual(model.calls, 2)
+        self.assertEqual(client.failures, 1)
+
+    def test_is_retryable(self):
+        self.assertTrue(is_retryable(google_exceptions.ResourceExhausted("quota")))
+        self.assertTrue(is_retryable(TimeoutError()))
+        self.assertFalse(is_retryable(google_exceptions.PermissionDenied("key")))
+        self.assertFalse(is_retryable(ValueError("parse")))
+
+
+class StreamTest(unittest.TestCase):
+    def _collect(self, client, model):
+        async def run():
+            return [piece async for piece in client.stream(model, "q")]
+
+        return asyncio.run(run())
+
+    def test_pieces_are_yielded_in_order(self):
+        client = _client()
+        self.assertEqual(self._collect(client, _FlakyModel()), ["answer", "to", "q"])
+        self.assertEqual(client.get_metrics()["lanes"][ModelClient.INTERACTIVE]["executor"]["completed"], 1)
+
+    def test_errors_before_the_first_piece_are_retried(self):
+        model = _FlakyModel([google_exceptions.ServiceUnavailable("unavailable")])
+        client = _client()
+        self.assertEqual(self._collect(client, model), ["answer", "to", "q"])
+        self.assertEqual((model.calls, client.retries), (2, 1))
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    def test_opens_and_fails_fast(self):
+        model = _FlakyModel([google_exceptions.ServiceUnavailable("down")] * 10)
+        client = _client()
+        with self.assertRaises(google_exceptions.ServiceUnavailable):
+            asyncio.run(client.generate(model, "q"))
+        self.assertEqual(client.breaker.state, CircuitBreaker.OPEN)
+
+        calls_before = model.calls
+        with self.assertRaises(CircuitOpenError):
+            asyncio.run(client.generate(model, "q"))
+        self.assertEqual(model.calls, calls_before)
+        self.assertEqual(client.get_metrics()["rejected_by_circuit"], 1)
+
+    def test_half_open_trial_closes_circuit(self):
+        model = _FlakyModel([google_exceptions.ServiceUnavailable("down")] * 3)
+        client = _client()
+        with self.assertRaises(google_exceptions.ServiceUnavailable):
+            asyncio.run(client.generate(model, "q"))
+        time.sleep(0.25)
+        self.assertEqual(asyncio.run(client.generate(model, "q")).text, "answer to q")
+        self.assertEqual(client.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_failed_trial_reopens_circuit(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+        breaker.record_failure()
+        breaker.before_call()
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+    def test_cancelled_trial_lets_the_next_call_through(self):
+        model = _FlakyModel([google_exceptions.ServiceUnavailable("down")] * 3)
+        client = _client()
+        with self.assertRaises(google_exceptions.ServiceUnavailable):
+            asyncio.run(client.generate(model, "q"))
+        time.sleep(0.25)
+
+        async def cancelled_trials():
+            model.latency = 0.2
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(client.generate(model, "q"), 0.05)
+            self.assertEqual(client.breaker.state, CircuitBreaker.HALF_OPEN)
+            stream = client.stream(model, "q")
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(stream.__anext__(), 0.05)
+            await stream.aclose()
+            model.latency = 0.0
+            return await client.generate(model, "q")
+
+        self.assertEqual(asyncio.run(cancelled_trials()).text, "answer to q")
+        self.assertEqual(client.breaker.state, CircuitBreaker.CLOSED)
+
+
+class RateLimitTest(unittest.TestCase):
+    def test_token_bucket_paces_requests(self):
+        async def run():
+            bucket = TokenBucket(rate_per_minute=600, capacity=2)  # 10 per second after a burst of 2
+            start = time.monotonic()
+            for _ in range(5):
+                await bucket.acquire()
+            return time.monotonic() - start
+
+        self.assertGreaterEqual(asyncio.run(run()), 0.25)
+
+    def test_concurrency_cap_and_queue_delay_metrics(self):
+        model = _FlakyModel(latency=0.05)
+        client = _client(max_concurrency=2)
+
+        async def burst():
+            start = time.monotonic()
+            await asyncio.gather(*(client.generate(model, i) for i in range(6)))
+            return time.monotonic() - start
+
+        elapsed = asyncio.run(burst())
+        # 6 calls of 50ms through 2 slots take at least 3 rounds
+        self.assertGreaterEqual(elapsed, 0.15)
+        metrics = client.get_metrics()
+        self.assertEqual(metrics["calls"], 6)
+        lane = metrics["lanes"][ModelClient.INTERACTIVE]
+        self.assertEqual(lane["waiting"], 0)
+        self.assertGreater(lane["queue_delay_seconds"]["max"], 0.05)
+        self.assertEqual(lane["executor"]["completed"], 6)
+
+    def test_batch_lane_does_not_block_interactive_calls(self):
+        slow = _FlakyModel(latency=0.3)
+        fast = _FlakyModel(latency=0.0)
+        client = _client(max_concurrency=2, batch_concurrency=1)
+
+        async def run():
+            batch = [asyncio.create_task(client.generate(slow, i, lane=ModelClient.BATCH)) for i in range(4)]
+            await asyncio.sleep(0.05)
+            start = time.monotonic()
+            await client.generate(fast, "chat")
+            elapsed = time.monotonic() - start
+            await asyncio.gather(*batch)
+            return elapsed
+
+        self.assertLess(asyncio.run(run()), 0.1)
+        self.assertEqual(client.get_metrics()["lanes"][ModelClient.BATCH]["executor"]["completed"], 4)
+
+    def test_configured_limits_are_split_between_workers(self):
+        with mock.patch.object(settings, "MODEL_RATE_LIMIT_WORKERS", 4):
+            client = ModelClient()
+        self.assertAlmostEqual(client.request_bucket.rate * 60, settings.MODEL_REQUESTS_PER_MINUTE / 4)
+        self.assertAlmostEqual(client.token_bucket.rate * 60, settings.MODEL_TOKENS_PER_MINUTE / 4)
+        client.shutdown()
+
+    def test_tokens_per_minute_limit(self):
+        model = _FlakyModel()
+        # 400 tokens per second; each 100-word prompt costs ~100 tokens
+        client = _client(tokens_per_minute=24000)
+
+        async def run():
+            start = time.monotonic()
+            for _ in range(2):
+                await client.generate(model, "word " * 100)
+            return time.monotonic() - start
+
+        client.token_bucket.tokens = 100
+        client.token_bucket.updated = time.monotonic()
+        self.assertGreaterEqual(asyncio.run(run()), 0.2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import asyncio
+import json
+import unittest
+from unittest import mock
+
+from config import settings
+from services.fake_model import FakeModel
+from services.model_client import ModelClient
+from services.model_router import ModelRoute, ModelRouter, default_routes
+
+
+def _model(latency_ms=0, failure_rate=0):
+    return FakeModel(latency_ms=latency_ms, latency_sigma=0, ms_per_token=0, failure_rate=failure_rate, seed=0)
+
+
+class ModelRouterTest(unittest.TestCase):
+    def setUp(self):
+        self.client = ModelClient(requests_per_minute=6000, max_retries=0)
+        self.models = {"primary": _model(), "fallback": _model()}
+        route = ModelRoute(primary="primary", fallback="fallback", latency_slo=0.2, temperature=0.7,
+                           max_output_tokens=256)
+        self.router = ModelRouter(self.client, routes={"default": route}, cooldown=60)
+
+    def tearDown(self):
+        self.client.shutdown()
+
+    def _generate(self, task="chat", calls=1):
+        async def run():
+            for _ in range(calls):
+                await self.router.generate(self.models.get, "Summarize the report.", task=task)
+        asyncio.run(run())
+        return self.router.get_metrics()["tasks"][task]
+
+    def test_healthy_primary_serves_every_call(self):
+        stats = self._generate(calls=3)
+        self.assertEqual((stats["calls"], stats["primary_ok"], stats["fallbacks"]), (3, 3, {}))
+        self.assertEqual((self.models["primary"].calls, self.models["fallback"].calls), (3, 0))
+
+    def test_slow_primary_falls_back_and_cools_down(self):
+        self.models["primary"] = _model(latency_ms=1000)
+        stats = self._generate(calls=3)
+        # The first call waits out the SLO; later ones skip the primary while it cools down
+        self.assertEqual(stats["fallbacks"], {"timeout": 1, "cooldown": 2})
+        self.assertTrue(stats["primary_cooling_down"])
+        self.assertEqual((self.models["primary"].calls, self.models["fallback"].calls), (1, 3))
+
+    def test_failing_primary_falls_back(self):
+        self.models["primary"] = _model(failure_rate=1)
+        stats = self._generate()
+        self.assertEqual((stats["primary_ok"], stats["fallbacks"], stats["fallback_failed"]), (0, {"error": 1}, 0))
+
+    def test_stream_falls_back_before_the_first_piece(self):
+        self.models["primary"] = _model(latency_ms=1000)
+
+        async def run():
+            return "".join([piece async for piece in self.router.stream(self.models.get, "Summarize.", task="report")])
+
+        self.assertTrue(asyncio.run(run()))
+        self.assertEqual(self.router.get_metrics()["tasks"]["report"]["fallbacks"], {"timeout": 1})
+
+    def test_repairs_follow_their_task_route(self):
+        self.router.routes["report"] = self.router.routes["default"].model_copy(update={"temperature": 0.5})
+        self.assertEqual(self.router.route("report_repair").temperature, 0.5)
+        self.assertEqual(self.router.route("unknown").temperature, 0.7)
+
+    def test_routes_can_be_overridden_per_task(self):
+        with mock.patch.object(settings, "AI_ROUTES", json.dumps({"chat": {"primary": "gemini-2.5-pro", "latency_slo": 5}})):
+            routes = default_routes()
+        self.assertEqual((routes["chat"].primary, routes["chat"].latency_slo, routes["chat"].max_output_tokens),
+                         ("gemini-2.5-pro", 5, 1024))
+        self.assertEqual(routes["narrative"].primary, settings.AI_MODEL)
+
+
+if __name__ == "__main__":
+    unittest.main()
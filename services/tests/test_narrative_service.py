@@ -0,0 +1,150 @@
+import asyncio
+import os
+import tempfile
+import threading
+import unittest
+
+from data.seed_data import get_seed_data
+from models import ReportData
+from services.database_service import DatabaseService
+from services.fake_model import FakeModel
+from services.gemini_service import NARRATIVE_ERROR_MESSAGE, GeminiService
+from services.model_client import ModelClient
+from services.narrative_service import NarrativeService, NarrativeWarmer
+
+
+class _FailingModel:
+    def generate_content(self, prompt, **kwargs):
+        raise ValueError("bad request")
+
+
+class NarrativeServiceTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_service = DatabaseService(os.path.join(self.tmpdir.name, "test.db"))
+        for report in get_seed_data()[:3]:
+            self.db_service.save_report(ReportData(**report))
+        self.model = FakeModel(latency_ms=0, latency_sigma=0, ms_per_token=0)
+        self.gemini_service = GeminiService(ModelClient(requests_per_minute=6000), model=self.model)
+        self.service = NarrativeService(self.db_service, self.gemini_service)
+
+    def tearDown(self):
+        self.gemini_service.client.shutdown()
+        self.db_service.engine.dispose()
+        self.tmpdir.cleanup()
+
+    def _get(self, report):
+        return asyncio.run(self.service.get(report))
+
+    def test_narrative_is_stored_and_reused_until_the_report_changes(self):
+        report = self.db_service.get_reports()[0]
+        narrative, cached = self._get(report)
+        self.assertFalse(cached)
+        self.assertEqual(self._get(report), (narrative, True))
+        self.assertEqual(self.model.calls, 1)
+
+        changed = self.db_service.save_report(report.model_copy(update={"summary": "A revised summary."}))
+        self.assertFalse(self._get(changed)[1])
+        self.assertEqual(self.model.calls, 2)
+
+    def test_failed_generation_is_not_stored(self):
+        self.gemini_service.model = _FailingModel()
+        report = self.db_service.get_reports()[0]
+        self.assertEqual(self._get(report), (NARRATIVE_ERROR_MESSAGE, False))
+        self.assertIsNone(self.db_service.get_narrative(report.id))
+
+    def test_users_do_not_join_a_pregeneration_on_the_batch_lane(self):
+        report = self.db_service.get_reports()[0]
+        released, started = threading.Event(), []
+        generate_content = self.model.generate_content
+
+        def first_call_waits(prompt, **kwargs):
+            started.append(prompt)
+            if len(started) == 1:
+                released.wait(5)
+            return generate_content(prompt, **kwargs)
+
+        self.model.generate_content = first_call_waits
+
+        async def run():
+            batch = asyncio.ensure_future(self.gemini_service.create_narrative(report, lane=ModelClient.BATCH))
+            await asyncio.sleep(0.05)
+            narrative = await asyncio.wait_for(self.gemini_service.create_narrative(report), 2)
+            released.set()
+            return narrative, await batch
+
+        interactive, batch = asyncio.run(run())
+        self.assertTrue(interactive and batch)
+        self.assertEqual(self.model.calls, 2)
+        lanes = self.gemini_service.client.get_metrics()["lanes"]
+        self.assertEqual(lanes[ModelClient.INTERACTIVE]["executor"]["completed"], 1)
+        self.assertEqual(lanes[ModelClient.BATCH]["executor"]["completed"], 1)
+
+    def test_warmer_pregenerates_stale_narratives(self):
+        warmer = NarrativeWarmer(self.service, per_minute=6000, idle_poll=0.01)
+        reports = self.db_service.get_reports()
+
+        async def run():
+            await self.service.get(reports[0])
+            warmer.start()
+            while warmer.warmed < len(reports) - 1:
+                await asyncio.sleep(0.01)
+            await warmer.stop()
+
+        asyncio.run(asyncio.wait_for(run(), 10))
+        self.assertTrue(all(self._get(report)[1] for report in reports))
+        self.assertEqual(self.model.calls, len(reports))
+
+    def test_warmer_picks_up_reports_saved_elsewhere(self):
+        warmer = NarrativeWarmer(self.service, per_minute=6000, idle_poll=0.01, catalog_poll=0.05)
+        reports = self.db_service.get_reports()
+
+        async def run():
+            warmer.start()
+            while warmer.warmed < len(reports):
+                await asyncio.sleep(0.01)
+            # Saved as another worker process would: nothing calls warmer.enqueue()
+            self.db_service.save_report(reports[0].model_copy(update={"id": "new-report", "summary": "New."}))
+            while warmer.warmed < len(reports) + 1:
+                await asyncio.sleep(0.01)
+            await warmer.stop()
+
+        asyncio.run(asyncio.wait_for(run(), 10))
+        self.assertIsNotNone(self.db_service.get_narrative("new-report"))
+
+    def test_later_scans_only_decode_changed_reports(self):
+        warmer = NarrativeWarmer(self.service, per_minute=6000, idle_poll=0.01)
+        reports = self.db_service.get_reports()
+        for report in reports:
+            self._get(report)
+        decoded = []
+        get_report_by_id = self.db_service.get_report_by_id
+        self.db_service.get_report_by_id = lambda report_id: decoded.append(report_id) or get_report_by_id(report_id)
+
+        self.assertEqual(warmer._stale_report_ids(check_all=True), [])
+        self.assertEqual(len(decoded), len(reports))
+        decoded.clear()
+        self.db_service.save_report(reports[0].model_copy(update={"summary": "A revised summary."}))
+        self.assertEqual(warmer._stale_report_ids(check_all=False), [reports[0].id])
+        self.assertEqual(decoded, [reports[0].id])
+
+    def test_warmer_waits_while_interactive_calls_queue(self):
+        warmer = NarrativeWarmer(self.service, per_minute=6000, idle_poll=0.01)
+        interactive = self.gemini_service.client.lanes[ModelClient.INTERACTIVE]
+
+        async def run():
+            interactive.waiting += 1
+            warmer.start()
+            await asyncio.sleep(0.1)
+            paused_at = warmer.warmed
+            interactive.waiting -= 1
+            while warmer.warmed < 3:
+                await asyncio.sleep(0.01)
+            await warmer.stop()
+            return paused_at
+
+        self.assertEqual(asyncio.run(asyncio.wait_for(run(), 10)), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
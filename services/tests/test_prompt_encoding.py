@@ -0,0 +1,62 @@
+import json
+import unittest
+
+from data.seed_data import get_seed_data
+from models import ChartConfig, ReportData
+from services.prompt_encoding import (
+    count_tokens, encode_chart, encode_report, encode_reports, truncate_to_tokens,
+)
+
+
+class CountTokensTest(unittest.TestCase):
+    def test_prose_is_about_four_characters_per_token(self):
+        text = " ".join(report["fullText"] for report in get_seed_data())
+        self.assertAlmostEqual(len(text) / count_tokens(text), 4, delta=0.6)
+
+    def test_indentation_and_digits_cost_tokens(self):
+        data = {"values": [12345, 67890], "label": "x"}
+        self.assertGreater(count_tokens(json.dumps(data, indent=2)), count_tokens(json.dumps(data)))
+        self.assertEqual(count_tokens("2024"), 4)
+
+
+class TruncateTest(unittest.TestCase):
+    TEXT = "Construction fell sharply. Prices rose by 3.5 percent. Wages stagnated in real terms."
+
+    def test_cuts_at_sentence_boundary_within_budget(self):
+        cut = truncate_to_tokens(self.TEXT, 20)
+        self.assertEqual(cut, "Construction fell sharply. Prices rose by 3.5 percent. […]")
+        self.assertLessEqual(count_tokens(cut), 20)
+
+    def test_text_within_budget_is_unchanged(self):
+        self.assertEqual(truncate_to_tokens(self.TEXT, 1000), self.TEXT)
+
+    def test_long_first_sentence_is_cut_at_a_word(self):
+        cut = truncate_to_tokens("word " * 50, 10, marker="")
+        self.assertEqual(cut, " ".join(["word"] * 10))
+
+
+class EncodeTest(unittest.TestCase):
+    def setUp(self):
+        self.reports = [ReportData(**report) for report in get_seed_data()]
+
+    def test_chart_is_a_table_of_its_series(self):
+        chart = ChartConfig(type="bar", title="Volume", description="", xAxisKey="year",
+                            dataKeys=[{"key": "volume", "color": "#8884d8"}],
+                            data=[{"year": "2023", "volume": 1.5}, {"year": "2024", "volume": -3.0}])
+        self.assertEqual(encode_chart(chart), "Chart (bar): Volume\nyear|volume\n2023|1.5\n2024|-3")
+
+    def test_report_excerpt_respects_its_token_budget(self):
+        report = self.reports[0].model_copy(update={"fullText": "A sentence about the economy. " * 500})
+        excerpt = encode_report(report, text_budget=100).split("Excerpt:\n")[1]
+        self.assertLessEqual(count_tokens(excerpt), 100)
+        self.assertTrue(excerpt.endswith("economy. […]"))
+
+    def test_reports_share_the_budget(self):
+        encoded = encode_reports(self.reports, 2000)
+        self.assertLessEqual(count_tokens(encoded), 2000 + len(self.reports))
+        for report in self.reports:
+            self.assertIn(f"(id: {report.id})", encoded)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+from sqlalchemy import event
+
+from services.database_service import DatabaseService
+from services.rate_limit import RateLimit, RateLimitMiddleware, SlidingWindowLimiter, route_class
+
+
+class RouteClassTest(unittest.TestCase):
+    def test_requests_are_classed_by_method_and_path(self):
+        self.assertEqual(route_class("GET", "/api/reports"), "read")
+        self.assertEqual(route_class("POST", "/api/reports/upload"), "upload")
+        self.assertEqual(route_class("DELETE", "/api/reports/abc"), "upload")
+        self.assertEqual(route_class("POST", "/api/generate-storyboard/stream"), "ai")
+        self.assertEqual(route_class("POST", "/api/chat/abc"), "ai")
+        self.assertIsNone(route_class("GET", "/static/app.js"))
+        self.assertIsNone(route_class("OPTIONS", "/api/chat/abc"))
+
+
+class SlidingWindowLimiterTest(unittest.TestCase):
+    def _limiter(self, requests=10, window=60, db_service=None):
+        return SlidingWindowLimiter({"ai": RateLimit(requests=requests, window=window)}, db_service=db_service,
+                                    enabled=True)
+
+    def test_limit_is_enforced_per_client_with_retry_after(self):
+        limiter = self._limiter(requests=3)
+        decisions = [limiter.hit("ai", "10.0.0.1", now=6000.0) for _ in range(4)]
+        self.assertEqual([d.allowed for d in decisions], [True, True, True, False])
+        self.assertEqual([d.remaining for d in decisions[:3]], [2, 1, 0])
+        self.assertEqual(decisions[3].retry_after, 60 + 20)  # next window, once 1/3 of this one has slid out
+        self.assertTrue(limiter.hit("ai", "10.0.0.2", now=6000.0).allowed)
+
+    def test_previous_window_counts_by_the_share_still_inside_the_sliding_window(self):
+        limiter = self._limiter(requests=10)
+        for _ in range(10):
+            limiter.hit("ai", "client", now=6030.0)
+        # A quarter into the next window three quarters of the previous one's 10 requests still count
+        allowed = [limiter.hit("ai", "client", now=6075.0).allowed for _ in range(4)]
+        self.assertEqual(allowed, [True, True, False, False])
+        rejected = limiter.hit("ai", "client", now=6075.0)
+        self.assertEqual(rejected.retry_after, 3)  # until 3 of the 10 have slid out
+        self.assertTrue(limiter.hit("ai", "client", now=6079.0).allowed)
+
+    def test_workers_share_counts_through_the_database(self):
+        db_service = DatabaseService(os.path.join(tempfile.mkdtemp(), "test.db"))
+        first, second = self._limiter(requests=5, db_service=db_service), self._limiter(requests=5, db_service=db_service)
+        for _ in range(3):
+            self.assertTrue(first.hit("ai", "client").allowed)
+        first.sync()
+        second.sync()
+        self.assertEqual([second.hit("ai", "client").allowed for _ in range(3)], [True, True, False])
+        second.sync()
+        first.sync()
+        self.assertFalse(first.hit("ai", "client").allowed)
+        self.assertEqual(first.syncs, 2)
+
+    def test_idle_workers_only_read_the_shared_counters(self):
+        db_service = DatabaseService(os.path.join(tempfile.mkdtemp(), "test.db"))
+        first, idle = self._limiter(requests=5, db_service=db_service), self._limiter(requests=5, db_service=db_service)
+        first.hit("ai", "client")
+        first.sync()
+        commits = []
+        event.listen(db_service.engine, "commit", lambda connection: commits.append(connection))
+        for _ in range(3):
+            idle.sync()
+            first.sync()
+        self.assertEqual(commits, [])
+        self.assertEqual(sum(idle._shared.values()), 1)  # still sees the other worker's count
+        first.hit("ai", "client")
+        first.sync()
+        self.assertEqual(len(commits), 1)
+
+
+class RateLimitMiddlewareTest(unittest.TestCase):
+    def _call(self, middleware, path="/api/chat/abc", headers=()):
+        sent = []
+
+        async def receive():
+            return {"type": "http.request", "body": b""}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {"type": "http", "method": "POST", "path": path, "headers": list(headers),
+                 "client": ("192.0.2.1", 5000)}
+        asyncio.run(middleware(scope, receive, send))
+        return sent[0]["status"], dict(sent[0]["headers"])
+
+    def test_responses_carry_limit_headers_and_excess_is_rejected_with_429(self):
+        async def app(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"ok"})
+
+        limiter = SlidingWindowLimiter({"ai": RateLimit(requests=1, window=60)}, enabled=True, key_header="X-API-Key")
+        middleware = RateLimitMiddleware(app, limiter)
+        status, headers = self._call(middleware)
+        self.assertEqual((status, headers[b"ratelimit-limit"], headers[b"ratelimit-remaining"]), (200, b"1", b"0"))
+        status, headers = self._call(middleware)
+        self.assertEqual(status, 429)
+        self.assertIn(b"retry-after", headers)
+        # A client presenting an API key is counted separately from its IP address
+        status, _ = self._call(middleware, headers=[(b"x-api-key", b"secret")])
+        self.assertEqual(status, 200)
+        self.assertEqual(self._call(middleware, path="/static/app.js")[1], {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import os
+import tempfile
+import unittest
+
+from models import ReportData
+from services.database_service import DatabaseService
+from services.retrieval_service import BM25Index, RetrievalService, chunk_text, select_chunks
+
+
+LONG_TEXT = " ".join(
+    [f"Section {i} discusses construction prices and housing demand in region {i}." for i in range(60)]
+    + ["The heat pump subsidy was raised to 70 percent for low-income households."]
+)
+
+
+class ChunkTextTest(unittest.TestCase):
+    def test_chunks_respect_size(self):
+        chunks = chunk_text(LONG_TEXT, chunk_size=300, overlap=80)
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(len(chunk) <= 300 for chunk in chunks))
+
+    def test_chunks_cover_whole_text(self):
+        chunks = chunk_text(LONG_TEXT, chunk_size=300, overlap=0)
+        self.assertEqual(" ".join(chunks), LONG_TEXT)
+
+    def test_overlap_repeats_trailing_sentence(self):
+        chunks = chunk_text(LONG_TEXT, chunk_size=300, overlap=80)
+        last_sentence = chunks[0].split(". ")[-1]
+        self.assertTrue(chunks[1].startswith(last_sentence))
+
+    def test_empty_text(self):
+        self.assertEqual(chunk_text("   "), [])
+
+
+class BM25IndexTest(unittest.TestCase):
+    def test_late_section_is_retrieved(self):
+        chunks = chunk_text(LONG_TEXT, chunk_size=300, overlap=0)
+        hits = BM25Index(chunks).search("How large is the heat pump subsidy?", top_k=2)
+        self.assertEqual(hits[0][0], len(chunks) - 1)
+
+    def test_select_chunks_falls_back_to_opening(self):
+        chunks = chunk_text(LONG_TEXT, chunk_size=300, overlap=0)
+        selected = select_chunks(chunks, "Summarize this", top_k=2)
+        self.assertEqual([i for i, _ in selected], [0, 1])
+
+
+class RetrievalServiceTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_service = DatabaseService(os.path.join(self.tmpdir.name, "test.db"))
+        self.report = self.db_service.save_report(ReportData(
+            id="long", title="Long report", summary="Summary", keyFindings=[], charts=[], fullText=LONG_TEXT,
+        ))
+
+    def tearDown(self):
+        self.db_service.engine.dispose()
+        self.tmpdir.cleanup()
+
+    def test_chunks_are_stored_on_save(self):
+        self.assertEqual(self.db_service.get_report_chunks("long"), chunk_text(LONG_TEXT))
+
+    def test_chunks_removed_on_delete(self):
+        self.db_service.delete_report("long")
+        self.assertEqual(self.db_service.get_report_chunks("long"), [])
+
+    def test_relevant_chunks(self):
+        service = RetrievalService(self.db_service)
+        selected = service.get_relevant_chunks(self.report, "heat pump subsidy", top_k=1)
+        self.assertIn("heat pump subsidy", selected[0][1])
+
+
+if __name__ == "__main__":
+    unittest.main()
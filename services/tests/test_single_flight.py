@@ -0,0 +1,127 @@
+import asyncio
+import unittest
+
+from services.single_flight import SingleFlight, prompt_key
+
+
+class _Work:
+    """Counts calls; each call sleeps `delay` and returns its call number or raises `error`."""
+
+    def __init__(self, delay=0.05, error=None):
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+        self.cancelled = 0
+
+    async def __call__(self):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.error:
+            raise self.error
+        return self.calls
+
+    async def stream(self):
+        self.calls += 1
+        for i in range(3):
+            await asyncio.sleep(self.delay)
+            yield i
+
+
+class SingleFlightTest(unittest.TestCase):
+    def test_concurrent_identical_calls_share_one_execution(self):
+        flights, work = SingleFlight(), _Work()
+
+        async def run():
+            return await asyncio.gather(*(flights.run("narrative", "k", work) for _ in range(100)))
+
+        self.assertEqual(asyncio.run(run()), [1] * 100)
+        self.assertEqual(work.calls, 1)
+        self.assertEqual(flights.get_metrics()["kinds"]["narrative"], {"started": 1, "coalesced": 99})
+        self.assertEqual(flights.get_metrics()["in_flight"], 0)
+
+    def test_different_keys_and_later_calls_are_not_shared(self):
+        flights, work = SingleFlight(), _Work(delay=0)
+
+        async def run():
+            await asyncio.gather(flights.run("narrative", "a", work), flights.run("narrative", "b", work))
+            await flights.run("narrative", "a", work)
+
+        asyncio.run(run())
+        self.assertEqual(work.calls, 3)
+
+    def test_errors_reach_every_waiter(self):
+        flights, work = SingleFlight(), _Work(error=ValueError("boom"))
+
+        async def run():
+            return await asyncio.gather(*(flights.run("report", "k", work) for _ in range(3)), return_exceptions=True)
+
+        results = asyncio.run(run())
+        self.assertTrue(all(isinstance(r, ValueError) for r in results))
+        self.assertEqual(work.calls, 1)
+
+    def test_call_survives_until_the_last_waiter_leaves(self):
+        flights, work = SingleFlight(), _Work(delay=0.1)
+
+        async def run():
+            first = asyncio.create_task(flights.run("storyboard", "k", work))
+            second = asyncio.create_task(flights.run("storyboard", "k", work))
+            await asyncio.sleep(0.02)
+            first.cancel()
+            result = await second
+            with self.assertRaises(asyncio.CancelledError):
+                await first
+            return result
+
+        self.assertEqual(asyncio.run(run()), 1)
+        self.assertEqual(work.cancelled, 0)
+
+    def test_call_is_cancelled_when_every_waiter_leaves(self):
+        flights, work = SingleFlight(), _Work(delay=1)
+
+        async def run():
+            waiters = [asyncio.create_task(flights.run("storyboard", "k", work)) for _ in range(3)]
+            await asyncio.sleep(0.02)
+            for waiter in waiters:
+                waiter.cancel()
+            await asyncio.gather(*waiters, return_exceptions=True)
+            await asyncio.sleep(0)
+            # A new caller starts a fresh call rather than joining the cancelled one
+            work.delay = 0
+            return await flights.run("storyboard", "k", work)
+
+        self.assertEqual(asyncio.run(run()), 2)
+        self.assertEqual(work.cancelled, 1)
+
+    def test_late_stream_subscribers_replay_earlier_items(self):
+        flights, work = SingleFlight(), _Work(delay=0.02)
+
+        async def collect(delay):
+            await asyncio.sleep(delay)
+            return [item async for item in flights.stream("report_stream", "k", work.stream)]
+
+        async def run():
+            return await asyncio.gather(collect(0), collect(0.03))
+
+        self.assertEqual(asyncio.run(run()), [[0, 1, 2], [0, 1, 2]])
+        self.assertEqual(work.calls, 1)
+
+    def test_disabled_runs_every_call(self):
+        flights, work = SingleFlight(enabled=False), _Work(delay=0.01)
+
+        async def run():
+            await asyncio.gather(*(flights.run("narrative", "k", work) for _ in range(5)))
+
+        asyncio.run(run())
+        self.assertEqual(work.calls, 5)
+
+    def test_prompt_key_separates_parts(self):
+        self.assertNotEqual(prompt_key("ab", "c"), prompt_key("a", "bc"))
+        self.assertEqual(prompt_key("prompt"), prompt_key("prompt"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import json
+import os
+import tempfile
+import unittest
+from datetime import date
+
+from models import ReportData
+from services.database_service import DatabaseService
+from services.report_metadata import publication_info
+from services.timeline_service import TimelineService, decode_cursor
+
+
+class PublicationInfoTest(unittest.TestCase):
+    def test_weekly_report_header_gives_issue_and_week(self):
+        self.assertEqual(publication_info("DIW Weekly Report 16*17*18 2024\nElectricity markets"),
+                         ("16*17*18", date(2024, 4, 15)))
+        self.assertEqual(publication_info("DIW Weekly Report 50-52 2024\nOutlook"), ("50-52", date(2024, 12, 9)))
+
+    def test_written_dates_and_missing_dates(self):
+        self.assertEqual(publication_info("Berlin, March 5, 2023. The economy"), (None, date(2023, 3, 5)))
+        self.assertEqual(publication_info("Published 12 October 2022 by DIW"), (None, date(2022, 10, 12)))
+        self.assertEqual(publication_info("DIW Weekly Report\nNo issue here"), (None, None))
+
+
+class TimelineServiceTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_service = DatabaseService(os.path.join(self.tmpdir.name, "test.db"))
+        self.db_service.initialize_database()
+        self.timeline = TimelineService(self.db_service, page_size=5)
+
+    def tearDown(self):
+        self.db_service.engine.dispose()
+        self.tmpdir.cleanup()
+
+    def _page(self, cursor=None, limit=None):
+        return json.loads(self.timeline.page(cursor, limit))
+
+    def _all_entries(self):
+        entries, cursor = [], None
+        while True:
+            page = self._page(cursor)
+            entries += page["timeline"]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return entries
+
+    def test_pages_cover_every_report_newest_first(self):
+        entries = self._all_entries()
+        self.assertEqual(sorted(entry["id"] for entry in entries),
+                         sorted(report.id for report in self.db_service.get_reports()))
+        keys = [(entry["published_on"] or "", entry["id"]) for entry in entries]
+        self.assertEqual(keys, sorted(keys, reverse=True))
+        self.assertIsNone(entries[-1]["published_on"])
+        first = self._page()["timeline"][0]
+        self.assertEqual((first["id"], first["issue"], first["published_on"]),
+                         ("economic_outlook_winter_2024", "50-52", "2024-12-09"))
+
+    def test_pages_are_cached_until_the_catalog_changes(self):
+        first = self.timeline.page()
+        self.assertEqual(self.timeline.page(), first)
+        self.assertEqual((self.timeline.hits, self.timeline.misses), (1, 1))
+
+        self.db_service.save_report(ReportData(id="new", title="New", summary="Latest", keyFindings=[], charts=[],
+                                               fullText="DIW Weekly Report 3 2025\nNew findings."))
+        self.assertEqual(self._page()["timeline"][0]["id"], "new")
+        self.db_service.delete_report("new")
+        self.assertEqual(self.timeline.page(), first)
+        self.assertEqual(self.timeline.misses, 3)
+
+    def test_bad_cursor_or_limit_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.timeline.page("not-a-cursor")
+        with self.assertRaises(ValueError):
+            self.timeline.page(limit=1000)
+        cursor = self._page()["next_cursor"]
+        self.assertIsInstance(decode_cursor(cursor)[0], date)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+
+import httpx
+from fastapi import FastAPI
+
+from services.database_service import DatabaseService
+from services.model_client import ModelClient
+from services.usage_service import UsageContextMiddleware, UsageRecorder, current_caller, usage_cost
+
+
+class _MeteredModel:
+    """Fake model whose responses carry usage metadata (or none, with metered=False)."""
+
+    model_name = "models/gemini-test"
+
+    def __init__(self, metered=True, error=None):
+        self.metered = metered
+        self.error = error
+
+    def _piece(self, text, prompt_tokens=None, output_tokens=None):
+        metadata = SimpleNamespace(prompt_token_count=prompt_tokens, candidates_token_count=output_tokens)
+        return SimpleNamespace(text=text, usage_metadata=metadata if self.metered else None)
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        if self.error:
+            raise self.error
+        if stream:
+            return iter([self._piece("partial "), self._piece("answer", prompt_tokens=120, output_tokens=30)])
+        return self._piece("answer", prompt_tokens=100, output_tokens=25)
+
+
+class UsageTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_service = DatabaseService(os.path.join(self.tmpdir.name, "test.db"))
+        self.recorder = UsageRecorder(self.db_service, flush_size=1000, flush_seconds=3600)
+        self.client = ModelClient(requests_per_minute=6000, max_retries=0, usage=self.recorder)
+
+    def tearDown(self):
+        self.client.shutdown()
+        self.db_service.engine.dispose()
+        self.tmpdir.cleanup()
+
+    def _by(self, group_by):
+        return {row[group_by]: row for row in self.recorder.rollup(group_by=group_by)}
+
+    def test_usage_metadata_is_recorded_per_task(self):
+        async def run():
+            await self.client.generate(_MeteredModel(), "prompt", task="narrative")
+            await self.client.generate(_MeteredModel(), "prompt", task="narrative")
+            return [piece async for piece in self.client.stream(_MeteredModel(), "prompt", task="report")]
+
+        self.assertEqual(asyncio.run(run()), ["partial ", "answer"])
+        tasks = self._by("task")
+        self.assertEqual((tasks["narrative"]["calls"], tasks["narrative"]["prompt_tokens"],
+                          tasks["narrative"]["output_tokens"]), (2, 200, 50))
+        self.assertEqual((tasks["report"]["prompt_tokens"], tasks["report"]["output_tokens"]), (120, 30))
+        self.assertEqual(tasks["report"]["estimated_calls"], 0)
+        self.assertEqual(self._by("model")["gemini-test"]["calls"], 3)
+        self.assertAlmostEqual(tasks["narrative"]["cost_usd"], usage_cost(200, 50))
+
+    def test_missing_metadata_and_failures_are_estimated(self):
+        async def run():
+            await self.client.generate(_MeteredModel(metered=False), "word " * 100, task="chat")
+            with self.assertRaises(ValueError):
+                await self.client.generate(_MeteredModel(error=ValueError("bad")), "word " * 100, task="chat")
+
+        asyncio.run(run())
+        totals = self.recorder.rollup()[0]
+        self.assertEqual((totals["calls"], totals["failed_calls"], totals["estimated_calls"]), (2, 1, 2))
+        self.assertEqual(totals["prompt_tokens"], 200)
+
+    def test_records_are_buffered_until_flushed(self):
+        asyncio.run(self.client.generate(_MeteredModel(), "prompt", task="chat"))
+        self.assertEqual(self.db_service.get_model_usage(since=self._epoch())[0]["calls"], 0)
+        self.recorder.flush()
+        self.assertEqual(self.db_service.get_model_usage(since=self._epoch())[0]["calls"], 1)
+
+    def test_full_buffers_are_written_off_the_event_loop(self):
+        recorder = UsageRecorder(self.db_service, flush_size=1, flush_seconds=3600)
+        client = ModelClient(requests_per_minute=6000, max_retries=0, usage=recorder)
+        writers = []
+        save = self.db_service.save_model_usage
+        self.db_service.save_model_usage = lambda records: (writers.append(threading.current_thread()), save(records))
+
+        async def run():
+            await client.generate(_MeteredModel(), "prompt", task="chat")
+            return threading.current_thread()
+
+        loop_thread = asyncio.run(run())  # waits for the default executor on exit
+        client.shutdown()
+        self.assertEqual(len(writers), 1)
+        self.assertIsNot(writers[0], loop_thread)
+        self.assertEqual(self.db_service.get_model_usage(since=self._epoch())[0]["calls"], 1)
+
+    def test_background_flush_writes_idle_buffers(self):
+        recorder = UsageRecorder(self.db_service, flush_size=1000, flush_seconds=0.2)
+        writers = []
+        save = self.db_service.save_model_usage
+        self.db_service.save_model_usage = lambda records: (writers.append(threading.current_thread().name), save(records))
+        recorder.start()
+        try:
+            recorder.record("chat", "gemini-test", 10, 5, 0.1)  # not yet due, so only buffered
+            time.sleep(0.5)
+            self.assertEqual(writers, ["usage-flush"])
+        finally:
+            recorder.stop()
+        self.assertEqual(self.db_service.get_model_usage(since=self._epoch())[0]["calls"], 1)
+
+    def test_calls_are_attributed_to_route_and_report(self):
+        app = FastAPI()
+        app.add_middleware(UsageContextMiddleware)
+
+        @app.post("/api/chat/{report_id}")
+        async def chat(report_id: str):
+            await self.client.generate(_MeteredModel(), "prompt", task="chat")
+            return dict(zip(("endpoint", "report_id"), current_caller()))
+
+        async def run():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                return (await http.post("/api/chat/construction")).json()
+
+        self.assertEqual(asyncio.run(run()), {"endpoint": "POST /api/chat/{report_id}", "report_id": "construction"})
+        self.assertEqual(current_caller(), ("internal", None))
+        self.assertEqual(self._by("endpoint")["POST /api/chat/{report_id}"]["calls"], 1)
+        self.assertEqual(self._by("report")["construction"]["prompt_tokens"], 100)
+
+    @staticmethod
+    def _epoch():
+        from datetime import datetime
+        return datetime(1970, 1, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
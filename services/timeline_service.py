@@ -0,0 +1,79 @@
+import base64
+import json
+import logging
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Optional, Tuple
+from config import settings
+from services.responses import dumps
+
+logger = logging.getLogger(__name__)
+
+def encode_cursor(entry: dict) -> str:
+    """Opaque cursor pointing after a timeline entry."""
+    published_on = entry["published_on"]
+    raw = json.dumps([published_on and published_on.isoformat(), entry["id"]]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[Optional[date], str]:
+    """(published_on, id) a cursor points after; ValueError if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        published_on, report_id = json.loads(raw)
+        return (date.fromisoformat(published_on) if published_on else None), str(report_id)
+    except Exception as e:
+        raise ValueError(f"Invalid timeline cursor: {cursor}") from e
+
+class TimelineService:
+    """
+    Highlights timeline pages, newest publication first and undated reports last, with cursor pagination.
+
+    Rendered pages are kept per (cursor, limit) until the catalog version
+    changes, i.e. until a report is added, changed or deleted by any worker.
+    A cached page costs one single-row query; an uncached one an indexed
+    range scan of `limit` rows, at any catalog size and page depth.
+    """
+
+    def __init__(self, db_service, page_size: int = None, max_page_size: int = 100, cache_size: int = 256):
+        self.db_service = db_service
+        self.page_size = page_size or settings.TIMELINE_PAGE_SIZE
+        self.max_page_size = max_page_size
+        self.cache_size = cache_size
+        self._pages: "OrderedDict[Tuple[Optional[str], int], bytes]" = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def page(self, cursor: Optional[str] = None, limit: Optional[int] = None) -> bytes:
+        """JSON of one page: {"timeline": [...], "next_cursor": ...}; ValueError for a bad cursor or limit."""
+        limit = limit or self.page_size
+        if not 1 <= limit <= self.max_page_size:
+            raise ValueError(f"limit must be between 1 and {self.max_page_size}")
+        after = decode_cursor(cursor) if cursor else None
+
+        version = self.db_service.get_catalog_version()
+        key = (cursor, limit)
+        with self._lock:
+            if version != self._version:
+                self._pages.clear()
+                self._version = version
+            if key in self._pages:
+                self._pages.move_to_end(key)
+                self.hits += 1
+                return self._pages[key]
+        self.misses += 1
+
+        entries = self.db_service.get_timeline(limit + 1, after)
+        next_cursor = encode_cursor(entries[limit - 1]) if len(entries) > limit else None
+        body = dumps({"timeline": entries[:limit], "next_cursor": next_cursor})
+        with self._lock:
+            if version == self._version:
+                self._pages[key] = body
+                while len(self._pages) > self.cache_size:
+                    self._pages.popitem(last=False)
+        return body
+
+    def get_metrics(self) -> dict:
+        return {"cached_pages": len(self._pages), "hits": self.hits, "misses": self.misses}
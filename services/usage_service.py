@@ -0,0 +1,156 @@
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from starlette.routing import Match
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Who a model call is made for; set per request by UsageContextMiddleware and
+# inherited by the tasks the request starts (including shared single-flight calls)
+_endpoint = contextvars.ContextVar("usage_endpoint", default="internal")
+_report_id = contextvars.ContextVar("usage_report_id", default=None)
+
+USAGE_GROUPS = ("hour", "endpoint", "report", "task", "model")
+
+def current_caller() -> Tuple[str, Optional[str]]:
+    """(endpoint, report_id) the current model call is attributed to."""
+    return _endpoint.get(), _report_id.get()
+
+def _route_of(scope) -> Tuple[str, Optional[str]]:
+    """Route template and report_id path parameter of a request, e.g. ("POST /api/chat/{report_id}", "abc")."""
+    method = scope.get("method", "WS")
+    for route in scope["app"].router.routes:
+        match, child_scope = route.matches(scope)
+        if match == Match.FULL:
+            return f"{method} {getattr(route, 'path', scope['path'])}", child_scope.get("path_params", {}).get("report_id")
+    return f"{method} (unmatched)", None
+
+class UsageContextMiddleware:
+    """ASGI middleware attributing the model calls made while serving a request to its route and report."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+        endpoint, report_id = _route_of(scope)
+        endpoint_token = _endpoint.set(endpoint)
+        report_token = _report_id.set(report_id)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _endpoint.reset(endpoint_token)
+            _report_id.reset(report_token)
+
+def usage_cost(prompt_tokens: int, output_tokens: int) -> float:
+    """Estimated USD cost of the given token counts at the configured prices."""
+    return (prompt_tokens * settings.MODEL_INPUT_COST_PER_MILLION
+            + output_tokens * settings.MODEL_OUTPUT_COST_PER_MILLION) / 1_000_000
+
+class UsageRecorder:
+    """
+    Records token counts, latency and outcome of every model call.
+
+    Records are buffered in memory and written to the model_usage table in
+    batches (every `flush_size` records or `flush_seconds`, whichever comes
+    first), so accounting adds no database round trip to individual calls.
+    Batches are written off the event loop: by the default executor when
+    the buffer fills, and by a background thread (start()) every
+    `flush_seconds`, so even an idle worker's records reach the table.
+    Rollups read only the table; with several workers they include the
+    others' calls once those are flushed, up to `flush_seconds` late.
+    """
+
+    def __init__(self, db_service, flush_size: int = None, flush_seconds: float = None):
+        self.db_service = db_service
+        self.flush_size = flush_size or settings.USAGE_FLUSH_SIZE
+        self.flush_seconds = settings.USAGE_FLUSH_SECONDS if flush_seconds is None else flush_seconds
+        self._pending: List[dict] = []
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.recorded = 0
+        self.dropped = 0
+
+    def record(self, task: str, model: str, prompt_tokens: int, output_tokens: int, latency: float,
+               success: bool = True, estimated: bool = False):
+        """Buffer one call's usage, attributed to the current request's endpoint and report."""
+        endpoint, report_id = current_caller()
+        record = {
+            "created_at": datetime.utcnow(),
+            "endpoint": endpoint,
+            "report_id": report_id,
+            "task": task,
+            "model": model,
+            "prompt_tokens": prompt_tokens,
+            "output_tokens": output_tokens,
+            "latency_ms": int(latency * 1000),
+            "estimated": estimated,
+            "success": success,
+        }
+        with self._lock:
+            self._pending.append(record)
+            self.recorded += 1
+            due = (len(self._pending) >= self.flush_size
+                   or time.monotonic() - self._last_flush >= self.flush_seconds)
+        if due:
+            try:
+                asyncio.get_running_loop().run_in_executor(None, self.flush)
+            except RuntimeError:  # no event loop: called from a worker thread
+                self.flush()
+
+    def flush(self):
+        """Write buffered records to the database; a failed batch is logged and dropped."""
+        with self._lock:
+            records, self._pending = self._pending, []
+            self._last_flush = time.monotonic()
+        if not records:
+            return
+        try:
+            self.db_service.save_model_usage(records)
+        except Exception as e:
+            self.dropped += len(records)
+            logger.error(f"Dropped {len(records)} model usage records: {e}")
+
+    def _run(self):
+        while not self._stop.wait(self.flush_seconds):
+            self.flush()
+
+    def start(self):
+        """Flush buffered records every `flush_seconds` in a background thread until stop()."""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="usage-flush", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the background thread and flush what is still buffered."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def rollup(self, hours: float = 24, group_by: Optional[str] = None) -> List[dict]:
+        """
+        Usage of the last `hours` hours, grouped as DatabaseService.get_model_usage, with estimated cost.
+
+        Flushes this worker's buffer first; blocking, so call it off the event loop.
+        """
+        self.flush()
+        rows = self.db_service.get_model_usage(datetime.utcnow() - timedelta(hours=hours), group_by)
+        for row in rows:
+            row["avg_latency_ms"] = round(row["avg_latency_ms"])
+            row["total_tokens"] = row["prompt_tokens"] + row["output_tokens"]
+            row["cost_usd"] = round(usage_cost(row["prompt_tokens"], row["output_tokens"]), 6)
+        return rows
@@ -1,3 +1,105 @@
+// ReportStore: report bodies fetched on demand and kept in IndexedDB by id and version
+class ReportStore {
+    /**
+     * Stored copies are served without a request while their version matches the catalog index,
+     * and revalidated with If-None-Match once it does not. Only the last few reports shown stay in memory.
+     * Charts come downsampled to at most maxPoints points, about what a chart's width can show.
+     */
+    constructor(memoryLimit = 5, maxPoints = 800) {
+        this.memory = new Map(); // id -> report, least recently used first
+        this.memoryLimit = memoryLimit;
+        this.maxPoints = maxPoints;
+        this.db = this.openDatabase().catch(error => {
+            console.warn('IndexedDB unavailable, reports will not be stored:', error);
+            return null;
+        });
+    }
+
+    openDatabase() {
+        return new Promise((resolve, reject) => {
+            if (!window.indexedDB) {
+                reject(new Error('IndexedDB not supported'));
+                return;
+            }
+            const request = indexedDB.open('economic-dashboard', 1);
+            request.onupgradeneeded = () => request.result.createObjectStore('reports', { keyPath: 'id' });
+            request.onsuccess = () => resolve(request.result);
+            request.onerror = () => reject(request.error);
+        });
+    }
+
+    async transaction(mode, operation) {
+        const db = await this.db;
+        if (!db) return null;
+        return new Promise((resolve, reject) => {
+            const request = operation(db.transaction('reports', mode).objectStore('reports'));
+            request.onsuccess = () => resolve(request.result);
+            request.onerror = () => reject(request.error);
+        });
+    }
+
+    /**
+     * The full report of a catalog index entry ({id, title, updated_at}).
+     */
+    async get(entry) {
+        const inMemory = this.memory.get(entry.id);
+        if (inMemory && inMemory.updated_at === entry.updated_at) {
+            this.remember(inMemory);
+            return inMemory;
+        }
+        const stored = await this.transaction('readonly', store => store.get(entry.id)).catch(() => null);
+        const current = stored && stored.points === this.maxPoints;
+        if (current && stored.version === entry.updated_at) {
+            this.remember(stored.report);
+            return stored.report;
+        }
+
+        // Outdated or missing: a stored copy whose ETag still matches comes back as 304 without a body
+        const headers = current && stored.etag ? { 'If-None-Match': stored.etag } : {};
+        const response = await fetch(`/api/reports/${entry.id}?max_points=${this.maxPoints}`, { headers, cache: 'no-store' });
+        let report;
+        if (response.status === 304) {
+            report = stored.report;
+        } else if (response.ok) {
+            report = await response.json();
+        } else {
+            throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+        }
+        const record = {
+            id: entry.id, version: report.updated_at, points: this.maxPoints, etag: response.headers.get('ETag'), report
+        };
+        await this.transaction('readwrite', store => store.put(record)).catch(error => {
+            console.warn('Could not store report:', error);
+        });
+        this.remember(report);
+        return report;
+    }
+
+    remember(report) {
+        this.memory.delete(report.id);
+        this.memory.set(report.id, report);
+        while (this.memory.size > this.memoryLimit) {
+            this.memory.delete(this.memory.keys().next().value);
+        }
+    }
+
+    /**
+     * Forget stored reports that are no longer in the catalog index.
+     */
+    async prune(entries) {
+        const ids = new Set(entries.map(entry => entry.id));
+        for (const id of this.memory.keys()) {
+            if (!ids.has(id)) this.memory.delete(id);
+        }
+        const storedIds = await this.transaction('readonly', store => store.getAllKeys()).catch(() => null);
+        for (const id of storedIds || []) {
+            if (!ids.has(id)) {
+                await this.transaction('readwrite', store => store.delete(id)).catch(() => null);
+            }
+        }
+    }
+}
+
 // DashboardApp: Main class for the economic insights dashboard
 class DashboardApp {
     /**
@@ -5,7 +107,8 @@ class DashboardApp {
      */
     constructor() {
         this.currentReportId = 'storyboard'; // Track which section is active
-        this.reports = []; // All loaded reports
+        this.reports = []; // Catalog index: id, title and version of every report
+        this.reportStore = new ReportStore(); // Report bodies, fetched when shown
         this.currentChat = null; // Current chat state
         this.cachedKeyActors = null; // Store latest AI-generated key actors
         // Speech synthesis for read-aloud
@@ -41,12 +144,14 @@ class DashboardApp {
 
     async loadReports() {
         try {
-            const response = await fetch('/api/reports');
+            // Only the index; report bodies are loaded when shown
+            const response = await fetch('/api/catalog');
             if (!response.ok) {
                 throw new Error(`HTTP ${response.status}: ${response.statusText}`);
             }
             const data = await response.json();
             this.reports = data.reports || [];
+            this.reportStore.prune(this.reports);
         } catch (error) {
             console.error('Error loading reports:', error);
             this.reports = []; // Set empty array as fallback
@@ -97,111 +202,166 @@ class DashboardApp {
         document.getElementById('content-area').innerHTML = content;
     }
 
+    /**
+     * Read a newline-delimited JSON response, calling onEvent for each event as it arrives.
+     */
+    async readNdjson(response, onEvent) {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        while (true) {
+            const { done, value } = await reader.read();
+            buffer += decoder.decode(value || new Uint8Array(), { stream: !done });
+            const lines = buffer.split('\n');
+            buffer = lines.pop();
+            lines.filter(line => line.trim()).forEach(line => onEvent(JSON.parse(line)));
+            if (done) break;
+        }
+        if (buffer.trim()) onEvent(JSON.parse(buffer));
+    }
+
     async generateStoryboard() {
         const contentDiv = document.getElementById('storyboard-content');
         contentDiv.innerHTML = `${this.getSpinner()} Generating AI Storyboard...`;
         try {
-            const response = await fetch('/api/generate-storyboard', { method: 'POST' });
+            const response = await fetch('/api/generate-storyboard/stream', { method: 'POST' });
             if (!response.ok) {
-                throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+                throw this.httpError(response);
             }
-            const data = await response.json();
-            // Cache key actors if present
-            if (data.keyActors && Array.isArray(data.keyActors) && data.keyActors.length > 0) {
-                this.cachedKeyActors = data.keyActors;
-                localStorage.setItem('cachedKeyActors', JSON.stringify(data.keyActors));
-                // If Key Actors tab is active, re-render it
-                if (this.currentReportId === 'key_actors') {
-                    this.showKeyActors();
+            // Render fields as the model writes them, then the full storyboard at the end
+            const partial = { title: '', narrative: '', keyActors: [], charts: [] };
+            let storyboard = null;
+            let failure = null;
+            await this.readNdjson(response, event => {
+                if (event.type === 'field') {
+                    partial[event.field] = event.value;
+                } else if (event.type === 'item' && Array.isArray(partial[event.field])) {
+                    partial[event.field][event.index] = event.value;
+                } else if (event.type === 'storyboard') {
+                    storyboard = event.storyboard;
+                    return;
+                } else if (event.type === 'error') {
+                    failure = event.message;
+                    return;
                 }
+                this.renderStoryboardPreview(partial, contentDiv);
+            });
+            if (!storyboard) {
+                throw new Error(failure || 'The storyboard stream ended unexpectedly');
             }
-            // Build the storyboard sections
-            let html = '';
-            // 1. The Singularity Thesis
-            html += `
-                <div class="bg-gray-900/80 border border-gray-700 rounded-lg p-6 mb-8 shadow-lg">
-                    <h3 class="text-2xl font-bold text-green-400 mb-2">The Singularity Thesis</h3>
-                    <div class="text-xl text-white font-semibold mb-2">${data.title}</div>
-                    <div class="text-gray-300 text-lg">${marked.parse(data.narrative)}</div>
-                </div>
-            `;
-            // 2. Inter-Report Relationships
-            html += `
-                <div class="bg-gray-900/80 border border-gray-700 rounded-lg p-6 mb-8 shadow-lg">
-                    <h3 class="text-2xl font-bold text-blue-400 mb-4">Inter-Report Relationships</h3>
-                    <div id="relationship-graph" class="mb-2"></div>
-                    <div class="text-gray-300 text-sm">This graph shows the most critical connections between reports supporting the singularity thesis.</div>
-                </div>
-            `;
-            // 3. Synthesized Visualizations
-            if (data.charts && data.charts.length > 0) {
-                html += `
-                    <div class="bg-gray-900/80 border border-gray-700 rounded-lg p-6 mb-8 shadow-lg">
-                        <h3 class="text-2xl font-bold text-purple-400 mb-4">Synthesized Visualizations</h3>
-                        <div class="grid grid-cols-1 md:grid-cols-2 gap-6">
-                            ${data.charts.map((chart, i) => `
-                                <div class="bg-gray-800 border border-gray-700 rounded-lg p-4">
-                                    <div class="font-bold text-white mb-2">${chart.title}</div>
-                                    <div class="text-gray-400 text-sm mb-2">${chart.description || ''}</div>
-                                    <div id="storyboard-chart-${i}" class="h-64"></div>
-                                </div>
-                            `).join('')}
-                        </div>
-                    </div>
-                `;
+            this.renderStoryboard(storyboard, contentDiv);
+        } catch (error) {
+            contentDiv.innerHTML = `<div class="text-red-400 text-center p-6">An error occurred while generating the storyboard: ${error.message}</div>`;
+        }
+    }
+
+    renderStoryboardPreview(partial, contentDiv) {
+        contentDiv.innerHTML = `
+            <div class="bg-gray-900/80 border border-gray-700 rounded-lg p-6 mb-8 shadow-lg text-left">
+                <h3 class="text-2xl font-bold text-green-400 mb-2">The Singularity Thesis</h3>
+                <div class="text-xl text-white font-semibold mb-2">${partial.title || ''}</div>
+                <div class="text-gray-300 text-lg">${partial.narrative ? marked.parse(partial.narrative) : ''}</div>
+                ${partial.charts.length ? `<div class="text-gray-400 text-sm mt-4">Charts: ${partial.charts.map(c => c.title).join(', ')}</div>` : ''}
+                ${partial.keyActors.length ? `<div class="text-gray-400 text-sm mt-2">Key actors: ${partial.keyActors.map(a => a.name).join(', ')}</div>` : ''}
+            </div>
+            <div class="text-center text-gray-400">${this.getSpinner()} Writing the storyboard...</div>
+        `;
+    }
+
+    renderStoryboard(data, contentDiv) {
+        // Cache key actors if present
+        if (data.keyActors && Array.isArray(data.keyActors) && data.keyActors.length > 0) {
+            this.cachedKeyActors = data.keyActors;
+            localStorage.setItem('cachedKeyActors', JSON.stringify(data.keyActors));
+            // If Key Actors tab is active, re-render it
+            if (this.currentReportId === 'key_actors') {
+                this.showKeyActors();
             }
-            // 4. AI Introspection: The 'Why'
-            html += `
-                <div class="bg-gray-900/80 border border-gray-700 rounded-lg p-6 mb-8 shadow-lg">
-                    <h3 class="text-2xl font-bold text-yellow-400 mb-2">AI Introspection: The 'Why'</h3>
-                    <div class="prose prose-invert max-w-none text-gray-200">${data.introspection && data.introspection.trim() ? marked.parse(data.introspection) : '<span class="italic text-gray-400">No introspection provided by AI.</span>'}</div>
-                </div>
-            `;
-            // 5. AI Retrospection: The 'What If'
-            html += `
-                <div class="bg-gray-900/80 border border-gray-700 rounded-lg p-6 mb-8 shadow-lg">
-                    <h3 class="text-2xl font-bold text-pink-400 mb-2">AI Retrospection: The 'What If'</h3>
-                    <div class="prose prose-invert max-w-none text-gray-200">${data.retrospection && data.retrospection.trim() ? marked.parse(data.retrospection) : '<span class="italic text-gray-400">No retrospection provided by AI.</span>'}</div>
-                </div>
-            `;
-            // 6. Key Actors in the Narrative (styled as grid of cards)
-            const defaultKeyActors = [
-                { name: "Policymakers (Federal/State/Municipal)", description: "Responsible for creating incentives, regulations, and investment frameworks to guide structural transformations and address social inequalities.", icon: "fa-solid fa-landmark" },
-                { name: "German Households", description: "Experience the direct effects of economic stagnation, climate costs (heating, transport), and social policies (care burden, health access).", icon: "fa-solid fa-users" },
-                { name: "German Industry", description: "Faces challenges adapting to higher energy costs, international competition, and the need to decarbonize while maintaining competitiveness.", icon: "fa-solid fa-industry" },
-                { name: "Energy Sector", description: "Navigating the shift from fossil fuels to renewables, requiring massive investment in generation, grids, and network decommissioning.", icon: "fa-solid fa-bolt" },
-                { name: "Property Owners / Landlords", description: "Key decision-makers for building renovations and investments in heating systems, influenced by financing, standards, and tenancy laws.", icon: "fa-solid fa-building" },
-                { name: "European Central Bank (ECB)", description: "Sets monetary policy influencing financing conditions, inflation, and overall economic stability in the Euro Area, including Germany.", icon: "fa-solid fa-euro-sign" }
-            ];
-            const keyActors = (data.keyActors && Array.isArray(data.keyActors) && data.keyActors.length > 0) ? data.keyActors : defaultKeyActors;
+        }
+        // Build the storyboard sections
+        let html = '';
+        // 1. The Singularity Thesis
+        html += `
+            <div class="bg-gray-900/80 border border-gray-700 rounded-lg p-6 mb-8 shadow-lg">
+                <h3 class="text-2xl font-bold text-green-400 mb-2">The Singularity Thesis</h3>
+                <div class="text-xl text-white font-semibold mb-2">${data.title}</div>
+                <div class="text-gray-300 text-lg">${marked.parse(data.narrative)}</div>
+            </div>
+        `;
+        // 2. Inter-Report Relationships
+        html += `
+            <div class="bg-gray-900/80 border border-gray-700 rounded-lg p-6 mb-8 shadow-lg">
+                <h3 class="text-2xl font-bold text-blue-400 mb-4">Inter-Report Relationships</h3>
+                <div id="relationship-graph" class="mb-2"></div>
+                <div class="text-gray-300 text-sm">This graph shows the most critical connections between reports supporting the singularity thesis.</div>
+            </div>
+        `;
+        // 3. Synthesized Visualizations
+        if (data.charts && data.charts.length > 0) {
             html += `
                 <div class="bg-gray-900/80 border border-gray-700 rounded-lg p-6 mb-8 shadow-lg">
-                    <h3 class="text-2xl font-bold text-green-400 mb-4">Key Actors in the Narrative</h3>
-                    <div class="grid grid-cols-1 md:grid-cols-2 xl:grid-cols-3 gap-6">
-                        ${keyActors.map(actor => `
-                            <div class="bg-gray-800 border border-gray-700 rounded-lg p-5 flex flex-col justify-between items-center shadow-lg">
-                                <div class="text-5xl mb-3"><i class="${actor.icon} text-green-400"></i></div>
-                                <div class="font-bold text-white text-lg mb-1 text-center">${actor.name}</div>
-                                <div class="text-gray-300 text-center text-sm">${actor.description}</div>
+                    <h3 class="text-2xl font-bold text-purple-400 mb-4">Synthesized Visualizations</h3>
+                    <div class="grid grid-cols-1 md:grid-cols-2 gap-6">
+                        ${data.charts.map((chart, i) => `
+                            <div class="bg-gray-800 border border-gray-700 rounded-lg p-4">
+                                <div class="font-bold text-white mb-2">${chart.title}</div>
+                                <div class="text-gray-400 text-sm mb-2">${chart.description || ''}</div>
+                                <div id="storyboard-chart-${i}" class="h-64"></div>
                             </div>
                         `).join('')}
                     </div>
                 </div>
             `;
-            // Render all
-            contentDiv.innerHTML = html;
-            // Render charts
-            if (data.charts && data.charts.length > 0) {
-                data.charts.forEach((chart, i) => {
-                    this.renderPlotlyChart(chart, `storyboard-chart-${i}`);
-                });
-            }
-            // Render relationship graph (placeholder for now)
-            if (data.relationshipGraph) {
-                this.renderRelationshipGraph(data.relationshipGraph, 'relationship-graph');
-            }
-        } catch (error) {
-            contentDiv.innerHTML = `<div class="text-red-400 text-center p-6">An error occurred while generating the storyboard: ${error.message}</div>`;
+        }
+        // 4. AI Introspection: The 'Why'
+        html += `
+            <div class="bg-gray-900/80 border border-gray-700 rounded-lg p-6 mb-8 shadow-lg">
+                <h3 class="text-2xl font-bold text-yellow-400 mb-2">AI Introspection: The 'Why'</h3>
+                <div class="prose prose-invert max-w-none text-gray-200">${data.introspection && data.introspection.trim() ? marked.parse(data.introspection) : '<span class="italic text-gray-400">No introspection provided by AI.</span>'}</div>
+            </div>
+        `;
+        // 5. AI Retrospection: The 'What If'
+        html += `
+            <div class="bg-gray-900/80 border border-gray-700 rounded-lg p-6 mb-8 shadow-lg">
+                <h3 class="text-2xl font-bold text-pink-400 mb-2">AI Retrospection: The 'What If'</h3>
+                <div class="prose prose-invert max-w-none text-gray-200">${data.retrospection && data.retrospection.trim() ? marked.parse(data.retrospection) : '<span class="italic text-gray-400">No retrospection provided by AI.</span>'}</div>
+            </div>
+        `;
+        // 6. Key Actors in the Narrative (styled as grid of cards)
+        const defaultKeyActors = [
+            { name: "Policymakers (Federal/State/Municipal)", description: "Responsible for creating incentives, regulations, and investment frameworks to guide structural transformations and address social inequalities.", icon: "fa-solid fa-landmark" },
+            { name: "German Households", description: "Experience the direct effects of economic stagnation, climate costs (heating, transport), and social policies (care burden, health access).", icon: "fa-solid fa-users" },
+            { name: "German Industry", description: "Faces challenges adapting to higher energy costs, international competition, and the need to decarbonize while maintaining competitiveness.", icon: "fa-solid fa-industry" },
+            { name: "Energy Sector", description: "Navigating the shift from fossil fuels to renewables, requiring massive investment in generation, grids, and network decommissioning.", icon: "fa-solid fa-bolt" },
+            { name: "Property Owners / Landlords", description: "Key decision-makers for building renovations and investments in heating systems, influenced by financing, standards, and tenancy laws.", icon: "fa-solid fa-building" },
+            { name: "European Central Bank (ECB)", description: "Sets monetary policy influencing financing conditions, inflation, and overall economic stability in the Euro Area, including Germany.", icon: "fa-solid fa-euro-sign" }
+        ];
+        const keyActors = (data.keyActors && Array.isArray(data.keyActors) && data.keyActors.length > 0) ? data.keyActors : defaultKeyActors;
+        html += `
+            <div class="bg-gray-900/80 border border-gray-700 rounded-lg p-6 mb-8 shadow-lg">
+                <h3 class="text-2xl font-bold text-green-400 mb-4">Key Actors in the Narrative</h3>
+                <div class="grid grid-cols-1 md:grid-cols-2 xl:grid-cols-3 gap-6">
+                    ${keyActors.map(actor => `
+                        <div class="bg-gray-800 border border-gray-700 rounded-lg p-5 flex flex-col justify-between items-center shadow-lg">
+                            <div class="text-5xl mb-3"><i class="${actor.icon} text-green-400"></i></div>
+                            <div class="font-bold text-white text-lg mb-1 text-center">${actor.name}</div>
+                            <div class="text-gray-300 text-center text-sm">${actor.description}</div>
+                        </div>
+                    `).join('')}
+                </div>
+            </div>
+        `;
+        // Render all
+        contentDiv.innerHTML = html;
+        // Render charts
+        if (data.charts && data.charts.length > 0) {
+            data.charts.forEach((chart, i) => {
+                this.renderPlotlyChart(chart, `storyboard-chart-${i}`);
+            });
+        }
+        // Render relationship graph (placeholder for now)
+        if (data.relationshipGraph) {
+            this.renderRelationshipGraph(data.relationshipGraph, 'relationship-graph');
         }
     }
 
@@ -230,6 +390,7 @@ class DashboardApp {
                     </div>
 
                     <div id="upload-error" class="hidden text-red-400 mt-4 text-center"></div>
+                    <div id="upload-progress" class="hidden mt-6 space-y-4"></div>
                     
                     <div class="mt-6 text-center">
                         <button type="submit" disabled class="bg-blue-600 text-white font-bold py-3 px-6 rounded-lg hover:bg-blue-700 disabled:bg-gray-500 transition-all duration-200 flex items-center justify-center mx-auto text-lg" id="upload-btn">
@@ -354,13 +515,22 @@ class DashboardApp {
         uploadBtn.innerHTML = `${this.getSpinner()} Processing ${files.length} file(s)...`;
         uploadBtn.disabled = true;
 
+        const progress = document.getElementById('upload-progress');
+        progress.innerHTML = '';
+        progress.classList.remove('hidden');
+
         try {
-            const response = await fetch('/api/reports/upload', {
+            const response = await fetch('/api/reports/upload/stream', {
                 method: 'POST',
                 body: formData
             });
+            if (!response.ok) {
+                throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+            }
             
-            const result = await response.json();
+            // Each file's report is previewed field by field while the model writes it
+            const result = { reports: [], errors: [], success_count: 0 };
+            await this.readNdjson(response, event => this.renderUploadProgress(event, progress, result));
             
             if (result.reports.length > 0) {
                 await this.loadReports();
@@ -414,12 +584,77 @@ class DashboardApp {
         }
     }
 
-    showReport(reportId) {
+    renderUploadProgress(event, progress, result) {
+        const card = id => document.getElementById(`upload-preview-${event.file_index}-${id}`);
+        switch (event.type) {
+            case 'file':
+                progress.insertAdjacentHTML('beforeend', `
+                    <div class="bg-gray-900/80 border border-gray-700 rounded-lg p-4">
+                        <div class="flex items-center justify-between text-sm text-gray-400 mb-2">
+                            <span>${event.filename}</span>
+                            <span id="upload-preview-${event.file_index}-status">${this.getSpinner()}</span>
+                        </div>
+                        <div id="upload-preview-${event.file_index}-title" class="text-lg font-bold text-white"></div>
+                        <div id="upload-preview-${event.file_index}-summary" class="text-gray-300 text-sm mt-1"></div>
+                        <ul id="upload-preview-${event.file_index}-keyFindings" class="list-disc list-inside text-gray-300 text-sm mt-2"></ul>
+                        <div id="upload-preview-${event.file_index}-charts" class="flex flex-wrap gap-2 mt-2"></div>
+                    </div>
+                `);
+                break;
+            case 'field':
+                if (card(event.field) && typeof event.value === 'string') card(event.field).textContent = event.value;
+                break;
+            case 'item':
+                if (event.field === 'keyFindings') {
+                    card('keyFindings').insertAdjacentHTML('beforeend', `<li>${event.value}</li>`);
+                } else if (event.field === 'charts') {
+                    card('charts').insertAdjacentHTML('beforeend',
+                        `<span class="text-xs bg-gray-700 text-gray-200 rounded px-2 py-1"><i class="fa-solid fa-chart-simple mr-1"></i>${event.value.title}</span>`);
+                }
+                break;
+            case 'part':
+                if (event.title && !card('title').textContent) card('title').textContent = event.title;
+                card('summary').textContent = `Analyzed part ${event.index + 1} of ${event.total}`;
+                event.keyFindings.forEach(finding => card('keyFindings').insertAdjacentHTML('beforeend', `<li>${finding}</li>`));
+                break;
+            case 'report':
+                result.reports.push(event.report);
+                card('status').innerHTML = '<i class="fa-solid fa-circle-check text-green-400"></i>';
+                break;
+            case 'error':
+                card('status').innerHTML = '<i class="fa-solid fa-circle-xmark text-red-400"></i>';
+                break;
+            case 'done':
+                result.success_count = event.success_count;
+                result.errors = event.errors;
+                break;
+        }
+    }
+
+    async showReport(reportId) {
         this.currentReportId = reportId;
         this.updateSidebarSelection(reportId);
         
-        const report = this.reports.find(r => r.id === reportId);
-        if (!report) return;
+        const entry = this.reports.find(r => r.id === reportId);
+        if (!entry) return;
+        
+        document.getElementById('content-area').innerHTML = `
+            <div class="flex justify-center items-center h-64">
+                ${this.getSpinner()} Loading report...
+            </div>
+        `;
+        let report;
+        try {
+            report = await this.reportStore.get(entry);
+        } catch (error) {
+            console.error('Error loading report:', error);
+            if (this.currentReportId === reportId) {
+                document.getElementById('content-area').innerHTML = `<div class="text-red-400 text-center p-6">Failed to load the report.</div>`;
+            }
+            return;
+        }
+        // Another section may have been opened meanwhile
+        if (this.currentReportId !== reportId) return;
 
         const content = `
             <div class="grid grid-cols-1 xl:grid-cols-2 gap-4 w-full overflow-y-auto">
@@ -506,6 +741,7 @@ class DashboardApp {
             chartDiv.innerHTML = `
                 <h3 class="text-lg font-bold text-white mb-2">${chart.title}</h3>
                 <p class="text-sm text-gray-400 mb-4">${chart.description}</p>
+                ${chart.sourcePoints ? `<p class="text-xs text-gray-500 mb-2">${chart.data.length.toLocaleString()} of ${chart.sourcePoints.toLocaleString()} points shown</p>` : ''}
                 <div id="chart-${containerId}-${index}" style="width: 100%; height: 300px;"></div>
             `;
             container.appendChild(chartDiv);
@@ -605,7 +841,7 @@ class DashboardApp {
             const response = await fetch(`/api/generate-narrative/${reportId}`, { method: 'POST' });
             
             if (!response.ok) {
-                throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+                throw this.httpError(response);
             }
             
             const data = await response.json();
@@ -658,6 +894,11 @@ class DashboardApp {
         `;
         
         document.getElementById('chat-container').innerHTML = chatHtml;
+        if (this.currentChat && this.currentChat.socket) {
+            this.currentChat.socket.close();
+        }
+        // A new server-side session is created on the first message
+        this.currentChat = { reportId, sessionId: null, socket: null, turns: {} };
     }
 
     async sendChatMessage(event, reportId) {
@@ -672,9 +913,21 @@ class DashboardApp {
         // Add loading message
         const loadingId = this.addChatMessage('model', `${this.getSpinner()} Thinking...`);
         
+        const chat = this.currentChat;
+        if (chat && chat.reportId === reportId && window.WebSocket && !chat.socketFailed) {
+            this.sendChatOverSocket(chat, message, loadingId);
+        } else {
+            await this.sendChatOverPost(reportId, message, loadingId);
+        }
+    }
+
+    async sendChatOverPost(reportId, message, loadingId) {
         try {
             const formData = new FormData();
             formData.append('message', message);
+            if (this.currentChat && this.currentChat.reportId === reportId && this.currentChat.sessionId) {
+                formData.append('session_id', this.currentChat.sessionId);
+            }
             
             const response = await fetch(`/api/chat/${reportId}`, {
                 method: 'POST',
@@ -682,10 +935,13 @@ class DashboardApp {
             });
             
             if (!response.ok) {
-                throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+                throw this.httpError(response);
             }
             
             const data = await response.json();
+            if (this.currentChat && this.currentChat.reportId === reportId) {
+                this.currentChat.sessionId = data.session_id;
+            }
             
             // Remove loading message and add real response
             document.getElementById(loadingId).remove();
@@ -697,6 +953,84 @@ class DashboardApp {
         }
     }
 
+    /**
+     * Open (or reuse) the chat socket of a report, which keeps the session loaded on the server.
+     * A question sent while an answer is streaming cancels that answer.
+     */
+    openChatSocket(chat) {
+        if (chat.socket && chat.socket.readyState <= WebSocket.OPEN) {
+            return chat.socket;
+        }
+        const scheme = location.protocol === 'https:' ? 'wss' : 'ws';
+        const query = chat.sessionId ? `?session_id=${encodeURIComponent(chat.sessionId)}` : '';
+        const socket = new WebSocket(`${scheme}://${location.host}/api/chat/${chat.reportId}/ws${query}`);
+        socket.onopen = () => { chat.opened = true; };
+        socket.onmessage = (event) => this.onChatSocketMessage(chat, JSON.parse(event.data));
+        socket.onclose = () => {
+            if (chat.socket === socket) chat.socket = null;
+            // Without a socket ever opening (e.g. a proxy without WebSocket support), use plain POSTs
+            if (!chat.opened) chat.socketFailed = true;
+            for (const [turnId, turn] of Object.entries(chat.turns)) {
+                delete chat.turns[turnId];
+                if (chat.socketFailed) {
+                    this.sendChatOverPost(chat.reportId, turn.message, turnId);
+                } else {
+                    this.finishChatTurn(chat, turnId, 'Sorry, I encountered an error: the connection was closed');
+                }
+            }
+        };
+        chat.socket = socket;
+        return socket;
+    }
+
+    sendChatOverSocket(chat, message, turnId) {
+        const socket = this.openChatSocket(chat);
+        chat.turns[turnId] = { message, text: '' };
+        const payload = JSON.stringify({ type: 'question', message, id: turnId });
+        if (socket.readyState === WebSocket.CONNECTING) {
+            socket.addEventListener('open', () => socket.send(payload), { once: true });
+        } else {
+            socket.send(payload);
+        }
+    }
+
+    onChatSocketMessage(chat, data) {
+        if (data.type === 'session') {
+            chat.sessionId = data.session_id;
+            return;
+        }
+        const turn = chat.turns[data.id];
+        const bubble = document.getElementById(data.id);
+        if (data.type === 'delta' && turn && bubble) {
+            turn.text += data.text;
+            bubble.firstElementChild.innerHTML = `<div class="prose-custom prose-sm max-w-none">${marked.parse(turn.text)}</div>`;
+            const messages = document.getElementById('chat-messages');
+            messages.scrollTop = messages.scrollHeight;
+        } else if (data.type === 'answer') {
+            this.finishChatTurn(chat, data.id, data.response);
+        } else if (data.type === 'cancelled') {
+            this.finishChatTurn(chat, data.id, turn && turn.text ? `${turn.text}\n\n_(stopped for your next question)_` : null);
+        } else if (data.type === 'error') {
+            const message = data.retry_after
+                ? `The assistant is busy, please try again in ${data.retry_after} seconds.`
+                : data.message;
+            this.finishChatTurn(chat, data.id, `Sorry, I encountered an error: ${message}`);
+        }
+    }
+
+    finishChatTurn(chat, turnId, text) {
+        delete chat.turns[turnId];
+        const bubble = document.getElementById(turnId);
+        if (!bubble) return;
+        if (text) {
+            // Rendered like a POST answer, with its read-aloud button, in the streamed answer's place
+            const finished = document.getElementById(this.addChatMessage('model', text));
+            bubble.replaceWith(finished);
+        } else {
+            bubble.remove();
+        }
+    }
+
     async sendQuickMessage(message) {
         const chatInput = document.getElementById('chat-input');
         if (!chatInput) return;
@@ -885,6 +1219,15 @@ class DashboardApp {
         return document.getElementById('spinner-template').innerHTML;
     }
 
+    httpError(response) {
+        // AI endpoints shed load with 429/503 and say when to retry
+        const retryAfter = response.headers.get('Retry-After');
+        if ((response.status === 429 || response.status === 503) && retryAfter) {
+            return new Error(`The AI service is busy. Please try again in ${retryAfter} seconds.`);
+        }
+        return new Error(`HTTP ${response.status}: ${response.statusText}`);
+    }
+
     showKeyActors() {
         this.currentReportId = 'key_actors';
         this.updateSidebarSelection('key-actors');
@@ -947,34 +1290,69 @@ class DashboardApp {
             </div>
         `;
         
-        fetch('/api/timeline')
-            .then(res => res.json())
-            .then(data => {
-                const timeline = data.timeline || [];
-                const timelineHtml = `
+        this.loadTimelinePage(null)
+            .then(page => {
+                const timeline = page.timeline || [];
+                document.getElementById('content-area').innerHTML = `
                     <div class="max-w-4xl mx-auto">
                         <h2 class="text-3xl font-bold text-white mb-8 text-center">Report Highlights Timeline</h2>
-                        <div class="relative border-l-2 border-blue-800 pl-8">
-                            ${timeline.length > 0 ? timeline.map((item, idx) => `
-                                <div class="mb-10 relative">
-                                    <div class="absolute -left-4 top-1 w-3 h-3 bg-blue-400 rounded-full border-2 border-blue-800"></div>
-                                    <div class="bg-gray-800 rounded-lg shadow-md p-6">
-                                        <h3 class="text-xl font-bold text-white mb-2">${item.title}</h3>
-                                        <p class="text-gray-300 mb-2">${item.summary}</p>
-                                        <button onclick="app.showReport('${item.id}')" class="text-blue-400 hover:underline font-semibold text-sm">View Full Report &rarr;</button>
-                                    </div>
-                                </div>
-                            `).join('') : '<div class="text-gray-400 text-center">No highlights found.</div>'}
+                        <div id="timeline-entries" class="relative border-l-2 border-blue-800 pl-8">
+                            ${timeline.length > 0 ? this.renderTimelineEntries(timeline) : '<div class="text-gray-400 text-center">No highlights found.</div>'}
                         </div>
+                        <div id="timeline-more" class="text-center"></div>
                     </div>
                 `;
-                document.getElementById('content-area').innerHTML = timelineHtml;
+                this.renderTimelineMore(page.next_cursor);
             })
             .catch(err => {
                 document.getElementById('content-area').innerHTML = `<div class="text-red-400 text-center p-6">Failed to load highlights timeline.</div>`;
                 this.showNotification('Failed to load highlights timeline', 'error');
             });
     }
+
+    async loadTimelinePage(cursor) {
+        const url = cursor ? `/api/timeline?cursor=${encodeURIComponent(cursor)}` : '/api/timeline';
+        const response = await fetch(url);
+        if (!response.ok) {
+            throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+        }
+        return response.json();
+    }
+
+    renderTimelineEntries(timeline) {
+        return timeline.map(item => `
+            <div class="mb-10 relative">
+                <div class="absolute -left-4 top-1 w-3 h-3 bg-blue-400 rounded-full border-2 border-blue-800"></div>
+                <div class="bg-gray-800 rounded-lg shadow-md p-6">
+                    <p class="text-sm text-blue-300 mb-1">${item.published_on || 'Undated'}${item.issue ? ` &middot; Weekly Report ${item.issue}` : ''}</p>
+                    <h3 class="text-xl font-bold text-white mb-2">${item.title}</h3>
+                    <p class="text-gray-300 mb-2">${item.summary}</p>
+                    <button onclick="app.showReport('${item.id}')" class="text-blue-400 hover:underline font-semibold text-sm">View Full Report &rarr;</button>
+                </div>
+            </div>
+        `).join('');
+    }
+
+    renderTimelineMore(nextCursor) {
+        const more = document.getElementById('timeline-more');
+        if (!more) return;
+        more.innerHTML = nextCursor
+            ? `<button id="timeline-more-btn" class="text-blue-400 hover:underline font-semibold">Load older reports</button>`
+            : '';
+        if (!nextCursor) return;
+        document.getElementById('timeline-more-btn').addEventListener('click', async () => {
+            more.innerHTML = `${this.getSpinner()} Loading...`;
+            try {
+                const page = await this.loadTimelinePage(nextCursor);
+                document.getElementById('timeline-entries').insertAdjacentHTML('beforeend', this.renderTimelineEntries(page.timeline || []));
+                this.renderTimelineMore(page.next_cursor);
+            } catch (error) {
+                console.error('Error loading timeline page:', error);
+                this.renderTimelineMore(nextCursor);
+                this.showNotification('Failed to load more of the timeline', 'error');
+            }
+        });
+    }
 }
 
 // Initialize the app when DOM is loaded